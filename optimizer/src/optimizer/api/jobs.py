@@ -0,0 +1,352 @@
+"""非同期最適化ジョブ — ジョブストアとバックグラウンド実行
+
+/optimize は最大600秒ソルブする同期ハンドラで、その間 gunicorn ワーカー
+（2プロセス、タイムアウト300秒）を占有する。ジョブとして投入すると即座に
+ジョブIDを返し、ソルブはスレッドプール（同時実行数を制限）で実行する。
+進捗は GET /optimize/jobs/{id} のポーリングか、SSE（stream_events）で受け取れる。
+
+進捗（solver.SolveProgress）と最終結果はジョブストアに保存する:
+- memory:    プロセス内の辞書（開発・単一ワーカー向け）
+- firestore: optimization_jobs コレクション（複数ワーカー・複数インスタンスで共有）
+
+CBC は外部プロセス、日次並列は ProcessPoolExecutor で動くため、
+ソルブ中もイベントループ・他のリクエストはブロックされない。
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from fastapi import HTTPException
+
+from optimizer.api.schemas import (
+    AssignmentResponse,
+    JobProgressResponse,
+    OptimizationJobResponse,
+    OptimizeRequest,
+    OptimizeResponse,
+    SolveProgressEvent,
+)
+from optimizer.engine.solver import SolveProgress
+
+if TYPE_CHECKING:
+    from google.cloud import firestore  # type: ignore[attr-defined]
+
+logger = logging.getLogger(__name__)
+
+# 進捗をストアに書き込む最小間隔（秒）。フェーズ変化・部分問題の完了時は即時
+_PROGRESS_INTERVAL_SECONDS = 1.0
+# イベントを保持するジョブ数（超えたら古いジョブから破棄）
+_MAX_EVENT_LOGS = 100
+# 他プロセスで実行中のジョブを SSE で中継するときのストアのポーリング間隔（秒）
+_POLL_SECONDS = 1.0
+
+RunOptimization = Callable[
+    [OptimizeRequest, dict[str, Any] | None, Callable[[SolveProgress], None]], OptimizeResponse
+]
+
+
+class OptimizationJob(OptimizationJobResponse):
+    """ストアに保存するジョブ（レスポンス + 再実行に必要なリクエスト）"""
+
+    request: OptimizeRequest
+    executed_by: str = "unknown"
+
+    def to_response(self) -> OptimizationJobResponse:
+        return OptimizationJobResponse.model_validate(
+            self.model_dump(exclude={"request", "executed_by"}),
+        )
+
+
+class JobQueueFullError(Exception):
+    """実行待ちジョブ数が上限に達している"""
+
+
+class JobStore(ABC):
+    """ジョブストアのインターフェース"""
+
+    @abstractmethod
+    def save(self, job: OptimizationJob) -> None: ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> OptimizationJob | None: ...
+
+
+class InMemoryJobStore(JobStore):
+    """プロセス内ストア（max_jobs を超えたら古いジョブから破棄）"""
+
+    def __init__(self, max_jobs: int = 100) -> None:
+        self._jobs: OrderedDict[str, OptimizationJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+
+    def save(self, job: OptimizationJob) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job.model_copy(deep=True)
+            self._jobs.move_to_end(job.job_id)
+            while len(self._jobs) > self._max_jobs:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> OptimizationJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy(deep=True) if job is not None else None
+
+
+class FirestoreJobStore(JobStore):
+    """optimization_jobs コレクションに保存するストア"""
+
+    COLLECTION = "optimization_jobs"
+
+    def __init__(self, db: "firestore.Client") -> None:
+        self._db = db
+
+    def save(self, job: OptimizationJob) -> None:
+        doc_ref = self._db.collection(self.COLLECTION).document(job.job_id)
+        doc_ref.set(job.model_dump(mode="json"))
+
+    def get(self, job_id: str) -> OptimizationJob | None:
+        doc = self._db.collection(self.COLLECTION).document(job_id).get()
+        if not doc.exists:
+            return None
+        return OptimizationJob.model_validate(doc.to_dict())
+
+
+@dataclass
+class JobEvent:
+    """SSE で送るイベント（id は再接続時の Last-Event-ID に使う）"""
+
+    id: int
+    event: str  # status / progress / result / error
+    data: str  # JSON
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {self.data}\n\n"
+
+
+class _EventLog:
+    """1ジョブ分のイベント列（再接続時は Last-Event-ID 以降を再送する）"""
+
+    def __init__(self) -> None:
+        self.events: list[JobEvent] = []
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def append(self, event: str, data: str, close: bool = False) -> None:
+        with self._cond:
+            self.events.append(JobEvent(len(self.events) + 1, event, data))
+            self.closed = self.closed or close
+            self._cond.notify_all()
+
+    def wait(self, after: int, timeout: float) -> tuple[list[JobEvent], bool]:
+        """after より後のイベントを返す（なければ timeout 秒まで待つ）"""
+        with self._cond:
+            if len(self.events) <= after and not self.closed:
+                self._cond.wait(timeout)
+            return self.events[after:], self.closed
+
+
+def _terminal_event(job: OptimizationJob) -> tuple[str, str]:
+    if job.status == "succeeded" and job.result is not None:
+        return "result", job.result.model_dump_json()
+    return "error", json.dumps(
+        {"detail": job.error, "status_code": job.error_status_code}, ensure_ascii=False,
+    )
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+class JobRunner:
+    """ジョブをスレッドプールで実行する
+
+    max_concurrent: 同時に実行するジョブ数（ソルブは CPU・メモリを使うため小さく保つ）
+    max_queued: 実行待ち + 実行中のジョブ数の上限（超えると JobQueueFullError）
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        run: RunOptimization,
+        max_concurrent: int = 1,
+        max_queued: int = 10,
+    ) -> None:
+        self.store = store
+        self._run = run
+        self._max_queued = max_queued
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent), thread_name_prefix="optimize-job",
+        )
+        self._lock = threading.Lock()
+        self._active = 0
+        self._logs: OrderedDict[str, _EventLog] = OrderedDict()
+
+    def submit(self, req: OptimizeRequest, auth: dict[str, Any] | None) -> OptimizationJob:
+        with self._lock:
+            if self._active >= self._max_queued:
+                raise JobQueueFullError(
+                    f"実行待ちのジョブが上限（{self._max_queued}件）に達しています",
+                )
+            self._active += 1
+        job = OptimizationJob(
+            job_id=uuid.uuid4().hex,
+            status="queued",
+            week_start_date=req.week_start_date,
+            created_at=_now(),
+            request=req,
+            executed_by=auth.get("email", "unknown") if auth else "unknown",
+        )
+        log = _EventLog()
+        log.append("status", job.to_response().model_dump_json(include={"job_id", "status"}))
+        with self._lock:
+            self._logs[job.job_id] = log
+            while len(self._logs) > _MAX_EVENT_LOGS:
+                self._logs.popitem(last=False)
+        try:
+            self.store.save(job)
+            # ワーカーは別インスタンスを更新する（返り値は投入時点のスナップショット）
+            self._pool.submit(self._execute, job.model_copy(deep=True), auth)
+        except Exception:
+            with self._lock:
+                self._active -= 1
+            raise
+        logger.info("最適化ジョブ投入: id=%s, week=%s", job.job_id, req.week_start_date)
+        return job
+
+    def get(self, job_id: str) -> OptimizationJob | None:
+        return self.store.get(job_id)
+
+    def stream_events(
+        self, job_id: str, last_event_id: int = 0, keepalive_seconds: float = 15.0,
+    ) -> Iterator[str] | None:
+        """ジョブのイベントを SSE 形式で返す（ジョブがなければ None）
+
+        このプロセスで実行したジョブは全イベント（日ごとの割当を含む）を、
+        他のプロセスのジョブはストアをポーリングして進捗と結果のみを送る。
+        """
+        with self._lock:
+            log = self._logs.get(job_id)
+        if log is not None:
+            return self._stream_log(log, last_event_id, keepalive_seconds)
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        return self._stream_store(job, last_event_id, keepalive_seconds)
+
+    def _stream_log(
+        self, log: _EventLog, after: int, keepalive_seconds: float,
+    ) -> Iterator[str]:
+        while True:
+            events, closed = log.wait(after, keepalive_seconds)
+            for event in events:
+                yield event.encode()
+            after += len(events)
+            if closed and not events:
+                return
+            if not events:
+                yield ": keepalive\n\n"
+
+    def _stream_store(
+        self, job: OptimizationJob, after: int, keepalive_seconds: float,
+    ) -> Iterator[str]:
+        event_id = after
+        last_progress: JobProgressResponse | None = None
+        idle = 0.0
+        while True:
+            if job.progress is not None and job.progress != last_progress:
+                last_progress = job.progress
+                event_id += 1
+                data = SolveProgressEvent(**job.progress.model_dump()).model_dump_json()
+                yield JobEvent(event_id, "progress", data).encode()
+                idle = 0.0
+            if job.status in ("succeeded", "failed"):
+                event, data = _terminal_event(job)
+                yield JobEvent(event_id + 1, event, data).encode()
+                return
+            time.sleep(_POLL_SECONDS)
+            idle += _POLL_SECONDS
+            if idle >= keepalive_seconds:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            reloaded = self.store.get(job.job_id)
+            if reloaded is None:
+                return
+            job = reloaded
+
+    def _log(self, job_id: str) -> _EventLog | None:
+        with self._lock:
+            return self._logs.get(job_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _execute(self, job: OptimizationJob, auth: dict[str, Any] | None) -> None:
+        log = self._log(job.job_id) or _EventLog()
+        try:
+            job.status = "running"
+            job.started_at = _now()
+            self.store.save(job)
+            log.append("status", job.to_response().model_dump_json(include={"job_id", "status"}))
+            last_saved_at = 0.0
+            last_phase = ""
+
+            def on_progress(p: SolveProgress) -> None:
+                nonlocal last_saved_at, last_phase
+                now = time.time()
+                step_done = p.phase != last_phase or (p.total > 0 and p.completed == p.total)
+                job.progress = JobProgressResponse(**vars(p))
+                save = step_done or now - last_saved_at >= _PROGRESS_INTERVAL_SECONDS
+                if save or p.phase != "lns":
+                    event = SolveProgressEvent(
+                        **job.progress.model_dump(),
+                        assignments=[
+                            AssignmentResponse(order_id=a.order_id, staff_ids=a.staff_ids)
+                            for a in p.assignments
+                        ] if p.assignments is not None else None,
+                    )
+                    log.append("progress", event.model_dump_json())
+                if save:
+                    last_saved_at, last_phase = now, p.phase
+                    try:
+                        self.store.save(job)
+                    except Exception as e:
+                        # 進捗の保存失敗でソルブを止めない
+                        logger.warning("ジョブ進捗の保存に失敗 (id=%s): %s", job.job_id, e)
+
+            try:
+                job.result = self._run(job.request, auth, on_progress)
+                job.status = "succeeded"
+            except HTTPException as e:
+                job.status = "failed"
+                job.error = str(e.detail)
+                job.error_status_code = e.status_code
+            except Exception as e:
+                logger.error("最適化ジョブ失敗 (id=%s): %s", job.job_id, e, exc_info=True)
+                job.status = "failed"
+                job.error = str(e)
+                job.error_status_code = 500
+            job.finished_at = _now()
+            self.store.save(job)
+            logger.info("最適化ジョブ終了: id=%s, status=%s", job.job_id, job.status)
+        except Exception as e:
+            logger.error("ジョブストアの更新に失敗 (id=%s): %s", job.job_id, e, exc_info=True)
+            if job.status not in ("succeeded", "failed"):
+                job.status = "failed"
+                job.error = f"ジョブストアの更新に失敗: {e}"
+                job.error_status_code = 500
+        finally:
+            event, data = _terminal_event(job)
+            log.append(event, data, close=True)
+            with self._lock:
+                self._active -= 1
+
@@ -1,19 +1,42 @@
 """FastAPI エントリポイント"""
 
+import logging
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from optimizer.api.routes import router as core_router
+from optimizer.api.routes_common import master_data_cache
 from optimizer.api.routes_import import router as import_router
+from optimizer.api.routes_jobs import router as jobs_router
 from optimizer.api.routes_notify import router as notify_router
 from optimizer.api.routes_orders import router as orders_router
 from optimizer.api.routes_report import router as report_router
+from optimizer.data.firestore_pool import close_client_pool, get_client_pool
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """起動時に Firestore クライアントプールを用意し、終了時に閉じる"""
+    try:
+        get_client_pool().warm()
+    except Exception as e:
+        # 認証情報のないローカル環境等。最初のリクエストで再度生成を試みる
+        logger.warning("Firestoreクライアントプールの事前生成に失敗: %s", e)
+    yield
+    master_data_cache.close()
+    close_client_pool()
+
 
 app = FastAPI(
     title="Visitcare Shift Optimizer API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS設定
@@ -27,6 +50,7 @@ app.add_middleware(
 
 app.include_router(core_router)
 app.include_router(import_router)
+app.include_router(jobs_router)
 app.include_router(notify_router)
 app.include_router(orders_router)
 app.include_router(report_router)
@@ -1,15 +1,27 @@
-"""APIルーティング（コアエンジン: /health, /optimize, /optimization-runs, /reset-assignments）"""
+"""APIルーティング（コアエンジン: /health, /optimize, /optimize/incremental,
+/optimize/cache, /optimization-runs, /reset-assignments）
+"""
 
 import logging
+import os
+from collections.abc import Callable
 from datetime import UTC, date, datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from google.cloud import firestore  # type: ignore[attr-defined]
 
 from optimizer.api.auth import require_manager_or_above
-from optimizer.api.routes_common import _parse_monday, _serialize_executed_at
+from optimizer.api.routes_common import (
+    _parse_monday,
+    _serialize_executed_at,
+    master_data_cache,
+)
 from optimizer.api.schemas import (
     AssignmentResponse,
     ErrorResponse,
+    FirestorePoolStatsResponse,
+    IncrementalOptimizeRequest,
+    IncrementalOptimizeResponse,
     OptimizationParametersResponse,
     OptimizationRunDetailResponse,
     OptimizationRunListResponse,
@@ -18,20 +30,87 @@ from optimizer.api.schemas import (
     OptimizeResponse,
     ResetAssignmentsRequest,
     ResetAssignmentsResponse,
+    ResultCacheStatsResponse,
+)
+from optimizer.data.firestore_loader import (
+    get_firestore_client,
+    load_current_assignments,
+    load_optimization_input,
+    load_previous_week_slot_staff,
+    load_run_assignments,
 )
-from optimizer.data.firestore_loader import get_firestore_client, load_optimization_input
+from optimizer.data.firestore_pool import get_client_pool
 from optimizer.data.firestore_writer import (
     reset_assignments,
     save_optimization_run,
     write_assignments,
 )
-from optimizer.engine.solver import SoftWeights, diagnose_infeasibility, solve
-from optimizer.models import Assignment, OptimizationParameters, OptimizationRunRecord
+from optimizer.engine.cache import ResultCache
+from optimizer.engine.incremental import IncrementalOptions, reoptimize_incremental
+from optimizer.engine.solver import (
+    SoftWeights,
+    SolveProgress,
+    SolverOptions,
+    diagnose_infeasibility,
+    solve,
+)
+from optimizer.engine.warm_start import assignments_from_slots
+from optimizer.models import (
+    Assignment,
+    OptimizationInput,
+    OptimizationParameters,
+    OptimizationRunRecord,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 日次分割ソルブの並列ワーカー数（Cloud Run の vCPU 数に合わせて設定、1=逐次）
+_MAX_WORKERS = int(os.getenv("OPTIMIZER_MAX_WORKERS", "1"))
+# ワーカー1つあたりのメモリ見積もり（MB）。0=メモリによる制限なし
+_WORKER_MEMORY_MB = int(os.getenv("OPTIMIZER_WORKER_MEMORY_MB", "0")) or None
+# ソルブ結果キャッシュのメモリ上限（MB）。0=キャッシュしない（既定）。
+# 有効にした場合もリクエストの use_cache=true で選択したときだけ使う
+_RESULT_CACHE_MB = int(os.getenv("OPTIMIZER_RESULT_CACHE_MB", "0"))
+# ソルブ結果キャッシュのディスク層（空=メモリのみ）とその上限（MB、0=無制限）
+_RESULT_CACHE_DIR = os.getenv("OPTIMIZER_RESULT_CACHE_DIR", "")
+_RESULT_CACHE_DISK_MB = int(os.getenv("OPTIMIZER_RESULT_CACHE_DISK_MB", "0"))
+# 保存した結果を使う期間（秒）。0=無期限
+_RESULT_CACHE_TTL_SECONDS = int(os.getenv("OPTIMIZER_RESULT_CACHE_TTL_SECONDS", "86400"))
+
+_result_cache = ResultCache(
+    max_bytes=_RESULT_CACHE_MB * 1024 * 1024,
+    disk_dir=_RESULT_CACHE_DIR or None,
+    max_disk_bytes=_RESULT_CACHE_DISK_MB * 1024 * 1024 or None,
+    ttl_seconds=_RESULT_CACHE_TTL_SECONDS or None,
+) if _RESULT_CACHE_MB > 0 else None
+
+
+def _load_initial_assignments(
+    db: firestore.Client,
+    week_start: date,
+    req: OptimizeRequest,
+    inp: OptimizationInput,
+) -> list[Assignment] | None:
+    """warm_start 指定に応じて初期割当を読み込む（失敗時は初期解なしで続行）"""
+    if req.warm_start == "none":
+        return None
+    try:
+        if req.warm_start == "current":
+            initial = load_current_assignments(db, week_start)
+        elif req.warm_start == "previous_run":
+            initial = load_run_assignments(db, week_start, req.warm_start_run_id)
+        else:
+            initial = assignments_from_slots(
+                inp.orders, load_previous_week_slot_staff(db, week_start),
+            )
+    except Exception as e:
+        logger.warning("初期割当の読み込みに失敗（初期解なしで続行）: %s", e)
+        return None
+    logger.info("初期割当: source=%s, orders=%d", req.warm_start, len(initial))
+    return initial or None
+
 
 @router.get("/health")
 def health() -> dict[str, str]:
@@ -45,6 +124,15 @@ def health() -> dict[str, str]:
 )
 def optimize(req: OptimizeRequest, _auth: dict | None = Depends(require_manager_or_above)) -> OptimizeResponse:
     """シフト最適化を実行し、結果をFirestoreに書き戻す"""
+    return run_optimization(req, _auth)
+
+
+def run_optimization(
+    req: OptimizeRequest,
+    _auth: dict | None,
+    progress: Callable[[SolveProgress], None] | None = None,
+) -> OptimizeResponse:
+    """/optimize の本体（非同期ジョブからも呼ぶ）。失敗は HTTPException で返す"""
     # 日付パース
     try:
         week_start = date.fromisoformat(req.week_start_date)
@@ -62,7 +150,7 @@ def optimize(req: OptimizeRequest, _auth: dict | None = Depends(require_manager_
     # Firestoreからデータ読み込み
     try:
         db = get_firestore_client()
-        inp = load_optimization_input(db, week_start)
+        inp = load_optimization_input(db, week_start, master_cache=master_data_cache)
     except Exception as e:
         logger.error("Firestore読み込み失敗: %s", e, exc_info=True)
         raise HTTPException(
@@ -82,6 +170,8 @@ def optimize(req: OptimizeRequest, _auth: dict | None = Depends(require_manager_
         len(inp.customers),
     )
 
+    initial_assignments = _load_initial_assignments(db, week_start, req, inp)
+
     # ソルバー実行
     weights = SoftWeights(
         travel=req.w_travel,
@@ -89,7 +179,20 @@ def optimize(req: OptimizeRequest, _auth: dict | None = Depends(require_manager_
         workload_balance=req.w_workload_balance,
         continuity=req.w_continuity,
     )
-    result = solve(inp, time_limit_seconds=req.time_limit_seconds, weights=weights)
+    result = solve(
+        inp,
+        time_limit_seconds=req.time_limit_seconds,
+        weights=weights,
+        max_workers=_MAX_WORKERS,
+        worker_memory_mb=_WORKER_MEMORY_MB,
+        weekly_rebalance=req.weekly_rebalance,
+        lns=req.lns,
+        decompose_components=req.decompose_components,
+        options=SolverOptions(no_overlap=req.no_overlap_mode, backend=req.solver_backend),
+        initial_assignments=initial_assignments,
+        progress=progress,
+        cache=_result_cache if req.use_cache else None,
+    )
 
     if result.status == "Infeasible":
         # 診断を実行してどのオーダーが問題かをログに記録
@@ -166,6 +269,119 @@ def optimize(req: OptimizeRequest, _auth: dict | None = Depends(require_manager_
         assigned_count=assigned_count,
         unassigned_count=result.unassigned_count,
         partial_count=result.partial_count,
+        rebalance_deltas=result.rebalance_deltas,
+        weekly_objective_value=result.weekly_objective_value,
+        component_sizes=result.component_sizes,
+        cache_hit=result.cache_hit,
+        day_sources=result.day_sources,
+    )
+
+
+@router.get("/optimize/cache", response_model=ResultCacheStatsResponse)
+def get_result_cache_stats(
+    _auth: dict | None = Depends(require_manager_or_above),
+) -> ResultCacheStatsResponse:
+    """ソルブ結果キャッシュのヒット・ミス数と使用量を返す"""
+    if _result_cache is None:
+        return ResultCacheStatsResponse(enabled=False)
+    stats = _result_cache.stats()
+    return ResultCacheStatsResponse(enabled=True, hit_rate=round(stats.hit_rate, 4), **vars(stats))
+
+
+@router.get("/firestore/pool", response_model=FirestorePoolStatsResponse)
+def get_firestore_pool_stats(
+    _auth: dict | None = Depends(require_manager_or_above),
+) -> FirestorePoolStatsResponse:
+    """Firestoreクライアントプールのクライアント数と取得時間を返す"""
+    stats = get_client_pool().stats()
+    return FirestorePoolStatsResponse(
+        size=stats.size,
+        clients=stats.clients,
+        acquisitions=stats.acquisitions,
+        avg_acquire_ms=round(stats.avg_acquire_ms, 3),
+        p95_acquire_ms=round(stats.p95_acquire_ms, 3),
+        max_acquire_ms=round(stats.max_acquire_ms, 3),
+    )
+
+
+@router.post(
+    "/optimize/incremental",
+    response_model=IncrementalOptimizeResponse,
+    responses={409: {"model": ErrorResponse}, 422: {"model": ErrorResponse}},
+)
+def optimize_incremental(
+    req: IncrementalOptimizeRequest,
+    _auth: dict | None = Depends(require_manager_or_above),
+) -> IncrementalOptimizeResponse:
+    """変更のあったオーダーの周辺だけを解き直し、担当が変わったオーダーのみ書き戻す"""
+    try:
+        week_start = date.fromisoformat(req.week_start_date)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+    if week_start.weekday() != 0:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{req.week_start_date} は月曜日ではありません"
+            f"（weekday={week_start.weekday()}）",
+        )
+
+    try:
+        db = get_firestore_client()
+        inp = load_optimization_input(db, week_start, master_cache=master_data_cache)
+        current = load_current_assignments(db, week_start)
+    except Exception as e:
+        logger.error("Firestore読み込み失敗: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Firestore読み込みエラー: {e}"
+        ) from e
+
+    if not inp.orders:
+        raise HTTPException(
+            status_code=409,
+            detail=f"対象週 {req.week_start_date} に最適化対象のオーダーがありません",
+        )
+
+    weights = SoftWeights(
+        travel=req.w_travel,
+        preferred_staff=req.w_preferred_staff,
+        workload_balance=req.w_workload_balance,
+        continuity=req.w_continuity,
+    )
+    result = reoptimize_incremental(
+        inp,
+        current,
+        req.order_ids,
+        helper_ids=req.helper_ids,
+        weights=weights,
+        time_limit_seconds=req.time_limit_seconds,
+        incremental_options=IncrementalOptions(
+            ripple=tuple(req.ripple), max_free_orders=req.max_free_orders,
+        ),
+    )
+
+    orders_updated = 0
+    if not req.dry_run and result.changed:
+        try:
+            orders_updated = write_assignments(db, result.changed)
+        except Exception as e:
+            logger.error("Firestore書き戻し失敗: %s", e, exc_info=True)
+            raise HTTPException(
+                status_code=500, detail=f"Firestore書き戻しエラー: {e}"
+            ) from e
+
+    return IncrementalOptimizeResponse(
+        changed_assignments=[
+            AssignmentResponse(order_id=a.order_id, staff_ids=a.staff_ids)
+            for a in result.changed
+        ],
+        freed_order_ids=result.freed_order_ids,
+        skipped_order_ids=result.skipped_order_ids,
+        objective_value=result.objective,
+        objective_before=result.initial_objective,
+        solve_time_seconds=result.solve_time_seconds,
+        status=result.status,
+        orders_updated=orders_updated,
     )
 
 
@@ -2,14 +2,47 @@
 
 import logging
 import os
+from collections.abc import Callable
 
 from datetime import date
 from fastapi import HTTPException
 
+from optimizer.data.delta_sync import DeltaSync, SqliteSnapshotStore
+from optimizer.data.firestore_loader import load_customers, load_helpers
+from optimizer.data.master_cache import MasterDataCache
+from optimizer.models import Customer, Helper
+
 logger = logging.getLogger(__name__)
 
 APP_URL = os.getenv("APP_URL", "https://visitcare-shift-optimizer.web.app")
 
+# マスタデータ（customers / helpers / service_types）キャッシュの有効期間（秒）。0=キャッシュしない
+_MASTER_CACHE_TTL_SECONDS = int(os.getenv("OPTIMIZER_MASTER_CACHE_TTL_SECONDS", "300"))
+# on_snapshot リスナーによる変更検知（false なら TTL のみで読み直す）
+_MASTER_CACHE_WATCH = os.getenv("OPTIMIZER_MASTER_CACHE_WATCH", "true").lower() == "true"
+
+# customers / helpers を updated_at の差分同期で読み込む（再読み込みを変更分だけにする）
+_MASTER_DELTA_SYNC = os.getenv("OPTIMIZER_MASTER_DELTA_SYNC", "false").lower() == "true"
+# 差分同期のスナップショットを保存する SQLite ファイル（空=メモリのみ）
+_MASTER_SNAPSHOT_PATH = os.getenv("OPTIMIZER_MASTER_SNAPSHOT_PATH", "")
+
+
+def _master_delta_loaders() -> dict[Callable[..., list], Callable[..., list]]:
+    if not _MASTER_DELTA_SYNC:
+        return {}
+    store = SqliteSnapshotStore(_MASTER_SNAPSHOT_PATH) if _MASTER_SNAPSHOT_PATH else None
+    return {
+        load_customers: DeltaSync("customers", Customer, load_customers, store),
+        load_helpers: DeltaSync("helpers", Helper, load_helpers, store),
+    }
+
+
+master_data_cache = MasterDataCache(
+    ttl_seconds=_MASTER_CACHE_TTL_SECONDS,
+    watch=_MASTER_CACHE_WATCH,
+    delta_loaders=_master_delta_loaders(),
+)
+
 
 def _parse_monday(date_str: str) -> date:
     """日付文字列をパースし月曜日であることを検証する。不正時はHTTPException。"""
@@ -8,7 +8,7 @@ from google.cloud import firestore as firestore_client  # type: ignore[import-un
 from googleapiclient.discovery import build  # type: ignore[import-untyped]
 
 from optimizer.api.auth import require_manager_or_above
-from optimizer.api.routes_common import _get_sheets_credentials
+from optimizer.api.routes_common import _get_sheets_credentials, master_data_cache
 from optimizer.api.schemas import (
     ErrorResponse,
     NoteImportActionResponse,
@@ -203,7 +203,7 @@ def import_notes_preview(
     # Firestoreから顧客・オーダー取得
     try:
         db = get_firestore_client()
-        customers_raw = load_all_customers(db)
+        customers_raw = master_data_cache.get(db, "customers", load_all_customers)
         # 全オーダーを取得（日付範囲でフィルタ）
         all_orders_raw = _load_orders_for_notes(db, parsed_notes)
     except Exception as e:
@@ -280,7 +280,7 @@ def import_notes_apply(
 
     try:
         db = get_firestore_client()
-        customers_raw = load_all_customers(db)
+        customers_raw = master_data_cache.get(db, "customers", load_all_customers)
         all_orders_raw = _load_orders_for_notes(db, parsed_notes)
     except Exception as e:
         logger.error("Firestore読み込み失敗: %s", e, exc_info=True)
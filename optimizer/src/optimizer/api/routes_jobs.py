@@ -0,0 +1,154 @@
+"""非同期最適化ジョブルート（/optimize/jobs、進捗の SSE ストリーム）
+
+ジョブストアは既定で firestore（optimization_jobs コレクション）。gunicorn の複数ワーカー・
+Cloud Run の複数インスタンスのどこに GET が届いてもジョブを参照できる。
+memory はプロセス内のため、単一ワーカー・単一インスタンスの開発環境でのみ使うこと。
+
+ソルブはレスポンス返却後にバックグラウンドスレッドで実行する。Cloud Run の
+リクエスト課金（CPU throttling 有効）ではレスポンス後に CPU がほぼ割り当てられず
+ソルブが進まないため、デプロイでは --no-cpu-throttling（CPU 常時割り当て）を指定する
+（cloudbuild.yaml）。インスタンスが停止した場合、実行中のジョブは running のまま残る。
+"""
+
+import logging
+import os
+import threading
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from optimizer.api.auth import require_manager_or_above
+from optimizer.api.jobs import (
+    FirestoreJobStore,
+    InMemoryJobStore,
+    JobQueueFullError,
+    JobRunner,
+    JobStore,
+)
+from optimizer.api.routes import run_optimization
+from optimizer.api.routes_common import _parse_monday
+from optimizer.api.schemas import ErrorResponse, OptimizationJobResponse, OptimizeRequest
+from optimizer.data.firestore_loader import get_firestore_client
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# ジョブストア: firestore（ワーカー・インスタンス間で共有）/ memory（プロセス内、単一ワーカー向け）
+_JOB_STORE = os.getenv("OPTIMIZER_JOB_STORE", "firestore")
+# 同時に実行する最適化ジョブ数
+_MAX_CONCURRENT_JOBS = int(os.getenv("OPTIMIZER_MAX_CONCURRENT_JOBS", "1"))
+# 実行待ち + 実行中のジョブ数の上限（超えると 429）
+_MAX_QUEUED_JOBS = int(os.getenv("OPTIMIZER_MAX_QUEUED_JOBS", "10"))
+
+_runner: JobRunner | None = None
+_lock = threading.Lock()
+
+
+def _create_store() -> JobStore:
+    if _JOB_STORE == "memory":
+        logger.warning(
+            "ジョブストア memory はプロセス内のみ有効です"
+            "（複数ワーカーでは別ワーカーへの GET が 404 になります）"
+        )
+        return InMemoryJobStore()
+    return FirestoreJobStore(get_firestore_client())
+
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    if _runner is not None:
+        return _runner
+    with _lock:
+        if _runner is None:
+            _runner = JobRunner(
+                _create_store(), run_optimization,
+                max_concurrent=_MAX_CONCURRENT_JOBS, max_queued=_MAX_QUEUED_JOBS,
+            )
+            logger.info(
+                "ジョブランナー初期化: store=%s, concurrent=%d, queued=%d",
+                _JOB_STORE, _MAX_CONCURRENT_JOBS, _MAX_QUEUED_JOBS,
+            )
+    return _runner
+
+
+@router.post(
+    "/optimize/jobs",
+    status_code=202,
+    response_model=OptimizationJobResponse,
+    responses={422: {"model": ErrorResponse}, 429: {"model": ErrorResponse}},
+)
+def create_optimization_job(
+    req: OptimizeRequest,
+    _auth: dict[str, Any] | None = Depends(require_manager_or_above),
+    runner: JobRunner = Depends(get_job_runner),
+) -> OptimizationJobResponse:
+    """最適化をジョブとして投入し、ジョブIDを即座に返す（結果は GET /optimize/jobs/{job_id}）"""
+    _parse_monday(req.week_start_date)
+    try:
+        job = runner.submit(req, _auth)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e)) from e
+    except Exception as e:
+        logger.error("ジョブ投入失敗: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"ジョブ投入エラー: {e}") from e
+    return job.to_response()
+
+
+@router.get(
+    "/optimize/jobs/{job_id}",
+    response_model=OptimizationJobResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+def get_optimization_job(
+    job_id: str,
+    _auth: dict[str, Any] | None = Depends(require_manager_or_above),
+    runner: JobRunner = Depends(get_job_runner),
+) -> OptimizationJobResponse:
+    """ジョブの状態・進捗・結果を返す"""
+    try:
+        job = runner.get(job_id)
+    except Exception as e:
+        logger.error("ジョブ取得失敗: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"ジョブ取得エラー: {e}") from e
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"ジョブ {job_id} が見つかりません")
+    return job.to_response()
+
+
+@router.get(
+    "/optimize/jobs/{job_id}/events",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        404: {"model": ErrorResponse},
+    },
+)
+def stream_optimization_job_events(
+    job_id: str,
+    last_event_id: int = Header(default=0, alias="Last-Event-ID", ge=0),
+    _auth: dict[str, Any] | None = Depends(require_manager_or_above),
+    runner: JobRunner = Depends(get_job_runner),
+) -> StreamingResponse:
+    """ジョブの進捗を Server-Sent Events で送る
+
+    イベント:
+    - status:   {"job_id", "status"}（queued → running）
+    - progress: SolveProgressEvent（日ごとの完了時は完了分の合算と、その日の割当を含む）
+    - result:   OptimizeResponse（成功時、最後のイベント）
+    - error:    {"detail", "status_code"}（失敗時、最後のイベント）
+    再接続時は Last-Event-ID 以降のイベントを送る。
+    """
+    try:
+        events = runner.stream_events(job_id, last_event_id)
+    except Exception as e:
+        logger.error("ジョブ取得失敗: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"ジョブ取得エラー: {e}") from e
+    if events is None:
+        raise HTTPException(status_code=404, detail=f"ジョブ {job_id} が見つかりません")
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
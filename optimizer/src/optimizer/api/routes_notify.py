@@ -116,7 +116,7 @@ def notify_order_change(
         db = get_firestore_client()
         staff_emails: dict[str, str] = {}
         helper_refs = [db.collection("helpers").document(sid) for sid in req.affected_staff_ids]
-        for hdoc in db.get_all(helper_refs):
+        for hdoc in db.get_all(helper_refs, field_paths=["email"]):
             if hdoc.exists:
                 d = hdoc.to_dict()
                 email = (d or {}).get("email", "")
@@ -231,6 +231,7 @@ def notify_next_day(
             .where("date", ">=", target_dt)
             .where("date", "<", target_dt_end)
             .where("status", "==", "assigned")
+            .select(["customer_id", "start_time", "end_time", "assigned_staff_ids"])
             .stream()
         )
 
@@ -257,7 +258,7 @@ def notify_next_day(
         # 利用者名を一括取得（N+1回避）
         if customer_ids_set:
             cust_refs = [db.collection("customers").document(cid) for cid in customer_ids_set]
-            for cdoc in db.get_all(cust_refs):
+            for cdoc in db.get_all(cust_refs, field_paths=["name"]):
                 if cdoc.exists:
                     cd = cdoc.to_dict() or {}
                     name = cd.get("name", {})
@@ -265,7 +266,7 @@ def notify_next_day(
 
         # ヘルパー情報を一括取得
         helper_refs = [db.collection("helpers").document(sid) for sid in staff_orders]
-        helper_docs = db.get_all(helper_refs)
+        helper_docs = db.get_all(helper_refs, field_paths=["name", "email"])
         helper_info: dict[str, tuple[str, str]] = {}  # sid → (name, email)
         for hdoc in helper_docs:
             if not hdoc.exists:
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from googleapiclient.discovery import build  # type: ignore[import-untyped]
 
 from optimizer.api.auth import require_manager_or_above
-from optimizer.api.routes_common import _get_sheets_credentials
+from optimizer.api.routes_common import _get_sheets_credentials, master_data_cache
 from optimizer.api.schemas import (
     ChecklistOrderItem,
     DailyChecklistResponse,
@@ -66,9 +66,9 @@ def export_report(
     try:
         db = get_firestore_client()
         orders = load_monthly_orders(db, req.year_month)
-        helpers = load_all_helpers(db)
-        customers = load_all_customers(db)
-        service_type_configs = load_all_service_types(db)
+        helpers = master_data_cache.get(db, "helpers", load_all_helpers)
+        customers = master_data_cache.get(db, "customers", load_all_customers)
+        service_type_configs = master_data_cache.get(db, "service_types", load_all_service_types)
     except Exception as e:
         logger.error("Firestore読み込み失敗: %s", e, exc_info=True)
         raise HTTPException(
@@ -180,6 +180,10 @@ def get_daily_checklist(
             .where("date", ">=", target_dt)
             .where("date", "<", target_dt_end)
             .where("status", "in", ["pending", "assigned"])
+            .select([
+                "customer_id", "start_time", "end_time", "service_type", "status",
+                "assigned_staff_ids",
+            ])
             .stream()
         )
 
@@ -211,7 +215,7 @@ def get_daily_checklist(
         # ヘルパー名を一括取得（N+1回避）
         if helper_ids_needed:
             helper_refs = [db.collection("helpers").document(sid) for sid in helper_ids_needed]
-            for hdoc in db.get_all(helper_refs):
+            for hdoc in db.get_all(helper_refs, field_paths=["name"]):
                 if hdoc.exists:
                     hd = hdoc.to_dict() or {}
                     name = hd.get("name", {})
@@ -221,7 +225,7 @@ def get_daily_checklist(
         customer_ids_needed.discard("")
         if customer_ids_needed:
             customer_refs = [db.collection("customers").document(cid) for cid in customer_ids_needed]
-            for cdoc in db.get_all(customer_refs):
+            for cdoc in db.get_all(customer_refs, field_paths=["name"]):
                 if cdoc.exists:
                     cd = cdoc.to_dict() or {}
                     name = cd.get("name", {})
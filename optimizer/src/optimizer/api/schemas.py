@@ -34,6 +34,47 @@ class OptimizeRequest(BaseModel):
     w_continuity: float = Field(
         default=3.0, ge=0.0, le=20.0, description="担当継続性の重み",
     )
+    weekly_rebalance: bool = Field(
+        default=False,
+        description="trueの場合、日次分割後に週次リバランスパスを実行する（制限時間の10%を使用）",
+    )
+    lns: bool = Field(
+        default=False,
+        description="trueの場合、最後に大近傍探索で週全体を改善する（制限時間の30%と残り時間を使用）",
+    )
+    decompose_components: bool = Field(
+        default=False,
+        description="trueの場合、各日を割当可能ヘルパーを共有しないオーダー群（連結成分）に分けて解く",
+    )
+    no_overlap_mode: Literal["pairwise", "clique"] = Field(
+        default="pairwise",
+        description="重複禁止制約の定式化（pairwise: ペアごと / clique: 同時刻クリークごと）",
+    )
+    solver_backend: Literal["pulp", "highs", "scip", "cpsat"] = Field(
+        default="pulp",
+        description=(
+            "ソルバーバックエンド（pulp: PuLP + CBC / highs, scip: OR-Tools ネイティブAPI / "
+            "cpsat: CP-SAT 区間変数定式化）"
+        ),
+    )
+    warm_start: Literal["none", "current", "previous_run", "last_week"] = Field(
+        default="none",
+        description=(
+            "初期解（none: なし / current: 現在の割当 / previous_run: 前回の最適化結果 / "
+            "last_week: 先週の同一枠の担当）。修復してから MIP start として使う"
+        ),
+    )
+    warm_start_run_id: str | None = Field(
+        default=None,
+        description="warm_start=previous_run で使う実行記録ID（省略時は対象週の最新）",
+    )
+    use_cache: bool = Field(
+        default=False,
+        description=(
+            "trueの場合、入力・パラメータが同一の問題（日次分割時は同一の日）は保存済みの結果"
+            "（Optimal のみ）を再利用する。サーバー側で OPTIMIZER_RESULT_CACHE_MB の設定が必要"
+        ),
+    )
 
 
 class AssignmentResponse(BaseModel):
@@ -51,6 +92,146 @@ class OptimizeResponse(BaseModel):
     assigned_count: int = Field(description="割当成功オーダー数")
     unassigned_count: int = Field(default=0, description="未割当オーダー数（スタッフ0人）")
     partial_count: int = Field(default=0, description="部分割当オーダー数（スタッフ < 必要人数）")
+    rebalance_deltas: dict[str, float] | None = Field(
+        default=None,
+        description="週次リバランスによるソフト制約項ごとの目的関数変化量（負=改善、未実行時null）",
+    )
+    weekly_objective_value: float | None = Field(
+        default=None,
+        description="週全体の目的関数値（週次リバランス・LNS 実行時のみ、未実行時null）",
+    )
+    component_sizes: list[int] | None = Field(
+        default=None,
+        description="連結成分分割時の成分ごとのオーダー数（未実行時null）",
+    )
+    cache_hit: bool | None = Field(
+        default=None,
+        description="結果キャッシュから返した場合true（キャッシュ未使用時null）",
+    )
+    day_sources: dict[str, str] | None = Field(
+        default=None,
+        description=(
+            "日（成分）ごとの結果の出どころ（reused: 前回の結果を再利用 / solved: 解き直した / "
+            "greedy: 時間切れで貪欲解、キャッシュ未使用時null）"
+        ),
+    )
+
+
+class ResultCacheStatsResponse(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = Field(default=0, description="hits のうちディスク層から読み込んだ数")
+    evictions: int = Field(default=0, description="メモリ上限により破棄したエントリ数")
+    hit_rate: float = 0.0
+    entries: int = Field(default=0, description="メモリ上のエントリ数")
+    bytes: int = Field(default=0, description="メモリ上のエントリの合計バイト数")
+
+
+class FirestorePoolStatsResponse(BaseModel):
+    size: int = Field(description="プールするクライアント（gRPC チャネル）数")
+    clients: int = Field(description="生成済みのクライアント数")
+    acquisitions: int
+    avg_acquire_ms: float = Field(description="取得時間の平均（クライアントの遅延生成を含む）")
+    p95_acquire_ms: float = Field(description="直近1000回の取得時間の95パーセンタイル")
+    max_acquire_ms: float
+
+
+class JobProgressResponse(BaseModel):
+    phase: str = Field(description="solve: 部分問題 / rebalance: 週次リバランス / lns: 大近傍探索")
+    completed: int = Field(description="完了した部分問題数（lns は反復数）")
+    total: int = Field(description="部分問題の総数（lns は 0）")
+    current: str | None = Field(default=None, description="直近に完了した部分問題（日付）")
+    objective: float | None = Field(default=None, description="現時点の目的関数値")
+    elapsed_seconds: float
+    status: str | None = Field(default=None, description="完了した部分問題の最悪ステータス")
+    unassigned_count: int | None = Field(default=None, description="完了分の未割当オーダー数")
+    partial_count: int | None = Field(default=None, description="完了分の部分割当オーダー数")
+    remaining_seconds: float | None = Field(default=None, description="制限時間の残り（秒）")
+
+
+class SolveProgressEvent(JobProgressResponse):
+    """SSE の progress イベント（phase=solve では完了した日の割当を含む）"""
+
+    assignments: list[AssignmentResponse] | None = None
+
+
+class OptimizationJobResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    week_start_date: str
+    created_at: str = Field(description="ISO 8601 datetime")
+    started_at: str | None = None
+    finished_at: str | None = None
+    progress: JobProgressResponse | None = None
+    result: OptimizeResponse | None = Field(default=None, description="status=succeeded の結果")
+    error: str | None = Field(default=None, description="status=failed のエラー内容")
+    error_status_code: int | None = Field(
+        default=None, description="同期の /optimize で返していたHTTPステータス",
+    )
+
+
+class IncrementalOptimizeRequest(BaseModel):
+    week_start_date: str = Field(
+        ...,
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="対象週の開始日（月曜日）YYYY-MM-DD",
+        examples=["2026-02-09"],
+    )
+    order_ids: list[str] = Field(
+        ...,
+        min_length=1,
+        description="変更のあったオーダーID（時間変更・キャンセル・担当解除など）",
+    )
+    helper_ids: list[str] = Field(
+        default_factory=list,
+        description="影響を受けたヘルパーID（週内の担当オーダーも解き直す）",
+    )
+    ripple: list[Literal["helper_day", "customer", "unfilled"]] = Field(
+        default_factory=lambda: ["helper_day", "customer"],
+        description=(
+            "解き直す波及近傍（helper_day: 担当ヘルパーの同日 / customer: 同じ利用者の週内 / "
+            "unfilled: 同日の未割当・部分割当）"
+        ),
+    )
+    max_free_orders: int = Field(
+        default=80, ge=1, le=500, description="解き直すオーダー数の上限",
+    )
+    time_limit_seconds: int = Field(
+        default=10, ge=1, le=120, description="ソルバーの制限時間（秒）",
+    )
+    dry_run: bool = Field(
+        default=False,
+        description="trueの場合、Firestoreへの書き戻しを行わない",
+    )
+    w_travel: float = Field(
+        default=1.0, ge=0.0, le=20.0, description="移動時間最小化の重み",
+    )
+    w_preferred_staff: float = Field(
+        default=5.0, ge=0.0, le=20.0, description="推奨スタッフ優先の重み",
+    )
+    w_workload_balance: float = Field(
+        default=10.0, ge=0.0, le=20.0, description="稼働バランスの重み",
+    )
+    w_continuity: float = Field(
+        default=3.0, ge=0.0, le=20.0, description="担当継続性の重み",
+    )
+
+
+class IncrementalOptimizeResponse(BaseModel):
+    changed_assignments: list[AssignmentResponse] = Field(
+        description="担当が変わったオーダーのみ（書き戻し対象）",
+    )
+    freed_order_ids: list[str] = Field(description="解き直したオーダーID")
+    skipped_order_ids: list[str] = Field(
+        default_factory=list,
+        description="対象週の最適化対象にないオーダーID（キャンセル済みなど）",
+    )
+    objective_value: float = Field(description="解き直し後の週全体の目的関数値")
+    objective_before: float = Field(description="変更オーダーの担当を外した時点の目的関数値")
+    solve_time_seconds: float
+    status: str
+    orders_updated: int = Field(description="Firestoreに書き戻したオーダー数")
 
 
 class OptimizationParametersResponse(BaseModel):
@@ -5,6 +5,8 @@ import math
 from datetime import date, timedelta
 from pathlib import Path
 
+import numpy as np
+
 from optimizer.data.link_household import link_household_orders
 from optimizer.models import (
     AvailabilitySlot,
@@ -18,6 +20,7 @@ from optimizer.models import (
     ServiceSlot,
     StaffConstraint,
     StaffUnavailability,
+    TravelMatrix,
     TravelTime,
     UnavailableSlot,
 )
@@ -205,6 +208,23 @@ def load_travel_times(data_dir: Path, customers: list[Customer]) -> list[TravelT
     return travel_times
 
 
+def load_travel_matrix(customers: list[Customer]) -> TravelMatrix:
+    """load_travel_times と同じ Haversine 移動時間を密行列で一括計算する
+
+    全ペアの TravelTime（n² 個）を作らずに numpy で計算する。
+    """
+    lat = np.radians([c.location.lat for c in customers])
+    lng = np.radians([c.location.lng for c in customers])
+    dlat = lat[None, :] - lat[:, None]
+    dlng = lng[None, :] - lng[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlng / 2) ** 2
+    a = np.clip(a, 0.0, 1.0)
+    distance_km = 6371.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    matrix = TravelMatrix([c.id for c in customers], distance_km * 1.3 / 40.0 * 60.0)
+    matrix.apply_zero_overrides(customers)
+    return matrix
+
+
 def _haversine_travel_minutes(loc1: GeoLocation, loc2: GeoLocation) -> float:
     """Haversine距離 × 市街地係数1.3 ÷ 車速40km/h → 分"""
 
@@ -285,7 +305,7 @@ def load_optimization_input(data_dir: Path, week_start: date) -> OptimizationInp
     customers = load_customers(data_dir)
     helpers = load_helpers(data_dir)
     orders = generate_orders(customers, week_start)
-    travel_times = load_travel_times(data_dir, customers)
+    travel_matrix = load_travel_matrix(customers)
     staff_unavailabilities = load_staff_unavailabilities(data_dir, week_start)
     staff_constraints = load_staff_constraints(data_dir)
 
@@ -293,7 +313,8 @@ def load_optimization_input(data_dir: Path, week_start: date) -> OptimizationInp
         customers=customers,
         helpers=helpers,
         orders=orders,
-        travel_times=travel_times,
+        travel_times=[],
+        travel_matrix=travel_matrix,
         staff_unavailabilities=staff_unavailabilities,
         staff_constraints=staff_constraints,
     )
@@ -0,0 +1,266 @@
+"""マスタデータの差分同期 — updated_at のウォーターマーク以降に変更されたドキュメントだけを読む
+
+customers / helpers はめったに変わらないため、ローカルのスナップショット
+（ドキュメントID → 解析済みモデル）を保持し、2回目以降は
+updated_at >= ウォーターマーク のドキュメントだけを読み込んでマージする。
+スナップショットは SQLite ファイルにも保存でき（SqliteSnapshotStore）、
+再起動したワーカーも全件を読み直さずに最新化できる。
+
+- ウォーターマークは前回の同期開始時刻から clock_skew_seconds 引いた時刻
+  （サーバー時刻とのずれ・同期中の書き込みを取りこぼさないため。重複はIDで上書きされる）
+- 削除は updated_at では検知できないため、差分をマージした後の件数が
+  count 集計と合わなければ全件を読み直す。full_sync_interval_seconds ごとにも全件を読み直す
+- updated_at のないドキュメントは差分クエリに現れない（全件同期でのみ反映される）
+"""
+
+import logging
+import sqlite3
+import threading
+from collections.abc import Callable
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@dataclass
+class DeltaSyncStats:
+    """差分同期の統計（プロセス起動時からの累計）"""
+
+    full_syncs: int
+    delta_syncs: int
+    # 差分同期・全件同期で読み込んだドキュメント数の合計
+    documents_read: int
+    # スナップショットのドキュメント数
+    size: int
+    watermark: datetime | None
+
+
+@dataclass
+class StoredSnapshot:
+    """永続化したスナップショット（モデルは JSON のまま）"""
+
+    watermark: datetime | None
+    full_synced_at: datetime | None
+    documents: dict[str, str]
+
+
+class SqliteSnapshotStore:
+    """スナップショットを SQLite ファイルに保存する（複数コレクションで1ファイルを共有）"""
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = str(path)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " collection TEXT NOT NULL, doc_id TEXT NOT NULL, data TEXT NOT NULL,"
+                " PRIMARY KEY (collection, doc_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                " collection TEXT PRIMARY KEY, watermark TEXT, full_synced_at TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path)
+
+    def load(self, collection: str) -> StoredSnapshot | None:
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT watermark, full_synced_at FROM watermarks WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+            if row is None:
+                return None
+            documents = dict(conn.execute(
+                "SELECT doc_id, data FROM documents WHERE collection = ?", (collection,),
+            ).fetchall())
+        return StoredSnapshot(
+            watermark=_parse_datetime(row[0]),
+            full_synced_at=_parse_datetime(row[1]),
+            documents=documents,
+        )
+
+    def save(
+        self,
+        collection: str,
+        watermark: datetime | None,
+        full_synced_at: datetime | None,
+        changed: dict[str, str],
+        replace: bool,
+    ) -> None:
+        """changed を書き込む（replace=True なら既存のドキュメントを全て置き換える）"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            if replace:
+                conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO documents (collection, doc_id, data) VALUES (?, ?, ?)",
+                [(collection, doc_id, data) for doc_id, data in changed.items()],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO watermarks (collection, watermark, full_synced_at)"
+                " VALUES (?, ?, ?)",
+                (collection, _format_datetime(watermark), _format_datetime(full_synced_at)),
+            )
+
+
+def _format_datetime(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+class DeltaSync(Generic[M]):
+    """1コレクションの差分同期（スレッドセーフ）
+
+    loader: loader(db, updated_since=...) でコレクションのモデルを返す関数（load_customers 等）
+    store: スナップショットの保存先（None ならメモリのみ）
+
+    インスタンスは loader と同じく db を受け取って全件のリストを返す呼び出し可能オブジェクトで、
+    MasterDataCache の delta_loaders にそのまま渡せる。
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        model_type: type[M],
+        loader: Callable[..., list[M]],
+        store: SqliteSnapshotStore | None = None,
+        full_sync_interval_seconds: float = 3600.0,
+        clock_skew_seconds: float = 300.0,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        self.collection = collection
+        self._model_type = model_type
+        self._loader = loader
+        self._store = store
+        self._full_sync_interval = timedelta(seconds=full_sync_interval_seconds)
+        self._clock_skew = timedelta(seconds=clock_skew_seconds)
+        self._now = now
+        self._lock = threading.Lock()
+        self._documents: dict[str, M] = {}
+        self._watermark: datetime | None = None
+        self._full_synced_at: datetime | None = None
+        self._full_syncs = 0
+        self._delta_syncs = 0
+        self._documents_read = 0
+        if store is not None:
+            self._restore(store)
+
+    def __call__(self, db: Any) -> list[M]:
+        return self.sync(db)
+
+    def sync(self, db: Any) -> list[M]:
+        """スナップショットを最新化し、全ドキュメントのモデルを返す"""
+        with self._lock:
+            started = self._now()
+            if not self._needs_full_sync(started):
+                models = self._loader(db, updated_since=self._watermark)
+                changed = {m.id: m for m in models}  # type: ignore[attr-defined]
+                self._documents.update(changed)
+                self._delta_syncs += 1
+                self._documents_read += len(models)
+                self._log("差分", len(models))
+                if self._count_matches(db):
+                    self._watermark = started - self._clock_skew
+                    self._persist(changed, replace=False)
+                    return list(self._documents.values())
+            models = self._loader(db)
+            self._documents = {m.id: m for m in models}  # type: ignore[attr-defined]
+            self._full_synced_at = started
+            self._full_syncs += 1
+            self._documents_read += len(models)
+            self._log("全件", len(models))
+            self._watermark = started - self._clock_skew
+            self._persist(self._documents, replace=True)
+            return list(self._documents.values())
+
+    def stats(self) -> DeltaSyncStats:
+        with self._lock:
+            return DeltaSyncStats(
+                full_syncs=self._full_syncs,
+                delta_syncs=self._delta_syncs,
+                documents_read=self._documents_read,
+                size=len(self._documents),
+                watermark=self._watermark,
+            )
+
+    def _needs_full_sync(self, now: datetime) -> bool:
+        if self._watermark is None or self._full_synced_at is None:
+            return True
+        return now - self._full_synced_at >= self._full_sync_interval
+
+    def _count_matches(self, db: Any) -> bool:
+        """マージ後のスナップショットと Firestore の件数が一致するか（不一致 = 削除があった）"""
+        count = _count_documents(db, self.collection)
+        if count is None or count == len(self._documents):
+            return True
+        logger.info(
+            "マスタデータ件数不一致 %s: Firestore %d件 / スナップショット %d件（全件同期します）",
+            self.collection, count, len(self._documents),
+        )
+        return False
+
+    def _log(self, mode: str, read: int) -> None:
+        logger.info(
+            "マスタデータ%s同期 %s: %d件読み込み（スナップショット%d件）",
+            mode, self.collection, read, len(self._documents),
+        )
+
+    def _restore(self, store: SqliteSnapshotStore) -> None:
+        try:
+            stored = store.load(self.collection)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning("スナップショットの読み込みに失敗（全件同期します）: %s", e)
+            return
+        if stored is None:
+            return
+        try:
+            self._documents = {
+                doc_id: self._model_type.model_validate_json(data)
+                for doc_id, data in stored.documents.items()
+            }
+        except ValueError as e:
+            # モデルの変更等で読めない場合は全件同期からやり直す
+            logger.warning("スナップショットを破棄（全件同期します）: %s", e)
+            self._documents = {}
+            return
+        self._watermark = stored.watermark
+        self._full_synced_at = stored.full_synced_at
+
+    def _persist(self, changed: dict[str, M], replace: bool) -> None:
+        if self._store is None:
+            return
+        try:
+            self._store.save(
+                self.collection,
+                self._watermark,
+                self._full_synced_at,
+                {doc_id: m.model_dump_json() for doc_id, m in changed.items()},
+                replace,
+            )
+        except sqlite3.Error as e:
+            # 保存に失敗してもメモリ上のスナップショットで続行する
+            logger.warning("スナップショットの保存に失敗: %s", e)
+
+
+def _count_documents(db: Any, collection: str) -> int | None:
+    """コレクションのドキュメント数（count 集計、取得できなければ None）"""
+    try:
+        result = db.collection(collection).count().get()
+        value = result[0][0].value
+    except Exception as e:
+        logger.warning("件数の取得に失敗 %s: %s", collection, e)
+        return None
+    return value if isinstance(value, int) else None
@@ -1,12 +1,20 @@
 """Firestore → Pydanticモデル変換ローダー"""
 
+import logging
 import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
+from typing import Any, TypedDict, TypeVar
 
 from google.cloud import firestore  # type: ignore[attr-defined]
 
+from optimizer.data.firestore_pool import get_client_pool
 from optimizer.data.link_household import link_household_orders
+from optimizer.data.master_cache import MasterDataCache
 from optimizer.models import (
+    Assignment,
     AvailabilitySlot,
     Customer,
     DayOfWeek,
@@ -21,10 +29,19 @@ from optimizer.models import (
     StaffConstraint,
     StaffConstraintType,
     StaffUnavailability,
+    TravelMatrix,
     TravelTime,
     UnavailableSlot,
 )
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# travel_times の一括取得（get_all）1回あたりのドキュメント数と並列数
+TRAVEL_TIMES_BATCH_SIZE = int(os.environ.get("OPTIMIZER_TRAVEL_TIMES_BATCH_SIZE", "300"))
+TRAVEL_TIMES_MAX_WORKERS = int(os.environ.get("OPTIMIZER_TRAVEL_TIMES_MAX_WORKERS", "8"))
+
 OFFSET_TO_DAY_OF_WEEK: dict[int, DayOfWeek] = {
     0: DayOfWeek.MONDAY,
     1: DayOfWeek.TUESDAY,
@@ -55,15 +72,34 @@ def _date_to_day_of_week(date_str: str) -> DayOfWeek:
 
 
 def get_firestore_client(project: str | None = None) -> firestore.Client:
-    """Firestoreクライアント取得（FIRESTORE_EMULATOR_HOST設定時はEmulatorに接続）"""
-    project_id = project or os.environ.get("GCP_PROJECT_ID", "visitcare-shift-optimizer")
-    return firestore.Client(project=project_id)
+    """Firestoreクライアント取得（FIRESTORE_EMULATOR_HOST設定時はEmulatorに接続）
+
+    project 未指定時はプロセス共通のプール（firestore_pool）のクライアントを返す。
+    """
+    if project is None:
+        return get_client_pool().acquire()
+    return firestore.Client(project=project)
 
 
-def load_customers(db: firestore.Client) -> list[Customer]:
-    """customersコレクション → Customer リスト"""
+def _master_query(
+    db: firestore.Client, collection: str, updated_since: datetime | None,
+) -> firestore.CollectionReference | firestore.Query:
+    query = db.collection(collection)
+    if updated_since is not None:
+        query = query.where("updated_at", ">=", updated_since)
+    return query
+
+
+def load_customers(
+    db: firestore.Client,
+    updated_since: datetime | None = None,
+) -> list[Customer]:
+    """customersコレクション → Customer リスト
+
+    updated_since 指定時は updated_at がそれ以降のドキュメントのみ（差分同期用）。
+    """
     customers: list[Customer] = []
-    for doc in db.collection("customers").stream():
+    for doc in _master_query(db, "customers", updated_since).stream():
         d = doc.to_dict()
         if d is None:
             continue
@@ -120,10 +156,16 @@ def load_customers(db: firestore.Client) -> list[Customer]:
     return customers
 
 
-def load_helpers(db: firestore.Client) -> list[Helper]:
-    """helpersコレクション → Helper リスト"""
+def load_helpers(
+    db: firestore.Client,
+    updated_since: datetime | None = None,
+) -> list[Helper]:
+    """helpersコレクション → Helper リスト
+
+    updated_since 指定時は updated_at がそれ以降のドキュメントのみ（差分同期用）。
+    """
     helpers: list[Helper] = []
-    for doc in db.collection("helpers").stream():
+    for doc in _master_query(db, "helpers", updated_since).stream():
         d = doc.to_dict()
         if d is None:
             continue
@@ -190,6 +232,11 @@ def load_orders(
     customers: list[Customer],
 ) -> list[Order]:
     """ordersコレクション → Order リスト（対象週のpending/assigned）"""
+    return _build_orders(_stream_order_docs(db, week_start), customers)
+
+
+def _stream_order_docs(db: firestore.Client, week_start: date) -> list[tuple[str, dict]]:
+    """対象週の pending/assigned オーダーの (ドキュメントID, データ) を読み込む"""
     # seedスクリプトが JST (UTC+9) midnight で保存するため、クエリも JST で合わせる
     JST = timezone(timedelta(hours=9))
     week_start_dt = datetime(week_start.year, week_start.month, week_start.day, tzinfo=JST)
@@ -200,14 +247,23 @@ def load_orders(
         .where("status", "in", ["pending", "assigned"])
         .stream()
     )
+    result: list[tuple[str, dict]] = []
+    for doc in docs:
+        d = doc.to_dict()
+        if d is not None:
+            result.append((doc.id, d))
+    return result
+
+
+def _build_orders(docs: list[tuple[str, dict]], customers: list[Customer]) -> list[Order]:
+    """オーダーのドキュメント → Order リスト
 
+    staff_count 未設定のオーダーは利用者の weekly_services から導出する。
+    """
     staff_count_lookup = _build_staff_count_lookup(customers)
 
     orders: list[Order] = []
-    for doc in docs:
-        d = doc.to_dict()
-        if d is None:
-            continue
+    for doc_id, d in docs:
         order_date_str = ts_to_date_str(d["date"])
         dow = _date_to_day_of_week(order_date_str)
 
@@ -219,7 +275,7 @@ def load_orders(
 
         orders.append(
             Order(
-                id=doc.id,
+                id=doc_id,
                 customer_id=d["customer_id"],
                 date=order_date_str,
                 day_of_week=dow,
@@ -233,6 +289,82 @@ def load_orders(
     return orders
 
 
+def load_current_assignments(
+    db: firestore.Client,
+    week_start: date,
+) -> list[Assignment]:
+    """対象週オーダーの現在の assigned_staff_ids → Assignment リスト（ウォームスタート用）"""
+    JST = timezone(timedelta(hours=9))
+    week_start_dt = datetime(week_start.year, week_start.month, week_start.day, tzinfo=JST)
+    docs = (
+        db.collection("orders")
+        .where("week_start_date", "==", week_start_dt)
+        .where("status", "in", ["pending", "assigned"])
+        .stream()
+    )
+    assignments: list[Assignment] = []
+    for doc in docs:
+        d = doc.to_dict()
+        if d is None or not d.get("assigned_staff_ids"):
+            continue
+        assignments.append(Assignment(order_id=doc.id, staff_ids=list(d["assigned_staff_ids"])))
+    return assignments
+
+
+def load_run_assignments(
+    db: firestore.Client,
+    week_start: date,
+    run_id: str | None = None,
+) -> list[Assignment]:
+    """optimization_runs の割当 → Assignment リスト（ウォームスタート用）
+
+    run_id 省略時は対象週の最新の実行記録を使う。見つからなければ空リスト。
+    """
+    if run_id is not None:
+        doc = db.collection("optimization_runs").document(run_id).get()
+        data = doc.to_dict() if doc.exists else None
+    else:
+        docs = list(
+            db.collection("optimization_runs")
+            .where("week_start_date", "==", week_start.isoformat())
+            .order_by("executed_at", direction="DESCENDING")
+            .limit(1)
+            .stream()
+        )
+        data = docs[0].to_dict() if docs else None
+    if data is None:
+        return []
+    return [
+        Assignment(order_id=a.get("order_id", ""), staff_ids=a.get("staff_ids", []))
+        for a in data.get("assignments", [])
+        if a.get("staff_ids")
+    ]
+
+
+def load_previous_week_slot_staff(
+    db: firestore.Client,
+    week_start: date,
+) -> dict[tuple[str, str, str, str, str], list[str]]:
+    """前週オーダーの担当 → (customer_id, dow, start_time, end_time, service_type) → staff_ids
+
+    warm_start.assignments_from_slots で今週の同一枠オーダーに写す。
+    """
+    JST = timezone(timedelta(hours=9))
+    prev = week_start - timedelta(days=7)
+    prev_dt = datetime(prev.year, prev.month, prev.day, tzinfo=JST)
+    docs = db.collection("orders").where("week_start_date", "==", prev_dt).stream()
+
+    staff_by_slot: dict[tuple[str, str, str, str, str], list[str]] = {}
+    for doc in docs:
+        d = doc.to_dict()
+        if d is None or not d.get("assigned_staff_ids") or d.get("status") == "cancelled":
+            continue
+        dow = _date_to_day_of_week(ts_to_date_str(d["date"]))
+        key = (d["customer_id"], dow.value, d["start_time"], d["end_time"], d["service_type"])
+        staff_by_slot[key] = list(d["assigned_staff_ids"])
+    return staff_by_slot
+
+
 def load_travel_times(
     db: firestore.Client,
     customer_ids: set[str] | None = None,
@@ -242,8 +374,16 @@ def load_travel_times(
     Args:
         db: Firestoreクライアント
         customer_ids: フィルタリング対象のcustomer ID集合。
-                      指定時はこれらのIDに関連するペアのみ返す。
+                      指定時はこれらのIDに関連するペアのみ返す
+                      （コレクション全体を読まず、該当ドキュメントだけを get_all で取得）。
     """
+    if customer_ids is not None:
+        return [
+            TravelTime(from_id=a, to_id=b, travel_time_minutes=minutes)
+            for a, b, minutes in _fetch_travel_pairs(
+                db, customer_ids, TRAVEL_TIMES_BATCH_SIZE, TRAVEL_TIMES_MAX_WORKERS,
+            )
+        ]
     travel_times: list[TravelTime] = []
     for doc in db.collection("travel_times").stream():
         d = doc.to_dict()
@@ -255,12 +395,6 @@ def load_travel_times(
             continue
         from_id = parts[0].removeprefix("from_")
         to_id = parts[1]
-
-        # customer_idsが指定されている場合、関連するペアのみ
-        if customer_ids is not None:
-            if from_id not in customer_ids or to_id not in customer_ids:
-                continue
-
         travel_times.append(
             TravelTime(
                 from_id=from_id,
@@ -271,6 +405,74 @@ def load_travel_times(
     return travel_times
 
 
+def _travel_doc_id(from_id: str, to_id: str) -> str:
+    return f"from_{from_id}_to_{to_id}"
+
+
+def _fetch_travel_pairs(
+    db: firestore.Client,
+    customer_ids: set[str],
+    batch_size: int,
+    max_workers: int,
+) -> list[tuple[str, str, float]]:
+    """customer_ids 間の全ペアのドキュメントIDを組み立てて get_all で一括取得する
+
+    コレクション全体（過去の利用者を含む n² 件）をストリームせず、
+    必要な n(n-1) 件だけを batch_size 件ずつ並列に読む。存在しないペアは返さない。
+    """
+    ids = sorted(customer_ids)
+    pair_ids = [(a, b) for a in ids for b in ids if a != b]
+    coll = db.collection("travel_times")
+    chunks = [pair_ids[i:i + batch_size] for i in range(0, len(pair_ids), batch_size)]
+
+    def fetch(chunk: list[tuple[str, str]]) -> list[tuple[str, str, float]]:
+        by_doc_id = {_travel_doc_id(a, b): (a, b) for a, b in chunk}
+        refs = [coll.document(doc_id) for doc_id in by_doc_id]
+        pairs = []
+        for doc in db.get_all(refs, field_paths=["travel_time_minutes"]):
+            pair = by_doc_id.get(doc.id)
+            d = doc.to_dict() if doc.exists else None
+            if pair is None or d is None:
+                continue
+            pairs.append((*pair, d.get("travel_time_minutes", 0.0)))
+        return pairs
+
+    if len(chunks) <= 1 or max_workers <= 1:
+        return [pair for chunk in chunks for pair in fetch(chunk)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        return [pair for pairs in pool.map(fetch, chunks) for pair in pairs]
+
+
+def load_travel_matrix(
+    db: firestore.Client,
+    customers: list[Customer],
+    customer_ids: set[str] | None = None,
+    batch_size: int = TRAVEL_TIMES_BATCH_SIZE,
+    max_workers: int = TRAVEL_TIMES_MAX_WORKERS,
+) -> TravelMatrix:
+    """travel_timesコレクション → 移動時間の密行列
+
+    customer_ids 指定時はそのペアのドキュメントだけを get_all で取得する
+    （未指定時は load_travel_times と同じくコレクション全体を読む）。
+    TravelTime を作らずに行列へ直接書き込み、同一世帯・同一施設の利用者ペアの
+    0 分オーバーライドも適用済みで返す。
+    """
+    started = time.perf_counter()
+    if customer_ids is not None:
+        pairs = _fetch_travel_pairs(db, customer_ids, batch_size, max_workers)
+        customers = [c for c in customers if c.id in customer_ids]
+    else:
+        pairs = [
+            (tt.from_id, tt.to_id, tt.travel_time_minutes) for tt in load_travel_times(db)
+        ]
+    logger.info(
+        "travel_times読み込み: %d件 (利用者%d人, %.2fs)",
+        len(pairs), len(customer_ids) if customer_ids is not None else len(customers),
+        time.perf_counter() - started,
+    )
+    return TravelMatrix.from_pairs(pairs, customers)
+
+
 def load_staff_unavailabilities(
     db: firestore.Client,
     week_start: date,
@@ -340,10 +542,48 @@ def load_staff_constraints(customers: list[Customer]) -> list[StaffConstraint]:
     return constraints
 
 
+class MonthlyOrderRow(TypedDict):
+    """月次レポート集計用のオーダー行（load_monthly_orders）"""
+
+    id: str
+    customer_id: str
+    # YYYY-MM-DD
+    date: str
+    start_time: str
+    end_time: str
+    service_type: str
+    status: str
+    assigned_staff_ids: list[str]
+    staff_count: int
+
+
+class PersonNameRow(TypedDict):
+    """月次レポート集計用の氏名行（load_all_helpers / load_all_customers）"""
+
+    id: str
+    family_name: str
+    given_name: str
+
+
+# 集計に使うフィールドだけを select で射影する
+# （利用者の weekly_services・notes・irregular_patterns 等を転送・デシリアライズしない）
+MONTHLY_ORDER_FIELDS = [
+    "customer_id",
+    "date",
+    "start_time",
+    "end_time",
+    "service_type",
+    "status",
+    "assigned_staff_ids",
+    "staff_count",
+]
+PERSON_NAME_FIELDS = ["name"]
+
+
 def load_monthly_orders(
     db: firestore.Client,
     year_month: str,
-) -> list[dict[str, object]]:
+) -> list[MonthlyOrderRow]:
     """指定月のオーダーを全ステータスで取得（月次レポート集計用）
 
     Args:
@@ -351,7 +591,7 @@ def load_monthly_orders(
         year_month: 'YYYY-MM' 形式の年月文字列
 
     Returns:
-        オーダーのdict リスト（集計ロジック向けのフラットなdict形式）
+        オーダー行のリスト（集計ロジック向けのフラットなdict形式）
     """
     JST = timezone(timedelta(hours=9))
     year, month = (int(x) for x in year_month.split("-"))
@@ -366,72 +606,57 @@ def load_monthly_orders(
         db.collection("orders")
         .where("date", ">=", month_start)
         .where("date", "<", next_month_start)
+        .select(MONTHLY_ORDER_FIELDS)
         .stream()
     )
 
-    orders: list[dict[str, object]] = []
+    orders: list[MonthlyOrderRow] = []
     for doc in docs:
         d = doc.to_dict()
         if d is None:
             continue
         orders.append(
-            {
-                "id": doc.id,
-                "customer_id": d.get("customer_id", ""),
-                "date": ts_to_date_str(d["date"]),
-                "start_time": d.get("start_time", ""),
-                "end_time": d.get("end_time", ""),
-                "service_type": d.get("service_type", ""),
-                "status": d.get("status", ""),
-                "assigned_staff_ids": d.get("assigned_staff_ids", []),
-                "staff_count": d.get("staff_count", 1),
-            }
+            MonthlyOrderRow(
+                id=doc.id,
+                customer_id=d.get("customer_id", ""),
+                date=ts_to_date_str(d["date"]),
+                start_time=d.get("start_time", ""),
+                end_time=d.get("end_time", ""),
+                service_type=d.get("service_type", ""),
+                status=d.get("status", ""),
+                assigned_staff_ids=d.get("assigned_staff_ids", []),
+                staff_count=d.get("staff_count", 1),
+            )
         )
     return orders
 
 
-def load_all_helpers(db: firestore.Client) -> list[dict[str, object]]:
-    """全ヘルパーを取得（月次レポート集計用）
-
-    Returns:
-        ヘルパーのdict リスト（集計ロジック向けのフラットなdict形式）
-    """
-    helpers: list[dict[str, object]] = []
-    for doc in db.collection("helpers").stream():
+def _load_person_names(db: firestore.Client, collection: str) -> list[PersonNameRow]:
+    """コレクションの全ドキュメントの氏名（name フィールドのみ射影して読む）"""
+    rows: list[PersonNameRow] = []
+    for doc in db.collection(collection).select(PERSON_NAME_FIELDS).stream():
         d = doc.to_dict()
         if d is None:
             continue
         name = d.get("name", {})
-        helpers.append(
-            {
-                "id": doc.id,
-                "family_name": name.get("family", ""),
-                "given_name": name.get("given", ""),
-            }
+        rows.append(
+            PersonNameRow(
+                id=doc.id,
+                family_name=name.get("family", ""),
+                given_name=name.get("given", ""),
+            )
         )
-    return helpers
+    return rows
 
 
-def load_all_customers(db: firestore.Client) -> list[dict[str, object]]:
-    """全利用者を取得（月次レポート集計用）
+def load_all_helpers(db: firestore.Client) -> list[PersonNameRow]:
+    """全ヘルパーの氏名を取得（月次レポート集計用）"""
+    return _load_person_names(db, "helpers")
 
-    Returns:
-        利用者のdict リスト（集計ロジック向けのフラットなdict形式）
-    """
-    customers: list[dict[str, object]] = []
-    for doc in db.collection("customers").stream():
-        d = doc.to_dict()
-        if d is None:
-            continue
-        name = d.get("name", {})
-        customers.append(
-            {
-                "id": doc.id,
-                "family_name": name.get("family", ""),
-                "given_name": name.get("given", ""),
-            }
-        )
-    return customers
+
+def load_all_customers(db: firestore.Client) -> list[PersonNameRow]:
+    """全利用者の氏名を取得（月次レポート集計用）"""
+    return _load_person_names(db, "customers")
 
 
 def load_service_types(db: firestore.Client) -> list[ServiceTypeConfig]:
@@ -472,30 +697,82 @@ def load_all_service_types(db: firestore.Client) -> list[dict[str, object]]:
     return result
 
 
+def _timed(name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """fn を実行し、所要時間をコレクション名つきでログに出す"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    logger.info("Firestore読み込み %s: %.2fs", name, time.perf_counter() - started)
+    return result
+
+
+def _load_master(
+    db: firestore.Client,
+    collection: str,
+    loader: Callable[[firestore.Client], list[T]],
+    master_cache: MasterDataCache | None,
+) -> list[T]:
+    if master_cache is None:
+        return loader(db)
+    return master_cache.get(db, collection, loader)
+
+
 def load_optimization_input(
     db: firestore.Client,
     week_start: date,
+    master_cache: MasterDataCache | None = None,
 ) -> OptimizationInput:
-    """全データをFirestoreから読み込み、OptimizationInput を返す"""
-    customers = load_customers(db)
-    helpers = load_helpers(db)
-    orders = load_orders(db, week_start, customers)
-    # Firestoreに linked_order_id がない場合でも動的にリンクを生成する
-    link_household_orders(orders, customers)
-    # オーダーに含まれる利用者IDのみでtravel_timesをフィルタリング
-    order_customer_ids = {o.customer_id for o in orders}
-    travel_times = load_travel_times(db, customer_ids=order_customer_ids)
-    staff_unavailabilities = load_staff_unavailabilities(db, week_start)
-    staff_constraints = load_staff_constraints(customers)
-
-    service_type_configs = load_service_types(db)
-
-    return OptimizationInput(
-        customers=customers,
-        helpers=helpers,
-        orders=orders,
-        travel_times=travel_times,
-        staff_unavailabilities=staff_unavailabilities,
-        staff_constraints=staff_constraints,
-        service_type_configs=service_type_configs,
+    """全データをFirestoreから読み込み、OptimizationInput を返す
+
+    互いに依存しないコレクション（customers / helpers / orders / staff_unavailability /
+    service_types）は並列に読み込む。travel_times はオーダーの利用者IDが分かった時点で
+    （customers の読み込み完了を待たずに）取得を始める。
+    master_cache 指定時は customers / helpers / service_types をキャッシュから取得する。
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        customers_future = pool.submit(
+            _timed, "customers", _load_master, db, "customers", load_customers, master_cache,
+        )
+        helpers_future = pool.submit(
+            _timed, "helpers", _load_master, db, "helpers", load_helpers, master_cache,
+        )
+        order_docs_future = pool.submit(_timed, "orders", _stream_order_docs, db, week_start)
+        unavailabilities_future = pool.submit(
+            _timed, "staff_unavailability", load_staff_unavailabilities, db, week_start,
+        )
+        service_types_future = pool.submit(
+            _timed, "service_types", _load_master, db, "service_types", load_service_types,
+            master_cache,
+        )
+
+        # オーダーに含まれる利用者IDのみでtravel_timesを取得
+        order_docs = order_docs_future.result()
+        order_customer_ids = {d["customer_id"] for _, d in order_docs}
+        travel_future = pool.submit(
+            _timed, "travel_times", _fetch_travel_pairs, db, order_customer_ids,
+            TRAVEL_TIMES_BATCH_SIZE, TRAVEL_TIMES_MAX_WORKERS,
+        )
+
+        customers = customers_future.result()
+        orders = _build_orders(order_docs, customers)
+        # Firestoreに linked_order_id がない場合でも動的にリンクを生成する
+        link_household_orders(orders, customers)
+        staff_constraints = load_staff_constraints(customers)
+        travel_matrix = TravelMatrix.from_pairs(
+            travel_future.result(), [c for c in customers if c.id in order_customer_ids],
+        )
+        inp = OptimizationInput(
+            customers=customers,
+            helpers=helpers_future.result(),
+            orders=orders,
+            travel_times=[],
+            travel_matrix=travel_matrix,
+            staff_unavailabilities=unavailabilities_future.result(),
+            staff_constraints=staff_constraints,
+            service_type_configs=service_types_future.result(),
+        )
+    logger.info(
+        "Firestore読み込み完了: オーダー%d件, 利用者%d人, 移動時間%d人分 (%.2fs)",
+        len(orders), len(customers), len(travel_matrix), time.perf_counter() - started,
     )
+    return inp
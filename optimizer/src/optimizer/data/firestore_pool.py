@@ -0,0 +1,172 @@
+"""Firestoreクライアントプール — プロセス内で firestore.Client を使い回す
+
+firestore.Client の生成は認証情報の探索と gRPC チャネルの確立を伴うため、
+リクエストごとに生成せず、起動時に生成したクライアントを共有する。
+firestore.Client はスレッドセーフなので貸し出しは排他にせず、size 個のクライアント
+（= gRPC チャネル）をラウンドロビンで返す（1チャネルの同時ストリーム数の上限を超える
+並列リクエストを複数チャネルに分散する）。
+クライアントの生成（数百ミリ秒）はロックの外で行い、生成済みクライアントを返す
+他スレッドの acquire を待たせない。
+
+FIRESTORE_EMULATOR_HOST 環境変数が設定されている場合、
+google-cloud-firestore ライブラリが自動的にエミュレータに接続する。
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from google.cloud import firestore  # type: ignore[attr-defined]
+
+logger = logging.getLogger(__name__)
+
+# プールするクライアント（gRPC チャネル）数
+FIRESTORE_POOL_SIZE = int(os.environ.get("OPTIMIZER_FIRESTORE_POOL_SIZE", "4"))
+
+# 取得時間のパーセンタイル計算に使う直近のサンプル数
+_LATENCY_SAMPLES = 1000
+
+
+@dataclass
+class FirestorePoolStats:
+    """クライアントプールの統計（プロセス起動時からの累計）"""
+
+    size: int
+    # 生成済みのクライアント数
+    clients: int
+    acquisitions: int
+    # 取得時間（クライアントの遅延生成を含む、ミリ秒）
+    avg_acquire_ms: float
+    p95_acquire_ms: float
+    max_acquire_ms: float
+
+
+class FirestoreClientPool:
+    """firestore.Client のプール（スレッドセーフ）
+
+    size: クライアント数（1以上）
+    factory: クライアントの生成関数（None なら firestore.Client(project=project)）
+    """
+
+    def __init__(
+        self,
+        size: int = FIRESTORE_POOL_SIZE,
+        project: str | None = None,
+        factory: Callable[[], firestore.Client] | None = None,
+    ) -> None:
+        self._size = max(1, size)
+        self._project = project
+        self._factory = factory or (lambda: firestore.Client(project=self._project))
+        self._clients: list[firestore.Client | None] = [None] * self._size
+        self._next = 0
+        self._lock = threading.Lock()
+        self._acquisitions = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._samples: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+    def acquire(self) -> firestore.Client:
+        """クライアントを返す（未生成ならその場で生成する）。返却は不要"""
+        started = time.perf_counter()
+        with self._lock:
+            slot = self._next
+            self._next = (self._next + 1) % self._size
+            client = self._clients[slot]
+        if client is None:
+            client = self._create(slot)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._acquisitions += 1
+            self._total_seconds += elapsed
+            self._max_seconds = max(self._max_seconds, elapsed)
+            self._samples.append(elapsed)
+        return client
+
+    def warm(self) -> None:
+        """全クライアントを生成しておく（起動時に呼び、最初のリクエストで待たせない）"""
+        for slot in range(self._size):
+            with self._lock:
+                client = self._clients[slot]
+            if client is None:
+                self._create(slot)
+
+    def close(self) -> None:
+        """全クライアントを閉じる（以降の acquire では生成し直す）"""
+        with self._lock:
+            clients = [c for c in self._clients if c is not None]
+            self._clients = [None] * self._size
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning("Firestoreクライアントのクローズに失敗: %s", e)
+
+    def stats(self) -> FirestorePoolStats:
+        with self._lock:
+            samples = sorted(self._samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+            return FirestorePoolStats(
+                size=self._size,
+                clients=sum(c is not None for c in self._clients),
+                acquisitions=self._acquisitions,
+                avg_acquire_ms=(
+                    self._total_seconds / self._acquisitions * 1000 if self._acquisitions else 0.0
+                ),
+                p95_acquire_ms=p95 * 1000,
+                max_acquire_ms=self._max_seconds * 1000,
+            )
+
+    def _create(self, slot: int) -> firestore.Client:
+        """slot のクライアントをロックの外で生成し、ロック内で登録する
+
+        生成中に他スレッドが同じ slot を登録していた場合は、そちらを返して生成したものは閉じる。
+        """
+        try:
+            client = self._factory()
+        except Exception as e:
+            logger.error("Firestoreクライアント初期化失敗 [project=%s]: %s", self._project, e)
+            raise
+        with self._lock:
+            existing = self._clients[slot]
+            if existing is None:
+                self._clients[slot] = client
+        if existing is not None:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning("Firestoreクライアントのクローズに失敗: %s", e)
+            return existing
+        logger.info(
+            "Firestoreクライアント初期化成功 [project=%s, %d/%d]",
+            self._project, slot + 1, self._size,
+        )
+        return client
+
+
+_pool: FirestoreClientPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> FirestoreClientPool:
+    """プロセス共通のクライアントプール（シングルトン）"""
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            project = os.environ.get("GCP_PROJECT_ID", "visitcare-shift-optimizer")
+            _pool = FirestoreClientPool(size=FIRESTORE_POOL_SIZE, project=project)
+    return _pool
+
+
+def close_client_pool() -> None:
+    """プロセス共通のプールを閉じて破棄する（FastAPI のシャットダウン時）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
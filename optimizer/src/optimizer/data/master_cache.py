@@ -0,0 +1,170 @@
+"""マスタデータキャッシュ — customers / helpers / service_types の読み込み結果をプロセス内に保持する
+
+/optimize・/export-report・インポート等のたびにマスタの全コレクションを
+ストリームし直さないよう、ローダー（load_customers 等）の戻り値（解析済みモデル）を保持する。
+
+- TTL: 読み込みから ttl_seconds を過ぎたら読み直す（None なら無期限）
+- 変更検知（watch=True）: コレクションに on_snapshot リスナーを張り、
+  追加・更新・削除があればそのコレクションのエントリを破棄する。
+  リスナーを張れない・切れた場合も TTL で読み直すため、古いデータを返し続けることはない
+
+キーは (コレクション, ローダー, プロジェクト)。同じコレクションを別の形に解析するローダー
+（load_customers と load_all_customers 等）は別エントリだが、無効化はコレクション単位で行う。
+delta_loaders でローダーを差分同期（delta_sync.DeltaSync）に差し替えると、
+無効化・期限切れ後の読み直しも変更分のドキュメントだけで済む。
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MASTER_COLLECTIONS = ("customers", "helpers", "service_types")
+
+
+@dataclass
+class MasterCacheStats:
+    """マスタデータキャッシュの統計（プロセス起動時からの累計）"""
+
+    hits: int
+    misses: int
+    # 変更検知・明示的な invalidate で破棄したエントリ数
+    invalidations: int
+    entries: int
+    # on_snapshot リスナーを張っているコレクション
+    watched: list[str]
+
+
+class MasterDataCache:
+    """マスタデータのローダー結果のキャッシュ（スレッドセーフ）
+
+    ttl_seconds: 読み込みからこの秒数を過ぎたエントリは読み直す（None なら無期限、0 なら常に読む）
+    watch: 初回の読み込み時に on_snapshot リスナーを張り、変更があれば無効化する
+    delta_loaders: ローダー → 代わりに呼ぶ読み込み関数（差分同期等。キャッシュのキーは元のローダー）
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float | None = 300.0,
+        watch: bool = False,
+        delta_loaders: dict[Callable[[Any], list[Any]], Callable[[Any], list[Any]]] | None = None,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._watch_enabled = watch
+        self._delta_loaders = delta_loaders or {}
+        # (collection, loader, project) → (読み込み時刻, 値)
+        self._entries: dict[tuple[str, Any, Any], tuple[float, list[Any]]] = {}
+        # コレクションごとの世代（読み込み中に無効化された結果を保存しないため）
+        self._generations: dict[str, int] = {}
+        # project → リスナー（unsubscribe() を持つ）のリスト
+        self._watches: dict[Any, list[Any]] = {}
+        self._watched: set[str] = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, db: Any, collection: str, loader: Callable[[Any], list[T]]) -> list[T]:
+        """loader(db) の結果を返す（キャッシュにあればそれを使う）
+
+        返すリストはコピーだが、要素（モデル・dict）は共有のため変更しないこと。
+        """
+        load = self._delta_loaders.get(loader, loader)
+        if self._ttl_seconds is not None and self._ttl_seconds <= 0:
+            return load(db)
+        project = getattr(db, "project", None)
+        if self._watch_enabled:
+            self._ensure_watch(db, project)
+        key = (collection, loader, project)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[0], now):
+                self._hits += 1
+                return list(entry[1])
+            self._misses += 1
+            generation = self._generations.get(collection, 0)
+        value = load(db)
+        with self._lock:
+            if self._generations.get(collection, 0) == generation:
+                self._entries[key] = (now, value)
+        return list(value)
+
+    def invalidate(self, collection: str | None = None) -> None:
+        """コレクション（None なら全コレクション）のエントリを破棄する"""
+        with self._lock:
+            for key in [k for k in self._entries if collection is None or k[0] == collection]:
+                del self._entries[key]
+                self._invalidations += 1
+            for name in [collection] if collection is not None else list(self._generations):
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def watch(self, db: Any) -> None:
+        """マスタの各コレクションに on_snapshot リスナーを張る
+
+        リスナーは初回に全件のスナップショットを受け取るため、2回目以降の通知で無効化する。
+        """
+        project = getattr(db, "project", None)
+        watches = []
+        for collection in MASTER_COLLECTIONS:
+            watches.append(db.collection(collection).on_snapshot(self._on_snapshot(collection)))
+        with self._lock:
+            self._watches[project] = watches
+
+    def close(self) -> None:
+        """リスナーを解除する（エントリは残し、以降は TTL のみで読み直す）"""
+        with self._lock:
+            watches = [w for ws in self._watches.values() for w in ws]
+            self._watches.clear()
+            self._watched.clear()
+            self._watch_enabled = False
+        for w in watches:
+            try:
+                w.unsubscribe()
+            except Exception as e:
+                logger.warning("マスタデータのリスナー解除に失敗: %s", e)
+
+    def stats(self) -> MasterCacheStats:
+        with self._lock:
+            return MasterCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                invalidations=self._invalidations,
+                entries=len(self._entries),
+                watched=sorted(self._watched),
+            )
+
+    def _expired(self, loaded_at: float, now: float) -> bool:
+        return self._ttl_seconds is not None and now - loaded_at > self._ttl_seconds
+
+    def _ensure_watch(self, db: Any, project: Any) -> None:
+        with self._lock:
+            if project in self._watches:
+                return
+            # 失敗しても毎リクエスト張り直さない（TTL のみで運用）
+            self._watches[project] = []
+        try:
+            self.watch(db)
+        except Exception as e:
+            logger.warning("マスタデータの変更検知を開始できません（TTLのみで更新）: %s", e)
+
+    def _on_snapshot(self, collection: str) -> Callable[[Any, Any, Any], None]:
+        initial = True
+
+        def callback(docs: Any, changes: Any, read_time: Any) -> None:
+            nonlocal initial
+            if initial:
+                initial = False
+                with self._lock:
+                    self._watched.add(collection)
+                return
+            logger.info("マスタデータ変更を検知: %s（%d件）", collection, len(changes))
+            self.invalidate(collection)
+
+        return callback
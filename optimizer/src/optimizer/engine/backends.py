@@ -0,0 +1,145 @@
+"""ソルバーバックエンド — 行列形式モデルを OR-Tools のネイティブAPIで解く
+
+SolverOptions.backend で選択する。"pulp"（既定）は従来どおり _solve_single が
+PuLP + CBC で解き、それ以外はここで linear_model.build_linear_model の
+配列を OR-Tools model_builder（HiGHS / SCIP）へ直接渡して解く。
+結果は _solve_single と同じ形式の OptimizationResult で返す。
+初期割当（ウォームスタート）は x 変数へのヒントとして渡す（_HINT_SOLVERS のみ）。
+
+ortools はオプション依存（pip install visitcare-optimizer[ortools]）のため、
+選択時にのみ import する。
+"""
+
+import logging
+import time
+from typing import Any
+
+import numpy as np
+
+from optimizer.engine.linear_model import LinearModel, build_linear_model
+from optimizer.engine.solver import SoftWeights, SolverOptions
+from optimizer.models import Assignment, OptimizationInput, OptimizationResult
+
+logger = logging.getLogger(__name__)
+
+# SolverOptions.backend → OR-Tools model_builder のソルバー名
+MODEL_BUILDER_SOLVERS = {"highs": "highs", "scip": "scip"}
+
+# ソルバー固有パラメータ（HiGHS は enable_output(False) でも起動バナーを出すため明示的に抑止）
+_SOLVER_PARAMETERS = {"highs": "output_flag=false"}
+
+# ヒント（MIP start）を渡せるソルバー。HiGHS は ortools 9.15 の model_builder 経由で
+# ヒントを渡すとソルブ中に異常終了するため、初期解なしで解く
+_HINT_SOLVERS = {"scip"}
+
+
+def _import_model_builder() -> Any:
+    try:
+        from ortools.linear_solver.python import model_builder_helper as mbh
+    except ImportError as e:  # pragma: no cover - 依存が入っていない環境のみ
+        raise RuntimeError(
+            "ortools が必要です（pip install visitcare-optimizer[ortools]）"
+        ) from e
+    return mbh
+
+
+def _load_model(mbh: Any, model: LinearModel) -> Any:
+    """LinearModel を ModelBuilderHelper に読み込む"""
+    helper = mbh.ModelBuilderHelper()
+    indices = helper.add_var_array_with_bounds(
+        model.var_lb, model.var_ub, model.var_integer, "v",
+    )
+    nonzero = np.flatnonzero(model.objective)
+    helper.set_objective_coefficients(
+        indices[nonzero].tolist(), model.objective[nonzero].tolist(),
+    )
+
+    variables = [mbh.Variable(helper, int(i)) for i in indices]
+    row_ptr = model.row_ptr.tolist()
+    cols = model.col_idx.tolist()
+    coefs = model.coef.tolist()
+    for r, (lb, ub) in enumerate(zip(model.row_lb.tolist(), model.row_ub.tolist())):
+        ct = helper.add_linear_constraint()
+        helper.set_constraint_lower_bound(ct, lb)
+        helper.set_constraint_upper_bound(ct, ub)
+        start, end = row_ptr[r], row_ptr[r + 1]
+        if end > start:
+            helper.add_terms_to_constraint(
+                ct, [variables[c] for c in cols[start:end]], coefs[start:end],
+            )
+    return helper
+
+
+def solve_with_model_builder(
+    inp: OptimizationInput,
+    time_limit_seconds: int = 180,
+    weights: SoftWeights | None = None,
+    options: SolverOptions | None = None,
+    initial: set[tuple[str, str]] | None = None,
+) -> OptimizationResult:
+    """単一期間の最適化を OR-Tools model_builder で実行する（_solve_single と同じ結果形式）
+
+    initial: 初期値1とする (helper_id, order_id) ペア（修復済み）。
+    指定時は全 x にヒントを与える（_HINT_SOLVERS 以外では無視）。
+    """
+    opts = options or SolverOptions()
+    solver_name = MODEL_BUILDER_SOLVERS[opts.backend]
+    mbh = _import_model_builder()
+
+    start_time = time.time()
+    model = build_linear_model(inp, weights, opts)
+    helper = _load_model(mbh, model)
+    if initial is not None and solver_name in _HINT_SOLVERS:
+        for i, (h, j) in enumerate(zip(model.x_helper.tolist(), model.x_order.tolist())):
+            helper.add_hint(i, 1.0 if (inp.helpers[h].id, inp.orders[j].id) in initial else 0.0)
+    build_time = time.time() - start_time
+
+    solver = mbh.ModelSolverHelper(solver_name)
+    if not solver.solver_is_supported():
+        raise RuntimeError(f"OR-Tools に {solver_name} ソルバーが組み込まれていません")
+    solver.enable_output(False)
+    if solver_name in _SOLVER_PARAMETERS:
+        solver.set_solver_specific_parameters(_SOLVER_PARAMETERS[solver_name])
+    solver.set_time_limit_in_seconds(float(time_limit_seconds))
+    solver.solve(helper)
+    solve_time = time.time() - start_time
+
+    status_code = solver.status()
+    status = {
+        mbh.SolveStatus.OPTIMAL: "Optimal",
+        mbh.SolveStatus.FEASIBLE: "Feasible",
+        mbh.SolveStatus.INFEASIBLE: "Infeasible",
+        mbh.SolveStatus.UNBOUNDED: "Unbounded",
+        mbh.SolveStatus.NOT_SOLVED: "Not Solved",
+    }.get(status_code, "Unknown")
+    logger.debug(
+        "%s: build=%.3fs, total=%.3fs, status=%s", solver_name, build_time, solve_time, status,
+    )
+
+    assignments: list[Assignment] = []
+    unassigned_count = 0
+    partial_count = 0
+    objective_value = 0.0
+    if status in ("Optimal", "Feasible") and solver.has_solution():
+        objective_value = float(solver.objective_value())
+        values = np.asarray(solver.variable_values())[: model.n_x]
+        chosen = values > 0.5
+        staff_by_order: list[list[str]] = [[] for _ in inp.orders]
+        # x は (ヘルパー, オーダー) 順に並ぶため、オーダーごとのリストはヘルパー順になる
+        for h, j in zip(model.x_helper[chosen].tolist(), model.x_order[chosen].tolist()):
+            staff_by_order[j].append(inp.helpers[h].id)
+        for o, staff_ids in zip(inp.orders, staff_by_order):
+            assignments.append(Assignment(order_id=o.id, staff_ids=staff_ids))
+            if len(staff_ids) == 0:
+                unassigned_count += 1
+            elif len(staff_ids) < o.staff_count:
+                partial_count += 1
+
+    return OptimizationResult(
+        assignments=assignments,
+        objective_value=objective_value,
+        solve_time_seconds=round(solve_time, 3),
+        status=status,
+        unassigned_count=unassigned_count,
+        partial_count=partial_count,
+    )
@@ -0,0 +1,316 @@
+"""ソルブ結果キャッシュ — 正規化した入力のフィンガープリントで結果を再利用する
+
+同じ週を同じパラメータで再実行する（UI の再読み込み、ジョブのリトライ、
+dry_run で確認してから本実行する等）たびに数分のソルブをやり直さないよう、
+入力・重み・制限時間・ソルバー設定から求めたフィンガープリントをキーに結果を保持する。
+日次分割時は日ごと（連結成分分割時は成分ごと）の部分問題もキャッシュする。
+部分問題のキーはその日の解に関係する部分だけ（project_subproblem）から求めるため、
+ある日のオーダーを1件変えても、他の日は前回の結果をそのまま使える。
+
+フィンガープリントは入力のトップレベルのリスト（orders, helpers, travel_times 等）を
+要素の JSON で並べ替えてから SHA-256 をとるため、Firestore の読み込み順の違いでは変わらない。
+要素内のリスト（資格・推奨スタッフ等）の並びは変えない（違えば別キー = ミスになるだけ）。
+
+status が Optimal の結果だけを保存する。時間切れの Feasible（貪欲解の代替を含む）や
+Infeasible を保存すると、次回以降に時間を延ばしても同じ結果を返し続けるため。
+
+- メモリ: LRU（max_bytes を超えたら最も古く使われたものから破棄）
+- ディスク（disk_dir 指定時）: <key>.json に書き込み、メモリでミスしたら読み込んで昇格する
+  （max_disk_bytes を超えたら更新時刻の古いファイルから削除）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from optimizer.models import Assignment, OptimizationInput, OptimizationResult, TravelMatrix
+
+if TYPE_CHECKING:
+    from optimizer.engine.solver import SoftWeights, SolverOptions
+
+logger = logging.getLogger(__name__)
+
+# 保存対象のステータス（これ以外の結果は put しても保存しない）
+_CACHEABLE_STATUSES = frozenset({"Optimal"})
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _canonical_list(items: list[Any]) -> list[str]:
+    return sorted(_canonical_json(item) for item in items)
+
+
+def _travel_digest(inp: OptimizationInput) -> str:
+    """移動時間（travel_matrix、なければ travel_times から構築）を利用者ID順に並べた行列のハッシュ
+
+    travel_times で渡しても同じ内容の travel_matrix で渡しても同じ値になる。
+    """
+    matrix = inp.travel_matrix
+    if matrix is None:
+        matrix = TravelMatrix.from_travel_times(inp.travel_times, inp.customers)
+    ids = sorted(matrix.customer_ids)
+    minutes = matrix.take(ids)
+    # 移動時間がすべて0の利用者は行列にいなくても同じ（ローダーによって含む範囲が違う）
+    keep = np.flatnonzero(minutes.any(axis=0) | minutes.any(axis=1))
+    digest = hashlib.sha256(_canonical_json([ids[i] for i in keep]).encode())
+    digest.update(np.ascontiguousarray(minutes[np.ix_(keep, keep)]).tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint(
+    inp: OptimizationInput,
+    weights: "SoftWeights | None",
+    time_limit_seconds: float,
+    options: "SolverOptions | None" = None,
+    initial_assignments: list[Assignment] | None = None,
+    **params: Any,
+) -> str:
+    """入力・重み・制限時間・ソルバー設定のフィンガープリント（SHA-256 の16進）
+
+    params には結果に影響するその他の solve() 引数（分割方式・LNS 等）を渡す。
+    weights / options が None の場合は既定値と同じキーになる。
+    """
+    from optimizer.engine.solver import SoftWeights, SolverOptions
+
+    dumped = inp.model_dump(mode="json", exclude={"travel_times"})
+    payload = {
+        "input": {
+            name: _canonical_list(value) if isinstance(value, list) else value
+            for name, value in dumped.items()
+        },
+        "travel": _travel_digest(inp),
+        "weights": asdict(weights or SoftWeights()),
+        "options": asdict(options or SolverOptions()),
+        "time_limit_seconds": time_limit_seconds,
+        "initial": sorted(
+            (a.order_id, sorted(a.staff_ids)) for a in initial_assignments
+        ) if initial_assignments is not None else None,
+        "params": params,
+    }
+    return hashlib.sha256(_canonical_json(payload).encode()).hexdigest()
+
+
+def project_subproblem(inp: OptimizationInput) -> OptimizationInput:
+    """部分問題（1日 or その連結成分）の解に関係する部分だけを残した入力
+
+    フィンガープリント専用（ソルブには使わない）。次を落とす:
+    - 移動時間: 部分問題の利用者間以外のペア（係数は当日の利用者間のみから計算する）
+    - 希望休: 部分問題の日付以外の枠
+    - スタッフ制約: 部分問題の利用者以外
+    - ヘルパー: 部分問題の利用者以外の研修状況
+    （勤務可能枠は空 = 制約なしの判定に全曜日を使うためそのまま残す）
+    """
+    customer_ids = {o.customer_id for o in inp.orders}
+    dates = {o.date for o in inp.orders}
+    unavailabilities = []
+    for su in inp.staff_unavailabilities:
+        slots = [slot for slot in su.unavailable_slots if slot.date in dates]
+        if slots:
+            unavailabilities.append(su.model_copy(update={"unavailable_slots": slots}))
+    helpers = [
+        h.model_copy(update={
+            "customer_training_status": {
+                cid: status for cid, status in h.customer_training_status.items()
+                if cid in customer_ids
+            },
+        })
+        for h in inp.helpers
+    ]
+    return inp.model_copy(update={
+        "helpers": helpers,
+        "travel_times": [
+            tt for tt in inp.travel_times
+            if tt.from_id in customer_ids and tt.to_id in customer_ids
+        ],
+        "travel_matrix": inp.travel_matrix.subset(sorted(customer_ids))
+        if inp.travel_matrix is not None else None,
+        "staff_unavailabilities": unavailabilities,
+        "staff_constraints": [
+            sc for sc in inp.staff_constraints if sc.customer_id in customer_ids
+        ],
+    })
+
+
+@dataclass
+class CacheStats:
+    """キャッシュの統計（プロセス起動時からの累計）"""
+
+    hits: int
+    misses: int
+    # hits のうちディスクから読み込んだもの
+    disk_hits: int
+    evictions: int
+    # メモリ上のエントリ数とバイト数
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """OptimizationResult の LRU キャッシュ（スレッドセーフ）
+
+    max_bytes: メモリに保持する結果（JSON）の合計バイト数の上限
+    disk_dir: ディスク層のディレクトリ（None ならメモリのみ）
+    max_disk_bytes: ディスク層の合計バイト数の上限（None なら無制限）
+    ttl_seconds: 保存からこの秒数を過ぎた結果は使わない（None なら無期限）
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: str | Path | None = None,
+        max_disk_bytes: int | None = None,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self._max_disk_bytes = max_disk_bytes
+        self._ttl_seconds = ttl_seconds
+        # key → (保存時刻, 結果の JSON)
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._disk_hits = 0
+        self._evictions = 0
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> OptimizationResult | None:
+        """キーに対応する結果（呼び出し側で変更してよいコピー）を返す。なければ None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], now):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                data = entry[1]
+            else:
+                data = None
+        if data is None:
+            disk = self._read_disk(key, now)
+            with self._lock:
+                if disk is None:
+                    self._misses += 1
+                    return None
+                self._hits += 1
+                self._disk_hits += 1
+                self._store(key, disk[0], disk[1])
+            data = disk[1]
+        return OptimizationResult.model_validate_json(data)
+
+    def put(self, key: str, result: OptimizationResult) -> None:
+        """結果を保存する（status が Optimal 以外なら何もしない）"""
+        if result.status not in _CACHEABLE_STATUSES:
+            logger.debug("結果キャッシュに保存しない: key=%s, status=%s", key[:12], result.status)
+            return
+        data = result.model_dump_json().encode()
+        now = time.time()
+        with self._lock:
+            self._store(key, now, data)
+        self._write_disk(key, data)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                disk_hits=self._disk_hits,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def clear(self) -> None:
+        """メモリ・ディスクの全エントリを削除する（統計は残す）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._disk_dir is not None:
+            for path in self._disk_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self._ttl_seconds is not None and now - stored_at > self._ttl_seconds
+
+    def _store(self, key: str, stored_at: float, data: bytes) -> None:
+        self._remove(key)
+        if len(data) > self._max_bytes:
+            # 1件で上限を超える結果はメモリに置かない（ディスク層のみ）
+            return
+        self._entries[key] = (stored_at, data)
+        self._bytes += len(data)
+        while self._bytes > self._max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _path(self, key: str) -> Path | None:
+        return self._disk_dir / f"{key}.json" if self._disk_dir is not None else None
+
+    def _read_disk(self, key: str, now: float) -> tuple[float, bytes] | None:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            stored_at = path.stat().st_mtime
+            if self._expired(stored_at, now):
+                path.unlink(missing_ok=True)
+                return None
+            return stored_at, path.read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if path is None or self._disk_dir is None:
+            return
+        try:
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            if self._max_disk_bytes is not None:
+                self._prune_disk(self._max_disk_bytes)
+        except OSError as e:
+            # ディスク層の失敗でソルブ結果を失わない
+            logger.warning("結果キャッシュのディスク書き込みに失敗: %s", e)
+
+    def _prune_disk(self, max_disk_bytes: int) -> None:
+        assert self._disk_dir is not None
+        files = []
+        for path in self._disk_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
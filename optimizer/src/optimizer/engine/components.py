@@ -0,0 +1,79 @@
+"""連結成分分解 — 割当可能ペアの二部グラフで独立なオーダー群に分ける
+
+日付で分けた後も、性別要件・入れるスタッフ・徒歩ヘルパーの移動範囲などで
+割当可能ヘルパーの集合が交わらないオーダー群は互いに独立に解ける。
+ヘルパー–オーダーの二部グラフ（割当可能ペア = 辺）の連結成分ごとに分割する。
+
+成分間で共有されるのは次の項のみで、いずれも分割しても最適解は変わらない:
+- 稼働バランス: ヘルパーは1つの成分にしか現れない（他成分では定数）
+- 担当継続性: 対象利用者（_CONTINUITY_MIN_ORDERS 件以上）のオーダーは同じ成分にまとめる
+- 世帯リンク: リンクされたオーダーは同じ成分にまとめる
+
+NOTE: 移動時間項の係数（conflicts.travel_coefficients）は同日の全オーダーから
+計算するため、成分ごとに解くと係数が小さくなる（近似）。報告する目的関数値は
+分割前の入力で objective.evaluate_objective により再計算する。
+"""
+
+import numpy as np
+
+from optimizer.engine.feasibility import compute_feasibility_matrix, household_groups
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import _CONTINUITY_MIN_ORDERS, SoftWeights
+from optimizer.models import OptimizationInput
+
+
+def connected_components(
+    inp: OptimizationInput,
+    weights: SoftWeights | None = None,
+    table: OrderTable | None = None,
+) -> list[list[int]]:
+    """オーダーを連結成分に分ける
+
+    割当可能ヘルパーが1人もいないオーダーは（解いても未割当のため）1つの成分にまとめる。
+
+    Returns:
+        成分ごとのオーダーインデックス（昇順）。成分は最小インデックス順
+    """
+    w = weights or SoftWeights()
+    if table is None:
+        table = OrderTable(inp.orders)
+    n = len(table)
+    if n == 0:
+        return []
+    mask = compute_feasibility_matrix(inp, table).mask
+
+    parent = np.arange(n)
+
+    def find(i: int) -> int:
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return int(root)
+
+    def union_all(members: list[int]) -> None:
+        if len(members) < 2:
+            return
+        roots = {find(j) for j in members}
+        r = min(roots)
+        for other in roots:
+            parent[other] = r
+
+    for h in range(mask.shape[0]):
+        union_all(np.flatnonzero(mask[h]).tolist())
+    union_all(np.flatnonzero(~mask.any(axis=0)).tolist())
+    for members in household_groups(inp, table):
+        union_all(members)
+    if w.continuity > 0:
+        by_customer: dict[int, list[int]] = {}
+        for j, c in enumerate(table.customer_idx):
+            by_customer.setdefault(c, []).append(j)
+        for members in by_customer.values():
+            if len(members) >= _CONTINUITY_MIN_ORDERS:
+                union_all(members)
+
+    components: dict[int, list[int]] = {}
+    for j in range(n):
+        components.setdefault(find(j), []).append(j)
+    return sorted(components.values(), key=lambda m: m[0])
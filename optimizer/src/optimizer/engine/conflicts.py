@@ -0,0 +1,231 @@
+"""競合ペアインデックス — 重複・移動時間不足・徒歩距離超過ペアの一括生成
+
+従来は no_overlap / travel_time / walk_distance の各制約と目的関数の移動時間項が
+それぞれ同日オーダーの全ペア（O(n²)）を走査していた。ここでは1回のソルブにつき
+1度だけ、開始時刻順のスイープライン（先読み幅 = 最大移動時間）で時間的に近い
+ペアのみを調べ、重複・移動時間不足ペアを同時に生成する。
+
+- 重複:   s1 < e2 and s2 < e1
+- 移動:   e1 <= s2 and s2 - e1 < tt(c1, c2)（または逆方向）
+どちらも s2 < e1 + max_tt を満たすペアに限られるため、開始時刻順に並べた
+オーダーを end + max_tt まで先読みすれば漏れなく列挙できる。
+
+徒歩距離超過は時刻に依存しないため、移動時間が上限を超える利用者ペアを先に求め、
+同日にその両利用者のオーダーがある組だけを展開する。
+
+ペアはすべて (日付の初出順, 入力順の小さい方, 大きい方) で整列し、
+従来の二重ループと同じ順序・同じ向きで返す。
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from optimizer.engine.order_table import OrderTable
+from optimizer.models import TravelMatrix
+
+
+@dataclass
+class ConflictIndex:
+    """オーダーインデックス（OrderTable の行番号）で表した競合ペア"""
+
+    # 同日・時間帯重複ペア (i, j), i < j
+    overlap: list[tuple[int, int]] = field(default_factory=list)
+    # 移動時間不足ペア (前のオーダー, 後のオーダー)
+    travel: list[tuple[int, int]] = field(default_factory=list)
+    # 徒歩移動時間超過ペア (i, j), i < j（walk_limit 指定時のみ）
+    walk: list[tuple[int, int]] = field(default_factory=list)
+
+    def neighbor_sets(self, n_orders: int) -> tuple[list[set[int]], list[set[int]]]:
+        """オーダーごとの競合相手（全ヘルパー共通 / 徒歩ヘルパーのみ）"""
+        common: list[set[int]] = [set() for _ in range(n_orders)]
+        walk: list[set[int]] = [set() for _ in range(n_orders)]
+        for i, j in self.overlap + self.travel:
+            common[i].add(j)
+            common[j].add(i)
+        for i, j in self.walk:
+            walk[i].add(j)
+            walk[j].add(i)
+        return common, walk
+
+
+def customer_travel_matrix(table: OrderTable, travel: TravelMatrix) -> np.ndarray:
+    """table.customer_ids 順の移動時間行列（float64、対角と負値は 0）"""
+    tt = np.maximum(travel.take(table.customer_ids).astype(np.float64), 0.0)
+    np.fill_diagonal(tt, 0.0)
+    return tt
+
+
+def _sweep_day(
+    table: OrderTable,
+    members: list[int],
+    tt: list[list[float]],
+    max_tt: float,
+    overlap: list[tuple[int, int, int]],
+    travel: list[tuple[int, int, int, int]],
+    d: int,
+) -> None:
+    """1日分のスイープ: 開始時刻順に end + max_tt まで先読みしてペアを判定"""
+    start, end = table.start, table.end
+    cust = table.customer_idx
+
+    by_start = sorted(members, key=lambda i: (start[i], i))
+    n = len(by_start)
+    for a in range(n):
+        i = by_start[a]
+        horizon = end[i] + max_tt
+        for b in range(a + 1, n):
+            j = by_start[b]
+            if start[j] >= horizon:
+                break
+            # 判定の向きは従来実装に合わせて入力順（小さい方を o1）で行う
+            p, q = (i, j) if i < j else (j, i)
+            s1, e1, s2, e2 = start[p], end[p], start[q], end[q]
+            if s1 < e2 and s2 < e1:
+                overlap.append((d, p, q))
+                continue
+            c1, c2 = cust[p], cust[q]
+            if c1 == c2:
+                continue
+            if e1 <= s2 and (s2 - e1) < tt[c1][c2]:
+                travel.append((d, p, q, 0))
+            elif e2 <= s1 and (s1 - e2) < tt[c2][c1]:
+                travel.append((d, p, q, 1))
+
+
+def _walk_pairs(
+    table: OrderTable,
+    tt: np.ndarray,
+    walk_limit: float,
+) -> list[tuple[int, int]]:
+    """移動時間が walk_limit を超える利用者ペアを持つ同日オーダーペア"""
+    over = tt > walk_limit
+    over |= over.T
+    far: dict[int, set[int]] = {
+        int(ca): set(np.flatnonzero(over[ca]).tolist()) for ca in np.flatnonzero(over.any(axis=1))
+    }
+    if not far:
+        return []
+
+    cust = table.customer_idx
+    keyed: list[tuple[int, int, int]] = []
+    for d, members in enumerate(table.by_date):
+        by_customer: dict[int, list[int]] = {}
+        for i in members:
+            by_customer.setdefault(cust[i], []).append(i)
+        for ca, orders_a in by_customer.items():
+            for cb in far.get(ca, ()):
+                if cb <= ca or cb not in by_customer:
+                    continue
+                for i in orders_a:
+                    for j in by_customer[cb]:
+                        keyed.append((d, i, j) if i < j else (d, j, i))
+    keyed.sort()
+    return [(i, j) for _, i, j in keyed]
+
+
+def build_conflict_index(
+    table: OrderTable,
+    travel_matrix: TravelMatrix,
+    walk_limit: float | None = None,
+) -> ConflictIndex:
+    """重複・移動時間不足（・徒歩距離超過）ペアを1パスで生成する
+
+    walk_limit が None の場合（徒歩スタッフがいない場合）は徒歩ペアを生成しない。
+    """
+    tt = customer_travel_matrix(table, travel_matrix)
+    # 先読み幅 = 対象利用者間の最大移動時間
+    max_tt = float(tt.max()) if tt.size else 0.0
+    rows = tt.tolist()
+    overlap: list[tuple[int, int, int]] = []
+    travel: list[tuple[int, int, int, int]] = []
+    for d, members in enumerate(table.by_date):
+        _sweep_day(table, members, rows, max_tt, overlap, travel, d)
+
+    overlap.sort()
+    travel.sort()
+    return ConflictIndex(
+        overlap=[(p, q) for _, p, q in overlap],
+        travel=[(q, p) if flipped else (p, q) for _, p, q, flipped in travel],
+        walk=_walk_pairs(table, tt, walk_limit) if walk_limit is not None else [],
+    )
+
+
+def travel_coefficients(
+    table: OrderTable,
+    travel_matrix: TravelMatrix,
+) -> list[float]:
+    """移動時間項のオーダー別係数 Σ tt/2（_build_objective の線形近似）
+
+    同日・異利用者ペア (o1, o2)（入力順で o1 が先）ごとに tt(c1, c2)/2 を
+    両方のオーダーへ加算した値。日ごとに利用者単位の累積件数と移動時間行列の
+    積で求めるため、ペア数ではなくオーダー数 × 当日利用者数に比例する。
+    """
+    n_customers = len(table.customer_ids)
+    coef = np.zeros(len(table), dtype=np.float64)
+    if n_customers == 0:
+        return coef.tolist()
+
+    # 同一利用者ペア（対角）は対象外
+    tt = customer_travel_matrix(table, travel_matrix)
+
+    cust = np.asarray(table.customer_idx, dtype=np.intp)
+    for members in table.by_date:
+        rows = np.asarray(members, dtype=np.intp)
+        present, local = np.unique(cust[rows], return_inverse=True)
+        sub = tt[np.ix_(present, present)]
+        onehot = np.zeros((len(rows), len(present)), dtype=np.float64)
+        onehot[np.arange(len(rows)), local] = 1.0
+        # before[k, c]: 当日 k 番目より前にある利用者 c のオーダー数
+        before = np.cumsum(onehot, axis=0) - onehot
+        after = onehot.sum(axis=0) - before - onehot
+        coef[rows] = (
+            (before * sub[:, local].T).sum(axis=1) + (after * sub[local, :]).sum(axis=1)
+        ) / 2
+    return coef.tolist()
+
+
+def overlap_cliques(
+    table: OrderTable,
+    conflicts: ConflictIndex,
+) -> tuple[list[list[int]], list[tuple[int, int]]]:
+    """重複グラフ（区間グラフ）の極大クリークを日ごとに列挙する
+
+    区間グラフの極大クリークは「ある時刻に同時に進行中のオーダー集合」であり、
+    開始→終了イベントの切り替わり直前の進行中集合として1回のスイープで得られる。
+    同時刻の終了は開始より先に処理する（接する区間は重複しない: s1 < e2 and s2 < e1）。
+
+    所要時間が0以下の退化オーダーは区間として扱えないため、それを含む
+    重複ペアはクリークに含めず、ペアのまま返す。
+
+    Returns:
+        (クリークのリスト（各クリークはオーダーインデックスの昇順、要素数2以上）,
+         退化オーダーを含む重複ペア)
+    """
+    start, end = table.start, table.end
+    cliques: list[list[int]] = []
+    for members in table.by_date:
+        events: list[tuple[int, int, int]] = []  # (時刻, 0=終了/1=開始, オーダー)
+        for i in members:
+            if end[i] > start[i]:
+                events.append((start[i], 1, i))
+                events.append((end[i], 0, i))
+        events.sort()
+
+        active: set[int] = set()
+        grew = False
+        for _, kind, i in events:
+            if kind == 1:
+                active.add(i)
+                grew = True
+            else:
+                if grew and len(active) >= 2:
+                    cliques.append(sorted(active))
+                grew = False
+                active.discard(i)
+
+    leftover = [
+        (i, j) for i, j in conflicts.overlap
+        if end[i] <= start[i] or end[j] <= start[j]
+    ]
+    return cliques, leftover
@@ -1,16 +1,15 @@
-"""ハード制約の定義"""
+"""ハード制約の定義
+
+資格(E)・NGスタッフ(H)・入れるスタッフ/勤務可能時間(I)・希望休(J)・
+研修中(L)・性別(N) は compute_feasibility_matrix による変数の枝刈りで表現する
+（割当不可ペアの決定変数を生成しない）。ここでは変数間の関係を表す制約のみ追加する。
+"""
 
 import pulp
 
-from optimizer.engine.solver import _orders_overlap, _time_to_minutes
-from optimizer.models import (
-    DayOfWeek,
-    GenderRequirement,
-    OptimizationInput,
-    StaffConstraintType,
-    TrainingStatus,
-    TransportationType,
-)
+from optimizer.engine.conflicts import ConflictIndex, build_conflict_index, overlap_cliques
+from optimizer.engine.order_table import OrderTable
+from optimizer.models import OptimizationInput, TransportationType, TravelMatrix
 
 
 MAX_WALK_TRAVEL_MINUTES = 30
@@ -20,189 +19,81 @@ def add_all_hard_constraints(
     prob: pulp.LpProblem,
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
-    travel_lookup: dict[tuple[str, str], float],
+    travel_matrix: TravelMatrix,
+    table: OrderTable | None = None,
+    conflicts: ConflictIndex | None = None,
+    no_overlap: str = "pairwise",
 ) -> None:
-    """全ハード制約を追加"""
-    _add_qualification_constraint(prob, x, inp)
-    _add_no_overlap_constraint(prob, x, inp)
-    _add_ng_staff_constraint(prob, x, inp)
-    _add_allowed_staff_constraint(prob, x, inp)
-    _add_gender_constraint(prob, x, inp)
-    _add_availability_constraint(prob, x, inp)
-    _add_unavailability_constraint(prob, x, inp)
-    _add_travel_time_constraint(prob, x, inp, travel_lookup)
-    _add_household_constraint(prob, x, inp)
-    _add_training_constraint(prob, x, inp)
-    _add_walk_distance_constraint(prob, x, inp, travel_lookup)
-
+    """全ハード制約を追加
 
-def _requires_physical_care_cert(service_type: str, inp: OptimizationInput) -> bool:
-    """service_type_configsのマスタデータで資格要否を判定する"""
-    if inp.service_type_configs:
-        config_map = {c.code: c for c in inp.service_type_configs}
-        config = config_map.get(service_type)
-        if config is not None:
-            return config.requires_physical_care_cert
-    return False
+    x は compute_feasibility_matrix で枝刈り済みであること（割当不可ペアの
+    x == 0 行はここでは追加しない）。table / conflicts 未指定時は inp から構築する。
+    no_overlap="clique" の場合、重複禁止を極大クリーク単位の制約で表す。
+    """
+    if table is None:
+        table = OrderTable(inp.orders)
+    if conflicts is None:
+        conflicts = build_conflict_index_for(inp, table, travel_matrix)
+    _add_no_overlap_constraint(prob, x, inp, table, conflicts, no_overlap)
+    _add_travel_time_constraint(prob, x, inp, table, conflicts)
+    _add_household_constraint(prob, x, inp)
+    _add_walk_distance_constraint(prob, x, inp, table, conflicts)
 
 
-def _add_qualification_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
+def build_conflict_index_for(
     inp: OptimizationInput,
-) -> None:
-    """E: 資格制約 — 身体介護・混合サービスに無資格者を割り当てない"""
-    for h in inp.helpers:
-        if not h.can_physical_care:
-            for o in inp.orders:
-                if _requires_physical_care_cert(o.service_type, inp):
-                    if (h.id, o.id) in x:
-                        prob += x[h.id, o.id] == 0, f"qual_{h.id}_{o.id}"
+    table: OrderTable,
+    travel_matrix: TravelMatrix,
+) -> ConflictIndex:
+    """競合ペアインデックスを構築（徒歩スタッフがいる場合のみ徒歩ペアも生成）"""
+    has_walk = any(h.transportation == TransportationType.WALK for h in inp.helpers)
+    return build_conflict_index(
+        table, travel_matrix, MAX_WALK_TRAVEL_MINUTES if has_walk else None,
+    )
 
 
 def _add_no_overlap_constraint(
     prob: pulp.LpProblem,
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
+    table: OrderTable,
+    conflicts: ConflictIndex,
+    mode: str = "pairwise",
 ) -> None:
     """F: 重複禁止 — 同一ヘルパーが同時刻に複数箇所にアサイン不可
 
-    最適化: 同一日付のオーダーのみペアリング（異なる日付は重複不可能）
-    """
-    # 日付でグループ化して、同日のオーダーペアのみチェック
-    orders_by_date: dict[str, list] = {}
-    for o in inp.orders:
-        orders_by_date.setdefault(o.date, []).append(o)
+    重複ペアは ConflictIndex のスイープで事前計算済み（ヘルパー非依存）
 
-    # 重複ペアを事前計算（ヘルパー非依存）
-    overlap_pairs: list[tuple] = []
-    for date_orders in orders_by_date.values():
-        for i, o1 in enumerate(date_orders):
-            for o2 in date_orders[i + 1 :]:
-                if _orders_overlap(o1, o2):
-                    overlap_pairs.append((o1, o2))
+    mode="clique": 同時刻に進行中のオーダー集合（区間グラフの極大クリーク）ごとに
+    Σ x[h, o] <= 1 を1本だけ追加する。ペア制約と実行可能解は同じで、
+    行数が減り、LP緩和も強くなる（3件同時重複で x=0.5 ずつの解を排除）。
+    """
+    ids = table.ids
+    if mode == "clique":
+        cliques, leftover = overlap_cliques(table, conflicts)
+        for h in inp.helpers:
+            seen: set[tuple[str, ...]] = set()
+            for k, clique in enumerate(cliques):
+                members = tuple(ids[i] for i in clique if (h.id, ids[i]) in x)
+                if len(members) < 2 or members in seen:
+                    continue
+                seen.add(members)
+                prob += (
+                    pulp.lpSum(x[h.id, oid] for oid in members) <= 1,
+                    f"no_overlap_clq_{h.id}_{k}",
+                )
+        # 所要時間0以下のオーダーを含むペアは従来どおりペア制約
+        overlap_pairs = [(ids[i], ids[j]) for i, j in leftover]
+    else:
+        overlap_pairs = [(ids[i], ids[j]) for i, j in conflicts.overlap]
 
     # 各ヘルパーに対して重複ペア制約を追加
     for h in inp.helpers:
-        for o1, o2 in overlap_pairs:
-            v1 = x.get((h.id, o1.id))
-            v2 = x.get((h.id, o2.id))
+        for oid1, oid2 in overlap_pairs:
+            v1 = x.get((h.id, oid1))
+            v2 = x.get((h.id, oid2))
             if v1 is not None and v2 is not None:
-                prob += v1 + v2 <= 1, f"no_overlap_{h.id}_{o1.id}_{o2.id}"
-
-
-def _add_ng_staff_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
-    inp: OptimizationInput,
-) -> None:
-    """H: NGスタッフ回避 — staff_constraintsのNG組み合わせを禁止"""
-    ng_pairs: set[tuple[str, str]] = set()
-    for sc in inp.staff_constraints:
-        if sc.constraint_type == StaffConstraintType.NG:
-            ng_pairs.add((sc.customer_id, sc.staff_id))
-
-    for o in inp.orders:
-        for h in inp.helpers:
-            if (o.customer_id, h.id) in ng_pairs and (h.id, o.id) in x:
-                prob += x[h.id, o.id] == 0, f"ng_{h.id}_{o.id}"
-
-
-def _add_allowed_staff_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
-    inp: OptimizationInput,
-) -> None:
-    """I: 入れるスタッフ制約 — allowed_staff_ids が空でない場合、リスト外スタッフの割り当てを禁止"""
-    # 利用者ごとに allowed スタッフIDセットを構築
-    allowed_by_customer: dict[str, set[str]] = {}
-    for sc in inp.staff_constraints:
-        if sc.constraint_type == StaffConstraintType.ALLOWED:
-            allowed_by_customer.setdefault(sc.customer_id, set()).add(sc.staff_id)
-
-    for o in inp.orders:
-        if o.customer_id not in allowed_by_customer:
-            continue  # allowed 未設定 = 制限なし
-        allowed_ids = allowed_by_customer[o.customer_id]
-        for h in inp.helpers:
-            if h.id not in allowed_ids and (h.id, o.id) in x:
-                prob += x[h.id, o.id] == 0, f"allowed_{h.id}_{o.id}"
-
-
-def _add_gender_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
-    inp: OptimizationInput,
-) -> None:
-    """N: 性別制約 — gender_requirementと一致しないスタッフを割り当てない"""
-    customer_map = {c.id: c for c in inp.customers}
-    for o in inp.orders:
-        c = customer_map[o.customer_id]
-        if c.gender_requirement == GenderRequirement.ANY:
-            continue
-        for h in inp.helpers:
-            if h.gender.value != c.gender_requirement.value and (h.id, o.id) in x:
-                prob += x[h.id, o.id] == 0, f"gender_{h.id}_{o.id}"
-
-
-def _add_availability_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
-    inp: OptimizationInput,
-) -> None:
-    """I: 勤務可能時間制約 — availability外はアサイン不可"""
-    for h in inp.helpers:
-        if not h.weekly_availability:
-            continue  # 未定義 → 常時可能
-        for o in inp.orders:
-            dow = o.day_of_week
-            slots = h.weekly_availability.get(dow, [])
-            if (h.id, o.id) not in x:
-                continue  # 既に枝刈り済み
-            if not slots:
-                prob += x[h.id, o.id] == 0, f"avail_day_{h.id}_{o.id}"
-                continue
-
-            order_start = _time_to_minutes(o.start_time)
-            order_end = _time_to_minutes(o.end_time)
-            covered = any(
-                _time_to_minutes(s.start_time) <= order_start
-                and order_end <= _time_to_minutes(s.end_time)
-                for s in slots
-            )
-            if not covered:
-                prob += x[h.id, o.id] == 0, f"avail_time_{h.id}_{o.id}"
-
-
-def _add_unavailability_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
-    inp: OptimizationInput,
-) -> None:
-    """J: 希望休制約 — unavailable_slotsに該当する日時はアサイン不可"""
-    for su in inp.staff_unavailabilities:
-        for slot in su.unavailable_slots:
-            for o in inp.orders:
-                if o.date != slot.date:
-                    continue
-                if (su.staff_id, o.id) not in x:
-                    continue
-                if slot.all_day:
-                    prob += (
-                        x[su.staff_id, o.id] == 0,
-                        f"unavail_{su.staff_id}_{o.id}_{slot.date}",
-                    )
-                else:
-                    if slot.start_time and slot.end_time:
-                        us = _time_to_minutes(slot.start_time)
-                        ue = _time_to_minutes(slot.end_time)
-                        os_ = _time_to_minutes(o.start_time)
-                        oe = _time_to_minutes(o.end_time)
-                        if os_ < ue and us < oe:
-                            prob += (
-                                x[su.staff_id, o.id] == 0,
-                                f"unavail_t_{su.staff_id}_{o.id}_{slot.date}",
-                            )
+                prob += v1 + v2 <= 1, f"no_overlap_{h.id}_{oid1}_{oid2}"
 
 
 def _add_household_constraint(
@@ -210,7 +101,11 @@ def _add_household_constraint(
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
 ) -> None:
-    """K: 世帯連続訪問制約 — linked_orderは同一ヘルパーが担当"""
+    """K: 世帯連続訪問制約 — linked_orderは同一ヘルパーが担当
+
+    片方のオーダーにしか割当できないヘルパーは枝刈りで両方から除外済みのため、
+    両方の変数があるヘルパーに x[h, o1] == x[h, o2] を追加するだけでよい。
+    """
     order_map = {o.id: o for o in inp.orders}
     seen: set[tuple[str, str]] = set()
 
@@ -226,17 +121,14 @@ def _add_household_constraint(
                 v2 = x.get((h.id, o.linked_order_id))
                 if v1 is not None and v2 is not None:
                     prob += v1 == v2, f"linked_{h.id}_{o.id}_{o.linked_order_id}"
-                elif v1 is not None:
-                    prob += v1 == 0, f"linked_force0_{h.id}_{o.id}_{o.linked_order_id}"
-                elif v2 is not None:
-                    prob += v2 == 0, f"linked_force0_{h.id}_{o.linked_order_id}_{o.id}"
 
 
 def _add_travel_time_constraint(
     prob: pulp.LpProblem,
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
-    travel_lookup: dict[tuple[str, str], float],
+    table: OrderTable,
+    conflicts: ConflictIndex,
 ) -> None:
     """G: 移動時間確保 — 連続訪問間の移動時間を確保
 
@@ -244,33 +136,12 @@ def _add_travel_time_constraint(
     前のオーダー終了時刻 + 移動時間 ≤ 次のオーダー開始時刻
     でなければ、両方に割当不可。
 
-    最適化: 日付でグループ化 + 移動時間不足ペアを事前計算
+    移動時間不足ペアは ConflictIndex のスイープで事前計算済み（ヘルパー非依存）
     """
-    # 日付でグループ化
-    orders_by_date: dict[str, list] = {}
-    for o in inp.orders:
-        orders_by_date.setdefault(o.date, []).append(o)
-
-    # 移動時間不足ペアを事前計算（ヘルパー非依存）
-    travel_conflict_pairs: list[tuple[str, str, str]] = []  # (o1.id, o2.id, constraint_name_suffix)
-    for date_orders in orders_by_date.values():
-        for i, o1 in enumerate(date_orders):
-            for o2 in date_orders[i + 1 :]:
-                if o1.customer_id == o2.customer_id:
-                    continue
-
-                e1 = _time_to_minutes(o1.end_time)
-                s2 = _time_to_minutes(o2.start_time)
-                e2 = _time_to_minutes(o2.end_time)
-                s1 = _time_to_minutes(o1.start_time)
-
-                tt_1to2 = travel_lookup.get((o1.customer_id, o2.customer_id), 0.0)
-                tt_2to1 = travel_lookup.get((o2.customer_id, o1.customer_id), 0.0)
-
-                if e1 <= s2 and (s2 - e1) < tt_1to2:
-                    travel_conflict_pairs.append((o1.id, o2.id, f"{o1.id}_{o2.id}"))
-                elif e2 <= s1 and (s1 - e2) < tt_2to1:
-                    travel_conflict_pairs.append((o2.id, o1.id, f"{o2.id}_{o1.id}"))
+    ids = table.ids
+    travel_conflict_pairs = [
+        (ids[i], ids[j], f"{ids[i]}_{ids[j]}") for i, j in conflicts.travel
+    ]
 
     # 各ヘルパーに対して制約追加
     for h in inp.helpers:
@@ -281,27 +152,12 @@ def _add_travel_time_constraint(
                 prob += v1 + v2 <= 1, f"travel_{h.id}_{suffix}"
 
 
-def _add_training_constraint(
-    prob: pulp.LpProblem,
-    x: dict[tuple[str, str], pulp.LpVariable],
-    inp: OptimizationInput,
-) -> None:
-    """L: 研修中スタッフ制約 — not_visited/training状態は単独訪問不可（staff_count=1のオーダー）"""
-    for h in inp.helpers:
-        for o in inp.orders:
-            if o.staff_count > 1:
-                continue  # 複数人体制なら研修中でもOK
-            training = h.customer_training_status.get(o.customer_id)
-            if training in (TrainingStatus.NOT_VISITED, TrainingStatus.TRAINING):
-                if (h.id, o.id) in x:
-                    prob += x[h.id, o.id] == 0, f"training_{h.id}_{o.id}"
-
-
 def _add_walk_distance_constraint(
     prob: pulp.LpProblem,
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
-    travel_lookup: dict[tuple[str, str], float],
+    table: OrderTable,
+    conflicts: ConflictIndex,
 ) -> None:
     """M: 徒歩移動距離制約 — 徒歩スタッフは移動時間が上限を超える訪問ペアに割当不可
 
@@ -313,22 +169,9 @@ def _add_walk_distance_constraint(
     if not walk_helpers:
         return
 
-    # 日付でグループ化
-    orders_by_date: dict[str, list] = {}
-    for o in inp.orders:
-        orders_by_date.setdefault(o.date, []).append(o)
-
-    # 徒歩移動時間超過ペアを事前計算
-    walk_conflict_pairs: list[tuple[str, str, str]] = []
-    for date_orders in orders_by_date.values():
-        for i, o1 in enumerate(date_orders):
-            for o2 in date_orders[i + 1 :]:
-                if o1.customer_id == o2.customer_id:
-                    continue
-                tt_1to2 = travel_lookup.get((o1.customer_id, o2.customer_id), 0.0)
-                tt_2to1 = travel_lookup.get((o2.customer_id, o1.customer_id), 0.0)
-                if tt_1to2 > MAX_WALK_TRAVEL_MINUTES or tt_2to1 > MAX_WALK_TRAVEL_MINUTES:
-                    walk_conflict_pairs.append((o1.id, o2.id, f"{o1.id}_{o2.id}"))
+    # 徒歩移動時間超過ペアは ConflictIndex で利用者ペアから展開済み
+    ids = table.ids
+    walk_conflict_pairs = [(ids[i], ids[j], f"{ids[i]}_{ids[j]}") for i, j in conflicts.walk]
 
     # 徒歩スタッフにのみ制約追加
     for h in walk_helpers:
@@ -0,0 +1,248 @@
+"""CP-SAT バックエンド — オプショナル区間変数によるスケジューリング定式化
+
+MIP（solver._build_model）と同じハード制約・ソフト目的（SoftWeights）を
+OR-Tools CP-SAT で表す。SolverOptions(backend="cpsat") で選択する。
+
+- F: 重複禁止は (helper, order) ごとのオプショナル区間変数（在否 = x[h, o]）を
+  ヘルパー・日ごとに AddNoOverlap でまとめる（重複ペア行が不要になる）。
+  所要時間0以下の退化オーダーは区間として扱えないため、従来どおりペア制約
+- G/M: 移動時間・徒歩距離はペア依存の非対称な間隔のため、競合ペアの
+  x[h, o1] + x[h, o2] <= 1 のまま
+- K: 世帯リンクは x[h, o1] == x[h, o2]
+- 割当可能性（資格・NG・勤務時間・希望休など）は変数の枝刈りで表現
+
+CP-SAT は整数係数のみ扱うため、目的関数の係数は _OBJECTIVE_SCALE 倍して
+丸め、preferred_hours の分換算も整数に丸める。結果の objective_value は
+objective.evaluate_objective で割当から再計算した MIP と同じ尺度の値を返す。
+
+NOTE: 稼働バランス項（分単位の over/under）は CP-SAT の下界が弱く、良い解は
+早く見つかっても最適性の証明に時間がかかる。制限時間内は "Feasible" で返ることが多い。
+"""
+
+import logging
+import time
+from typing import Any
+
+import numpy as np
+
+from optimizer.engine.conflicts import overlap_cliques, travel_coefficients
+from optimizer.engine.constraints import build_conflict_index_for
+from optimizer.engine.feasibility import compute_feasibility_matrix
+from optimizer.engine.objective import evaluate_objective
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import (
+    _CONTINUITY_MIN_ORDERS,
+    _COVERAGE_PENALTY,
+    SoftWeights,
+    SolverOptions,
+    _build_travel_matrix,
+)
+from optimizer.models import (
+    Assignment,
+    OptimizationInput,
+    OptimizationResult,
+    StaffConstraintType,
+    TransportationType,
+)
+
+logger = logging.getLogger(__name__)
+
+# 目的関数係数の整数化スケール（移動時間係数は 0.05 分刻みのため 100 倍で誤差なし）
+_OBJECTIVE_SCALE = 100
+
+
+def _import_cp_model() -> Any:
+    try:
+        from ortools.sat.python import cp_model
+    except ImportError as e:  # pragma: no cover - 依存が入っていない環境のみ
+        raise RuntimeError(
+            "ortools が必要です（pip install visitcare-optimizer[ortools]）"
+        ) from e
+    return cp_model
+
+
+def _scaled(value: float) -> int:
+    return int(round(value * _OBJECTIVE_SCALE))
+
+
+def solve_with_cpsat(
+    inp: OptimizationInput,
+    time_limit_seconds: int = 180,
+    weights: SoftWeights | None = None,
+    options: SolverOptions | None = None,
+    initial: set[tuple[str, str]] | None = None,
+) -> OptimizationResult:
+    """単一期間の最適化を CP-SAT で実行する（_solve_single と同じ結果形式）
+
+    initial: 初期値1とする (helper_id, order_id) ペア（修復済み）。指定時は全 x にヒントを与える。
+    """
+    cp_model = _import_cp_model()
+    w = weights or SoftWeights()
+    opts = options or SolverOptions()
+    start_time = time.time()
+
+    helpers, orders = inp.helpers, inp.orders
+    table = OrderTable(orders)
+    travel_matrix = _build_travel_matrix(inp)
+    conflicts = build_conflict_index_for(inp, table, travel_matrix)
+    mask = compute_feasibility_matrix(inp, table).mask
+
+    model = cp_model.CpModel()
+    objective: list[tuple[Any, int]] = []
+
+    # --- 決定変数: feasibleペアのみ ---
+    x: dict[tuple[int, int], Any] = {}
+    for h, j in zip(*(a.tolist() for a in np.nonzero(mask))):
+        x[h, j] = model.NewBoolVar(f"x_{helpers[h].id}_{orders[j].id}")
+        if initial is not None:
+            model.AddHint(x[h, j], (helpers[h].id, orders[j].id) in initial)
+    x_by_order: list[list[Any]] = [[] for _ in orders]
+    x_by_helper: list[list[tuple[int, Any]]] = [[] for _ in helpers]
+    for (h, j), v in x.items():
+        x_by_order[j].append(v)
+        x_by_helper[h].append((j, v))
+
+    # --- カバレッジ: Σx <= staff_count, 不足人数 × ペナルティ ---
+    for j, o in enumerate(orders):
+        if x_by_order[j]:
+            model.Add(cp_model.LinearExpr.Sum(x_by_order[j]) <= o.staff_count)
+        # unmet = staff_count - Σx（定数項は目的関数から省き、Σx の係数で表す）
+        for v in x_by_order[j]:
+            objective.append((v, -_scaled(_COVERAGE_PENALTY)))
+    coverage_offset = sum(o.staff_count for o in orders) * _scaled(_COVERAGE_PENALTY)
+
+    # --- F: 重複禁止（区間変数 + AddNoOverlap） ---
+    _, degenerate_pairs = overlap_cliques(table, conflicts)
+    for h in range(len(helpers)):
+        intervals_by_date: dict[int, list[Any]] = {}
+        for j, v in x_by_helper[h]:
+            s, e = table.start[j], table.end[j]
+            if e <= s:
+                continue
+            intervals_by_date.setdefault(table.date_idx[j], []).append(
+                model.NewOptionalFixedSizeIntervalVar(s, e - s, v, f"iv_{h}_{j}")
+            )
+        for intervals in intervals_by_date.values():
+            if len(intervals) >= 2:
+                model.AddNoOverlap(intervals)
+
+    # --- F（退化オーダー）/ G: 移動時間 / M: 徒歩距離 — ペア制約 ---
+    walk = [h.transportation == TransportationType.WALK for h in helpers]
+    pair_groups = [(degenerate_pairs, False), (conflicts.travel, False), (conflicts.walk, True)]
+    for pairs, walk_only in pair_groups:
+        for i, j in pairs:
+            for h in range(len(helpers)):
+                if walk_only and not walk[h]:
+                    continue
+                v1, v2 = x.get((h, i)), x.get((h, j))
+                if v1 is not None and v2 is not None:
+                    model.AddBoolOr([v1.Not(), v2.Not()])
+
+    # --- K: 世帯連続訪問 ---
+    for i, o in enumerate(orders):
+        j = table.index.get(o.linked_order_id) if o.linked_order_id else None
+        if j is None or j == i:
+            continue
+        for h in range(len(helpers)):
+            v1, v2 = x.get((h, i)), x.get((h, j))
+            if v1 is not None and v2 is not None:
+                model.Add(v1 == v2)
+
+    # --- 目的関数 1. 移動時間 ---
+    if w.travel > 0:
+        coef = travel_coefficients(table, travel_matrix)
+        for (h, j), v in x.items():
+            if coef[j] > 0:
+                objective.append((v, _scaled(w.travel * coef[j])))
+
+    # --- 目的関数 2. 推奨スタッフ優先 ---
+    if w.preferred_staff > 0:
+        preferred_by_customer: dict[str, set[str]] = {}
+        for sc in inp.staff_constraints:
+            if sc.constraint_type == StaffConstraintType.PREFERRED:
+                preferred_by_customer.setdefault(sc.customer_id, set()).add(sc.staff_id)
+        for (h, j), v in x.items():
+            preferred = preferred_by_customer.get(orders[j].customer_id)
+            if preferred is not None and helpers[h].id not in preferred:
+                objective.append((v, _scaled(w.preferred_staff)))
+
+    # --- 目的関数 3. 稼働バランス ---
+    if w.workload_balance > 0:
+        horizon = sum(max(d, 0) for d in table.duration)
+        for h, helper in enumerate(helpers):
+            total = cp_model.LinearExpr.WeightedSum(
+                [v for _, v in x_by_helper[h]], [table.duration[j] for j, _ in x_by_helper[h]],
+            )
+            over = model.NewIntVar(0, horizon, f"over_{helper.id}")
+            under = model.NewIntVar(0, max(horizon, round(helper.preferred_hours.min * 60)),
+                                    f"under_{helper.id}")
+            model.Add(over >= total - round(helper.preferred_hours.max * 60))
+            model.Add(under >= round(helper.preferred_hours.min * 60) - total)
+            objective.append((over, _scaled(w.workload_balance * 2.0)))
+            objective.append((under, _scaled(w.workload_balance)))
+
+    # --- 目的関数 4. 担当継続性 ---
+    if w.continuity > 0:
+        orders_by_customer: dict[int, list[int]] = {}
+        for j, c in enumerate(table.customer_idx):
+            orders_by_customer.setdefault(c, []).append(j)
+        for c, members in orders_by_customer.items():
+            if len(members) < _CONTINUITY_MIN_ORDERS:
+                continue
+            for h in range(len(helpers)):
+                xs = [x[h, j] for j in members if (h, j) in x]
+                if not xs:
+                    continue
+                y = model.NewBoolVar(f"y_{c}_{h}")
+                for v in xs:
+                    model.AddImplication(v, y)
+                objective.append((y, _scaled(w.continuity)))
+
+    model.Minimize(
+        cp_model.LinearExpr.WeightedSum([v for v, _ in objective], [c for _, c in objective])
+        + coverage_offset
+    )
+
+    # --- ソルバー実行 ---
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(time_limit_seconds)
+    solver.parameters.num_workers = opts.cpsat_workers
+    status_code = solver.Solve(model)
+    solve_time = time.time() - start_time
+
+    status = {
+        cp_model.OPTIMAL: "Optimal",
+        cp_model.FEASIBLE: "Feasible",
+        cp_model.INFEASIBLE: "Infeasible",
+        cp_model.UNKNOWN: "Not Solved",
+    }.get(status_code, "Unknown")
+    logger.debug(
+        "cpsat: status=%s, time=%.3fs, bound=%.1f",
+        status, solve_time, solver.BestObjectiveBound() / _OBJECTIVE_SCALE,
+    )
+
+    assignments: list[Assignment] = []
+    unassigned_count = 0
+    partial_count = 0
+    objective_value = 0.0
+    if status in ("Optimal", "Feasible"):
+        for j, o in enumerate(orders):
+            staff_ids = [
+                helpers[h].id for h in range(len(helpers))
+                if (h, j) in x and solver.BooleanValue(x[h, j])
+            ]
+            assignments.append(Assignment(order_id=o.id, staff_ids=staff_ids))
+            if len(staff_ids) == 0:
+                unassigned_count += 1
+            elif len(staff_ids) < o.staff_count:
+                partial_count += 1
+        objective_value = evaluate_objective(inp, assignments, w).total
+
+    return OptimizationResult(
+        assignments=assignments,
+        objective_value=objective_value,
+        solve_time_seconds=round(solve_time, 3),
+        status=status,
+        unassigned_count=unassigned_count,
+        partial_count=partial_count,
+    )
@@ -0,0 +1,264 @@
+"""割当可能性行列 — NumPyによる (helper × order) の一括判定
+
+_compute_feasible_pairs の判定（資格・性別・NG・勤務可能日・勤務時間帯・
+入れるスタッフ・研修中・希望休・世帯リンク）をヘルパー属性・オーダー属性の
+配列に変換し、ブール行列として1パスで求める。
+オーダーの時刻・曜日は OrderTable の整数表現を使う。
+
+ここで除外したペアは決定変数自体を生成しないため、constraints 側で
+x == 0 の行を追加する必要はない（変数消去）。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from optimizer.engine.order_table import DAY_INDEX, OrderTable, time_to_minutes
+from optimizer.models import (
+    Gender,
+    GenderRequirement,
+    OptimizationInput,
+    StaffConstraintType,
+    TrainingStatus,
+)
+
+# 属性ビット: ヘルパーは「持っている属性」、オーダーは「要求する属性」
+_BIT_CERT = np.uint8(1)
+_BIT_MALE = np.uint8(2)
+_BIT_FEMALE = np.uint8(4)
+
+_GENDER_BIT = {Gender.MALE.value: _BIT_MALE, Gender.FEMALE.value: _BIT_FEMALE}
+
+
+@dataclass
+class FeasibilityMatrix:
+    """割当可能性行列
+
+    mask[i, j] が True のとき helpers[i] を orders[j] に割当可能。
+    行・列の順序は inp.helpers / inp.orders と同じ。
+    """
+
+    helper_ids: list[str]
+    order_ids: list[str]
+    mask: np.ndarray  # shape (H, O), dtype=bool
+
+    def pairs(self) -> set[tuple[str, str]]:
+        """(helper_id, order_id) ペアの集合に変換"""
+        hi, oi = np.nonzero(self.mask)
+        h_ids, o_ids = self.helper_ids, self.order_ids
+        return {(h_ids[h], o_ids[o]) for h, o in zip(hi.tolist(), oi.tolist())}
+
+    def order_counts(self) -> dict[str, int]:
+        """オーダーごとの割当可能ヘルパー数"""
+        counts = self.mask.sum(axis=0).tolist()
+        return dict(zip(self.order_ids, counts))
+
+    def helpers_for_order(self) -> dict[str, list[str]]:
+        """order_id → 割当可能な helper_id のリスト（inp.helpers 順）"""
+        h_ids = self.helper_ids
+        return {
+            oid: [h_ids[h] for h in np.flatnonzero(self.mask[:, j]).tolist()]
+            for j, oid in enumerate(self.order_ids)
+        }
+
+
+def _attribute_mask(inp: OptimizationInput) -> np.ndarray:
+    """資格・性別: オーダーの要求ビットがヘルパーの保有ビットに含まれるか"""
+    cert_required = (
+        {c.code for c in inp.service_type_configs if c.requires_physical_care_cert}
+        if inp.service_type_configs else set()
+    )
+    gender_req = {c.id: c.gender_requirement for c in inp.customers}
+
+    helper_bits = np.fromiter(
+        (
+            (_BIT_CERT if h.can_physical_care else 0) | _GENDER_BIT[h.gender.value]
+            for h in inp.helpers
+        ),
+        dtype=np.uint8, count=len(inp.helpers),
+    )
+
+    order_bits = np.zeros(len(inp.orders), dtype=np.uint8)
+    for j, o in enumerate(inp.orders):
+        bits = _BIT_CERT if o.service_type in cert_required else 0
+        req = gender_req.get(o.customer_id, GenderRequirement.ANY)
+        if req != GenderRequirement.ANY:
+            bits |= _GENDER_BIT[req.value]
+        order_bits[j] = bits
+
+    return (order_bits[None, :] & ~helper_bits[:, None]) == 0
+
+
+def _staff_constraint_mask(inp: OptimizationInput, table: OrderTable) -> np.ndarray:
+    """NG・入れるスタッフ: (helper, customer) 行列をオーダー列に展開する
+
+    NG: 該当ペアを除外。ALLOWED: 設定のある利用者はリスト外のヘルパーを除外
+    （リストのヘルパーが inp.helpers にいなければ全員除外）。
+    """
+    customer_index = {cid: c for c, cid in enumerate(table.customer_ids)}
+    order_customer = np.asarray(table.customer_idx, dtype=np.intp)
+    helper_index = {h.id: i for i, h in enumerate(inp.helpers)}
+
+    n_customers = len(customer_index)
+    ng = np.zeros((len(inp.helpers), n_customers), dtype=bool)
+    allowed = np.zeros((len(inp.helpers), n_customers), dtype=bool)
+    restricted = np.zeros(n_customers, dtype=bool)
+    for sc in inp.staff_constraints:
+        c = customer_index.get(sc.customer_id)
+        if c is None:
+            continue
+        h = helper_index.get(sc.staff_id)
+        if sc.constraint_type == StaffConstraintType.NG:
+            if h is not None:
+                ng[h, c] = True
+        elif sc.constraint_type == StaffConstraintType.ALLOWED:
+            restricted[c] = True
+            if h is not None:
+                allowed[h, c] = True
+
+    ok = ~ng & (~restricted[None, :] | allowed)
+    return ok[:, order_customer]
+
+
+def _training_mask(inp: OptimizationInput, table: OrderTable) -> np.ndarray:
+    """研修中: not_visited/training の利用者の単独訪問（staff_count=1）を除外"""
+    customer_index = {cid: c for c, cid in enumerate(table.customer_ids)}
+    training = np.zeros((len(inp.helpers), len(customer_index)), dtype=bool)
+    for i, h in enumerate(inp.helpers):
+        for cid, status in h.customer_training_status.items():
+            c = customer_index.get(cid)
+            if c is not None and status in (TrainingStatus.NOT_VISITED, TrainingStatus.TRAINING):
+                training[i, c] = True
+
+    single = np.fromiter(
+        (o.staff_count <= 1 for o in inp.orders), dtype=bool, count=len(inp.orders),
+    )
+    order_customer = np.asarray(table.customer_idx, dtype=np.intp)
+    return ~(training[:, order_customer] & single[None, :])
+
+
+def _apply_unavailability(inp: OptimizationInput, table: OrderTable, mask: np.ndarray) -> None:
+    """希望休: 終日休の日、または時間休と重なるオーダーを除外（in-place）"""
+    helper_index = {h.id: i for i, h in enumerate(inp.helpers)}
+    order_start = np.asarray(table.start, dtype=np.int32)
+    order_end = np.asarray(table.end, dtype=np.int32)
+    for su in inp.staff_unavailabilities:
+        h = helper_index.get(su.staff_id)
+        if h is None:
+            continue
+        for slot in su.unavailable_slots:
+            d = table.date_index.get(slot.date)
+            if d is None:
+                continue
+            cols = np.asarray(table.by_date[d], dtype=np.intp)
+            if slot.all_day:
+                mask[h, cols] = False
+            elif slot.start_time and slot.end_time:
+                us, ue = time_to_minutes(slot.start_time), time_to_minutes(slot.end_time)
+                hit = (order_start[cols] < ue) & (us < order_end[cols])
+                mask[h, cols[hit]] = False
+
+
+def household_groups(inp: OptimizationInput, table: OrderTable) -> list[list[int]]:
+    """世帯リンクで連結されたオーダー群（2件以上、オーダーインデックス昇順）"""
+    parent = list(range(len(table)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, o in enumerate(inp.orders):
+        j = table.index.get(o.linked_order_id) if o.linked_order_id else None
+        if j is not None:
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(table)):
+        groups.setdefault(find(i), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def _apply_household_links(inp: OptimizationInput, table: OrderTable, mask: np.ndarray) -> None:
+    """世帯リンク: 連結されたオーダー群は同じヘルパーが担当するため、
+    群の全オーダーに割当可能なヘルパーだけを残す（in-place）
+
+    従来の linked_force0 行（片方の変数しかない場合に x == 0）に相当する。
+    """
+    for members in household_groups(inp, table):
+        mask[:, members] = mask[:, members].all(axis=1, keepdims=True)
+
+
+def _availability_mask(inp: OptimizationInput, table: OrderTable) -> np.ndarray:
+    """勤務可能日・時間帯: オーダー時間帯を完全に含む勤務枠があるか
+
+    weekly_availability が空のヘルパーは制約なし（全オーダー可）。
+    曜日ごとに (勤務枠 × オーダー) の包含判定を行い、ヘルパー単位に OR 集約する。
+    """
+    n_helpers, n_orders = len(inp.helpers), len(inp.orders)
+    mask = np.zeros((n_helpers, n_orders), dtype=bool)
+
+    unrestricted = np.fromiter(
+        (not h.weekly_availability for h in inp.helpers), dtype=bool, count=n_helpers,
+    )
+    mask[unrestricted, :] = True
+
+    order_day = np.asarray(table.dow_idx, dtype=np.intp)
+    order_start = np.asarray(table.start, dtype=np.int32)
+    order_end = np.asarray(table.end, dtype=np.int32)
+
+    # 勤務枠を曜日ごとにフラット化（ヘルパー順に並ぶ）
+    slots_by_day: dict[int, tuple[list[int], list[int], list[int]]] = {}
+    for i, h in enumerate(inp.helpers):
+        for day, slots in h.weekly_availability.items():
+            if not slots:
+                continue
+            s_helper, s_start, s_end = slots_by_day.setdefault(DAY_INDEX[day], ([], [], []))
+            for s in slots:
+                s_helper.append(i)
+                s_start.append(time_to_minutes(s.start_time))
+                s_end.append(time_to_minutes(s.end_time))
+
+    for day, (s_helper, s_start, s_end) in slots_by_day.items():
+        cols = np.flatnonzero(order_day == day)
+        if cols.size == 0:
+            continue
+        starts = np.asarray(s_start, dtype=np.int32)
+        ends = np.asarray(s_end, dtype=np.int32)
+        covers = (starts[:, None] <= order_start[None, cols]) & (
+            order_end[None, cols] <= ends[:, None]
+        )
+        # 同一ヘルパーの枠は連続しているため reduceat で OR 集約できる
+        helpers_arr = np.asarray(s_helper, dtype=np.intp)
+        first = np.flatnonzero(np.r_[True, helpers_arr[1:] != helpers_arr[:-1]])
+        covered = np.logical_or.reduceat(covers, first, axis=0)
+        mask[np.ix_(helpers_arr[first], cols)] = covered
+
+    return mask
+
+
+def compute_feasibility_matrix(
+    inp: OptimizationInput,
+    table: OrderTable | None = None,
+) -> FeasibilityMatrix:
+    """割当可能な (helper, order) をブール行列として一括計算する"""
+    helper_ids = [h.id for h in inp.helpers]
+    order_ids = [o.id for o in inp.orders]
+    if not helper_ids or not order_ids:
+        return FeasibilityMatrix(
+            helper_ids, order_ids, np.zeros((len(helper_ids), len(order_ids)), dtype=bool),
+        )
+
+    if table is None:
+        table = OrderTable(inp.orders)
+    mask = _attribute_mask(inp)
+    mask &= _staff_constraint_mask(inp, table)
+    mask &= _availability_mask(inp, table)
+    mask &= _training_mask(inp, table)
+    _apply_unavailability(inp, table, mask)
+    # 世帯リンクは他の除外をすべて反映した後に伝播させる
+    _apply_household_links(inp, table, mask)
+    return FeasibilityMatrix(helper_ids, order_ids, mask)
@@ -0,0 +1,180 @@
+"""貪欲構築ヒューリスティック — MIP のフォールバック解・初期解
+
+CBC が制限時間内に incumbent を見つけられないと _solve_single は割当なしを返し、
+日次分割で時間切れになった日は全オーダー未割当になる。ここでは MIP と同じ
+割当可能性行列・競合ペアインデックスを使い、1秒未満で実行可能解を構築する。
+
+1. オーダー（世帯リンク群はまとめて1単位）を割当可能ヘルパー数の少ない順に並べる
+2. 各単位について、重複・移動時間・徒歩距離の競合がないヘルパーのうち、
+   目的関数の増分（_build_objective と同じ項）が最小のヘルパーを staff_count 人まで割り当てる
+3. 増分がカバレッジペナルティ（未割当1人分）以上なら割り当てない
+
+結果の目的関数値は objective.evaluate_objective で求める（MIP と同じ尺度）。
+"""
+
+import time
+
+import numpy as np
+
+from optimizer.engine.conflicts import travel_coefficients
+from optimizer.engine.constraints import build_conflict_index_for
+from optimizer.engine.feasibility import compute_feasibility_matrix, household_groups
+from optimizer.engine.objective import evaluate_objective
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import (
+    _CONTINUITY_MIN_ORDERS,
+    _COVERAGE_PENALTY,
+    SoftWeights,
+    _build_travel_matrix,
+    _with_travel_matrix,
+)
+from optimizer.models import (
+    Assignment,
+    OptimizationInput,
+    OptimizationResult,
+    StaffConstraintType,
+    TransportationType,
+)
+
+
+def construct_greedy(
+    inp: OptimizationInput,
+    weights: SoftWeights | None = None,
+    table: OrderTable | None = None,
+) -> list[Assignment]:
+    """貪欲法で実行可能な割当を構築する
+
+    移動時間行列は inp.travel_matrix を使う。travel_times のみの入力では呼び出しごとに
+    構築するため、繰り返し呼ぶ場合は solver._with_travel_matrix で変換してから渡す。
+
+    Returns:
+        inp.orders 順の割当（未割当のオーダーは staff_ids=[]）
+    """
+    w = weights or SoftWeights()
+    if table is None:
+        table = OrderTable(inp.orders)
+    helpers, orders = inp.helpers, inp.orders
+    travel_matrix = _build_travel_matrix(inp)
+    mask = compute_feasibility_matrix(inp, table).mask
+    conflicts = build_conflict_index_for(inp, table, travel_matrix)
+    common_conflicts, walk_conflicts = conflicts.neighbor_sets(len(table))
+    walk = [h.transportation == TransportationType.WALK for h in helpers]
+
+    # ヘルパーに依存しない増分（移動時間項）
+    base_cost = np.zeros(len(table))
+    if w.travel > 0:
+        base_cost += w.travel * np.asarray(travel_coefficients(table, travel_matrix))
+
+    # 推奨スタッフ以外を割り当てたときのペナルティ（利用者 × ヘルパー）
+    h_index = {h.id: i for i, h in enumerate(helpers)}
+    preferred_cost = np.zeros((len(table.customer_ids), len(helpers)))
+    if w.preferred_staff > 0:
+        c_index = {cid: c for c, cid in enumerate(table.customer_ids)}
+        preferred_by_customer: dict[int, list[int]] = {}
+        for sc in inp.staff_constraints:
+            c = c_index.get(sc.customer_id)
+            if sc.constraint_type == StaffConstraintType.PREFERRED and c is not None:
+                preferred_by_customer.setdefault(c, []).append(h_index.get(sc.staff_id, -1))
+        for c, preferred in preferred_by_customer.items():
+            preferred_cost[c] = w.preferred_staff
+            preferred_cost[c, [h for h in preferred if h >= 0]] = 0.0
+
+    customer_order_counts = np.bincount(table.customer_idx, minlength=len(table.customer_ids))
+    continuity_customers = (
+        set(np.flatnonzero(customer_order_counts >= _CONTINUITY_MIN_ORDERS).tolist())
+        if w.continuity > 0 else set()
+    )
+
+    # 割当単位: 世帯リンク群はまとめて同じヘルパーを割り当てる
+    grouped: set[int] = set()
+    units: list[list[int]] = []
+    for members in household_groups(inp, table):
+        units.append(members)
+        grouped.update(members)
+    units.extend([j] for j in range(len(table)) if j not in grouped)
+    feasible_count = mask.sum(axis=0)
+    units.sort(key=lambda m: (
+        int(feasible_count[m[0]]),
+        min(table.date_idx[j] for j in m),
+        min(table.start[j] for j in m),
+    ))
+
+    pref_min = np.array([h.preferred_hours.min * 60 for h in helpers], dtype=np.float64)
+    pref_max = np.array([h.preferred_hours.max * 60 for h in helpers], dtype=np.float64)
+    minutes = np.zeros(len(helpers))
+    staff: list[list[int]] = [[] for _ in orders]
+    kept: list[set[int]] = [set() for _ in helpers]
+    served: list[set[int]] = [set() for _ in helpers]  # ヘルパーごとの担当利用者（customer_idx）
+
+    def workload(m: np.ndarray, h: np.ndarray) -> np.ndarray:
+        # objective.workload_penalty のベクトル版
+        over = np.maximum(0.0, m - pref_max[h])
+        under = np.maximum(0.0, pref_min[h] - m)
+        return w.workload_balance * (2.0 * over + under)
+
+    for members in units:
+        blocked_common = set().union(*(common_conflicts[j] for j in members))
+        blocked_walk = blocked_common.union(*(walk_conflicts[j] for j in members))
+        # 群内で競合するオーダーは同じヘルパーが担当できない（MIP では群ごと0）
+        if not blocked_common.isdisjoint(members):
+            continue
+        walk_ok = blocked_walk.isdisjoint(members)
+        candidates = np.array([
+            h for h in np.flatnonzero(mask[:, members[0]]).tolist()
+            if (walk_ok or not walk[h])
+            and kept[h].isdisjoint(blocked_walk if walk[h] else blocked_common)
+        ], dtype=np.intp)
+        if len(candidates) == 0:
+            continue
+
+        duration = sum(max(table.duration[j], 0) for j in members)
+        unit_customers = {table.customer_idx[j] for j in members}
+        cost = np.full(len(candidates), float(base_cost[members].sum()))
+        cost += preferred_cost[[table.customer_idx[j] for j in members]][:, candidates].sum(axis=0)
+        if w.workload_balance > 0:
+            m = minutes[candidates]
+            cost += workload(m + duration, candidates) - workload(m, candidates)
+        for c in unit_customers & continuity_customers:
+            cost += w.continuity * np.array([c not in served[h] for h in candidates.tolist()])
+
+        need = min(orders[j].staff_count for j in members)
+        for k in np.argsort(cost, kind="stable")[:need].tolist():
+            if cost[k] >= _COVERAGE_PENALTY * len(members):
+                break
+            h = int(candidates[k])
+            for j in members:
+                staff[j].append(h)
+            served[h].update(unit_customers)
+            kept[h].update(members)
+            minutes[h] += duration
+
+    return [
+        Assignment(order_id=o.id, staff_ids=[helpers[h].id for h in sorted(staff[j])])
+        for j, o in enumerate(orders)
+    ]
+
+
+def solve_greedy(
+    inp: OptimizationInput,
+    weights: SoftWeights | None = None,
+    assignments: list[Assignment] | None = None,
+) -> OptimizationResult:
+    """貪欲解を _solve_single と同じ結果形式で返す（status="Feasible"）
+
+    assignments 指定時は構築を省略し、その割当（inp.orders 順）を評価する。
+    """
+    start_time = time.time()
+    inp = _with_travel_matrix(inp)
+    if assignments is None:
+        assignments = construct_greedy(inp, weights)
+    staff_count = {o.id: o.staff_count for o in inp.orders}
+    return OptimizationResult(
+        assignments=assignments,
+        objective_value=round(evaluate_objective(inp, assignments, weights).total, 6),
+        solve_time_seconds=round(time.time() - start_time, 3),
+        status="Feasible",
+        unassigned_count=sum(1 for a in assignments if not a.staff_ids),
+        partial_count=sum(
+            1 for a in assignments if 0 < len(a.staff_ids) < staff_count[a.order_id]
+        ),
+    )
@@ -0,0 +1,162 @@
+"""差分再最適化 — 変更のあったオーダーの周辺だけを解き直す
+
+ノート取込でオーダーが時間変更・キャンセルされた、休み希望の反映
+（firestore_writer.apply_unavailability_to_orders）でヘルパーが外れた、といった
+少数のオーダーの変更のたびに週全体を最適化し直すのは重い。ここでは
+現在の割当を固定したまま、次のオーダーだけを解放して部分MIPで解き直す:
+
+- 変更のあったオーダー（order_ids）
+- 波及近傍（ripple）
+  - helper_day: 変更オーダーを担当しているヘルパーの同日のオーダー
+  - customer:   変更オーダーの利用者の週内の他のオーダー
+  - unfilled:   変更オーダーと同日の未割当・部分割当のオーダー
+- 影響を受けたヘルパー（helper_ids、キャンセル済みオーダーの担当者など）の週内のオーダー
+- 現在の割当がハード制約に違反していたオーダー（warm_start.repair_initial_assignment で検出）
+
+部分MIPは lns._LnsState.solve_sub（解放オーダー以外は現在値に固定）で解く。
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+from optimizer.engine.lns import _LnsState
+from optimizer.engine.solver import SoftWeights, SolverOptions
+from optimizer.engine.warm_start import repair_initial_assignment
+from optimizer.models import Assignment, OptimizationInput
+
+logger = logging.getLogger(__name__)
+
+RIPPLES = ("helper_day", "customer", "unfilled")
+
+
+@dataclass
+class IncrementalOptions:
+    """差分再最適化のパラメータ"""
+
+    # 波及近傍（RIPPLES の部分集合）
+    ripple: tuple[str, ...] = ("helper_day", "customer")
+    # 解放するオーダー数の上限（変更オーダーは常に解放し、波及近傍はこの数まで追加する）
+    max_free_orders: int = 80
+
+
+@dataclass
+class IncrementalResult:
+    """差分再最適化の結果"""
+
+    # 週全体の割当（inp.orders 順）
+    assignments: list[Assignment]
+    # 現在の割当から担当が変わったオーダーのみ（書き戻し対象）
+    changed: list[Assignment]
+    freed_order_ids: list[str]
+    # 変更オーダーの担当を外した状態（解き直し前）の週全体の目的関数値
+    initial_objective: float
+    objective: float
+    solve_time_seconds: float
+    # Feasible: 部分MIPの解を採用 / Not Solved: 解けず現在の割当（修復後）のまま
+    status: str
+    skipped_order_ids: list[str] = field(default_factory=list)
+
+
+def reoptimize_incremental(
+    inp: OptimizationInput,
+    current: list[Assignment],
+    order_ids: list[str],
+    helper_ids: list[str] | None = None,
+    weights: SoftWeights | None = None,
+    time_limit_seconds: float = 10.0,
+    options: SolverOptions | None = None,
+    incremental_options: IncrementalOptions | None = None,
+) -> IncrementalResult:
+    """変更オーダーとその波及近傍だけを解き直す
+
+    Args:
+        inp: 週全体の入力（変更反映後）
+        current: 現在の割当（inp にないオーダーの分は無視する）
+        order_ids: 変更のあったオーダーID（inp にないもの = キャンセル済みは skipped_order_ids）
+        helper_ids: 影響を受けたヘルパーID（週内の担当オーダーを解放する）
+
+    Raises:
+        ValueError: ripple に未知の近傍が含まれる場合
+    """
+    start_time = time.time()
+    w = weights or SoftWeights()
+    opts = incremental_options or IncrementalOptions()
+    unknown = set(opts.ripple) - set(RIPPLES)
+    if unknown:
+        raise ValueError(f"unknown ripple: {sorted(unknown)}")
+
+    # 変更オーダーの担当は解き直すので外してから修復する（他のオーダーが巻き込まれないように）
+    before = {a.order_id: sorted(a.staff_ids) for a in current}
+    changed_ids = set(order_ids)
+    repaired, _ = repair_initial_assignment(
+        inp, [a for a in current if a.order_id not in changed_ids],
+    )
+    state = _LnsState(inp, repaired, w)
+    table = state.table
+    initial_objective = state.evaluator.total(state.staff)
+
+    seeds = [table.index[o_id] for o_id in order_ids if o_id in table.index]
+    skipped = [o_id for o_id in order_ids if o_id not in table.index]
+    # 修復で担当が外れたオーダー（現在の割当がハード制約に違反していたもの）
+    seeds.extend(
+        j for j, o in enumerate(inp.orders)
+        if o.id not in changed_ids
+        and before.get(o.id, []) != sorted(inp.helpers[h].id for h in state.staff[j])
+    )
+
+    ripple: list[int] = []
+    seed_dates = {table.date_idx[j] for j in seeds}
+    if "helper_day" in opts.ripple:
+        for j in seeds:
+            d = table.date_idx[j]
+            for h_id in before.get(inp.orders[j].id, []):
+                h = state.h_index.get(h_id)
+                if h is not None:
+                    ripple.extend(k for k in state.orders_by_date[d] if h in state.staff[k])
+    if "customer" in opts.ripple:
+        for j in seeds:
+            ripple.extend(state.orders_by_customer[table.customer_idx[j]])
+    if "unfilled" in opts.ripple:
+        ripple.extend(
+            k for d in sorted(seed_dates) for k in state.orders_by_date[d]
+            if len(state.staff[k]) < inp.orders[k].staff_count
+        )
+    affected = {state.h_index[h_id] for h_id in helper_ids or [] if h_id in state.h_index}
+    ripple.extend(j for j, hs in enumerate(state.staff) if affected.intersection(hs))
+
+    # 世帯リンク群は丸ごと解放する。上限を超えた波及近傍は切り捨て
+    free: dict[int, None] = {}
+    for i, j in enumerate(seeds + ripple):
+        if i >= len(seeds) and len(free) >= opts.max_free_orders:
+            break
+        for k in state.group_of.get(j, [j]):
+            free[k] = None
+    freed = list(free)
+
+    status = "Feasible"
+    if freed and state.mask[:, freed].any():
+        new_staff = state.solve_sub(freed, w, options, time_limit_seconds)
+        if new_staff is None:
+            status = "Not Solved"
+        else:
+            for j, hs in zip(freed, new_staff):
+                state.staff[j] = sorted(hs)
+
+    assignments = state.to_assignments()
+    changed = [a for a in assignments if before.get(a.order_id, []) != sorted(a.staff_ids)]
+    objective = state.evaluator.total(state.staff)
+    logger.info(
+        "差分再最適化: seeds=%d, freed=%d, changed=%d, objective %.1f → %.1f (%s)",
+        len(seeds), len(freed), len(changed), initial_objective, objective, status,
+    )
+    return IncrementalResult(
+        assignments=assignments,
+        changed=changed,
+        freed_order_ids=[inp.orders[j].id for j in freed],
+        initial_objective=initial_objective,
+        objective=objective,
+        solve_time_seconds=round(time.time() - start_time, 3),
+        status=status,
+        skipped_order_ids=skipped,
+    )
@@ -0,0 +1,309 @@
+"""行列形式のMIPモデル — PuLP を介さずインデックス配列から直接構築する
+
+_build_model と同じ変数・制約・目的関数を、pulp.LpAffineExpression を作らずに
+割当可能性行列・競合ペアインデックスの整数配列から CSR 形式（行ポインタ・
+列インデックス・係数）で組み立てる。ソルバーバックエンド（backends モジュール）は
+この表現をネイティブAPIへそのまま渡すため、LP/MPSファイルの書き出しも発生しない。
+
+変数の並び:
+    [x（割当可能ペア, ヘルパー順→オーダー順）| unmet（オーダー順）|
+     over, under（ヘルパー順、稼働バランス有効時）| y（担当継続性有効時）]
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from optimizer.engine.conflicts import ConflictIndex, overlap_cliques, travel_coefficients
+from optimizer.engine.constraints import build_conflict_index_for
+from optimizer.engine.feasibility import compute_feasibility_matrix
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import (
+    _CONTINUITY_MIN_ORDERS,
+    _COVERAGE_PENALTY,
+    ModelSize,
+    SoftWeights,
+    SolverOptions,
+    _build_travel_matrix,
+)
+from optimizer.models import OptimizationInput, StaffConstraintType, TransportationType
+
+_INF = float("inf")
+
+
+@dataclass
+class LinearModel:
+    """行列形式のMIPモデル（min obj·v, row_lb <= A v <= row_ub）"""
+
+    var_lb: np.ndarray
+    var_ub: np.ndarray
+    var_integer: np.ndarray  # dtype=bool
+    objective: np.ndarray
+    row_lb: np.ndarray
+    row_ub: np.ndarray
+    # 制約行列 A（CSR）: 行 r の係数は col_idx/coef[row_ptr[r]:row_ptr[r + 1]]
+    row_ptr: np.ndarray
+    col_idx: np.ndarray
+    coef: np.ndarray
+    # 割当変数 x の (ヘルパー, オーダー) インデックス（先頭 n_x 個の変数に対応）
+    x_helper: np.ndarray
+    x_order: np.ndarray
+
+    @property
+    def n_x(self) -> int:
+        return len(self.x_helper)
+
+    def size(self) -> ModelSize:
+        return ModelSize(
+            variables=len(self.var_lb),
+            rows=len(self.row_lb),
+            nonzeros=len(self.col_idx),
+        )
+
+
+class _RowBuffer:
+    """制約行をブロック単位で蓄積する（行ごとの Python オブジェクトを作らない）"""
+
+    def __init__(self) -> None:
+        self._lengths: list[np.ndarray] = []
+        self._cols: list[np.ndarray] = []
+        self._coefs: list[np.ndarray] = []
+        self._lb: list[np.ndarray] = []
+        self._ub: list[np.ndarray] = []
+
+    def add_pairs(
+        self, v1: np.ndarray, v2: np.ndarray, c2: float, lb: float, ub: float,
+    ) -> None:
+        """2変数の行 v1 + c2 * v2 ∈ [lb, ub] を一括追加"""
+        k = len(v1)
+        if k == 0:
+            return
+        self._lengths.append(np.full(k, 2, dtype=np.int64))
+        self._cols.append(np.column_stack([v1, v2]).ravel())
+        self._coefs.append(np.tile(np.array([1.0, c2]), k))
+        self._lb.append(np.full(k, lb))
+        self._ub.append(np.full(k, ub))
+
+    def add_row(self, cols: np.ndarray, coefs: np.ndarray, lb: float, ub: float) -> None:
+        self._lengths.append(np.array([len(cols)], dtype=np.int64))
+        self._cols.append(np.asarray(cols, dtype=np.int64))
+        self._coefs.append(np.asarray(coefs, dtype=np.float64))
+        self._lb.append(np.array([lb]))
+        self._ub.append(np.array([ub]))
+
+    def to_csr(self) -> tuple[np.ndarray, ...]:
+        if not self._lengths:
+            empty_f = np.zeros(0, dtype=np.float64)
+            return (
+                np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                empty_f, empty_f, empty_f,
+            )
+        lengths = np.concatenate(self._lengths)
+        row_ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=row_ptr[1:])
+        return (
+            row_ptr,
+            np.concatenate(self._cols),
+            np.concatenate(self._coefs),
+            np.concatenate(self._lb),
+            np.concatenate(self._ub),
+        )
+
+
+def _pairs_for_helpers(
+    xidx: np.ndarray, pairs: list[tuple[int, int]], helpers: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """オーダーペアを、両方の変数を持つヘルパーごとの変数インデックスペアに展開"""
+    if not pairs:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    p = np.asarray(pairs, dtype=np.intp)
+    sub = xidx if helpers is None else xidx[helpers]
+    v1, v2 = sub[:, p[:, 0]], sub[:, p[:, 1]]
+    both = (v1 >= 0) & (v2 >= 0)
+    return v1[both], v2[both]
+
+
+def _household_pairs(inp: OptimizationInput, table: OrderTable) -> list[tuple[int, int]]:
+    """世帯リンクのオーダーペア（_add_household_constraint と同じ重複除去）"""
+    seen: set[tuple[str, str]] = set()
+    pairs: list[tuple[int, int]] = []
+    for i, o in enumerate(inp.orders):
+        j = table.index.get(o.linked_order_id) if o.linked_order_id else None
+        if j is None or j == i:
+            continue
+        key = (o.id, o.linked_order_id) if o.id < o.linked_order_id else (o.linked_order_id, o.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        pairs.append((i, j))
+    return pairs
+
+
+def build_linear_model(
+    inp: OptimizationInput,
+    weights: SoftWeights | None = None,
+    options: SolverOptions | None = None,
+    table: OrderTable | None = None,
+    conflicts: ConflictIndex | None = None,
+) -> LinearModel:
+    """_build_model と同じMIPモデルを行列形式で構築する"""
+    w = weights or SoftWeights()
+    opts = options or SolverOptions()
+    if table is None:
+        table = OrderTable(inp.orders)
+    travel_matrix = _build_travel_matrix(inp)
+    if conflicts is None:
+        conflicts = build_conflict_index_for(inp, table, travel_matrix)
+
+    n_helpers, n_orders = len(inp.helpers), len(inp.orders)
+    mask = compute_feasibility_matrix(inp, table).mask
+
+    # --- 変数 ---
+    x_helper, x_order = np.nonzero(mask)
+    n_x = len(x_helper)
+    xidx = np.full((n_helpers, n_orders), -1, dtype=np.int64)
+    xidx[x_helper, x_order] = np.arange(n_x)
+
+    lb_parts = [np.zeros(n_x), np.zeros(n_orders)]
+    ub_parts = [np.ones(n_x), np.full(n_orders, _INF)]
+    int_parts = [np.ones(n_x, dtype=bool), np.ones(n_orders, dtype=bool)]
+    obj_x = np.zeros(n_x)
+    obj_parts = [obj_x, np.full(n_orders, float(_COVERAGE_PENALTY))]
+    unmet0 = n_x
+    n_vars = n_x + n_orders
+
+    rows = _RowBuffer()
+
+    # --- カバレッジ: Σx <= staff_count, unmet + Σx >= staff_count ---
+    staff_count = np.fromiter((o.staff_count for o in inp.orders), dtype=np.float64, count=n_orders)
+    by_order = np.argsort(x_order, kind="stable")
+    bounds = np.searchsorted(x_order[by_order], np.arange(n_orders + 1))
+    for j in range(n_orders):
+        cols = by_order[bounds[j]:bounds[j + 1]]
+        rows.add_row(cols, np.ones(len(cols)), -_INF, staff_count[j])
+    for j in range(n_orders):
+        cols = np.concatenate([[unmet0 + j], by_order[bounds[j]:bounds[j + 1]]])
+        rows.add_row(cols, np.ones(len(cols)), staff_count[j], _INF)
+
+    # --- F: 重複禁止 ---
+    if opts.no_overlap == "clique":
+        cliques, overlap_pairs = overlap_cliques(table, conflicts)
+        for h in range(n_helpers):
+            seen: set[tuple[int, ...]] = set()
+            for clique in cliques:
+                members = xidx[h, clique]
+                members = tuple(members[members >= 0].tolist())
+                if len(members) < 2 or members in seen:
+                    continue
+                seen.add(members)
+                rows.add_row(np.asarray(members), np.ones(len(members)), -_INF, 1.0)
+    else:
+        overlap_pairs = conflicts.overlap
+    rows.add_pairs(*_pairs_for_helpers(xidx, overlap_pairs), 1.0, -_INF, 1.0)
+
+    # --- G: 移動時間確保 / K: 世帯連続訪問 / M: 徒歩移動距離 ---
+    rows.add_pairs(*_pairs_for_helpers(xidx, conflicts.travel), 1.0, -_INF, 1.0)
+    rows.add_pairs(*_pairs_for_helpers(xidx, _household_pairs(inp, table)), -1.0, 0.0, 0.0)
+    walk_helpers = np.flatnonzero(
+        [h.transportation == TransportationType.WALK for h in inp.helpers]
+    )
+    if len(walk_helpers):
+        rows.add_pairs(
+            *_pairs_for_helpers(xidx, conflicts.walk, walk_helpers), 1.0, -_INF, 1.0,
+        )
+
+    # --- 目的関数 1. 移動時間 ---
+    if w.travel > 0:
+        coef = np.asarray(travel_coefficients(table, travel_matrix))
+        obj_x += w.travel * coef[x_order]
+
+    # --- 目的関数 2. 推奨スタッフ優先 ---
+    if w.preferred_staff > 0:
+        preferred_pairs = {
+            (sc.customer_id, sc.staff_id)
+            for sc in inp.staff_constraints
+            if sc.constraint_type == StaffConstraintType.PREFERRED
+        }
+        customers = {cid for cid, _ in preferred_pairs}
+        if customers:
+            c_index = {cid: c for c, cid in enumerate(table.customer_ids)}
+            h_index = {h.id: i for i, h in enumerate(inp.helpers)}
+            penalized = np.zeros((n_helpers, len(table.customer_ids)), dtype=bool)
+            for cid in customers:
+                if cid in c_index:
+                    penalized[:, c_index[cid]] = True
+            for cid, hid in preferred_pairs:
+                if cid in c_index and hid in h_index:
+                    penalized[h_index[hid], c_index[cid]] = False
+            order_customer = np.asarray(table.customer_idx, dtype=np.intp)
+            obj_x += w.preferred_staff * penalized[x_helper, order_customer[x_order]]
+
+    # --- 目的関数 3. 稼働バランス ---
+    if w.workload_balance > 0:
+        duration = np.asarray(table.duration, dtype=np.float64)
+        over0, under0 = n_vars, n_vars + n_helpers
+        n_vars += 2 * n_helpers
+        lb_parts.append(np.zeros(2 * n_helpers))
+        ub_parts.append(np.full(2 * n_helpers, _INF))
+        int_parts.append(np.zeros(2 * n_helpers, dtype=bool))
+        obj_parts.append(np.concatenate([
+            np.full(n_helpers, w.workload_balance * 2.0),
+            np.full(n_helpers, w.workload_balance),
+        ]))
+        helper_bounds = np.searchsorted(x_helper, np.arange(n_helpers + 1))
+        for h, helper in enumerate(inp.helpers):
+            cols = np.arange(helper_bounds[h], helper_bounds[h + 1])
+            minutes = duration[x_order[cols]]
+            # over >= Σ dur·x - max,  under >= min - Σ dur·x
+            rows.add_row(
+                np.concatenate([[over0 + h], cols]), np.concatenate([[1.0], -minutes]),
+                -helper.preferred_hours.max * 60, _INF,
+            )
+            rows.add_row(
+                np.concatenate([[under0 + h], cols]), np.concatenate([[1.0], minutes]),
+                helper.preferred_hours.min * 60, _INF,
+            )
+
+    # --- 目的関数 4. 担当継続性 ---
+    if w.continuity > 0:
+        orders_by_customer: dict[int, list[int]] = {}
+        for i, c in enumerate(table.customer_idx):
+            orders_by_customer.setdefault(c, []).append(i)
+        helper_days = [{d.value for d in h.weekly_availability} for h in inp.helpers]
+
+        y_count = 0
+        y0 = n_vars
+        for members in orders_by_customer.values():
+            if len(members) < _CONTINUITY_MIN_ORDERS:
+                continue
+            order_days = {inp.orders[i].day_of_week.value for i in members}
+            for h in range(n_helpers):
+                if helper_days[h] and not order_days & helper_days[h]:
+                    continue
+                y = y0 + y_count
+                y_count += 1
+                xs = xidx[h, members]
+                xs = xs[xs >= 0]
+                # y >= x
+                rows.add_pairs(np.full(len(xs), y), xs, -1.0, 0.0, _INF)
+        n_vars += y_count
+        lb_parts.append(np.zeros(y_count))
+        ub_parts.append(np.ones(y_count))
+        int_parts.append(np.zeros(y_count, dtype=bool))
+        obj_parts.append(np.full(y_count, w.continuity))
+
+    row_ptr, col_idx, coef_arr, row_lb, row_ub = rows.to_csr()
+    return LinearModel(
+        var_lb=np.concatenate(lb_parts),
+        var_ub=np.concatenate(ub_parts),
+        var_integer=np.concatenate(int_parts),
+        objective=np.concatenate(obj_parts),
+        row_lb=row_lb,
+        row_ub=row_ub,
+        row_ptr=row_ptr,
+        col_idx=col_idx,
+        coef=coef_arr,
+        x_helper=x_helper,
+        x_order=x_order,
+    )
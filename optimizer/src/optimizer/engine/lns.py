@@ -0,0 +1,398 @@
+"""大近傍探索（LNS）— 既存の割当の一部を解放して部分MIPで解き直す
+
+本番規模の週は全体MIPが解けず、日次分割では週次の稼働バランス・担当継続性が
+分断される。ここでは割当済みの解を初期解とし、残り時間のあいだ次を繰り返す:
+
+1. 近傍を1つ選んでオーダーを解放する
+   - helper_day:    1ヘルパーの1日分
+   - customer_week: 1利用者の1週間分
+   - time_window:   1日のうち一定時間帯に開始するオーダー
+   - cluster:       地理的に近い利用者群の1日分
+2. 解放したオーダー + 文脈オーダー（固定）で部分入力を作り、solver._build_model
+   （既存の制約ビルダー）で部分MIPを構築して解く
+   - 文脈: 解放オーダーと競合する同日の割当済みオーダー（候補ヘルパー担当分）、
+     解放した利用者の他のオーダー（継続性のため）。変数は現在値に固定する
+   - 部分入力外の稼働時間は preferred_hours をずらして稼働バランス項に反映する
+3. 週全体の目的関数（objective.evaluate_objective と同じ項）が改善すれば採用する
+
+部分MIPの移動時間項は部分入力内のオーダーだけで係数を計算するため近似になるが、
+採否は週全体の目的関数で判定するため、採用した解は必ず改善している。
+"""
+
+import logging
+import math
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import numpy as np
+import pulp
+
+from optimizer.engine.conflicts import travel_coefficients
+from optimizer.engine.constraints import build_conflict_index_for
+from optimizer.engine.feasibility import compute_feasibility_matrix, household_groups
+from optimizer.engine.objective import workload_penalty
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import (
+    _CONTINUITY_MIN_ORDERS,
+    _COVERAGE_PENALTY,
+    SoftWeights,
+    SolverOptions,
+    _build_model,
+    _build_travel_matrix,
+)
+from optimizer.models import (
+    Assignment,
+    HoursRange,
+    OptimizationInput,
+    StaffConstraintType,
+    TravelMatrix,
+)
+
+logger = logging.getLogger(__name__)
+
+NEIGHBORHOODS = ("helper_day", "customer_week", "time_window", "cluster")
+
+# 改善とみなす最小の目的関数減少量（浮動小数誤差対策）
+_EPS = 1e-6
+
+
+@dataclass
+class LnsOptions:
+    """LNS のパラメータ"""
+
+    # 1回の部分MIPの制限時間（秒）
+    sub_time_limit_seconds: float = 10.0
+    # 解放するオーダー数の上限（超えた分は開始時刻順に切り捨て）
+    max_free_orders: int = 60
+    # time_window 近傍の幅（分）
+    window_minutes: int = 120
+    # cluster 近傍の利用者数
+    cluster_size: int = 6
+    # 使う近傍（NEIGHBORHOODS の部分集合）
+    neighborhoods: tuple[str, ...] = NEIGHBORHOODS
+    seed: int = 0
+
+
+@dataclass
+class LnsProgress:
+    """1反復ごとの進捗（progress コールバックに渡す）"""
+
+    iteration: int
+    elapsed_seconds: float
+    neighborhood: str
+    freed_orders: int
+    accepted: bool
+    objective: float  # 現在の解（= 最良解）の週全体の目的関数値
+
+
+@dataclass
+class LnsResult:
+    """LNS の実行結果"""
+
+    assignments: list[Assignment]
+    initial_objective: float
+    objective: float
+    iterations: int = 0
+    accepted: int = 0
+    elapsed_seconds: float = 0.0
+    # 近傍ごとの (試行回数, 採用回数)
+    by_neighborhood: dict[str, list[int]] = field(default_factory=dict)
+    # 目的関数の推移 (経過秒, 目的関数値)。初期値と採用時に記録する
+    trace: list[tuple[float, float]] = field(default_factory=list)
+
+    @property
+    def improvement(self) -> float:
+        return self.initial_objective - self.objective
+
+
+class _WeekEvaluator:
+    """週全体の目的関数（evaluate_objective と同じ項）を整数インデックスの割当から計算する"""
+
+    def __init__(
+        self, inp: OptimizationInput, table: OrderTable, w: SoftWeights,
+        travel_matrix: TravelMatrix,
+    ) -> None:
+        self.inp = inp
+        self.table = table
+        self.w = w
+        self.travel_coef = (
+            np.asarray(travel_coefficients(table, travel_matrix)) * w.travel
+            if w.travel > 0 else np.zeros(len(table))
+        )
+        preferred: dict[str, set[str]] = {}
+        for sc in inp.staff_constraints:
+            if sc.constraint_type == StaffConstraintType.PREFERRED:
+                preferred.setdefault(sc.customer_id, set()).add(sc.staff_id)
+        self.non_preferred = [
+            {
+                hi for hi, h in enumerate(inp.helpers)
+                if o.customer_id in preferred and h.id not in preferred[o.customer_id]
+            } if w.preferred_staff > 0 else set()
+            for o in inp.orders
+        ]
+        counts = np.bincount(table.customer_idx, minlength=len(table.customer_ids))
+        self.continuity_customers = set(
+            np.flatnonzero(counts >= _CONTINUITY_MIN_ORDERS).tolist()
+        )
+
+    def total(self, staff: list[list[int]]) -> float:
+        w, table = self.w, self.table
+        value = 0.0
+        minutes = [0] * len(self.inp.helpers)
+        pairs: set[tuple[int, int]] = set()
+        for j, (o, hs) in enumerate(zip(self.inp.orders, staff)):
+            value += _COVERAGE_PENALTY * max(0, o.staff_count - len(hs))
+            value += self.travel_coef[j] * len(hs)
+            for h in hs:
+                if h in self.non_preferred[j]:
+                    value += w.preferred_staff
+                minutes[h] += table.duration[j]
+                if table.customer_idx[j] in self.continuity_customers:
+                    pairs.add((table.customer_idx[j], h))
+        if w.workload_balance > 0:
+            value += sum(
+                workload_penalty(h, m, w.workload_balance)
+                for h, m in zip(self.inp.helpers, minutes)
+            )
+        if w.continuity > 0:
+            value += w.continuity * len(pairs)
+        return float(value)
+
+
+class _LnsState:
+    """LNS の探索状態（現在の割当と近傍選択に使う索引）"""
+
+    def __init__(
+        self, inp: OptimizationInput, assignments: list[Assignment], w: SoftWeights,
+    ) -> None:
+        self.inp = inp
+        self.table = OrderTable(inp.orders)
+        travel_matrix = _build_travel_matrix(inp)
+        self.evaluator = _WeekEvaluator(inp, self.table, w, travel_matrix)
+        self.mask = compute_feasibility_matrix(inp, self.table).mask
+        conflicts = build_conflict_index_for(inp, self.table, travel_matrix)
+        common, walk = conflicts.neighbor_sets(len(self.table))
+        self.neighbors = [c | wk for c, wk in zip(common, walk)]
+
+        self.group_of: dict[int, list[int]] = {}
+        for members in household_groups(inp, self.table):
+            for j in members:
+                self.group_of[j] = members
+
+        self.h_index = {h.id: i for i, h in enumerate(inp.helpers)}
+        self.staff: list[list[int]] = [[] for _ in inp.orders]
+        for a in assignments:
+            j = self.table.index.get(a.order_id)
+            if j is not None:
+                self.staff[j] = [self.h_index[s] for s in a.staff_ids if s in self.h_index]
+
+        self.orders_by_customer: dict[int, list[int]] = {}
+        self.orders_by_date: dict[int, list[int]] = {}
+        for j in range(len(self.table)):
+            self.orders_by_customer.setdefault(self.table.customer_idx[j], []).append(j)
+            self.orders_by_date.setdefault(self.table.date_idx[j], []).append(j)
+        locations = {c.id: c.location for c in inp.customers}
+        self.customer_locations = [locations.get(cid) for cid in self.table.customer_ids]
+
+    def to_assignments(self) -> list[Assignment]:
+        helpers = self.inp.helpers
+        return [
+            Assignment(order_id=o.id, staff_ids=[helpers[h].id for h in self.staff[j]])
+            for j, o in enumerate(self.inp.orders)
+        ]
+
+    # --- 近傍 ---
+
+    def select(self, kind: str, rng: random.Random, opts: LnsOptions) -> list[int]:
+        """近傍 kind のオーダー（インデックス）を選ぶ。世帯リンク群は丸ごと含める"""
+        table = self.table
+        if kind == "helper_day":
+            busy = sorted({(h, table.date_idx[j]) for j, hs in enumerate(self.staff) for h in hs})
+            if not busy:
+                return []
+            h, d = rng.choice(busy)
+            free = [j for j in self.orders_by_date[d] if h in self.staff[j]]
+        elif kind == "customer_week":
+            free = list(rng.choice(list(self.orders_by_customer.values())))
+        elif kind == "time_window":
+            d = rng.choice(sorted(self.orders_by_date))
+            t0 = table.start[rng.choice(self.orders_by_date[d])]
+            free = [
+                j for j in self.orders_by_date[d]
+                if t0 <= table.start[j] < t0 + opts.window_minutes
+            ]
+        elif kind == "cluster":
+            d = rng.choice(sorted(self.orders_by_date))
+            day_customers = sorted({table.customer_idx[j] for j in self.orders_by_date[d]})
+            center = self.customer_locations[rng.choice(day_customers)]
+            if center is None:
+                return []
+
+            def distance(c: int) -> float:
+                loc = self.customer_locations[c]
+                if loc is None:
+                    return math.inf
+                return math.hypot(loc.lat - center.lat, loc.lng - center.lng)
+
+            near = set(sorted(day_customers, key=distance)[: opts.cluster_size])
+            free = [j for j in self.orders_by_date[d] if table.customer_idx[j] in near]
+        else:
+            raise ValueError(f"unknown neighborhood: {kind}")
+
+        free = sorted(free, key=lambda j: (table.date_idx[j], table.start[j], j))
+        free = free[: opts.max_free_orders]
+        expanded: dict[int, None] = {}
+        for j in free:
+            for k in self.group_of.get(j, [j]):
+                expanded[k] = None
+        return list(expanded)
+
+    # --- 部分MIP ---
+
+    def solve_sub(
+        self,
+        free: list[int],
+        weights: SoftWeights,
+        options: SolverOptions | None,
+        time_limit_seconds: float,
+    ) -> list[list[int]] | None:
+        """解放オーダーの担当を部分MIPで求める（free と同じ順のヘルパーインデックス）"""
+        inp, table = self.inp, self.table
+        free_set = set(free)
+        involved = sorted(set(np.flatnonzero(self.mask[:, free].any(axis=1)).tolist()))
+        if not involved:
+            return None
+        involved_set = set(involved)
+
+        # 文脈オーダー: 競合する候補ヘルパー担当分 + 解放した利用者の他のオーダー
+        context: set[int] = set()
+        for j in free:
+            for k in self.neighbors[j]:
+                if k not in free_set and involved_set.intersection(self.staff[k]):
+                    context.add(k)
+        for c in {table.customer_idx[j] for j in free}:
+            context.update(k for k in self.orders_by_customer[c] if k not in free_set)
+        sub_idx = sorted(free_set | context)
+
+        # 部分入力外の稼働時間を preferred_hours から差し引く
+        outside = [0] * len(inp.helpers)
+        sub_set = set(sub_idx)
+        for j, hs in enumerate(self.staff):
+            if j not in sub_set:
+                for h in hs:
+                    outside[h] += table.duration[j]
+        helpers = [
+            inp.helpers[h].model_copy(update={"preferred_hours": HoursRange(
+                min=inp.helpers[h].preferred_hours.min - outside[h] / 60,
+                max=inp.helpers[h].preferred_hours.max - outside[h] / 60,
+            )})
+            for h in involved
+        ]
+        orders = [inp.orders[j] for j in sub_idx]
+        customer_ids = {o.customer_id for o in orders}
+        sub_inp = inp.model_copy(update={
+            "helpers": helpers,
+            "orders": orders,
+            "customers": [c for c in inp.customers if c.id in customer_ids],
+        })
+
+        current = {
+            (inp.helpers[h].id, inp.orders[j].id) for j in sub_idx for h in self.staff[j]
+        }
+        prob, x = _build_model(sub_inp, weights, options, current)
+        context_ids = {inp.orders[j].id for j in context}
+        for (h_id, o_id), v in x.items():
+            if o_id in context_ids:
+                value = 1 if (h_id, o_id) in current else 0
+                v.lowBound = v.upBound = value
+        prob.solve(pulp.PULP_CBC_CMD(
+            msg=0, timeLimit=max(1, int(time_limit_seconds)), warmStart=True,
+        ))
+        if prob.status != pulp.constants.LpStatusOptimal and pulp.value(prob.objective) is None:
+            return None
+        sub_ids = [h.id for h in helpers]
+        chosen: list[list[int]] = []
+        for j in free:
+            o_id = inp.orders[j].id
+            chosen.append([
+                self.h_index[h_id] for h_id in sub_ids
+                if (h_id, o_id) in x and (pulp.value(x[h_id, o_id]) or 0) > 0.5
+            ])
+        return chosen
+
+
+def improve_lns(
+    inp: OptimizationInput,
+    assignments: list[Assignment],
+    weights: SoftWeights | None = None,
+    time_limit_seconds: float = 60.0,
+    options: SolverOptions | None = None,
+    lns_options: LnsOptions | None = None,
+    progress: Callable[[LnsProgress], None] | None = None,
+) -> LnsResult:
+    """割当を LNS で改善する（time_limit_seconds に達するまで反復）
+
+    近傍は lns_options.neighborhoods を順に巡回し、解放するオーダーは乱数で選ぶ
+    （lns_options.seed で再現可能）。progress は毎反復呼ばれる。
+    """
+    start = time.time()
+    w = weights or SoftWeights()
+    opts = lns_options or LnsOptions()
+    rng = random.Random(opts.seed)
+    state = _LnsState(inp, assignments, w)
+    best = state.evaluator.total(state.staff)
+    result = LnsResult(
+        assignments=[], initial_objective=best, objective=best,
+        by_neighborhood={kind: [0, 0] for kind in opts.neighborhoods},
+        trace=[(0.0, best)],
+    )
+    deadline = start + time_limit_seconds
+
+    while inp.orders and opts.neighborhoods:
+        remaining = deadline - time.time()
+        if remaining < 1:
+            break  # 部分MIPの最小制限時間（1秒）を確保できない
+        kind = opts.neighborhoods[result.iterations % len(opts.neighborhoods)]
+        result.iterations += 1
+        result.by_neighborhood[kind][0] += 1
+        free = state.select(kind, rng, opts)
+        accepted = False
+        new_staff = (
+            state.solve_sub(free, w, options, min(opts.sub_time_limit_seconds, remaining))
+            if free else None
+        )
+        if new_staff is not None:
+            old_staff = [state.staff[j] for j in free]
+            for j, hs in zip(free, new_staff):
+                state.staff[j] = hs
+            value = state.evaluator.total(state.staff)
+            if value < best - _EPS:
+                best = value
+                accepted = True
+                result.accepted += 1
+                result.by_neighborhood[kind][1] += 1
+                result.trace.append((round(time.time() - start, 3), best))
+            else:
+                for j, hs in zip(free, old_staff):
+                    state.staff[j] = hs
+        if progress is not None:
+            progress(LnsProgress(
+                iteration=result.iterations,
+                elapsed_seconds=round(time.time() - start, 3),
+                neighborhood=kind,
+                freed_orders=len(free),
+                accepted=accepted,
+                objective=best,
+            ))
+
+    result.assignments = state.to_assignments()
+    result.objective = best
+    result.elapsed_seconds = round(time.time() - start, 3)
+    logger.info(
+        "LNS完了: iterations=%d, accepted=%d, objective %.1f → %.1f (%.1fs)",
+        result.iterations, result.accepted, result.initial_objective, best,
+        result.elapsed_seconds,
+    )
+    return result
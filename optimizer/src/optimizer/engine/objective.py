@@ -0,0 +1,143 @@
+"""目的関数の評価 — 割当結果から _build_objective と同じ項を再計算する
+
+MIPを解かずに割当（Assignment[]）の目的関数値をソフト制約項ごとに求める。
+週次リバランスやヒューリスティックの評価、日次分割結果の週次評価に使う。
+"""
+
+from dataclasses import asdict, dataclass
+
+from optimizer.engine.conflicts import travel_coefficients as _order_travel_coefficients
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import (
+    _CONTINUITY_MIN_ORDERS,
+    _COVERAGE_PENALTY,
+    SoftWeights,
+    _build_travel_matrix,
+)
+from optimizer.models import (
+    Assignment,
+    Helper,
+    OptimizationInput,
+    Order,
+    StaffConstraintType,
+    TravelMatrix,
+)
+
+
+@dataclass
+class ObjectiveBreakdown:
+    """ソフト制約項ごとの目的関数値（重み適用済み）"""
+
+    travel: float = 0.0
+    preferred_staff: float = 0.0
+    workload_balance: float = 0.0
+    continuity: float = 0.0
+    coverage: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return (
+            self.travel + self.preferred_staff + self.workload_balance
+            + self.continuity + self.coverage
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        return {k: round(v, 6) for k, v in asdict(self).items()}
+
+    def minus(self, other: "ObjectiveBreakdown") -> "ObjectiveBreakdown":
+        """項ごとの差分（self - other）"""
+        return ObjectiveBreakdown(
+            travel=self.travel - other.travel,
+            preferred_staff=self.preferred_staff - other.preferred_staff,
+            workload_balance=self.workload_balance - other.workload_balance,
+            continuity=self.continuity - other.continuity,
+            coverage=self.coverage - other.coverage,
+        )
+
+
+def workload_penalty(helper: Helper, minutes: float, weight: float) -> float:
+    """稼働バランス項: preferred_hours 超過は2倍、不足は1倍のペナルティ"""
+    over = max(0.0, minutes - helper.preferred_hours.max * 60)
+    under = max(0.0, helper.preferred_hours.min * 60 - minutes)
+    return weight * (2.0 * over + under)
+
+
+def travel_coefficients(
+    inp: OptimizationInput,
+    travel_matrix: TravelMatrix,
+) -> dict[str, float]:
+    """オーダーごとの移動時間項の係数（重み適用前）
+
+    _build_objective の線形近似では、同日・異利用者のペア(o1, o2)ごとに
+    tt * (x[h,o1] + x[h,o2]) / 2 を加算する。これはヘルパーに依存しないため、
+    オーダーごとの係数 Σ tt/2 に集約できる（計算は conflicts モジュール）。
+    """
+    table = OrderTable(inp.orders)
+    return dict(zip(table.ids, _order_travel_coefficients(table, travel_matrix)))
+
+
+def evaluate_objective(
+    inp: OptimizationInput,
+    assignments: list[Assignment],
+    weights: SoftWeights | None = None,
+) -> ObjectiveBreakdown:
+    """割当結果の目的関数値を項ごとに計算する
+
+    inp 全体（週次）を1つの問題とみなして評価するため、日次分割で解いた
+    結果に対しては週次の稼働バランス・継続性で評価した値になる。
+    """
+    w = weights or SoftWeights()
+    staff_by_order = {a.order_id: a.staff_ids for a in assignments}
+    result = ObjectiveBreakdown()
+
+    # --- カバレッジ ---
+    for o in inp.orders:
+        missing = o.staff_count - len(staff_by_order.get(o.id, []))
+        if missing > 0:
+            result.coverage += _COVERAGE_PENALTY * missing
+
+    # --- 1. 移動時間 ---
+    if w.travel > 0:
+        coef = travel_coefficients(inp, _build_travel_matrix(inp))
+        for o in inp.orders:
+            result.travel += w.travel * coef[o.id] * len(staff_by_order.get(o.id, []))
+
+    # --- 2. 推奨スタッフ ---
+    if w.preferred_staff > 0:
+        preferred_by_customer: dict[str, set[str]] = {}
+        for sc in inp.staff_constraints:
+            if sc.constraint_type == StaffConstraintType.PREFERRED:
+                preferred_by_customer.setdefault(sc.customer_id, set()).add(sc.staff_id)
+        for o in inp.orders:
+            preferred = preferred_by_customer.get(o.customer_id)
+            if preferred is None:
+                continue
+            for sid in staff_by_order.get(o.id, []):
+                if sid not in preferred:
+                    result.preferred_staff += w.preferred_staff
+
+    # --- 3. 稼働バランス ---
+    if w.workload_balance > 0:
+        minutes: dict[str, int] = {h.id: 0 for h in inp.helpers}
+        table = OrderTable(inp.orders)
+        for o, duration in zip(inp.orders, table.duration):
+            for sid in staff_by_order.get(o.id, []):
+                if sid in minutes:
+                    minutes[sid] += duration
+        for h in inp.helpers:
+            result.workload_balance += workload_penalty(h, minutes[h.id], w.workload_balance)
+
+    # --- 4. 担当継続性 ---
+    if w.continuity > 0:
+        orders_by_customer: dict[str, list[Order]] = {}
+        for o in inp.orders:
+            orders_by_customer.setdefault(o.customer_id, []).append(o)
+        for customer_orders in orders_by_customer.values():
+            if len(customer_orders) < _CONTINUITY_MIN_ORDERS:
+                continue
+            staff: set[str] = set()
+            for o in customer_orders:
+                staff.update(staff_by_order.get(o.id, []))
+            result.continuity += w.continuity * len(staff)
+
+    return result
@@ -0,0 +1,79 @@
+"""オーダーテーブル — 時刻・日付・利用者を整数化した事前計算済みの表
+
+制約・目的関数の構築ループで Order.start_time などの "HH:MM" 文字列を
+毎回パースしないよう、OptimizationInput ごとに1回だけ整数表現へ変換する。
+オーダーは inp.orders の順序のまま整数インデックスで参照する。
+"""
+
+from functools import lru_cache
+
+from optimizer.models import DayOfWeek, Order
+
+# DayOfWeek → 曜日インデックス（月=0 … 日=6）
+DAY_INDEX: dict[DayOfWeek, int] = {d: i for i, d in enumerate(DayOfWeek)}
+
+
+@lru_cache(maxsize=2048)
+def time_to_minutes(time_str: str) -> int:
+    """"HH:MM" → 分換算（1日の時刻は高々1440通りのためキャッシュする）"""
+    h, m = time_str.split(":")
+    return int(h) * 60 + int(m)
+
+
+class OrderTable:
+    """オーダー属性の列指向テーブル
+
+    ids[i], start[i], end[i] … はすべて inp.orders[i] に対応する。
+    by_date は日付ごとのオーダーインデックス（日付の初出順・入力順）で、
+    従来の orders_by_date と同じ走査順になる。
+    """
+
+    __slots__ = (
+        "ids",
+        "index",
+        "start",
+        "end",
+        "duration",
+        "date_idx",
+        "dow_idx",
+        "customer_idx",
+        "dates",
+        "date_index",
+        "customer_ids",
+        "by_date",
+    )
+
+    def __init__(self, orders: list[Order]) -> None:
+        self.ids: list[str] = [o.id for o in orders]
+        self.index: dict[str, int] = {oid: i for i, oid in enumerate(self.ids)}
+        self.start: list[int] = [time_to_minutes(o.start_time) for o in orders]
+        self.end: list[int] = [time_to_minutes(o.end_time) for o in orders]
+        self.duration: list[int] = [e - s for s, e in zip(self.start, self.end)]
+        self.dow_idx: list[int] = [DAY_INDEX[o.day_of_week] for o in orders]
+
+        self.date_index: dict[str, int] = {}
+        self.date_idx: list[int] = [
+            self.date_index.setdefault(o.date, len(self.date_index)) for o in orders
+        ]
+        self.dates: list[str] = list(self.date_index)
+
+        customer_index: dict[str, int] = {}
+        self.customer_idx: list[int] = [
+            customer_index.setdefault(o.customer_id, len(customer_index)) for o in orders
+        ]
+        self.customer_ids: list[str] = list(customer_index)
+
+        self.by_date: list[list[int]] = [[] for _ in self.dates]
+        for i, d in enumerate(self.date_idx):
+            self.by_date[d].append(i)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def overlaps(self, i: int, j: int) -> bool:
+        """2つのオーダーが同日かつ時間帯重複するか"""
+        return (
+            self.date_idx[i] == self.date_idx[j]
+            and self.start[i] < self.end[j]
+            and self.start[j] < self.end[i]
+        )
@@ -0,0 +1,181 @@
+"""日次分割ソルブの並列実行 — ProcessPoolExecutor
+
+ADR-021により日ごとの部分問題は完全に独立しているため、
+各日の OptimizationInput をプロセスプールに投入して並列にソルブする。
+CBCは外部プロセスとして起動されるが、PuLPのモデル構築はPython側で
+GILを握るため、スレッドではなくプロセスで並列化する。
+
+部分問題の構築と求解は solver の公開関数（build_day_input / solve_day /
+unsolved_day_result）を使い、逐次実行と同じ経路で解く。
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+from optimizer.engine.solver import (
+    SoftWeights,
+    SolverOptions,
+    build_day_input,
+    solve_day,
+    unsolved_day_result,
+)
+from optimizer.models import Assignment, OptimizationInput, OptimizationResult, Order
+
+logger = logging.getLogger(__name__)
+
+# 1日あたりの最小ソルブ時間（逐次モードと同じ下限）
+_MIN_DAY_SECONDS = 10
+
+# cgroup v2 / v1 のメモリ上限ファイル（Cloud Run はcgroupで --memory を適用する）
+_CGROUP_MEMORY_FILES = (
+    "/sys/fs/cgroup/memory.max",
+    "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+)
+
+
+def _available_memory_mb() -> int | None:
+    """コンテナのメモリ上限（MB）を取得する。取得できない場合は物理メモリ量"""
+    for path in _CGROUP_MEMORY_FILES:
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw.isdigit():
+            limit = int(raw) // (1024 * 1024)
+            # cgroup v1 の「無制限」は巨大値で表現される
+            if limit < 1024 * 1024:
+                return limit
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def resolve_worker_count(
+    max_workers: int,
+    n_tasks: int,
+    worker_memory_mb: int | None = None,
+) -> int:
+    """実際に起動するワーカー数を決定する
+
+    max_workers・CPU数・タスク数の最小値をとり、worker_memory_mb 指定時は
+    コンテナのメモリ上限に収まる数にさらに制限する（最低1）。
+    """
+    workers = min(max_workers, os.cpu_count() or 1, n_tasks)
+    if worker_memory_mb:
+        available = _available_memory_mb()
+        if available is not None:
+            workers = min(workers, available // worker_memory_mb)
+    return max(1, workers)
+
+
+def _per_day_limit(remaining: float, n_outstanding: int, n_workers: int) -> int:
+    """これから投入する日に残り時間を配分する
+
+    残りのラウンド数（実行中 + 未着手の日数 / ワーカー数）で割るため、
+    早く終わった日の余り時間は後続の日へ自動的に回る。
+    """
+    rounds = math.ceil(n_outstanding / n_workers)
+    return max(_MIN_DAY_SECONDS, int(remaining / rounds))
+
+
+def solve_days_parallel(
+    inp: OptimizationInput,
+    sorted_dates: list[tuple[str, list[Order]]],
+    time_limit_seconds: int,
+    weights: SoftWeights | None,
+    n_workers: int,
+    start_time: float,
+    options: SolverOptions | None = None,
+    initial_assignments: list[Assignment] | None = None,
+    on_result: Callable[[str, OptimizationResult], None] | None = None,
+    on_solved: Callable[[str, OptimizationResult], None] | None = None,
+) -> dict[str, OptimizationResult]:
+    """日ごとの部分問題をプロセスプールで解き、date → 結果 の辞書を返す
+
+    オーダー数の多い日から投入して末尾の待ち時間を減らす。
+    結果の合算順序は呼び出し側で日付順に固定する。
+    on_result は各日の結果が確定するたびに（完了順で）呼ばれる。
+    on_solved はそのうち MIP で解いた日（時間切れの貪欲解以外）についてのみ先に呼ばれる。
+    """
+    # 大きい日から投入（同数なら日付順で決定的に）
+    pending = sorted(sorted_dates, key=lambda item: (-len(item[1]), item[0]))
+    orders_by_date = dict(sorted_dates)
+    results: dict[str, OptimizationResult] = {}
+
+    def done_day(date_str: str, result: OptimizationResult, solved: bool = True) -> None:
+        results[date_str] = result
+        if solved and on_solved is not None:
+            on_solved(date_str, result)
+        if on_result is not None:
+            on_result(date_str, result)
+
+    logger.info(
+        "並列日次ソルブ開始: days=%d, workers=%d, limit=%ds",
+        len(sorted_dates), n_workers, time_limit_seconds,
+    )
+
+    # fork はスレッド（gunicorn/uvicorn）と併用すると危険なため spawn を使う
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx) as pool:
+        running: dict[Future[OptimizationResult], tuple[str, int]] = {}
+
+        while pending or running:
+            # 1回の投入パスで投入する日には同じ時間を配分する
+            # （投入ごとに計算すると、先に投入する大きい日ほど配分が少なくなる）
+            per_day_limit = _per_day_limit(
+                time_limit_seconds - (time.time() - start_time),
+                len(pending) + len(running), n_workers,
+            )
+            while pending and len(running) < n_workers:
+                date_str, day_orders = pending.pop(0)
+                elapsed = time.time() - start_time
+                if elapsed >= time_limit_seconds:
+                    logger.warning(
+                        "Time budget exhausted before %s: falling back to greedy for %d orders "
+                        "(elapsed=%.1fs, limit=%ds)",
+                        date_str, len(day_orders), elapsed, time_limit_seconds,
+                    )
+                    done_day(date_str, unsolved_day_result(inp, day_orders, weights), solved=False)
+                    continue
+                day_inp = build_day_input(inp, day_orders)
+                try:
+                    future = pool.submit(
+                        solve_day, day_inp, per_day_limit, weights, options, initial_assignments,
+                    )
+                except Exception as e:
+                    # プール破損（BrokenProcessPool）時はインプロセスで継続
+                    logger.warning("並列投入失敗 (%s): %s — インプロセスで実行", date_str, e)
+                    done_day(date_str, solve_day(
+                        day_inp, per_day_limit, weights, options, initial_assignments,
+                    ))
+                    continue
+                running[future] = (date_str, per_day_limit)
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                date_str, per_day_limit = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # ワーカー異常終了（OOM等）: この日はインプロセスで解き直す
+                    logger.warning(
+                        "並列ソルブ失敗 (%s): %s — インプロセスで再実行", date_str, e,
+                    )
+                    day_orders = orders_by_date[date_str]
+                    result = solve_day(
+                        build_day_input(inp, day_orders), per_day_limit, weights, options,
+                        initial_assignments,
+                    )
+                done_day(date_str, result)
+
+    return results
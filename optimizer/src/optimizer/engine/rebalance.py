@@ -0,0 +1,383 @@
+"""週次リバランス — 日次分割後の割当を週次ソフト目的で局所改善する
+
+ADR-021 の2パス方式。日次分割（decompose_by_day=True）で得た割当を初期解とし、
+週全体の稼働バランス・担当継続性・推奨スタッフ・カバレッジを目的に
+move（担当替え）/ swap（2オーダーの担当交換）/ insert（未充足枠への割当）/
+consolidate（利用者単位の担当集約）の近傍を局所探索する。近傍は割当可能ペアに限定し、ハード制約
+（重複・移動時間・徒歩距離・希望休・入れるスタッフ・研修）を満たす手のみ採用する。
+世帯リンク（linked_order_id）のオーダーは対で動かす必要があるため固定する。
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+from optimizer.engine.conflicts import customer_travel_matrix, travel_coefficients
+from optimizer.engine.constraints import MAX_WALK_TRAVEL_MINUTES
+from optimizer.engine.objective import ObjectiveBreakdown, workload_penalty
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import (
+    _CONTINUITY_MIN_ORDERS,
+    _COVERAGE_PENALTY,
+    SoftWeights,
+    _build_travel_matrix,
+    _compute_feasible_pairs,
+)
+from optimizer.models import (
+    Assignment,
+    OptimizationInput,
+    StaffConstraintType,
+    TransportationType,
+)
+
+logger = logging.getLogger(__name__)
+
+# 改善とみなす最小の目的関数減少量（浮動小数誤差対策）
+_EPS = 1e-6
+
+
+@dataclass
+class RebalanceReport:
+    """週次リバランスの実行結果"""
+
+    moves: int = 0
+    swaps: int = 0
+    inserts: int = 0
+    passes: int = 0
+    elapsed_seconds: float = 0.0
+    # ソフト制約項ごとの目的関数変化量（負 = 改善）
+    deltas: ObjectiveBreakdown = field(default_factory=ObjectiveBreakdown)
+
+
+class _WeekState:
+    """局所探索の状態（オーダー・ヘルパーは整数インデックスで保持）"""
+
+    def __init__(
+        self,
+        inp: OptimizationInput,
+        assignments: list[Assignment],
+        w: SoftWeights,
+    ) -> None:
+        self.w = w
+        self.helpers = inp.helpers
+        self.orders = inp.orders
+        travel = _build_travel_matrix(inp)
+        h_index = {h.id: i for i, h in enumerate(inp.helpers)}
+        table = OrderTable(inp.orders)
+        o_index = table.index
+
+        self.start = table.start
+        self.end = table.end
+        # 利用者インデックス（table.customer_idx）間の移動時間
+        self.customer_idx = table.customer_idx
+        self.travel = customer_travel_matrix(table, travel).tolist()
+        self.travel_coef = travel_coefficients(table, travel) if w.travel > 0 else []
+        self.walk = [h.transportation == TransportationType.WALK for h in inp.helpers]
+
+        # 移動不可オーダー（世帯リンクの対は一緒に動かす必要があるため固定）
+        self.fixed = [
+            o.linked_order_id is not None and o.linked_order_id in o_index
+            for o in inp.orders
+        ]
+
+        # オーダーごとの割当可能ヘルパー（決定的な順序）
+        # 入れるスタッフ・研修・希望休も枝刈りに含まれるため、ソルバーの変数と同じ集合
+        self.candidates: list[list[int]] = [[] for _ in inp.orders]
+        for h_id, o_id in _compute_feasible_pairs(inp, table):
+            self.candidates[o_index[o_id]].append(h_index[h_id])
+        for c in self.candidates:
+            c.sort()
+
+        preferred: dict[str, set[str]] = {}
+        for sc in inp.staff_constraints:
+            if sc.constraint_type == StaffConstraintType.PREFERRED:
+                preferred.setdefault(sc.customer_id, set()).add(sc.staff_id)
+        self.preferred = preferred
+
+        customer_order_count: dict[str, int] = {}
+        for o in inp.orders:
+            customer_order_count[o.customer_id] = customer_order_count.get(o.customer_id, 0) + 1
+        self.continuity_customers = {
+            cid for cid, n in customer_order_count.items() if n >= _CONTINUITY_MIN_ORDERS
+        }
+
+        # 割当状態
+        self.staff: list[list[int]] = [[] for _ in inp.orders]
+        for a in assignments:
+            oi = o_index.get(a.order_id)
+            if oi is None:
+                continue
+            self.staff[oi] = [h_index[sid] for sid in a.staff_ids if sid in h_index]
+
+        self.minutes = [0] * len(inp.helpers)
+        self.by_helper_date: dict[tuple[int, str], list[int]] = {}
+        self.cust_helper: dict[tuple[str, int], int] = {}
+        for oi, hs in enumerate(self.staff):
+            for hi in hs:
+                self._attach(oi, hi)
+
+    # --- 状態更新 ---
+
+    def _attach(self, oi: int, hi: int) -> None:
+        o = self.orders[oi]
+        self.minutes[hi] += self.end[oi] - self.start[oi]
+        self.by_helper_date.setdefault((hi, o.date), []).append(oi)
+        key = (o.customer_id, hi)
+        self.cust_helper[key] = self.cust_helper.get(key, 0) + 1
+
+    def _detach(self, oi: int, hi: int) -> None:
+        o = self.orders[oi]
+        self.minutes[hi] -= self.end[oi] - self.start[oi]
+        self.by_helper_date[hi, o.date].remove(oi)
+        key = (o.customer_id, hi)
+        self.cust_helper[key] -= 1
+
+    def reassign(self, oi: int, old: int | None, new: int) -> None:
+        if old is not None:
+            self.staff[oi].remove(old)
+            self._detach(oi, old)
+        self.staff[oi].append(new)
+        self._attach(oi, new)
+
+    # --- 実行可能性 ---
+
+    def _pair_conflict(self, a: int, b: int, walk: bool) -> bool:
+        """同日の2オーダーを同一ヘルパーが担当できないか（重複・移動時間・徒歩距離）"""
+        if self.start[a] < self.end[b] and self.start[b] < self.end[a]:
+            return True
+        ca, cb = self.customer_idx[a], self.customer_idx[b]
+        if ca == cb:
+            return False
+        tt_ab = self.travel[ca][cb]
+        tt_ba = self.travel[cb][ca]
+        if self.end[a] <= self.start[b] and self.start[b] - self.end[a] < tt_ab:
+            return True
+        if self.end[b] <= self.start[a] and self.start[a] - self.end[b] < tt_ba:
+            return True
+        return walk and (tt_ab > MAX_WALK_TRAVEL_MINUTES or tt_ba > MAX_WALK_TRAVEL_MINUTES)
+
+    def conflicts(self, oi: int, hi: int, ignore: int | None = None) -> list[int]:
+        """ヘルパーhiの同日担当のうち、オーダーoiと両立しないもの"""
+        day = self.by_helper_date.get((hi, self.orders[oi].date), [])
+        return [
+            other for other in day
+            if other != ignore and other != oi and self._pair_conflict(oi, other, self.walk[hi])
+        ]
+
+    # --- 目的関数の差分 ---
+
+    def _workload(self, hi: int, minutes: float) -> float:
+        if self.w.workload_balance <= 0:
+            return 0.0
+        return workload_penalty(self.helpers[hi], minutes, self.w.workload_balance)
+
+    def _preferred(self, oi: int, hi: int) -> float:
+        if self.w.preferred_staff <= 0:
+            return 0.0
+        preferred = self.preferred.get(self.orders[oi].customer_id)
+        if preferred is None or self.helpers[hi].id in preferred:
+            return 0.0
+        return self.w.preferred_staff
+
+    def delta(self, changes: list[tuple[int, int | None, int]]) -> ObjectiveBreakdown:
+        """(order, 旧ヘルパー, 新ヘルパー) の組を同時に適用した場合の項ごとの差分"""
+        d = ObjectiveBreakdown()
+        minute_delta: dict[int, int] = {}
+        pair_delta: dict[tuple[str, int], int] = {}
+        for oi, old, new in changes:
+            duration = self.end[oi] - self.start[oi]
+            cid = self.orders[oi].customer_id
+            minute_delta[new] = minute_delta.get(new, 0) + duration
+            pair_delta[cid, new] = pair_delta.get((cid, new), 0) + 1
+            d.preferred_staff += self._preferred(oi, new)
+            if old is None:
+                d.coverage -= _COVERAGE_PENALTY
+            else:
+                minute_delta[old] = minute_delta.get(old, 0) - duration
+                pair_delta[cid, old] = pair_delta.get((cid, old), 0) - 1
+                d.preferred_staff -= self._preferred(oi, old)
+
+        for hi, dm in minute_delta.items():
+            if dm:
+                m = self.minutes[hi]
+                d.workload_balance += self._workload(hi, m + dm) - self._workload(hi, m)
+
+        if self.w.continuity > 0:
+            for (cid, hi), dn in pair_delta.items():
+                if dn == 0 or cid not in self.continuity_customers:
+                    continue
+                before = self.cust_helper.get((cid, hi), 0)
+                after = before + dn
+                d.continuity += self.w.continuity * ((after > 0) - (before > 0))
+        return d
+
+    def travel_coefficient(self, oi: int) -> float:
+        """挿入時の移動時間項（ヘルパー非依存、_build_objective の線形近似と同じ）"""
+        if self.w.travel <= 0:
+            return 0.0
+        return self.w.travel * self.travel_coef[oi]
+
+    def to_assignments(self) -> list[Assignment]:
+        return [
+            Assignment(order_id=o.id, staff_ids=[self.helpers[hi].id for hi in self.staff[oi]])
+            for oi, o in enumerate(self.orders)
+        ]
+
+
+def _add_into(total: ObjectiveBreakdown, d: ObjectiveBreakdown) -> None:
+    total.travel += d.travel
+    total.preferred_staff += d.preferred_staff
+    total.workload_balance += d.workload_balance
+    total.continuity += d.continuity
+    total.coverage += d.coverage
+
+
+def _best_move(
+    state: _WeekState, oi: int,
+) -> tuple[ObjectiveBreakdown | None, list[tuple[int, int | None, int]]]:
+    """オーダーoiについて最も改善する move / swap / insert を探す"""
+    best_gain = -_EPS
+    best_delta: ObjectiveBreakdown | None = None
+    best: list[tuple[int, int | None, int]] = []
+    current = state.staff[oi]
+    o = state.orders[oi]
+
+    # 未充足枠があれば insert、なければ既存担当者からの move / swap
+    olds: list[int | None] = [None] if len(current) < o.staff_count else list(current)
+    for old in olds:
+        for new in state.candidates[oi]:
+            if new in current:
+                continue
+            blocking = state.conflicts(oi, new)
+            if not blocking:
+                changes: list[tuple[int, int | None, int]] = [(oi, old, new)]
+            elif len(blocking) == 1 and old is not None:
+                # swap: newが担当する競合オーダーをoldへ渡す
+                other = blocking[0]
+                if (
+                    state.fixed[other]
+                    or old in state.staff[other]
+                    or old not in state.candidates[other]
+                    or state.conflicts(other, old, ignore=oi)
+                ):
+                    continue
+                changes = [(oi, old, new), (other, new, old)]
+            else:
+                continue
+            d = state.delta(changes)
+            if old is None:
+                d.travel += state.travel_coefficient(oi)
+            if d.total < best_gain:
+                best_gain = d.total
+                best_delta = d
+                best = changes
+    return best_delta, best
+
+
+def _best_consolidation(
+    state: _WeekState, order_ids: list[int],
+) -> tuple[ObjectiveBreakdown | None, list[tuple[int, int | None, int]]]:
+    """利用者1人分のオーダーについて、担当者h_fromの分をまとめてh_toへ寄せる手を探す
+
+    継続性は「最後の1件」を移したときに初めて改善するため、単一オーダーの
+    moveでは平坦な近傍から抜け出せない。利用者単位でまとめて評価する。
+    """
+    best_gain = -_EPS
+    best_delta: ObjectiveBreakdown | None = None
+    best: list[tuple[int, int | None, int]] = []
+    serving = sorted({hi for oi in order_ids for hi in state.staff[oi]})
+    for h_from in serving:
+        moved = [oi for oi in order_ids if h_from in state.staff[oi]]
+        if any(state.fixed[oi] for oi in moved):
+            continue
+        for h_to in serving:
+            if h_to == h_from:
+                continue
+            feasible = all(
+                h_to in state.candidates[oi]
+                and h_to not in state.staff[oi]
+                and not state.conflicts(oi, h_to)
+                for oi in moved
+            ) and not any(
+                state.orders[a].date == state.orders[b].date
+                and state._pair_conflict(a, b, state.walk[h_to])
+                for i, a in enumerate(moved) for b in moved[i + 1:]
+            )
+            if not feasible:
+                continue
+            changes: list[tuple[int, int | None, int]] = [(oi, h_from, h_to) for oi in moved]
+            d = state.delta(changes)
+            if d.total < best_gain:
+                best_gain = d.total
+                best_delta = d
+                best = changes
+    return best_delta, best
+
+
+def rebalance_week(
+    inp: OptimizationInput,
+    assignments: list[Assignment],
+    weights: SoftWeights | None = None,
+    time_limit_seconds: float = 30.0,
+) -> tuple[list[Assignment], RebalanceReport]:
+    """日次分割の割当を週次目的で局所改善し、改善後の割当とレポートを返す
+
+    オーダーを順に走査して最良の改善手を適用するパスを、改善がなくなるか
+    time_limit_seconds に達するまで繰り返す（first-improvement ではなく
+    オーダー単位の best-improvement）。
+    """
+    start = time.time()
+    w = weights or SoftWeights()
+    state = _WeekState(inp, assignments, w)
+    report = RebalanceReport()
+    deadline = start + time_limit_seconds
+
+    orders_by_customer: dict[str, list[int]] = {}
+    for oi, o in enumerate(state.orders):
+        if o.customer_id in state.continuity_customers:
+            orders_by_customer.setdefault(o.customer_id, []).append(oi)
+
+    improved = True
+    while improved and time.time() < deadline:
+        improved = False
+        report.passes += 1
+        for oi in range(len(state.orders)):
+            if time.time() >= deadline:
+                break
+            if state.fixed[oi]:
+                continue
+            d, changes = _best_move(state, oi)
+            if d is None:
+                continue
+            for target, old, new in changes:
+                state.reassign(target, old, new)
+            _add_into(report.deltas, d)
+            improved = True
+            if changes[0][1] is None:
+                report.inserts += 1
+            elif len(changes) == 2:
+                report.swaps += 1
+            else:
+                report.moves += 1
+
+        if state.w.continuity <= 0:
+            continue
+        for cid in sorted(orders_by_customer):
+            if time.time() >= deadline:
+                break
+            d, changes = _best_consolidation(state, orders_by_customer[cid])
+            if d is None:
+                continue
+            for target, old, new in changes:
+                state.reassign(target, old, new)
+            _add_into(report.deltas, d)
+            improved = True
+            report.moves += len(changes)
+
+    report.elapsed_seconds = round(time.time() - start, 3)
+    logger.info(
+        "週次リバランス完了: moves=%d, swaps=%d, inserts=%d, passes=%d, %.1fs, deltas=%s",
+        report.moves, report.swaps, report.inserts, report.passes,
+        report.elapsed_seconds, report.deltas.as_dict(),
+    )
+    return state.to_assignments(), report
@@ -2,17 +2,23 @@
 
 import logging
 import time
-from dataclasses import dataclass, field
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from typing import Any
 
 import pulp
 
+from optimizer.engine.cache import ResultCache, fingerprint, project_subproblem
+from optimizer.engine.conflicts import travel_coefficients
+from optimizer.engine.feasibility import compute_feasibility_matrix
+from optimizer.engine.order_table import OrderTable
 from optimizer.models import (
     Assignment,
-    GenderRequirement,
     OptimizationInput,
     OptimizationResult,
     Order,
     StaffConstraintType,
+    TravelMatrix,
 )
 
 logger = logging.getLogger(__name__)
@@ -20,6 +26,9 @@ logger = logging.getLogger(__name__)
 # 未割当1人あたりのペナルティ（他重みの100倍以上）
 _COVERAGE_PENALTY = 1000
 
+# 担当継続性ペナルティの対象とする利用者の最小オーダー数
+_CONTINUITY_MIN_ORDERS = 4
+
 
 @dataclass
 class SoftWeights:
@@ -31,6 +40,70 @@ class SoftWeights:
     continuity: float = 3.0
 
 
+@dataclass
+class SolverOptions:
+    """MIP定式化の選択（重みと異なり目的関数値には影響しない）"""
+
+    # 重複禁止制約: "pairwise"（重複ペアごとに v1 + v2 <= 1）
+    #              "clique"（時刻点の極大クリークごとに Σ x <= 1）
+    no_overlap: str = "pairwise"
+    # ソルバーバックエンド: "pulp"（PuLP + CBC）
+    #                     "highs" / "scip"（行列形式で OR-Tools model_builder に直接渡す）
+    #                     "cpsat"（区間変数 + AddNoOverlap による CP-SAT 定式化）
+    backend: str = "pulp"
+    # CP-SAT の並列探索ワーカー数（backend="cpsat" のみ）
+    cpsat_workers: int = 8
+    # 初期割当がないとき貪欲解（heuristic.construct_greedy）を初期解に使う
+    heuristic_start: bool = True
+
+
+NO_OVERLAP_MODES = ("pairwise", "clique")
+BACKENDS = ("pulp", "highs", "scip", "cpsat")
+
+
+@dataclass
+class SolveProgress:
+    """solve() の進捗（progress コールバックに渡す）"""
+
+    # "solve"（部分問題 or 単一MIP）/ "rebalance"（週次リバランス）/ "lns"（大近傍探索）
+    phase: str
+    # 完了した部分問題数（lns は反復数）
+    completed: int
+    # 部分問題の総数（lns は 0 = 時間まで反復）
+    total: int
+    # 直近に完了した部分問題のキー（日付、成分分割時は "<日付>#<番号>"）
+    current: str | None
+    # 現時点の目的関数値（部分問題の途中では完了分の合計、lns では週全体の値）
+    objective: float | None
+    elapsed_seconds: float
+    # 完了分の合算（_merge_day_results と同じ: ステータスは最悪のもの）。lns では None
+    status: str | None = None
+    unassigned_count: int | None = None
+    partial_count: int | None = None
+    # solve() の制限時間の残り（秒）
+    remaining_seconds: float | None = None
+    # 直近に完了した部分問題の割当（phase="solve" のみ。UI の逐次表示用）
+    assignments: list[Assignment] | None = None
+
+
+@dataclass
+class ModelSize:
+    """MIPモデルの規模"""
+
+    variables: int
+    rows: int
+    nonzeros: int
+
+
+def measure_model_size(prob: pulp.LpProblem) -> ModelSize:
+    """変数数・制約行数・非ゼロ係数数を数える"""
+    return ModelSize(
+        variables=len(prob.variables()),
+        rows=len(prob.constraints),
+        nonzeros=sum(len(c) for c in prob.constraints.values()),
+    )
+
+
 @dataclass
 class InfeasibilityDiagnosis:
     """Infeasibility診断結果"""
@@ -43,89 +116,36 @@ class InfeasibilityDiagnosis:
     partially_assigned_orders: list[str] = field(default_factory=list)
 
 
-def _time_to_minutes(time_str: str) -> int:
-    """"HH:MM" → 分換算"""
-    h, m = time_str.split(":")
-    return int(h) * 60 + int(m)
-
-
-def _orders_overlap(o1: Order, o2: Order) -> bool:
-    """2つのオーダーが同日かつ時間帯重複するか判定"""
-    if o1.date != o2.date:
-        return False
-    s1, e1 = _time_to_minutes(o1.start_time), _time_to_minutes(o1.end_time)
-    s2, e2 = _time_to_minutes(o2.start_time), _time_to_minutes(o2.end_time)
-    return s1 < e2 and s2 < e1
-
+def _build_travel_matrix(inp: OptimizationInput) -> TravelMatrix:
+    """移動時間の密行列（inp.travel_matrix があればそれを、なければ travel_times から構築）
 
-def _build_travel_time_lookup(
-    inp: OptimizationInput,
-) -> dict[tuple[str, str], float]:
-    """(from_id, to_id) → 移動時間（分）のルックアップ
-
-    同一世帯・同一施設の利用者ペアは移動時間0にオーバーライドする。
+    travel_times から構築する場合、同一世帯・同一施設の利用者ペアは移動時間0にオーバーライドする
+    （travel_matrix はローダーが構築時に適用済み）。
     """
-    lookup = {(tt.from_id, tt.to_id): tt.travel_time_minutes for tt in inp.travel_times}
+    if inp.travel_matrix is not None:
+        return inp.travel_matrix
+    return TravelMatrix.from_travel_times(inp.travel_times, inp.customers)
 
-    # 同一世帯/施設グループを構築し、グループ内ペアの移動時間を0にする
-    for c in inp.customers:
-        related = set(c.same_household_customer_ids) | set(c.same_facility_customer_ids)
-        for other_id in related:
-            lookup[(c.id, other_id)] = 0.0
-            lookup[(other_id, c.id)] = 0.0
 
-    return lookup
+def _with_travel_matrix(inp: OptimizationInput) -> OptimizationInput:
+    """travel_times を密行列に置き換えた入力（部分問題・LNS・リバランスで再構築しない）"""
+    if inp.travel_matrix is not None and not inp.travel_times:
+        return inp
+    return inp.model_copy(update={"travel_matrix": _build_travel_matrix(inp), "travel_times": []})
 
 
-def _compute_feasible_pairs(inp: OptimizationInput) -> set[tuple[str, str]]:
+def _compute_feasible_pairs(
+    inp: OptimizationInput,
+    table: OrderTable | None = None,
+) -> set[tuple[str, str]]:
     """割当可能な(helper_id, order_id)ペアを事前計算
 
-    資格制約・性別制約・勤務可能日・勤務可能時間帯・NGスタッフを考慮し、
-    明らかに割当不可能なペアを除外する。
+    資格・性別・勤務可能日・勤務可能時間帯・NGスタッフ・入れるスタッフ・
+    研修中・希望休・世帯リンクを考慮し、割当不可能なペアを除外する。
+    除外したペアは変数を生成しないため、対応する x == 0 の制約行は不要。
+    判定は feasibility モジュールで NumPy配列として一括計算する。
     """
-    # NGペアの事前計算
-    ng_pairs: set[tuple[str, str]] = set()
-    for sc in inp.staff_constraints:
-        if sc.constraint_type == StaffConstraintType.NG:
-            ng_pairs.add((sc.customer_id, sc.staff_id))
-
-    # 資格が必要なservice_typeのセットをマスタデータから構築
-    _cert_required: set[str] = {c.code for c in inp.service_type_configs if c.requires_physical_care_cert} if inp.service_type_configs else set()
-
-    # 顧客マップ（customer_id → Customer）
-    customer_map = {c.id: c for c in inp.customers}
-
-    feasible: set[tuple[str, str]] = set()
-    for h in inp.helpers:
-        for o in inp.orders:
-            # 資格チェック: 無資格者は資格必要な種別に割当不可
-            if not h.can_physical_care and o.service_type in _cert_required:
-                continue
-            # NGスタッフチェック
-            if (o.customer_id, h.id) in ng_pairs:
-                continue
-            # 性別制約チェック
-            customer = customer_map.get(o.customer_id)
-            if customer and customer.gender_requirement != GenderRequirement.ANY:
-                if h.gender.value != customer.gender_requirement.value:
-                    continue
-            # 勤務可能日チェック
-            if h.weekly_availability:
-                slots = h.weekly_availability.get(o.day_of_week, [])
-                if not slots:
-                    continue
-                # 勤務時間帯チェック
-                order_start = _time_to_minutes(o.start_time)
-                order_end = _time_to_minutes(o.end_time)
-                covered = any(
-                    _time_to_minutes(s.start_time) <= order_start
-                    and order_end <= _time_to_minutes(s.end_time)
-                    for s in slots
-                )
-                if not covered:
-                    continue
-            feasible.add((h.id, o.id))
-    return feasible
+    return compute_feasibility_matrix(inp, table).pairs()
 
 
 def solve(
@@ -133,82 +153,572 @@ def solve(
     time_limit_seconds: int = 180,
     weights: SoftWeights | None = None,
     decompose_by_day: bool = True,
+    max_workers: int = 1,
+    worker_memory_mb: int | None = None,
+    weekly_rebalance: bool = False,
+    rebalance_time_fraction: float = 0.1,
+    options: SolverOptions | None = None,
+    initial_assignments: list[Assignment] | None = None,
+    lns: bool = False,
+    lns_time_fraction: float = 0.3,
+    lns_progress: Callable[[Any], None] | None = None,
+    decompose_components: bool = False,
+    progress: Callable[[SolveProgress], None] | None = None,
+    cache: ResultCache | None = None,
 ) -> OptimizationResult:
     """最適化を実行し、結果を返す
 
     decompose_by_day=Trueの場合、オーダーを日付ごとに分割して
     独立にソルブする（メモリ・時間削減）。
+    max_workers>1の場合、日ごとのソルブをプロセスプールで並列実行する
+    （worker_memory_mb指定時はコンテナのメモリ上限からワーカー数を制限）。
 
     NOTE: 日次分割により週次ワークロードバランスと担当継続性は
     日単位の最適化に分断される。継続性は1日4件以上の利用者のみ有効。
-    TODO: Phase 2で週間リバランスパスを検討（ADR-021参照）
+    weekly_rebalance=Trueの場合、time_limit_secondsのうち
+    rebalance_time_fraction分を週次リバランスパスに充てて補正する（ADR-021参照）。
+    options で重複禁止制約の定式化やソルバーバックエンドを切り替えられる。
+    initial_assignments（現在の割当・前回結果・先週の同一枠など）を渡すと、
+    各部分問題で修復（warm_start.repair_initial_assignment）してから初期解として使う。
+    lns=True の場合、time_limit_seconds のうち lns_time_fraction 分（と、それまでに
+    余った時間）で週全体に大近傍探索（lns.improve_lns）を適用する。
+    lns_progress は LNS の反復ごとに lns.LnsProgress を受け取る。
+    decompose_components=True の場合、各日（decompose_by_day=False なら週全体）を
+    割当可能ペアの二部グラフの連結成分（components.connected_components）に分け、
+    ヘルパーを共有しない成分を別々に（max_workers>1 なら並列に）解く。
+    成分ごとのオーダー数は結果の component_sizes に入る。
+    progress は部分問題の完了・リバランス後・LNS の反復ごとに SolveProgress を受け取る。
+    cache を渡すと、入力・重み・制限時間・設定が同一の問題は保存済みの結果を返し
+    （cache_hit=True）、日次分割時は同一の日（成分）の部分問題も再利用する。
+    日（成分）ごとに再利用したか解いたかは結果の day_sources に入る。
     """
-    if not decompose_by_day:
-        return _solve_single(inp, time_limit_seconds, weights)
+    if options is not None and options.no_overlap not in NO_OVERLAP_MODES:
+        raise ValueError(f"unknown no_overlap mode: {options.no_overlap}")
+    if options is not None and options.backend not in BACKENDS:
+        raise ValueError(f"unknown solver backend: {options.backend}")
 
-    # --- 曜日分割モード ---
     start_time = time.time()
-    orders_by_date: dict[str, list[Order]] = {}
-    for o in inp.orders:
-        orders_by_date.setdefault(o.date, []).append(o)
+    if progress is not None:
+        notify = progress
+
+        def with_budget(p: SolveProgress) -> None:
+            notify(replace(p, remaining_seconds=round(
+                max(0.0, time_limit_seconds - p.elapsed_seconds), 3,
+            )))
+
+        progress = with_budget
+    inp = _with_travel_matrix(inp)
+    cache_key: str | None = None
+    if cache is not None:
+        cache_key = fingerprint(
+            inp, weights, time_limit_seconds, options, initial_assignments,
+            level="week", decompose_by_day=decompose_by_day,
+            weekly_rebalance=weekly_rebalance, rebalance_time_fraction=rebalance_time_fraction,
+            lns=lns, lns_time_fraction=lns_time_fraction,
+            decompose_components=decompose_components,
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            # 合算と同じ並び（日次分割時は日付順、日内は inp.orders 順）に揃える
+            orders = sorted(inp.orders, key=lambda o: o.date) if decompose_by_day else inp.orders
+            result = _reorder_assignments(cached, orders).model_copy(update={
+                "solve_time_seconds": round(time.time() - start_time, 3),
+                "cache_hit": True,
+                "day_sources": {
+                    key: "reused" for key in cached.day_sources
+                } if cached.day_sources is not None else None,
+            })
+            logger.info("結果キャッシュを使用: key=%s, status=%s", cache_key[:12], result.status)
+            if progress is not None:
+                progress(SolveProgress(
+                    phase="solve", completed=1, total=1, current=None,
+                    objective=result.objective_value,
+                    elapsed_seconds=result.solve_time_seconds,
+                    status=result.status,
+                    unassigned_count=result.unassigned_count,
+                    partial_count=result.partial_count,
+                    assignments=result.assignments,
+                ))
+            return result
+
+    lns_budget = time_limit_seconds * lns_time_fraction if lns else 0.0
+    budget = max(1, int(time_limit_seconds - lns_budget))
+    result = _solve_main(
+        inp, budget, weights, decompose_by_day, max_workers, worker_memory_mb,
+        weekly_rebalance, rebalance_time_fraction, options, initial_assignments, start_time,
+        decompose_components, progress, cache,
+    )
+    if lns:
+        remaining = time_limit_seconds - (time.time() - start_time)
+        if remaining >= 1:
+            result = _apply_lns(
+                inp, result, weights, remaining, start_time, options, lns_progress, progress,
+                decompose_by_day,
+            )
+    if cache is not None and cache_key is not None:
+        result = result.model_copy(update={"cache_hit": False})
+        cache.put(cache_key, result)
+    return result
 
-    if len(orders_by_date) <= 1:
-        # 1日分しかない → 分割不要
-        return _solve_single(inp, time_limit_seconds, weights)
 
-    # 日ごとに独立してソルブ
-    all_assignments: list[Assignment] = []
-    total_objective = 0.0
-    total_unassigned = 0
-    total_partial = 0
-    worst_status = "Optimal"
-    n_days = len(orders_by_date)
-    # ステータス優先順位（小さいほど深刻）
-    _STATUS_PRIORITY = {
-        "Infeasible": 0, "Unbounded": 0, "Unknown": 0,
-        "Not Solved": 1, "Feasible": 2, "Optimal": 3,
-    }
+def _solve_main(
+    inp: OptimizationInput,
+    time_limit_seconds: int,
+    weights: SoftWeights | None,
+    decompose_by_day: bool,
+    max_workers: int,
+    worker_memory_mb: int | None,
+    weekly_rebalance: bool,
+    rebalance_time_fraction: float,
+    options: SolverOptions | None,
+    initial_assignments: list[Assignment] | None,
+    start_time: float,
+    decompose_components: bool = False,
+    progress: Callable[[SolveProgress], None] | None = None,
+    cache: ResultCache | None = None,
+) -> OptimizationResult:
+    """LNS 前の本体（単一MIP、または日次分割・連結成分分割 + 週次リバランス）"""
+    if decompose_by_day:
+        orders_by_date: dict[str, list[Order]] = {}
+        for o in inp.orders:
+            orders_by_date.setdefault(o.date, []).append(o)
+        groups = sorted(orders_by_date.items())
+    else:
+        groups = [("week", inp.orders)] if inp.orders else []
+
+    component_sizes: list[int] | None = None
+    if decompose_components:
+        groups = _split_components(inp, groups, weights)
+        component_sizes = [len(orders) for _, orders in groups]
+
+    if len(groups) <= 1:
+        # 部分問題が1つしかない → 分割不要
+        result = _solve_single(inp, time_limit_seconds, weights, options, initial_assignments)
+        if component_sizes is not None:
+            result = result.model_copy(update={"component_sizes": component_sizes})
+        if progress is not None:
+            progress(SolveProgress(
+                phase="solve", completed=1, total=1,
+                current=groups[0][0] if groups else None,
+                objective=result.objective_value,
+                elapsed_seconds=round(time.time() - start_time, 3),
+                status=result.status,
+                unassigned_count=result.unassigned_count,
+                partial_count=result.partial_count,
+                assignments=result.assignments,
+            ))
+        return result
+
+    # 週次リバランス用に予算の一部を確保する（日次分割時のみ）
+    weekly_rebalance = weekly_rebalance and decompose_by_day
+    rebalance_budget = time_limit_seconds * rebalance_time_fraction if weekly_rebalance else 0.0
+    day_budget = max(1, int(time_limit_seconds - rebalance_budget))
+
+    result = _solve_days(
+        inp, groups, day_budget, weights, max_workers, worker_memory_mb, start_time,
+        options, initial_assignments, progress, cache,
+    )
+    if component_sizes is not None:
+        result = _merge_components(inp, result, weights, decompose_by_day, component_sizes)
+    if weekly_rebalance:
+        remaining = min(rebalance_budget, time_limit_seconds - (time.time() - start_time))
+        if remaining > 0:
+            result = _apply_weekly_rebalance(inp, result, weights, remaining, start_time)
+            if progress is not None:
+                progress(SolveProgress(
+                    phase="rebalance", completed=1, total=1, current=None,
+                    objective=result.objective_value,
+                    elapsed_seconds=round(time.time() - start_time, 3),
+                    status=result.status,
+                    unassigned_count=result.unassigned_count,
+                    partial_count=result.partial_count,
+                ))
+    return result
+
+
+def _split_components(
+    inp: OptimizationInput,
+    groups: list[tuple[str, list[Order]]],
+    weights: SoftWeights | None,
+) -> list[tuple[str, list[Order]]]:
+    """各部分問題（日 or 週）を割当可能ペアの連結成分に分ける
+
+    キーは "<日付>#<成分番号>"（並列実行時の結果の対応付けに使う）。
+    """
+    from optimizer.engine.components import connected_components
+
+    split: list[tuple[str, list[Order]]] = []
+    for key, orders in groups:
+        sub_inp = build_day_input(inp, orders)
+        components = connected_components(sub_inp, weights)
+        split.extend(
+            (f"{key}#{k}", [orders[j] for j in members])
+            for k, members in enumerate(components)
+        )
+    logger.info(
+        "Component decomposition: %d groups -> %d components (largest=%d orders)",
+        len(groups), len(split), max((len(o) for _, o in split), default=0),
+    )
+    return split
+
+
+def _merge_components(
+    inp: OptimizationInput,
+    result: OptimizationResult,
+    weights: SoftWeights | None,
+    decompose_by_day: bool,
+    component_sizes: list[int],
+) -> OptimizationResult:
+    """成分ごとの合算結果を日付順（日内は inp.orders 順）に並べ、目的関数値を再計算する
+
+    成分ごとの目的関数値には他成分のヘルパーの稼働バランス項（定数）が重複して含まれ、
+    移動時間項も成分内のオーダーのみで計算されるため、分割前と同じ単位で求め直す。
+    """
+    assignments, objective = _grouped_objective(
+        inp, result.assignments, weights, decompose_by_day,
+    )
+    return result.model_copy(update={
+        "assignments": assignments,
+        "objective_value": round(objective, 6),
+        "component_sizes": component_sizes,
+    })
+
+
+def _grouped_objective(
+    inp: OptimizationInput,
+    assignments: list[Assignment],
+    weights: SoftWeights | None,
+    decompose_by_day: bool,
+) -> tuple[list[Assignment], float]:
+    """objective_value と同じ単位の目的関数値（日次分割時は日ごとの合計、そうでなければ週全体）
+
+    Returns:
+        (日付順・日内は inp.orders 順に並べた割当, 目的関数値)
+    """
+    from optimizer.engine.objective import evaluate_objective
+
+    by_order = {a.order_id: a for a in assignments}
+    if decompose_by_day:
+        orders_by_date: dict[str, list[Order]] = {}
+        for o in inp.orders:
+            orders_by_date.setdefault(o.date, []).append(o)
+        groups = [orders for _, orders in sorted(orders_by_date.items())]
+    else:
+        groups = [inp.orders]
 
-    sorted_dates = sorted(orders_by_date.items())
-    for day_index, (date_str, day_orders) in enumerate(sorted_dates):
+    ordered: list[Assignment] = []
+    objective = 0.0
+    for orders in groups:
+        group_assignments = [by_order[o.id] for o in orders if o.id in by_order]
+        ordered.extend(group_assignments)
+        objective += evaluate_objective(
+            build_day_input(inp, orders), group_assignments, weights,
+        ).total
+    return ordered, objective
+
+
+def _solve_days(
+    inp: OptimizationInput,
+    sorted_dates: list[tuple[str, list[Order]]],
+    time_limit_seconds: int,
+    weights: SoftWeights | None,
+    max_workers: int,
+    worker_memory_mb: int | None,
+    start_time: float,
+    options: SolverOptions | None = None,
+    initial_assignments: list[Assignment] | None = None,
+    progress: Callable[[SolveProgress], None] | None = None,
+    cache: ResultCache | None = None,
+) -> OptimizationResult:
+    """日付ごとの部分問題を解いて合算する（逐次 or 並列）
+
+    cache があれば、部分問題の入力（その日に関係する部分のみ、cache.project_subproblem）・
+    重み・設定・初期割当・予算が同一の日は保存済みの結果を使い、MIP で解いた日の結果を
+    保存する（時間切れで貪欲解にした日は保存しない）。このとき結果の day_sources に
+    日ごとの出どころ（reused: キャッシュ / solved: MIP / greedy: 時間切れの貪欲解）を入れる。
+    """
+    n_days = len(sorted_dates)
+    finished: list[OptimizationResult] = []
+    cache_keys: dict[str, str] = {}
+    cached: dict[str, OptimizationResult] = {}
+    sources: dict[str, str] = {}
+    if cache is not None:
+        for date_str, day_orders in sorted_dates:
+            cache_keys[date_str] = fingerprint(
+                project_subproblem(build_day_input(inp, day_orders)), weights,
+                time_limit_seconds, options, _filter_initial(initial_assignments, day_orders),
+                level="day",
+            )
+            hit = cache.get(cache_keys[date_str])
+            if hit is not None:
+                cached[date_str] = _reorder_assignments(hit, day_orders)
+                sources[date_str] = "reused"
+        logger.info("部分問題の結果キャッシュ: reused=%d/%d", len(cached), n_days)
+
+    def store(date_str: str, day_result: OptimizationResult) -> None:
+        if cache is not None:
+            sources[date_str] = "solved"
+            cache.put(cache_keys[date_str], day_result)
+
+    def merge(results: dict[str, OptimizationResult]) -> OptimizationResult:
+        merged = _merge_day_results([results[date_str] for date_str, _ in sorted_dates], start_time)
+        if cache is None:
+            return merged
+        return merged.model_copy(update={"day_sources": {
+            date_str: sources.get(date_str, "greedy") for date_str, _ in sorted_dates
+        }})
+
+    def report(date_str: str, day_result: OptimizationResult) -> None:
+        if progress is None:
+            return
+        # 完了した日までの合算（完了順）
+        finished.append(day_result)
+        so_far = _merge_day_results(finished, start_time)
+        progress(SolveProgress(
+            phase="solve", completed=len(finished), total=n_days, current=date_str,
+            objective=so_far.objective_value,
+            elapsed_seconds=so_far.solve_time_seconds,
+            status=so_far.status,
+            unassigned_count=so_far.unassigned_count,
+            partial_count=so_far.partial_count,
+            assignments=day_result.assignments,
+        ))
+
+    for date_str, day_result in cached.items():
+        report(date_str, day_result)
+    pending = [(date_str, orders) for date_str, orders in sorted_dates if date_str not in cached]
+
+    if max_workers > 1 and pending:
+        from optimizer.engine.parallel import resolve_worker_count, solve_days_parallel
+
+        n_workers = resolve_worker_count(max_workers, len(pending), worker_memory_mb)
+        if n_workers > 1:
+            parallel_results = solve_days_parallel(
+                inp, pending, time_limit_seconds, weights, n_workers, start_time,
+                options, initial_assignments, on_result=report, on_solved=store,
+            )
+            parallel_results.update(cached)
+            return merge(parallel_results)
+
+    # 日ごとに独立してソルブ
+    day_results: dict[str, OptimizationResult] = dict(cached)
+    n_pending = len(pending)
+    for day_index, (date_str, day_orders) in enumerate(pending):
         # time budget: 経過時間を差し引いて残りを均等配分
         elapsed = time.time() - start_time
         if elapsed >= time_limit_seconds:
-            # 時間切れ: 残りオーダーを未割当として返す
+            # 時間切れ: 残りの日は貪欲解で埋める
             logger.warning(
                 "Time budget exhausted at day %d/%d (%s): "
-                "marking %d orders as unassigned (elapsed=%.1fs, limit=%ds)",
-                day_index + 1, n_days, date_str,
+                "falling back to greedy for %d orders (elapsed=%.1fs, limit=%ds)",
+                day_index + 1, n_pending, date_str,
                 len(day_orders), elapsed, time_limit_seconds,
             )
-            for o in day_orders:
-                all_assignments.append(Assignment(order_id=o.id, staff_ids=[]))
-                total_unassigned += 1
-                total_objective += _COVERAGE_PENALTY * o.staff_count
-            if _STATUS_PRIORITY.get("Feasible", 2) < _STATUS_PRIORITY.get(worst_status, 99):
-                worst_status = "Feasible"
+            day_results[date_str] = unsolved_day_result(inp, day_orders, weights)
+            report(date_str, day_results[date_str])
             continue
         remaining = max(10, time_limit_seconds - elapsed)
-        remaining_days = n_days - day_index
+        remaining_days = n_pending - day_index
         per_day_limit = max(10, int(remaining / remaining_days))
 
-        # この日に必要な利用者IDを特定
-        customer_ids = {o.customer_id for o in day_orders}
-        day_customers = [c for c in inp.customers if c.id in customer_ids]
-
-        # 日単位の入力を構築
-        day_inp = OptimizationInput(
-            customers=day_customers,
-            helpers=inp.helpers,
-            orders=day_orders,
-            travel_times=inp.travel_times,
-            staff_unavailabilities=inp.staff_unavailabilities,
-            staff_constraints=inp.staff_constraints,
-            service_type_configs=inp.service_type_configs,
+        day_results[date_str] = solve_day(
+            build_day_input(inp, day_orders), per_day_limit, weights, options, initial_assignments,
         )
+        store(date_str, day_results[date_str])
+        report(date_str, day_results[date_str])
 
-        day_result = _solve_single(day_inp, per_day_limit, weights)
+    return merge(day_results)
+
+
+def _apply_weekly_rebalance(
+    inp: OptimizationInput,
+    result: OptimizationResult,
+    weights: SoftWeights | None,
+    time_limit_seconds: float,
+    start_time: float,
+) -> OptimizationResult:
+    """日次分割の合算結果に週次リバランスパスを適用する
+
+    objective_value は日ごとの目的関数値の合計のまま求め直し、
+    週全体の値は weekly_objective_value に分けて返す（尺度を混ぜない）。
+    """
+    from optimizer.engine.objective import evaluate_objective
+    from optimizer.engine.rebalance import rebalance_week
+
+    if not result.assignments:
+        return result
+
+    rebalanced, report = rebalance_week(inp, result.assignments, weights, time_limit_seconds)
+    # 合算結果の並び（日付順）を維持する
+    by_order = {a.order_id: a for a in rebalanced}
+    assignments = [by_order.pop(a.order_id) for a in result.assignments]
+    assignments.extend(by_order.values())
+    staff_count = {o.id: o.staff_count for o in inp.orders}
+    unassigned = sum(1 for a in assignments if not a.staff_ids)
+    partial = sum(
+        1 for a in assignments if 0 < len(a.staff_ids) < staff_count.get(a.order_id, 1)
+    )
+    return result.model_copy(update={
+        "assignments": assignments,
+        "objective_value": round(_grouped_objective(inp, assignments, weights, True)[1], 6),
+        "weekly_objective_value": round(evaluate_objective(inp, rebalanced, weights).total, 6),
+        "solve_time_seconds": round(time.time() - start_time, 3),
+        "unassigned_count": unassigned,
+        "partial_count": partial,
+        "rebalance_deltas": report.deltas.as_dict(),
+    })
+
+
+def _apply_lns(
+    inp: OptimizationInput,
+    result: OptimizationResult,
+    weights: SoftWeights | None,
+    time_limit_seconds: float,
+    start_time: float,
+    options: SolverOptions | None,
+    lns_progress: Callable[[Any], None] | None,
+    progress: Callable[[SolveProgress], None] | None = None,
+    decompose_by_day: bool = False,
+) -> OptimizationResult:
+    """結果に大近傍探索を適用する
 
+    LNS は週全体の目的関数で探索する。objective_value は本体と同じ単位
+    （日次分割時は日ごとの合計）で求め直し、LNS の値は weekly_objective_value に返す。
+    """
+    from optimizer.engine.lns import LnsProgress, improve_lns
+
+    if not result.assignments:
+        return result
+
+    on_iteration = lns_progress
+    if progress is not None:
+        emit = progress
+
+        def forward(p: LnsProgress) -> None:
+            if lns_progress is not None:
+                lns_progress(p)
+            emit(SolveProgress(
+                phase="lns", completed=p.iteration, total=0, current=p.neighborhood,
+                objective=round(p.objective, 6),
+                elapsed_seconds=round(time.time() - start_time, 3),
+            ))
+
+        on_iteration = forward
+
+    lns_result = improve_lns(
+        inp, result.assignments, weights, time_limit_seconds, options, progress=on_iteration,
+    )
+    by_order = {a.order_id: a for a in lns_result.assignments}
+    assignments = [by_order.pop(a.order_id) for a in result.assignments]
+    assignments.extend(by_order.values())
+    staff_count = {o.id: o.staff_count for o in inp.orders}
+    return result.model_copy(update={
+        "assignments": assignments,
+        "objective_value": round(
+            _grouped_objective(inp, assignments, weights, decompose_by_day)[1], 6,
+        ),
+        "weekly_objective_value": round(lns_result.objective, 6),
+        "solve_time_seconds": round(time.time() - start_time, 3),
+        "unassigned_count": sum(1 for a in assignments if not a.staff_ids),
+        "partial_count": sum(
+            1 for a in assignments if 0 < len(a.staff_ids) < staff_count.get(a.order_id, 1)
+        ),
+        "lns_stats": {
+            "iterations": lns_result.iterations,
+            "accepted": lns_result.accepted,
+            "improvement": round(lns_result.improvement, 6),
+            "elapsed_seconds": lns_result.elapsed_seconds,
+        },
+    })
+
+
+# ステータス優先順位（小さいほど深刻）
+_STATUS_PRIORITY = {
+    "Infeasible": 0, "Unbounded": 0, "Unknown": 0,
+    "Not Solved": 1, "Feasible": 2, "Optimal": 3,
+}
+
+
+def build_day_input(inp: OptimizationInput, day_orders: list[Order]) -> OptimizationInput:
+    """1日分のオーダーから日単位の入力を構築する（移動時間は当日の利用者間のみ）"""
+    # この日に必要な利用者IDを特定
+    customer_ids = {o.customer_id for o in day_orders}
+    day_customers = [c for c in inp.customers if c.id in customer_ids]
+    day_customer_ids = list(dict.fromkeys(o.customer_id for o in day_orders))
+
+    return OptimizationInput(
+        customers=day_customers,
+        helpers=inp.helpers,
+        orders=day_orders,
+        travel_times=[],
+        travel_matrix=_build_travel_matrix(inp).subset(day_customer_ids),
+        staff_unavailabilities=inp.staff_unavailabilities,
+        staff_constraints=inp.staff_constraints,
+        service_type_configs=inp.service_type_configs,
+    )
+
+
+def _reorder_assignments(
+    result: OptimizationResult,
+    orders: list[Order],
+) -> OptimizationResult:
+    """割当を orders の順に並べ替える（キャッシュの結果は別の並びの入力で解いたものがある）"""
+    by_order = {a.order_id: a for a in result.assignments}
+    assignments = [by_order.pop(o.id) for o in orders if o.id in by_order]
+    assignments.extend(by_order.values())
+    return result.model_copy(update={"assignments": assignments})
+
+
+def _filter_initial(
+    initial_assignments: list[Assignment] | None,
+    day_orders: list[Order],
+) -> list[Assignment] | None:
+    """初期割当のうち、その日のオーダー分だけを取り出す"""
+    if initial_assignments is None:
+        return None
+    order_ids = {o.id for o in day_orders}
+    return [a for a in initial_assignments if a.order_id in order_ids]
+
+
+def solve_day(
+    day_inp: OptimizationInput,
+    time_limit_seconds: int,
+    weights: SoftWeights | None = None,
+    options: SolverOptions | None = None,
+    initial_assignments: list[Assignment] | None = None,
+) -> OptimizationResult:
+    """日（成分）単位の部分問題を解く — 日次分割の逐次実行・並列実行（parallel）で共通の入口
+
+    day_inp は build_day_input で構築した入力。initial_assignments は週全体のものを渡してよく、
+    day_inp のオーダー分だけを初期解に使う。プロセスプールに投入するためモジュール直下に置く。
+    """
+    day_initial = _filter_initial(initial_assignments, day_inp.orders)
+    return _solve_single(day_inp, time_limit_seconds, weights, options, day_initial)
+
+
+def unsolved_day_result(
+    inp: OptimizationInput,
+    day_orders: list[Order],
+    weights: SoftWeights | None = None,
+) -> OptimizationResult:
+    """時間切れでソルブできなかった日の結果（貪欲解）"""
+    from optimizer.engine.heuristic import solve_greedy
+
+    return solve_greedy(build_day_input(inp, day_orders), weights)
+
+
+def _merge_day_results(
+    day_results: list[OptimizationResult],
+    start_time: float,
+) -> OptimizationResult:
+    """日ごとの結果を日付順に合算する（並列実行時も同一の結果になるよう順序固定）"""
+    all_assignments: list[Assignment] = []
+    total_objective = 0.0
+    total_unassigned = 0
+    total_partial = 0
+    worst_status = "Optimal"
+
+    for day_result in day_results:
         all_assignments.extend(day_result.assignments)
         total_objective += day_result.objective_value
         total_unassigned += day_result.unassigned_count
@@ -233,48 +743,73 @@ def _solve_single(
     inp: OptimizationInput,
     time_limit_seconds: int = 180,
     weights: SoftWeights | None = None,
+    options: SolverOptions | None = None,
+    initial_assignments: list[Assignment] | None = None,
 ) -> OptimizationResult:
-    """単一期間の最適化を実行する（分割なし）"""
-    start_time = time.time()
-    w = weights or SoftWeights()
+    """単一期間の最適化を実行する（分割なし）
 
-    helpers = inp.helpers
-    orders = inp.orders
-    travel_lookup = _build_travel_time_lookup(inp)
+    initial_assignments は修復してから MIP start（CBC warmStart）として渡す。
+    初期割当がなければ貪欲解（heuristic）を MIP start に使い、
+    制限時間内に incumbent が得られなかった場合はそれを結果として返す。
+    """
+    from optimizer.engine.heuristic import construct_greedy, solve_greedy
+    from optimizer.engine.warm_start import initial_pairs, repair_initial_assignment
 
-    # --- モデル作成 ---
-    prob = pulp.LpProblem("shift_optimization", pulp.LpMinimize)
+    start_time = time.time()
+    # 貪欲解・MIP・フォールバック評価で移動時間行列を共有する（solve() 経由なら構築済み）
+    inp = _with_travel_matrix(inp)
+    start: list[Assignment] | None = None
+    if initial_assignments is not None:
+        start, _ = repair_initial_assignment(inp, initial_assignments)
+    elif inp.orders and (options is None or options.heuristic_start):
+        start = construct_greedy(inp, weights)
+    initial = initial_pairs(start) if start is not None else None
+
+    result = _solve_backend(inp, time_limit_seconds, weights, options, initial)
+    if result.assignments or not inp.orders or result.status in ("Infeasible", "Unbounded"):
+        return result
+
+    # 制限時間内に incumbent なし → 初期解（なければ貪欲解）を返す
+    logger.warning("incumbentなし (status=%s): 貪欲解で代替", result.status)
+    fallback = solve_greedy(inp, weights, start)
+    return fallback.model_copy(
+        update={"solve_time_seconds": round(time.time() - start_time, 3)},
+    )
 
-    # --- 割当可能ペアの事前計算（変数枝刈り） ---
-    feasible_pairs = _compute_feasible_pairs(inp)
 
-    # --- 決定変数: feasibleペアのみ生成（メモリ削減） ---
-    x: dict[tuple[str, str], pulp.LpVariable] = {}
-    for h_id, o_id in feasible_pairs:
-        x[h_id, o_id] = pulp.LpVariable(f"x_{h_id}_{o_id}", cat="Binary")
+def _solve_backend(
+    inp: OptimizationInput,
+    time_limit_seconds: int,
+    weights: SoftWeights | None,
+    options: SolverOptions | None,
+    initial: set[tuple[str, str]] | None,
+) -> OptimizationResult:
+    """選択されたバックエンドで MIP を解く（initial は MIP start のペア）"""
+    if options is not None and options.backend == "cpsat":
+        from optimizer.engine.cpsat import solve_with_cpsat
 
-    # --- 基本制約: カバレッジ（<= staff_count + ペナルティで緩和） ---
-    COVERAGE_PENALTY = _COVERAGE_PENALTY  # ローカル参照
-    unmet: dict[str, pulp.LpVariable] = {}  # order_id → 不足人数
-    for o in orders:
-        assigned_sum = pulp.lpSum(x.get((h.id, o.id), 0) for h in helpers)
-        # 割当人数 <= staff_count（上限制約）
-        prob += assigned_sum <= o.staff_count, f"assign_upper_{o.id}"
-        # 不足人数のスラック変数: unmet_o >= staff_count - assigned_sum
-        u = pulp.LpVariable(f"unmet_{o.id}", lowBound=0, cat="Integer")
-        prob += u >= o.staff_count - assigned_sum, f"unmet_def_{o.id}"
-        unmet[o.id] = u
+        return solve_with_cpsat(inp, time_limit_seconds, weights, options, initial)
+    if options is not None and options.backend != "pulp":
+        from optimizer.engine.backends import solve_with_model_builder
 
-    # --- 制約の追加（外部から呼べるよう分離） ---
-    _add_constraints(prob, x, inp, travel_lookup)
+        return solve_with_model_builder(inp, time_limit_seconds, weights, options, initial)
 
-    # --- 目的関数: 重み付き加算 + カバレッジペナルティ ---
-    objective = _build_objective(x, inp, travel_lookup, prob, w)
-    coverage_penalty = pulp.lpSum(COVERAGE_PENALTY * unmet[o.id] for o in orders)
-    prob += objective + coverage_penalty, "total_cost"
+    start_time = time.time()
+    helpers = inp.helpers
+    orders = inp.orders
+
+    prob, x = _build_model(inp, weights, options, initial)
+    if logger.isEnabledFor(logging.DEBUG):
+        size = measure_model_size(prob)
+        logger.debug(
+            "モデル規模: 変数=%d, 制約=%d, 非ゼロ=%d",
+            size.variables, size.rows, size.nonzeros,
+        )
 
     # --- ソルバー実行 ---
-    solver = pulp.PULP_CBC_CMD(msg=0, timeLimit=time_limit_seconds)
+    solver = pulp.PULP_CBC_CMD(
+        msg=0, timeLimit=time_limit_seconds, warmStart=initial is not None,
+    )
     prob.solve(solver)
 
     solve_time = time.time() - start_time
@@ -323,24 +858,88 @@ def _solve_single(
     )
 
 
+def _build_model(
+    inp: OptimizationInput,
+    weights: SoftWeights | None = None,
+    options: SolverOptions | None = None,
+    initial: set[tuple[str, str]] | None = None,
+) -> tuple[pulp.LpProblem, dict[tuple[str, str], pulp.LpVariable]]:
+    """MIPモデル（変数・制約・目的関数）を構築する（ソルブは行わない）
+
+    initial 指定時は、そのペアを1・他を0とした初期値（MIP start）を設定する。
+    """
+    w = weights or SoftWeights()
+    opts = options or SolverOptions()
+
+    orders = inp.orders
+    travel_matrix = _build_travel_matrix(inp)
+    table = OrderTable(orders)
+
+    # --- モデル作成 ---
+    prob = pulp.LpProblem("shift_optimization", pulp.LpMinimize)
+
+    # --- 割当可能ペアの事前計算（変数枝刈り） ---
+    feasible_pairs = _compute_feasible_pairs(inp, table)
+
+    # --- 決定変数: feasibleペアのみ生成（メモリ削減） ---
+    x: dict[tuple[str, str], pulp.LpVariable] = {}
+    for h_id, o_id in feasible_pairs:
+        x[h_id, o_id] = pulp.LpVariable(f"x_{h_id}_{o_id}", cat="Binary")
+        if initial is not None:
+            x[h_id, o_id].setInitialValue(1 if (h_id, o_id) in initial else 0)
+
+    # --- 基本制約: カバレッジ（<= staff_count + ペナルティで緩和） ---
+    COVERAGE_PENALTY = _COVERAGE_PENALTY  # ローカル参照
+    unmet: dict[str, pulp.LpVariable] = {}  # order_id → 不足人数
+    for o in orders:
+        assigned_sum = pulp.lpSum(x.get((h.id, o.id), 0) for h in inp.helpers)
+        # 割当人数 <= staff_count（上限制約）
+        prob += assigned_sum <= o.staff_count, f"assign_upper_{o.id}"
+        # 不足人数のスラック変数: unmet_o >= staff_count - assigned_sum
+        u = pulp.LpVariable(f"unmet_{o.id}", lowBound=0, cat="Integer")
+        prob += u >= o.staff_count - assigned_sum, f"unmet_def_{o.id}"
+        if initial is not None:
+            n_initial = sum(1 for h in inp.helpers if (h.id, o.id) in initial)
+            u.setInitialValue(max(0, o.staff_count - n_initial))
+        unmet[o.id] = u
+
+    # --- 制約の追加（外部から呼べるよう分離） ---
+    _add_constraints(prob, x, inp, travel_matrix, table, opts.no_overlap)
+
+    # --- 目的関数: 重み付き加算 + カバレッジペナルティ ---
+    objective = _build_objective(x, inp, travel_matrix, prob, w, table)
+    coverage_penalty = pulp.lpSum(COVERAGE_PENALTY * unmet[o.id] for o in orders)
+    prob += objective + coverage_penalty, "total_cost"
+    return prob, x
+
+
 def _add_constraints(
     prob: pulp.LpProblem,
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
-    travel_lookup: dict[tuple[str, str], float],
+    travel_matrix: TravelMatrix,
+    table: OrderTable | None = None,
+    no_overlap: str = "pairwise",
 ) -> None:
-    """全制約を追加するエントリポイント"""
-    from optimizer.engine.constraints import add_all_hard_constraints
+    """全制約を追加するエントリポイント
 
-    add_all_hard_constraints(prob, x, inp, travel_lookup)
+    重複・移動時間・徒歩距離の競合ペアはここで1回だけ生成する。
+    """
+    from optimizer.engine.constraints import add_all_hard_constraints, build_conflict_index_for
+
+    if table is None:
+        table = OrderTable(inp.orders)
+    conflicts = build_conflict_index_for(inp, table, travel_matrix)
+    add_all_hard_constraints(prob, x, inp, travel_matrix, table, conflicts, no_overlap)
 
 
 def _build_objective(
     x: dict[tuple[str, str], pulp.LpVariable],
     inp: OptimizationInput,
-    travel_lookup: dict[tuple[str, str], float],
+    travel_matrix: TravelMatrix,
     prob: pulp.LpProblem,
     w: SoftWeights | None = None,
+    table: OrderTable | None = None,
 ) -> pulp.LpAffineExpression:
     """重み付き目的関数の構築
 
@@ -351,28 +950,22 @@ def _build_objective(
     """
     if w is None:
         w = SoftWeights()
+    if table is None:
+        table = OrderTable(inp.orders)
 
     objective = pulp.LpAffineExpression()
 
     # --- 1. 移動時間最小化（線形近似） ---
+    # 同日・異利用者ペアごとの tt * (x[h,o1] + x[h,o2]) / 2 はヘルパーに依存しないため、
+    # オーダー別係数 Σ tt/2 に集約してから各変数に掛ける
     if w.travel > 0:
-        orders_by_date: dict[str, list[Order]] = {}
-        for o in inp.orders:
-            orders_by_date.setdefault(o.date, []).append(o)
-
-        for h in inp.helpers:
-            for date_orders in orders_by_date.values():
-                for i, o1 in enumerate(date_orders):
-                    for o2 in date_orders[i + 1 :]:
-                        c1, c2 = o1.customer_id, o2.customer_id
-                        if c1 == c2:
-                            continue
-                        tt = travel_lookup.get((c1, c2), 0.0)
-                        if tt > 0:
-                            v1 = x.get((h.id, o1.id), 0)
-                            v2 = x.get((h.id, o2.id), 0)
-                            if v1 != 0 or v2 != 0:
-                                objective += w.travel * tt * (v1 + v2) / 2
+        coef = travel_coefficients(table, travel_matrix)
+        travel_terms = [
+            (v, w.travel * coef[table.index[o_id]])
+            for (h_id, o_id), v in x.items()
+            if coef[table.index[o_id]] > 0
+        ]
+        objective += pulp.LpAffineExpression(travel_terms)
 
     # --- 2. 推奨スタッフ優先 ---
     if w.preferred_staff > 0:
@@ -393,7 +986,7 @@ def _build_objective(
 
     # --- 3. 稼働バランス（preferred_hours乖離ペナルティ） ---
     if w.workload_balance > 0:
-        _add_workload_balance(prob, x, inp, objective, w.workload_balance)
+        _add_workload_balance(prob, x, inp, objective, w.workload_balance, table)
 
     # --- 4. 担当継続性（同一利用者のスタッフ分散ペナルティ） ---
     if w.continuity > 0:
@@ -408,6 +1001,7 @@ def _add_workload_balance(
     inp: OptimizationInput,
     objective: pulp.LpAffineExpression,
     weight: float,
+    table: OrderTable,
 ) -> None:
     """稼働バランス: 各ヘルパーの合計稼働時間がpreferred_hoursを超過した分にペナルティ
 
@@ -417,9 +1011,9 @@ def _add_workload_balance(
     for h in inp.helpers:
         # 各ヘルパーの合計稼働時間（分）
         total_minutes = pulp.lpSum(
-            (_time_to_minutes(o.end_time) - _time_to_minutes(o.start_time)) * x.get((h.id, o.id), 0)
-            for o in inp.orders
-            if (h.id, o.id) in x
+            duration * x[h.id, oid]
+            for oid, duration in zip(table.ids, table.duration)
+            if (h.id, oid) in x
         )
 
         pref_max_min = h.preferred_hours.max * 60
@@ -468,7 +1062,7 @@ def _add_staff_continuity(
             helper_available_days[h.id] = set()  # 未定義=全日可能は別扱い
 
     for cid, customer_orders in orders_by_customer.items():
-        if len(customer_orders) < 4:
+        if len(customer_orders) < _CONTINUITY_MIN_ORDERS:
             continue  # 3件以下はスキップ（計算効率・変数数削減）
 
         # この利用者のオーダー曜日
@@ -506,18 +1100,17 @@ def diagnose_infeasibility(
     """
     from optimizer.engine.constraints import add_all_hard_constraints
 
-    helpers = inp.helpers
     orders = inp.orders
-    travel_lookup = _build_travel_time_lookup(inp)
+    travel_matrix = _build_travel_matrix(inp)
+    table = OrderTable(orders)
 
     # --- 0. feasible_pairsが0のオーダーを特定（cert/NG/availability考慮） ---
-    feasible_pairs = _compute_feasible_pairs(inp)
-    feasible_count_by_order: dict[str, int] = {o.id: 0 for o in orders}
-    for h_id, o_id in feasible_pairs:
-        feasible_count_by_order[o_id] += 1
+    feasibility = compute_feasibility_matrix(inp, table)
+    feasible_pairs = feasibility.pairs()
     zero_feasible_orders = [
-        oid for oid, cnt in feasible_count_by_order.items() if cnt == 0
+        oid for oid, cnt in feasibility.order_counts().items() if cnt == 0
     ]
+    helpers_by_order = feasibility.helpers_for_order()
 
     # --- 1. ソフトカバレッジ MIP ---
     prob = pulp.LpProblem("diagnose", pulp.LpMinimize)
@@ -532,13 +1125,13 @@ def diagnose_infeasibility(
     for o in orders:
         unmet = pulp.LpVariable(f"unmet_{o.id}", lowBound=0, upBound=o.staff_count)
         unmet_vars[o.id] = unmet
-        assigned = pulp.lpSum(x.get((h.id, o.id), 0) for h in helpers)
+        assigned = pulp.lpSum(x[h_id, o.id] for h_id in helpers_by_order[o.id])
         prob += unmet >= o.staff_count - assigned, f"soft_cover_{o.id}"
         # 過剰割当は禁止（staff_count を超えない）
         prob += assigned <= o.staff_count, f"max_cover_{o.id}"
 
     # ハード制約を追加（coverage 制約はソフト化済みのため除外）
-    add_all_hard_constraints(prob, x, inp, travel_lookup)
+    add_all_hard_constraints(prob, x, inp, travel_matrix, table)
 
     # 目的: unmet の合計を最小化
     prob += pulp.lpSum(unmet_vars[o.id] for o in orders), "minimize_unmet"
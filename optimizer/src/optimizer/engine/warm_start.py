@@ -0,0 +1,143 @@
+"""ウォームスタート — 既存の割当を修復して MIP 初期解として渡す
+
+/optimize は毎回ゼロから解くが、duplicate_week_orders で複製した週や
+手動調整済みの週には、ほぼ実行可能な割当（orders.assigned_staff_ids、
+前回の optimization_runs、先週の同一枠の担当）が既にある。
+ここではそれを貪欲に修復して実行可能にし、ソルバーの初期解に使う。
+
+修復は割当を「削る」方向のみ行う（カバレッジはソフト制約のため、
+削った結果が未割当でも実行可能解になる）:
+1. 割当可能性行列で不可のペアを除外（資格・NG・勤務時間・希望休など）
+2. staff_count を超える分を除外（先頭から残す）
+3. 世帯リンク群は全オーダーに共通するスタッフだけ残す
+4. ヘルパーごとに開始時刻順に見て、既に残した訪問と重複・移動時間不足・
+   徒歩距離超過になる訪問を除外（世帯リンク群は群ごと除外）
+"""
+
+import logging
+from dataclasses import dataclass
+
+from optimizer.engine.constraints import build_conflict_index_for
+from optimizer.engine.feasibility import compute_feasibility_matrix, household_groups
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import _build_travel_matrix
+from optimizer.models import Assignment, OptimizationInput, Order, TransportationType
+
+logger = logging.getLogger(__name__)
+
+# 先週の同一枠を特定するキー: (customer_id, 曜日, start_time, end_time, service_type)
+SlotKey = tuple[str, str, str, str, str]
+
+
+@dataclass
+class RepairReport:
+    """初期割当の修復結果（ペア数）"""
+
+    kept: int = 0
+    infeasible: int = 0
+    excess: int = 0
+    household: int = 0
+    conflict: int = 0
+
+
+def slot_key(order: Order) -> SlotKey:
+    return (
+        order.customer_id, order.day_of_week.value,
+        order.start_time, order.end_time, order.service_type,
+    )
+
+
+def assignments_from_slots(
+    orders: list[Order],
+    staff_by_slot: dict[SlotKey, list[str]],
+) -> list[Assignment]:
+    """先週の同一枠（利用者・曜日・時間帯・サービス種別）の担当を今週のオーダーに写す"""
+    return [
+        Assignment(order_id=o.id, staff_ids=list(staff_by_slot[slot_key(o)]))
+        for o in orders
+        if staff_by_slot.get(slot_key(o))
+    ]
+
+
+def repair_initial_assignment(
+    inp: OptimizationInput,
+    initial: list[Assignment],
+    table: OrderTable | None = None,
+) -> tuple[list[Assignment], RepairReport]:
+    """初期割当をハード制約を満たすように貪欲に修復する
+
+    inp に含まれないオーダー・ヘルパーの割当は無視する（日次分割時は
+    週全体の初期割当をそのまま渡してよい）。
+
+    Returns:
+        (inp.orders 順の修復済み割当, 修復結果)
+    """
+    if table is None:
+        table = OrderTable(inp.orders)
+    report = RepairReport()
+    fm = compute_feasibility_matrix(inp, table)
+    h_index = {hid: i for i, hid in enumerate(fm.helper_ids)}
+
+    # 1. 割当可能性 / 2. staff_count
+    staff: list[list[int]] = [[] for _ in inp.orders]
+    for a in initial:
+        j = table.index.get(a.order_id)
+        if j is None:
+            continue
+        limit = inp.orders[j].staff_count
+        for sid in dict.fromkeys(a.staff_ids):  # 重複を除き順序維持
+            h = h_index.get(sid)
+            if h is None:
+                continue
+            if not fm.mask[h, j]:
+                report.infeasible += 1
+            elif len(staff[j]) >= limit:
+                report.excess += 1
+            else:
+                staff[j].append(h)
+
+    # 3. 世帯リンク: 群の全オーダーに共通するスタッフのみ
+    group_of: dict[int, list[int]] = {}
+    for members in household_groups(inp, table):
+        common = set.intersection(*(set(staff[j]) for j in members))
+        for j in members:
+            report.household += len(staff[j]) - len(common)
+            staff[j] = [h for h in staff[j] if h in common]
+            group_of[j] = members
+
+    # 4. ヘルパーごとの競合解消（開始時刻順に先着優先）
+    conflicts = build_conflict_index_for(inp, table, _build_travel_matrix(inp))
+    common_conflicts, walk_conflicts = conflicts.neighbor_sets(len(table))
+    walk = [h.transportation == TransportationType.WALK for h in inp.helpers]
+
+    kept: list[set[int]] = [set() for _ in inp.helpers]
+    order_seq = sorted(range(len(table)), key=lambda j: (table.date_idx[j], table.start[j], j))
+    for j in order_seq:
+        for h in list(staff[j]):
+            if h not in staff[j]:
+                continue  # 同じ群の先行オーダーで除外済み
+            blocked = common_conflicts[j] | (walk_conflicts[j] if walk[h] else set())
+            if kept[h].isdisjoint(blocked):
+                kept[h].add(j)
+                continue
+            for k in group_of.get(j, [j]):
+                if h in staff[k]:
+                    staff[k].remove(h)
+                    kept[h].discard(k)
+                    report.conflict += 1
+
+    repaired = [
+        Assignment(order_id=o.id, staff_ids=[inp.helpers[h].id for h in staff[j]])
+        for j, o in enumerate(inp.orders)
+    ]
+    report.kept = sum(len(s) for s in staff)
+    logger.info(
+        "初期割当の修復: 採用=%d, 除外(割当不可=%d, 人数超過=%d, 世帯=%d, 競合=%d)",
+        report.kept, report.infeasible, report.excess, report.household, report.conflict,
+    )
+    return repaired, report
+
+
+def initial_pairs(assignments: list[Assignment]) -> set[tuple[str, str]]:
+    """修復済み割当 → 初期値1とする (helper_id, order_id) ペア"""
+    return {(sid, a.order_id) for a in assignments for sid in a.staff_ids}
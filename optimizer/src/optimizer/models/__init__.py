@@ -24,7 +24,7 @@ from .order import Order
 from .optimization_run import OptimizationParameters, OptimizationRunRecord
 from .problem import Assignment, OptimizationInput, OptimizationResult
 from .staff_unavailability import StaffUnavailability
-from .travel_time import TravelTime
+from .travel_time import TravelMatrix, TravelTime
 
 __all__ = [
     "Assignment",
@@ -52,6 +52,7 @@ __all__ = [
     "StaffUnavailability",
     "TrainingStatus",
     "TransportationType",
+    "TravelMatrix",
     "TravelTime",
     "UnavailableSlot",
 ]
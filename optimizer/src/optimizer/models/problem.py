@@ -1,6 +1,6 @@
 """最適化問題の入力データ"""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 from .common import ServiceTypeConfig
 from .constraint import StaffConstraint
@@ -8,12 +8,14 @@ from .customer import Customer
 from .helper import Helper
 from .order import Order
 from .staff_unavailability import StaffUnavailability
-from .travel_time import TravelTime
+from .travel_time import TravelMatrix, TravelTime
 
 
 class OptimizationInput(BaseModel):
     """最適化エンジンへの入力データ一式"""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     customers: list[Customer]
     helpers: list[Helper]
     orders: list[Order]
@@ -21,6 +23,9 @@ class OptimizationInput(BaseModel):
     staff_unavailabilities: list[StaffUnavailability]
     staff_constraints: list[StaffConstraint]
     service_type_configs: list[ServiceTypeConfig] = []  # Firestoreマスタ（後方互換のためデフォルト空）
+    # 移動時間の密行列（ローダーが直接構築する）。指定時は travel_times より優先し、
+    # None の場合はエンジンが travel_times から構築する。シリアライズには含めない
+    travel_matrix: TravelMatrix | None = Field(default=None, exclude=True)
 
 
 class Assignment(BaseModel):
@@ -39,3 +44,17 @@ class OptimizationResult(BaseModel):
     status: str  # "Optimal", "Feasible", "Infeasible", "Not Solved"
     unassigned_count: int = 0  # staff_ids空のオーダー数
     partial_count: int = 0  # staff_ids < staff_count のオーダー数
+    # 週次リバランスによるソフト制約項ごとの目的関数変化量（負 = 改善、未実行時はNone）
+    rebalance_deltas: dict[str, float] | None = None
+    # 週全体の evaluate_objective による目的関数値（週次リバランス・LNS 適用時のみ、
+    # 未実行時はNone）。日次分割時の objective_value は日ごとの合計で尺度が異なる
+    weekly_objective_value: float | None = None
+    # 大近傍探索の実行結果（iterations / accepted / improvement / elapsed_seconds、未実行時はNone）
+    lns_stats: dict[str, float] | None = None
+    # 連結成分分割時の成分ごとのオーダー数（分割順、未実行時はNone）
+    component_sizes: list[int] | None = None
+    # 結果キャッシュ（engine.cache.ResultCache）から返した場合 True（キャッシュ未使用時はNone）
+    cache_hit: bool | None = None
+    # 日次分割 + キャッシュ使用時の日（成分）ごとの結果の出どころ
+    # （reused: キャッシュ / solved: MIP / greedy: 時間切れの貪欲解、キャッシュ未使用時はNone）
+    day_sources: dict[str, str] | None = None
@@ -1,9 +1,119 @@
 """移動時間モデル — shared/types/travel-time.ts に対応"""
 
+from collections.abc import Iterable, Sequence
+
+import numpy as np
 from pydantic import BaseModel
 
+from .customer import Customer
+
 
 class TravelTime(BaseModel):
     from_id: str  # customer_id or helper base location
     to_id: str
     travel_time_minutes: float
+
+
+class TravelMatrix:
+    """利用者間の移動時間（分）の密行列
+
+    minutes[i, j] は customer_ids[i] → customer_ids[j] の移動時間（float32）。
+    データのないペアは 0（従来の (from_id, to_id) 辞書ルックアップの既定値と同じ）。
+    同一世帯・同一施設の利用者ペアの 0 分オーバーライドは構築時に1度だけ適用する。
+    TravelTime のリスト（n² 個の pydantic オブジェクト）に比べ、1,000人で約4MB。
+    """
+
+    def __init__(self, customer_ids: Sequence[str], minutes: np.ndarray) -> None:
+        self.customer_ids = list(customer_ids)
+        self.index = {cid: i for i, cid in enumerate(self.customer_ids)}
+        self.minutes = np.asarray(minutes, dtype=np.float32)
+        n = len(self.customer_ids)
+        if self.minutes.shape != (n, n):
+            raise ValueError(f"minutes must be {n}x{n}, got {self.minutes.shape}")
+
+    @classmethod
+    def from_pairs(
+        cls,
+        pairs: Iterable[tuple[str, str, float]],
+        customers: Sequence[Customer] = (),
+    ) -> "TravelMatrix":
+        """(from_id, to_id, 分) の列から構築する
+
+        添字は customers の順、続いて pairs・世帯/施設リンクにのみ現れるIDの初出順。
+        """
+        entries = list(pairs)
+        ids: dict[str, int] = {}
+        for c in customers:
+            ids.setdefault(c.id, len(ids))
+        for a, b, _ in entries:
+            ids.setdefault(a, len(ids))
+            ids.setdefault(b, len(ids))
+        for c in customers:
+            for other_id in (*c.same_household_customer_ids, *c.same_facility_customer_ids):
+                ids.setdefault(other_id, len(ids))
+
+        minutes = np.zeros((len(ids), len(ids)), dtype=np.float32)
+        if entries:
+            rows = np.fromiter((ids[a] for a, _, _ in entries), dtype=np.intp, count=len(entries))
+            cols = np.fromiter((ids[b] for _, b, _ in entries), dtype=np.intp, count=len(entries))
+            values = np.fromiter((m for _, _, m in entries), dtype=np.float32, count=len(entries))
+            minutes[rows, cols] = values
+        matrix = cls(list(ids), minutes)
+        matrix.apply_zero_overrides(customers)
+        return matrix
+
+    @classmethod
+    def from_travel_times(
+        cls,
+        travel_times: Iterable[TravelTime],
+        customers: Sequence[Customer] = (),
+    ) -> "TravelMatrix":
+        return cls.from_pairs(
+            ((tt.from_id, tt.to_id, tt.travel_time_minutes) for tt in travel_times), customers,
+        )
+
+    def apply_zero_overrides(self, customers: Iterable[Customer]) -> None:
+        """同一世帯・同一施設の利用者ペアの移動時間を 0 にする（in-place）"""
+        for c in customers:
+            i = self.index.get(c.id)
+            if i is None:
+                continue
+            for other_id in (*c.same_household_customer_ids, *c.same_facility_customer_ids):
+                j = self.index.get(other_id)
+                if j is not None:
+                    self.minutes[i, j] = 0.0
+                    self.minutes[j, i] = 0.0
+
+    def take(self, customer_ids: Sequence[str]) -> np.ndarray:
+        """customer_ids 順の部分行列（行列にない利用者の行・列は 0）"""
+        idx = np.fromiter(
+            (self.index.get(cid, -1) for cid in customer_ids), dtype=np.intp,
+            count=len(customer_ids),
+        )
+        known = np.flatnonzero(idx >= 0)
+        out = np.zeros((len(customer_ids), len(customer_ids)), dtype=np.float32)
+        out[np.ix_(known, known)] = self.minutes[np.ix_(idx[known], idx[known])]
+        return out
+
+    def subset(self, customer_ids: Sequence[str]) -> "TravelMatrix":
+        """customer_ids のみの行列（日ごとの部分問題の入力用）"""
+        return TravelMatrix(customer_ids, self.take(customer_ids))
+
+    def get(self, from_id: str, to_id: str) -> float:
+        i, j = self.index.get(from_id), self.index.get(to_id)
+        if i is None or j is None:
+            return 0.0
+        return float(self.minutes[i, j])
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TravelMatrix):
+            return NotImplemented
+        return self.customer_ids == other.customer_ids and np.array_equal(
+            self.minutes, other.minutes,
+        )
+
+    def __repr__(self) -> str:
+        return f"TravelMatrix(customers={len(self)}, nbytes={self.minutes.nbytes})"
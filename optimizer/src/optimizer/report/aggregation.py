@@ -1,6 +1,7 @@
 """月次レポート集計ロジック — TypeScript aggregation.ts の Python移植"""
 
 from collections import defaultdict
+from collections.abc import Mapping, Sequence
 
 from .models import (
     CustomerSummaryRow,
@@ -22,7 +23,7 @@ def order_duration_minutes(start_time: str, end_time: str) -> int:
     return time_to_minutes(end_time) - time_to_minutes(start_time)
 
 
-def aggregate_status_summary(orders: list[dict[str, object]]) -> StatusSummary:
+def aggregate_status_summary(orders: Sequence[Mapping[str, object]]) -> StatusSummary:
     """ステータス別集計を行う"""
     counts: dict[str, int] = {
         "pending": 0,
@@ -53,7 +54,7 @@ def aggregate_status_summary(orders: list[dict[str, object]]) -> StatusSummary:
 
 
 def aggregate_service_type_summary(
-    orders: list[dict[str, object]],
+    orders: Sequence[Mapping[str, object]],
     service_type_configs: list[dict[str, object]] | None = None,
 ) -> list[ServiceTypeSummaryItem]:
     """サービス種別内訳を集計する（visitCount降順）
@@ -98,8 +99,8 @@ def aggregate_service_type_summary(
 
 
 def aggregate_staff_summary(
-    orders: list[dict[str, object]],
-    helpers: list[dict[str, object]],
+    orders: Sequence[Mapping[str, object]],
+    helpers: Sequence[Mapping[str, object]],
 ) -> list[StaffSummaryRow]:
     """スタッフ別稼働集計（totalMinutes降順）"""
     helper_map: dict[str, str] = {}
@@ -139,8 +140,8 @@ def aggregate_staff_summary(
 
 
 def aggregate_customer_summary(
-    orders: list[dict[str, object]],
-    customers: list[dict[str, object]],
+    orders: Sequence[Mapping[str, object]],
+    customers: Sequence[Mapping[str, object]],
 ) -> list[CustomerSummaryRow]:
     """利用者別サービス実績集計（totalMinutes降順）"""
     customer_map: dict[str, str] = {}
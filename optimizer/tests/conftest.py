@@ -4,10 +4,24 @@ import os
 
 os.environ.setdefault("ALLOW_UNAUTHENTICATED", "true")
 
+import random
+from collections.abc import Sequence
 from pathlib import Path
 
 import pytest
 
+from optimizer.models import (
+    Customer,
+    DayOfWeek,
+    GeoLocation,
+    Helper,
+    HoursRange,
+    OptimizationInput,
+    Order,
+    StaffConstraint,
+    TravelTime,
+)
+
 SEED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "seed" / "data"
 
 
@@ -16,3 +30,90 @@ def seed_data_dir() -> Path:
     """seed/data/ ディレクトリのパスを返す"""
     assert SEED_DATA_DIR.exists(), f"Seed data directory not found: {SEED_DATA_DIR}"
     return SEED_DATA_DIR
+
+
+# --- ランダム入力ファクトリ（ソルバー・ヒューリスティック系テスト共通） ---
+
+# 2026-02-16（月）からの1週間
+WEEK_DATES: dict[DayOfWeek, str] = {d: f"2026-02-{16 + i:02d}" for i, d in enumerate(DayOfWeek)}
+
+
+def hhmm(minutes: int) -> str:
+    """分換算 → "HH:MM" """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def random_input(
+    seed: int,
+    n_helpers: int = 6,
+    n_orders: int = 30,
+    *,
+    n_days: int = 2,
+    n_customers: int = 8,
+    durations: Sequence[int] = (30, 60, 90),
+    service_types: Sequence[str] = ("daily_living",),
+    travel_minutes: Sequence[int] = (5, 20, 40),
+    preferred_hours: tuple[float, float] = (1, 3),
+    available_hours: tuple[float, float] = (0, 8),
+    walk_helpers: bool = True,
+    physical_care_every: int = 1,
+    spread_locations: bool = False,
+    link_first_pair: bool = True,
+    staff_constraints: list[StaffConstraint] | None = None,
+) -> OptimizationInput:
+    """重複・移動時間・徒歩・世帯リンク・2人対応を含むランダム入力
+
+    オーダーは週の先頭 n_days 日の 8:00〜17:00 に30分刻みで開始する。
+    walk_helpers: 3人に1人（h0, h3, …）を徒歩にする
+    physical_care_every: この間隔のヘルパー（h0, h{n}, …）だけ身体介護可
+    spread_locations: 利用者の位置を散らす（False なら全員同じ位置）
+    link_first_pair: 先頭2件のオーダーを世帯リンクする
+    """
+    rng = random.Random(seed)
+    dates = dict(list(WEEK_DATES.items())[:n_days])
+    helpers = [
+        Helper(
+            id=f"h{i}", family_name="ヘルパー", given_name=str(i),
+            can_physical_care=i % physical_care_every == 0,
+            transportation="walk" if walk_helpers and i % 3 == 0 else "car",
+            preferred_hours=HoursRange(min=preferred_hours[0], max=preferred_hours[1]),
+            available_hours=HoursRange(min=available_hours[0], max=available_hours[1]),
+            employment_type="part_time",
+        )
+        for i in range(n_helpers)
+    ]
+    customers = [
+        Customer(
+            id=f"c{i}", family_name="利用者", given_name=str(i), address="鹿児島市",
+            location=(
+                GeoLocation(lat=31.5 + rng.random() * 0.05, lng=130.5 + rng.random() * 0.05)
+                if spread_locations else GeoLocation(lat=31.5, lng=130.5)
+            ),
+        )
+        for i in range(n_customers)
+    ]
+    orders = []
+    for i in range(n_orders):
+        day = rng.choice(list(dates))
+        start = rng.randrange(8 * 60, 17 * 60, 30)
+        orders.append(Order(
+            id=f"o{i:02d}", customer_id=f"c{rng.randrange(n_customers)}",
+            date=dates[day], day_of_week=day,
+            start_time=hhmm(start), end_time=hhmm(start + rng.choice(durations)),
+            service_type=(
+                rng.choice(service_types) if len(service_types) > 1 else service_types[0]
+            ),
+            staff_count=rng.choice([1, 1, 2]),
+        ))
+    if link_first_pair and n_orders >= 2:
+        orders[0].linked_order_id = orders[1].id
+        orders[1].linked_order_id = orders[0].id
+    travel_times = [
+        TravelTime(from_id=a.id, to_id=b.id, travel_time_minutes=rng.choice(travel_minutes))
+        for a in customers for b in customers if a.id != b.id
+    ]
+    return OptimizationInput(
+        customers=customers, helpers=helpers, orders=orders,
+        travel_times=travel_times, staff_unavailabilities=[],
+        staff_constraints=staff_constraints or [],
+    )
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
 
 from optimizer.api.main import app
+from optimizer.engine.cache import ResultCache
 from optimizer.models import Assignment, OptimizationInput, OptimizationResult
 
 client = TestClient(app)
@@ -193,6 +194,222 @@ class TestOptimizeEndpoint:
         _, kwargs = mock_solve.call_args
         assert kwargs["time_limit_seconds"] == 60
 
+    @patch("optimizer.api.routes.write_assignments")
+    @patch("optimizer.api.routes.solve")
+    @patch("optimizer.api.routes.load_optimization_input")
+    @patch("optimizer.api.routes.get_firestore_client")
+    def test_result_cache(
+        self,
+        mock_get_db: MagicMock,
+        mock_load: MagicMock,
+        mock_solve: MagicMock,
+        mock_write: MagicMock,
+    ) -> None:
+        """キャッシュは use_cache=true のときだけ渡す（既定は渡さない）"""
+        mock_get_db.return_value = MagicMock()
+        mock_load.return_value = MagicMock(
+            spec=OptimizationInput,
+            orders=[MagicMock()],
+            helpers=[MagicMock()],
+            customers=[MagicMock()],
+        )
+        mock_solve.return_value = OptimizationResult(
+            assignments=[], objective_value=0.0, solve_time_seconds=0.01,
+            status="Optimal", cache_hit=False,
+            day_sources={"2026-02-09": "reused", "2026-02-10": "solved"},
+        )
+        mock_write.return_value = 0
+
+        with patch("optimizer.api.routes._result_cache", ResultCache()):
+            response = client.post(
+                "/optimize", json={"week_start_date": "2026-02-09", "use_cache": True},
+            )
+            assert response.status_code == 200
+            assert response.json()["cache_hit"] is False
+            assert response.json()["day_sources"] == {
+                "2026-02-09": "reused", "2026-02-10": "solved",
+            }
+            assert mock_solve.call_args.kwargs["cache"] is not None
+
+            response = client.post("/optimize", json={"week_start_date": "2026-02-09"})
+            assert response.status_code == 200
+            assert mock_solve.call_args.kwargs["cache"] is None
+
+    def test_result_cache_stats(self) -> None:
+        # 既定（OPTIMIZER_RESULT_CACHE_MB 未設定）ではキャッシュなし
+        response = client.get("/optimize/cache")
+        assert response.status_code == 200
+        assert response.json()["enabled"] is False
+
+        with patch("optimizer.api.routes._result_cache", ResultCache()):
+            response = client.get("/optimize/cache")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["enabled"] is True
+        assert {"hits", "misses", "disk_hits", "evictions", "hit_rate", "bytes"} <= data.keys()
+
+    def test_firestore_pool_stats(self) -> None:
+        response = client.get("/firestore/pool")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["size"] >= 1
+        assert {"clients", "acquisitions", "avg_acquire_ms", "p95_acquire_ms"} <= data.keys()
+
+
+class TestIncrementalOptimizeEndpoint:
+    @patch("optimizer.api.routes.write_assignments")
+    @patch("optimizer.api.routes.reoptimize_incremental")
+    @patch("optimizer.api.routes.load_current_assignments")
+    @patch("optimizer.api.routes.load_optimization_input")
+    @patch("optimizer.api.routes.get_firestore_client")
+    def test_writes_only_changed(
+        self,
+        mock_get_db: MagicMock,
+        mock_load: MagicMock,
+        mock_current: MagicMock,
+        mock_reopt: MagicMock,
+        mock_write: MagicMock,
+    ) -> None:
+        from optimizer.engine.incremental import IncrementalResult
+
+        mock_get_db.return_value = MagicMock()
+        mock_load.return_value = MagicMock(spec=OptimizationInput, orders=[MagicMock()])
+        mock_current.return_value = [Assignment(order_id="ORD0001", staff_ids=["H001"])]
+        changed = [Assignment(order_id="ORD0001", staff_ids=["H002"])]
+        mock_reopt.return_value = IncrementalResult(
+            assignments=changed + [Assignment(order_id="ORD0002", staff_ids=["H001"])],
+            changed=changed,
+            freed_order_ids=["ORD0001", "ORD0002"],
+            initial_objective=1010.0,
+            objective=12.0,
+            solve_time_seconds=0.2,
+            status="Feasible",
+        )
+        mock_write.return_value = 1
+
+        response = client.post(
+            "/optimize/incremental",
+            json={
+                "week_start_date": "2026-02-09",
+                "order_ids": ["ORD0001"],
+                "ripple": ["helper_day", "unfilled"],
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["changed_assignments"] == [{"order_id": "ORD0001", "staff_ids": ["H002"]}]
+        assert data["freed_order_ids"] == ["ORD0001", "ORD0002"]
+        assert data["orders_updated"] == 1
+        mock_write.assert_called_once_with(mock_get_db.return_value, changed)
+        args, kwargs = mock_reopt.call_args
+        assert args[2] == ["ORD0001"]
+        assert kwargs["incremental_options"].ripple == ("helper_day", "unfilled")
+
+    def test_empty_order_ids_returns_422(self) -> None:
+        response = client.post(
+            "/optimize/incremental",
+            json={"week_start_date": "2026-02-09", "order_ids": []},
+        )
+        assert response.status_code == 422
+
+    def test_unknown_ripple_returns_422(self) -> None:
+        response = client.post(
+            "/optimize/incremental",
+            json={"week_start_date": "2026-02-09", "order_ids": ["ORD0001"], "ripple": ["bogus"]},
+        )
+        assert response.status_code == 422
+
+
+class TestOptimizationJobEndpoints:
+    def _runner(self, run):
+        from optimizer.api.jobs import InMemoryJobStore, JobRunner
+
+        return JobRunner(InMemoryJobStore(), run)
+
+    def test_submit_and_poll(self) -> None:
+        import time
+
+        from optimizer.api.routes_jobs import get_job_runner
+        from optimizer.api.schemas import OptimizeResponse
+
+        def run(req, auth, progress):
+            return OptimizeResponse(
+                assignments=[], objective_value=1.0, solve_time_seconds=0.1,
+                status="Optimal", orders_updated=0, total_orders=0, assigned_count=0,
+            )
+
+        runner = self._runner(run)
+        app.dependency_overrides[get_job_runner] = lambda: runner
+        try:
+            response = client.post("/optimize/jobs", json={"week_start_date": "2026-02-09"})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            assert response.json()["status"] == "queued"
+
+            for _ in range(200):
+                data = client.get(f"/optimize/jobs/{job_id}").json()
+                if data["status"] == "succeeded":
+                    break
+                time.sleep(0.01)
+            assert data["status"] == "succeeded"
+            assert data["result"]["objective_value"] == 1.0
+        finally:
+            app.dependency_overrides.clear()
+            runner.shutdown(wait=True)
+
+    def test_not_monday_rejected_before_queueing(self) -> None:
+        from optimizer.api.routes_jobs import get_job_runner
+
+        runner = MagicMock()
+        app.dependency_overrides[get_job_runner] = lambda: runner
+        try:
+            response = client.post("/optimize/jobs", json={"week_start_date": "2026-02-10"})
+            assert response.status_code == 422
+            runner.submit.assert_not_called()
+        finally:
+            app.dependency_overrides.clear()
+
+    def test_queue_full_returns_429(self) -> None:
+        from optimizer.api.jobs import JobQueueFullError
+        from optimizer.api.routes_jobs import get_job_runner
+
+        runner = MagicMock()
+        runner.submit.side_effect = JobQueueFullError("full")
+        app.dependency_overrides[get_job_runner] = lambda: runner
+        try:
+            response = client.post("/optimize/jobs", json={"week_start_date": "2026-02-09"})
+            assert response.status_code == 429
+        finally:
+            app.dependency_overrides.clear()
+
+    def test_event_stream(self) -> None:
+        from optimizer.api.routes_jobs import get_job_runner
+
+        runner = MagicMock()
+        runner.stream_events.return_value = iter([
+            'id: 1\nevent: status\ndata: {"job_id": "j1", "status": "queued"}\n\n',
+            'id: 2\nevent: error\ndata: {"detail": "x", "status_code": 409}\n\n',
+        ])
+        app.dependency_overrides[get_job_runner] = lambda: runner
+        try:
+            response = client.get("/optimize/jobs/j1/events", headers={"Last-Event-ID": "0"})
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert "event: error" in response.text
+            runner.stream_events.assert_called_once_with("j1", 0)
+        finally:
+            app.dependency_overrides.clear()
+
+    def test_unknown_job_returns_404(self) -> None:
+        from optimizer.api.routes_jobs import get_job_runner
+
+        runner = self._runner(lambda req, auth, progress: None)
+        app.dependency_overrides[get_job_runner] = lambda: runner
+        try:
+            assert client.get("/optimize/jobs/nope").status_code == 404
+        finally:
+            app.dependency_overrides.clear()
+
 
 class TestFirestoreWriter:
     """Firestore書き戻しのユニットテスト"""
@@ -1095,6 +1312,7 @@ class TestDailyChecklistEndpoint:
         # ordersコレクションクエリ
         order_query = MagicMock()
         order_query.where.return_value = order_query
+        order_query.select.return_value = order_query
         order_query.stream.return_value = iter([order_doc])
 
         # helpersドキュメント（db.get_all用）
@@ -1126,6 +1344,10 @@ class TestDailyChecklistEndpoint:
         assert data["staff_checklists"][0]["staff_id"] == "H003"
         assert data["staff_checklists"][0]["staff_name"] == "佐藤 花子"
         assert len(data["staff_checklists"][0]["orders"]) == 1
+        # 氏名・表示に使うフィールドだけを射影して読む
+        assert "weekly_services" not in order_query.select.call_args.args[0]
+        for call in db.get_all.call_args_list:
+            assert call.kwargs["field_paths"] == ["name"]
 
     @patch("optimizer.api.routes_report.get_firestore_client")
     def test_empty_checklist(
@@ -1137,6 +1359,7 @@ class TestDailyChecklistEndpoint:
 
         order_query = MagicMock()
         order_query.where.return_value = order_query
+        order_query.select.return_value = order_query
         order_query.stream.return_value = iter([])
         db.collection.return_value = order_query
 
@@ -1180,6 +1403,7 @@ class TestNextDayNotifyEndpoint:
 
         order_query = MagicMock()
         order_query.where.return_value = order_query
+        order_query.select.return_value = order_query
         order_query.stream.return_value = iter([order_doc])
 
         # ヘルパー（db.get_all用）
@@ -1214,6 +1438,9 @@ class TestNextDayNotifyEndpoint:
         assert data["results"][0]["staff_name"] == "佐藤 花子"
         assert data["results"][0]["success"] is True
         mock_send_dm.assert_called_once()
+        assert [c.kwargs["field_paths"] for c in db.get_all.call_args_list] == [
+            ["name"], ["name", "email"],
+        ]
 
     def test_email_channel_returns_422(self) -> None:
         response = client.post(
@@ -1233,6 +1460,7 @@ class TestNextDayNotifyEndpoint:
 
         order_query = MagicMock()
         order_query.where.return_value = order_query
+        order_query.select.return_value = order_query
         order_query.stream.return_value = iter([])
         db.collection.return_value = order_query
 
@@ -0,0 +1,144 @@
+"""ソルバーバックエンドのテスト — 行列形式モデル・CP-SAT と PuLP モデルの一致を確認"""
+
+import pytest
+
+from optimizer.engine.linear_model import build_linear_model
+from optimizer.engine.solver import (
+    SoftWeights,
+    SolverOptions,
+    _build_model,
+    _solve_single,
+    measure_model_size,
+    solve,
+)
+from optimizer.models import (
+    DayOfWeek,
+    OptimizationInput,
+    StaffConstraint,
+    StaffConstraintType,
+)
+from tests.conftest import WEEK_DATES, random_input
+
+
+def _random_input(seed: int, n_helpers: int = 5, n_orders: int = 20) -> OptimizationInput:
+    """重複・移動時間・徒歩・世帯リンク・推奨スタッフ・継続性対象を含む小規模入力"""
+    return random_input(
+        seed, n_helpers, n_orders,
+        staff_constraints=[
+            StaffConstraint(
+                customer_id="c0", staff_id="h1", constraint_type=StaffConstraintType.PREFERRED,
+            ),
+            StaffConstraint(
+                customer_id="c1", staff_id="h2", constraint_type=StaffConstraintType.PREFERRED,
+            ),
+        ],
+    )
+
+
+class TestLinearModel:
+    @pytest.mark.parametrize("no_overlap", ["pairwise", "clique"])
+    @pytest.mark.parametrize("weights", [
+        SoftWeights(),
+        SoftWeights(travel=0, preferred_staff=0, workload_balance=0, continuity=0),
+    ])
+    def test_same_size_as_pulp_model(self, no_overlap: str, weights: SoftWeights) -> None:
+        """変数数・制約行数・非ゼロ係数数が _build_model と一致する"""
+        inp = _random_input(0)
+        options = SolverOptions(no_overlap=no_overlap)
+        prob, x = _build_model(inp, weights, options)
+        model = build_linear_model(inp, weights, options)
+        assert model.size() == measure_model_size(prob)
+        assert model.n_x == len(x)
+        assert {
+            (inp.helpers[h].id, inp.orders[j].id)
+            for h, j in zip(model.x_helper.tolist(), model.x_order.tolist())
+        } == set(x)
+
+    def test_empty_orders(self) -> None:
+        inp = _random_input(0).model_copy(update={"orders": []})
+        model = build_linear_model(inp)
+        assert model.n_x == 0
+        assert model.size().rows == 2 * len(inp.helpers)  # over / under のみ
+
+
+class TestModelBuilderBackend:
+    @pytest.fixture(autouse=True)
+    def _require_ortools(self) -> None:
+        pytest.importorskip("ortools")
+
+    @pytest.mark.parametrize("backend", ["highs", "scip"])
+    @pytest.mark.parametrize("seed", range(2))
+    def test_same_result_as_pulp(self, backend: str, seed: int) -> None:
+        """最適値が一致する（同値な最適解が複数ある場合、割当自体は異なり得る）"""
+        inp = _random_input(seed)
+        expected = _solve_single(inp, 60)
+        result = _solve_single(inp, 60, options=SolverOptions(backend=backend))
+        assert result.status == expected.status == "Optimal"
+        assert result.objective_value == pytest.approx(expected.objective_value, abs=1e-6)
+        assert [a.order_id for a in result.assignments] == [o.id for o in inp.orders]
+        for a, o in zip(result.assignments, inp.orders):
+            assert len(a.staff_ids) <= o.staff_count
+
+        # 世帯リンクのオーダーは同じスタッフ
+        by_order = {a.order_id: a.staff_ids for a in result.assignments}
+        assert by_order["o00"] == by_order["o01"]
+
+    def test_solve_with_day_decomposition(self) -> None:
+        inp = _random_input(1)
+        expected = solve(inp, time_limit_seconds=60)
+        result = solve(inp, time_limit_seconds=60, options=SolverOptions(backend="highs"))
+        assert result.status == expected.status
+        assert result.objective_value == pytest.approx(expected.objective_value, abs=1e-6)
+
+    def test_unknown_backend_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            solve(_random_input(0), options=SolverOptions(backend="bogus"))
+
+
+class TestCpSatBackend:
+    @pytest.fixture(autouse=True)
+    def _require_ortools(self) -> None:
+        pytest.importorskip("ortools")
+
+    @pytest.mark.parametrize("seed", range(2))
+    def test_same_objective_as_pulp(self, seed: int) -> None:
+        """稼働バランス項なしでは CP-SAT も最適性を証明し、最適値が一致する"""
+        inp = _random_input(seed)
+        weights = SoftWeights(workload_balance=0)
+        expected = _solve_single(inp, 60, weights)
+        result = _solve_single(
+            inp, 60, weights, SolverOptions(backend="cpsat", cpsat_workers=2),
+        )
+        assert result.status == expected.status == "Optimal"
+        assert result.objective_value == pytest.approx(expected.objective_value, abs=1e-6)
+        by_order = {a.order_id: a.staff_ids for a in result.assignments}
+        assert by_order["o00"] == by_order["o01"]
+
+    def test_default_weights_within_time_limit(self) -> None:
+        """稼働バランス項ありは下界が弱く、制限時間内は Feasible のことがある"""
+        inp = _random_input(0)
+        expected = _solve_single(inp, 60)
+        result = _solve_single(inp, 3, options=SolverOptions(backend="cpsat", cpsat_workers=2))
+        assert result.status in ("Optimal", "Feasible")
+        assert result.solve_time_seconds < 10
+        assert result.objective_value >= expected.objective_value - 1e-6
+
+    def test_zero_duration_order_keeps_pair_constraint(self) -> None:
+        """所要0分のオーダーは区間にならないが、内包する訪問とは重複扱い"""
+        inp = _random_input(0, n_helpers=1, n_orders=2)
+        orders = [
+            inp.orders[0].model_copy(update={
+                "date": WEEK_DATES[DayOfWeek.MONDAY], "day_of_week": DayOfWeek.MONDAY,
+                "start_time": "09:00", "end_time": "10:00", "staff_count": 1,
+                "linked_order_id": None,
+            }),
+            inp.orders[1].model_copy(update={
+                "date": WEEK_DATES[DayOfWeek.MONDAY], "day_of_week": DayOfWeek.MONDAY,
+                "start_time": "09:30", "end_time": "09:30", "staff_count": 1,
+                "customer_id": inp.orders[0].customer_id, "linked_order_id": None,
+            }),
+        ]
+        inp = inp.model_copy(update={"orders": orders})
+        result = _solve_single(inp, 10, options=SolverOptions(backend="cpsat"))
+        assert result.status == "Optimal"
+        assert result.unassigned_count == 1
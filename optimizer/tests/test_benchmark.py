@@ -278,3 +278,265 @@ class TestScaleBaseline:
         # 20ヘルパーで7人同時割当は可能だが、他のオーダーとの競合でInfeasibleの可能性
         # 現状の == 制約では Infeasible になりやすい
         assert result.status in ("Optimal", "Feasible", "Infeasible")
+
+
+@pytest.mark.benchmark
+class TestCliqueNoOverlapBenchmark:
+    """重複禁止制約の定式化比較（pairwise vs clique）
+
+    行数・LP緩和値・モデル構築時のメモリ・ソルブ時間を同じ1日分の入力で比較する。
+    """
+
+    def _busy_day(self) -> OptimizationInput:
+        inp = _generate_data(n_helpers=30, n_customers=400, orders_per_customer_per_day=0.9)
+        day = DATE_MAP[DayOfWeek.MONDAY]
+        orders = [o for o in inp.orders if o.date == day]
+        return inp.model_copy(update={"orders": orders})
+
+    def _measure(self, inp: OptimizationInput, mode: str) -> dict[str, float]:
+        import tracemalloc
+
+        import pulp
+
+        from optimizer.engine.solver import SolverOptions, _build_model
+
+        options = SolverOptions(no_overlap=mode)
+
+        tracemalloc.start()
+        t0 = time.time()
+        prob, _ = _build_model(inp, options=options)
+        build_time = time.time() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows = len(prob.constraints)
+
+        # LP緩和: 全変数を連続化して解く
+        relaxed, _ = _build_model(inp, options=options)
+        for v in relaxed.variables():
+            v.cat = pulp.LpContinuous
+        relaxed.solve(pulp.PULP_CBC_CMD(msg=0))
+        lp_bound = pulp.value(relaxed.objective)
+
+        t0 = time.time()
+        prob.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=120))
+        solve_time = time.time() - t0
+
+        return {
+            "rows": rows,
+            "lp_bound": lp_bound,
+            "mip": pulp.value(prob.objective),
+            "peak_mb": peak / 1024 / 1024,
+            "build_s": build_time,
+            "solve_s": solve_time,
+        }
+
+    def test_pairwise_vs_clique(self) -> None:
+        inp = self._busy_day()
+        pairwise = self._measure(inp, "pairwise")
+        clique = self._measure(inp, "clique")
+
+        print(f"\n[no_overlap] orders={len(inp.orders)}, helpers={len(inp.helpers)}")
+        for name, m in (("pairwise", pairwise), ("clique", clique)):
+            print(
+                f"  {name:8s}: rows={m['rows']:,}, LP={m['lp_bound']:.1f}, "
+                f"MIP={m['mip']:.1f}, peak={m['peak_mb']:.1f}MB, "
+                f"build={m['build_s']:.2f}s, solve={m['solve_s']:.1f}s"
+            )
+        assert clique["rows"] < pairwise["rows"]
+        # クリーク制約はペア制約を包含するためLP緩和は同等以上に強い
+        assert clique["lp_bound"] >= pairwise["lp_bound"] * (1 - 1e-9) - 1e-6
+
+
+@pytest.mark.benchmark
+class TestSolverBackendBenchmark:
+    """ソルバーバックエンド比較（PuLP + CBC vs 行列形式 + HiGHS / SCIP）
+
+    モデル構築（Python側）とソルブを分けて計測する。PuLP は LpAffineExpression の
+    生成と LP ファイル書き出しが構築側に含まれる。
+    """
+
+    def _measure_pulp(self, inp: OptimizationInput, limit: int) -> dict[str, float]:
+        import pulp
+
+        from optimizer.engine.solver import _build_model
+
+        t0 = time.time()
+        prob, _ = _build_model(inp)
+        build = time.time() - t0
+        t0 = time.time()
+        prob.solve(pulp.PULP_CBC_CMD(msg=0, timeLimit=limit))
+        return {
+            "build_s": build,
+            "solve_s": time.time() - t0,
+            "objective": pulp.value(prob.objective),
+        }
+
+    def _measure_native(self, inp: OptimizationInput, backend: str, limit: int) -> dict[str, float]:
+        from optimizer.engine.backends import solve_with_model_builder
+        from optimizer.engine.linear_model import build_linear_model
+        from optimizer.engine.solver import SolverOptions
+
+        t0 = time.time()
+        build_linear_model(inp)
+        build = time.time() - t0
+        result = solve_with_model_builder(inp, limit, options=SolverOptions(backend=backend))
+        return {
+            "build_s": build,
+            "solve_s": result.solve_time_seconds - build,
+            "objective": result.objective_value,
+        }
+
+    @pytest.mark.parametrize("n_customers", [150, 400])
+    def test_backend_comparison(self, n_customers: int) -> None:
+        pytest.importorskip("ortools")
+        inp = _generate_data(n_helpers=30, n_customers=n_customers)
+        day = DATE_MAP[DayOfWeek.MONDAY]
+        inp = inp.model_copy(update={"orders": [o for o in inp.orders if o.date == day]})
+
+        results = {"pulp": self._measure_pulp(inp, 120)}
+        for backend in ("highs", "scip"):
+            results[backend] = self._measure_native(inp, backend, 120)
+
+        print(f"\n[backend] orders={len(inp.orders)}, helpers={len(inp.helpers)}")
+        for name, m in results.items():
+            print(
+                f"  {name:6s}: build={m['build_s']:.3f}s, solve={m['solve_s']:.2f}s, "
+                f"objective={m['objective']:.1f}"
+            )
+        assert results["highs"]["build_s"] < results["pulp"]["build_s"]
+        for backend in ("highs", "scip"):
+            assert results[backend]["objective"] == pytest.approx(
+                results["pulp"]["objective"], rel=1e-6,
+            )
+
+
+@pytest.mark.benchmark
+class TestCpSatBenchmark:
+    """CP-SAT（区間変数）と CBC の品質・時間比較（TestBenchmark と同じデータセット）"""
+
+    @pytest.mark.parametrize("n_helpers,n_customers", [(20, 50), (30, 160), (50, 350)])
+    def test_cpsat_vs_cbc(self, n_helpers: int, n_customers: int) -> None:
+        pytest.importorskip("ortools")
+        from optimizer.engine.solver import SolverOptions
+
+        inp = _generate_data(n_helpers=n_helpers, n_customers=n_customers)
+        cbc = solve(inp, time_limit_seconds=120)
+        cpsat = solve(inp, time_limit_seconds=120, options=SolverOptions(backend="cpsat"))
+
+        print(f"\n[cpsat] helpers={len(inp.helpers)}, orders={len(inp.orders)}")
+        for name, r in (("cbc", cbc), ("cpsat", cpsat)):
+            print(
+                f"  {name:5s}: status={r.status}, time={r.solve_time_seconds:.1f}s, "
+                f"objective={r.objective_value:.1f}, unassigned={r.unassigned_count}"
+            )
+        assert cpsat.status in ("Optimal", "Feasible")
+        if cbc.status == cpsat.status == "Optimal":
+            assert cpsat.objective_value == pytest.approx(cbc.objective_value, rel=1e-6)
+
+
+@pytest.mark.benchmark
+class TestGreedyHeuristicBenchmark:
+    """貪欲構築ヒューリスティックの速度と、MIP start としての効果"""
+
+    def test_construct_1500_orders_per_day(self) -> None:
+        from optimizer.engine.heuristic import construct_greedy
+        from optimizer.engine.objective import evaluate_objective
+        from optimizer.engine.solver import _with_travel_matrix
+
+        inp = _generate_data(n_helpers=150, n_customers=2700, orders_per_customer_per_day=0.9)
+        day = DATE_MAP[DayOfWeek.MONDAY]
+        inp = inp.model_copy(update={"orders": [o for o in inp.orders if o.date == day]})
+        # solve() と同じく移動時間行列は構築済みの入力で計測する
+        inp = _with_travel_matrix(inp)
+
+        t0 = time.time()
+        assignments = construct_greedy(inp)
+        elapsed = time.time() - t0
+        unassigned = sum(1 for a in assignments if not a.staff_ids)
+        print(
+            f"\n[greedy] orders={len(inp.orders)}, helpers={len(inp.helpers)}, "
+            f"time={elapsed:.3f}s, unassigned={unassigned}, "
+            f"objective={evaluate_objective(inp, assignments).total:.1f}"
+        )
+        assert elapsed < 1
+
+    def test_mip_start(self) -> None:
+        from optimizer.engine.solver import SolverOptions, _solve_single
+
+        inp = _generate_data(n_helpers=30, n_customers=400, orders_per_customer_per_day=0.9)
+        day = DATE_MAP[DayOfWeek.MONDAY]
+        inp = inp.model_copy(update={"orders": [o for o in inp.orders if o.date == day]})
+
+        print(f"\n[mip start] orders={len(inp.orders)}")
+        for heuristic_start in (False, True):
+            r = _solve_single(inp, 30, options=SolverOptions(heuristic_start=heuristic_start))
+            print(
+                f"  heuristic_start={heuristic_start}: status={r.status}, "
+                f"time={r.solve_time_seconds:.1f}s, objective={r.objective_value:.1f}"
+            )
+            assert r.assignments
+
+
+@pytest.mark.benchmark
+class TestLnsBenchmark:
+    """日次分割の結果に LNS を適用したときの週全体の目的関数の推移"""
+
+    @pytest.mark.parametrize("n_helpers,n_customers", [(20, 50), (30, 160)])
+    def test_lns_after_day_decomposition(self, n_helpers: int, n_customers: int) -> None:
+        from optimizer.engine.lns import improve_lns
+        from optimizer.engine.objective import evaluate_objective
+
+        inp = _generate_data(n_helpers=n_helpers, n_customers=n_customers)
+        base = solve(inp, time_limit_seconds=120)
+        lns = improve_lns(inp, base.assignments, time_limit_seconds=60)
+
+        print(
+            f"\n[lns] orders={len(inp.orders)}, helpers={len(inp.helpers)}, "
+            f"days={base.solve_time_seconds:.1f}s, iterations={lns.iterations}, "
+            f"accepted={lns.accepted}"
+        )
+        print(f"  by_neighborhood={lns.by_neighborhood}")
+        for elapsed, value in lns.trace[:: max(1, len(lns.trace) // 10)] + lns.trace[-1:]:
+            print(f"  t={elapsed:6.1f}s objective={value:.1f}")
+        assert lns.objective <= lns.initial_objective
+        assert lns.objective == pytest.approx(
+            evaluate_objective(inp, lns.assignments).total, abs=1e-6,
+        )
+
+
+@pytest.mark.benchmark
+class TestComponentDecompositionBenchmark:
+    """入れるスタッフで担当チームに分かれた入力での連結成分分割の効果"""
+
+    @pytest.mark.parametrize("n_teams", [1, 4])
+    def test_components_vs_days(self, n_teams: int) -> None:
+        inp = _generate_data(n_helpers=40, n_customers=200)
+        # 利用者 i はチーム i % n_teams のヘルパーのみ入れる
+        constraints = [
+            StaffConstraint(
+                customer_id=c.id, staff_id=h.id, constraint_type=StaffConstraintType.ALLOWED,
+            )
+            for i, c in enumerate(inp.customers)
+            for k, h in enumerate(inp.helpers)
+            if k % n_teams == i % n_teams
+        ] if n_teams > 1 else []
+        inp = inp.model_copy(update={"staff_constraints": constraints})
+
+        t0 = time.time()
+        days = solve(inp, time_limit_seconds=120)
+        t_days = time.time() - t0
+        t0 = time.time()
+        components = solve(inp, time_limit_seconds=120, decompose_components=True)
+        t_components = time.time() - t0
+
+        print(
+            f"\n[components] orders={len(inp.orders)}, teams={n_teams}, "
+            f"sizes={components.component_sizes}"
+        )
+        print(f"  days:       {t_days:.1f}s objective={days.objective_value:.1f} ({days.status})")
+        print(
+            f"  components: {t_components:.1f}s objective={components.objective_value:.1f} "
+            f"({components.status})"
+        )
+        assert sum(components.component_sizes) == len(inp.orders)
+        assert len(components.component_sizes) >= n_teams
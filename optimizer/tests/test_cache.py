@@ -0,0 +1,305 @@
+"""ソルブ結果キャッシュのテスト — フィンガープリント・LRU・ディスク層・solve() への組み込み"""
+
+import os
+import random
+import time
+
+import pytest
+
+from optimizer.engine.cache import ResultCache, fingerprint, project_subproblem
+from optimizer.engine.solver import SoftWeights, SolverOptions, solve
+from optimizer.models import (
+    Assignment,
+    Customer,
+    DayOfWeek,
+    GeoLocation,
+    Helper,
+    HoursRange,
+    OptimizationInput,
+    OptimizationResult,
+    Order,
+    StaffConstraint,
+    StaffConstraintType,
+    StaffUnavailability,
+    TravelMatrix,
+    TravelTime,
+    UnavailableSlot,
+)
+
+DATES = {
+    DayOfWeek.MONDAY: "2026-02-16",
+    DayOfWeek.TUESDAY: "2026-02-17",
+    DayOfWeek.WEDNESDAY: "2026-02-18",
+}
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _input(seed: int = 0, n_orders: int = 24) -> OptimizationInput:
+    rng = random.Random(seed)
+    helpers = [
+        Helper(
+            id=f"h{i}", family_name="ヘルパー", given_name=str(i),
+            can_physical_care=True, transportation="car",
+            preferred_hours=HoursRange(min=2, max=6),
+            available_hours=HoursRange(min=0, max=40),
+            employment_type="part_time",
+        )
+        for i in range(4)
+    ]
+    customers = [
+        Customer(
+            id=f"c{i}", family_name="利用者", given_name=str(i), address="鹿児島市",
+            location=GeoLocation(lat=31.5 + rng.random() * 0.05, lng=130.5 + rng.random() * 0.05),
+        )
+        for i in range(6)
+    ]
+    orders = []
+    for i in range(n_orders):
+        day = list(DATES)[i % len(DATES)]
+        start = rng.randrange(8 * 60, 17 * 60, 30)
+        orders.append(Order(
+            id=f"o{i:02d}", customer_id=f"c{rng.randrange(6)}",
+            date=DATES[day], day_of_week=day,
+            start_time=_hhmm(start), end_time=_hhmm(start + 60),
+            service_type="daily_living",
+        ))
+    travel_times = [
+        TravelTime(from_id=a.id, to_id=b.id, travel_time_minutes=rng.choice([5, 10, 20]))
+        for a in customers for b in customers if a.id != b.id
+    ]
+    return OptimizationInput(
+        customers=customers, helpers=helpers, orders=orders,
+        travel_times=travel_times, staff_unavailabilities=[], staff_constraints=[],
+    )
+
+
+def _result(n_assignments: int = 1, status: str = "Optimal") -> OptimizationResult:
+    return OptimizationResult(
+        assignments=[
+            Assignment(order_id=f"o{i:04d}", staff_ids=["h1"]) for i in range(n_assignments)
+        ],
+        objective_value=1.0, solve_time_seconds=0.5, status=status,
+    )
+
+
+class TestFingerprint:
+    def test_list_order_ignored(self) -> None:
+        inp = _input()
+        shuffled = inp.model_copy(update={
+            "orders": list(reversed(inp.orders)),
+            "helpers": list(reversed(inp.helpers)),
+            "travel_times": list(reversed(inp.travel_times)),
+        })
+        assert fingerprint(inp, None, 60) == fingerprint(shuffled, SoftWeights(), 60)
+
+    def test_travel_matrix_same_key(self) -> None:
+        """travel_times と同じ内容の travel_matrix で渡しても同じキー"""
+        inp = _input()
+        matrix = TravelMatrix.from_travel_times(inp.travel_times, inp.customers)
+        as_matrix = inp.model_copy(update={"travel_times": [], "travel_matrix": matrix})
+        assert fingerprint(inp, None, 60) == fingerprint(as_matrix, None, 60)
+
+    @pytest.mark.parametrize(
+        "change", ["weights", "limit", "options", "initial", "params", "input"],
+    )
+    def test_sensitive(self, change: str) -> None:
+        inp = _input()
+        base = fingerprint(inp, None, 60, lns=False)
+        if change == "weights":
+            key = fingerprint(inp, SoftWeights(travel=2.0), 60, lns=False)
+        elif change == "limit":
+            key = fingerprint(inp, None, 61, lns=False)
+        elif change == "options":
+            key = fingerprint(inp, None, 60, SolverOptions(no_overlap="clique"), lns=False)
+        elif change == "initial":
+            key = fingerprint(inp, None, 60, None, [], lns=False)
+        elif change == "params":
+            key = fingerprint(inp, None, 60, lns=True)
+        else:
+            retimed = inp.orders[0].model_copy(update={"end_time": "23:00"})
+            key = fingerprint(
+                inp.model_copy(update={"orders": [retimed, *inp.orders[1:]]}), None, 60, lns=False,
+            )
+        assert key != base
+
+
+class TestResultCache:
+    def test_lru_eviction_by_bytes(self) -> None:
+        size = len(_result(10).model_dump_json())
+        cache = ResultCache(max_bytes=size * 2)
+        cache.put("a", _result(10))
+        cache.put("b", _result(10))
+        assert cache.get("a") is not None  # a が最近使われた側になる
+        cache.put("c", _result(10))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        stats = cache.stats()
+        assert stats.evictions == 1
+        assert stats.entries == 2 and stats.bytes <= size * 2
+        assert (stats.hits, stats.misses) == (3, 1)
+        assert stats.hit_rate == pytest.approx(0.75)
+
+    @pytest.mark.parametrize("status", ["Feasible", "Infeasible", "Not Solved"])
+    def test_non_optimal_not_stored(self, status: str) -> None:
+        cache = ResultCache()
+        cache.put("a", _result(status=status))
+        assert cache.get("a") is None
+        assert cache.stats().entries == 0
+
+    def test_returns_copy(self) -> None:
+        cache = ResultCache()
+        cache.put("a", _result())
+        got = cache.get("a")
+        assert got is not None
+        got.assignments[0].staff_ids.append("h2")
+        assert cache.get("a") == _result()
+
+    def test_disk_tier(self, tmp_path) -> None:
+        cache = ResultCache(disk_dir=tmp_path)
+        cache.put("a", _result(3))
+        # 別プロセス（新しいインスタンス）からもディスク層で読める
+        other = ResultCache(disk_dir=tmp_path)
+        assert other.get("a") == _result(3)
+        assert other.get("a") == _result(3)
+        stats = other.stats()
+        assert (stats.hits, stats.disk_hits, stats.entries) == (2, 1, 1)
+
+        cache.clear()
+        assert ResultCache(disk_dir=tmp_path).get("a") is None
+
+    def test_disk_tier_pruned(self, tmp_path) -> None:
+        size = len(_result(10).model_dump_json())
+        cache = ResultCache(max_bytes=0, disk_dir=tmp_path, max_disk_bytes=size * 2)
+        for i, key in enumerate(("a", "b", "c")):
+            cache.put(key, _result(10))
+            os.utime(tmp_path / f"{key}.json", (i, i))
+        cache.put("d", _result(10))
+        assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["c", "d"]
+
+    def test_ttl(self, tmp_path) -> None:
+        cache = ResultCache(disk_dir=tmp_path, ttl_seconds=60)
+        cache.put("a", _result())
+        assert cache.get("a") is not None
+        old = time.time() - 120
+        cache._entries["a"] = (old, cache._entries["a"][1])
+        os.utime(tmp_path / "a.json", (old, old))
+        assert cache.get("a") is None
+        assert not (tmp_path / "a.json").exists()
+
+
+class TestSolveWithCache:
+    def test_identical_problem_returns_stored_result(self) -> None:
+        inp = _input()
+        cache = ResultCache()
+        first = solve(inp, time_limit_seconds=30, cache=cache)
+        assert first.cache_hit is False
+
+        shuffled = inp.model_copy(update={"orders": list(reversed(inp.orders))})
+        second = solve(shuffled, time_limit_seconds=30, cache=cache)
+        assert second.cache_hit is True
+        assert second.objective_value == first.objective_value
+        # 合算と同じ並び（日付順、日内は入力順）で返す
+        order_ids = [o.id for o in sorted(shuffled.orders, key=lambda o: o.date)]
+        assert [a.order_id for a in second.assignments] == order_ids
+        assert {a.order_id: a.staff_ids for a in second.assignments} == {
+            a.order_id: a.staff_ids for a in first.assignments
+        }
+
+        assert second.day_sources == dict.fromkeys(DATES.values(), "reused")
+
+        # 制限時間が違えば解き直す（週は再計算、日は予算が変わるのでミス）
+        third = solve(inp, time_limit_seconds=31, cache=cache)
+        assert third.cache_hit is False
+        assert set(third.day_sources.values()) == {"solved"}
+        uncached = solve(inp, time_limit_seconds=30)
+        assert uncached.cache_hit is None and uncached.day_sources is None
+
+    def test_unchanged_days_reused(self) -> None:
+        inp = _input()
+        cache = ResultCache()
+        first = solve(inp, time_limit_seconds=30, cache=cache)
+        # 1日分（月曜）のオーダーを変更 → 週のキーはミス、他の2日は部分問題のキャッシュを使う
+        target = next(o for o in inp.orders if o.date == DATES[DayOfWeek.MONDAY])
+        retimed = target.model_copy(update={"start_time": "18:00", "end_time": "19:00"})
+        changed = inp.model_copy(update={
+            "orders": [retimed if o.id == target.id else o for o in inp.orders],
+        })
+        before = cache.stats()
+        second = solve(changed, time_limit_seconds=30, cache=cache)
+        after = cache.stats()
+        assert second.cache_hit is False
+        assert first.day_sources == dict.fromkeys(DATES.values(), "solved")
+        assert second.day_sources == {
+            DATES[DayOfWeek.MONDAY]: "solved",
+            DATES[DayOfWeek.TUESDAY]: "reused",
+            DATES[DayOfWeek.WEDNESDAY]: "reused",
+        }
+        # 週のミス1 + 月曜のミス1、火・水はヒット
+        assert after.misses - before.misses == 2
+        assert after.hits - before.hits == 2
+        first_staff = {a.order_id: a.staff_ids for a in first.assignments}
+        for a in second.assignments:
+            if a.order_id in {o.id for o in inp.orders if o.date != target.date}:
+                assert a.staff_ids == first_staff[a.order_id]
+
+    def test_changes_outside_day_keep_day_reused(self) -> None:
+        """他の日の希望休・当日の利用者以外の移動時間・スタッフ制約の変更では解き直さない"""
+        inp = _input()
+        cache = ResultCache()
+        solve(inp, time_limit_seconds=30, cache=cache, weekly_rebalance=True)
+        monday = DATES[DayOfWeek.MONDAY]
+        monday_customers = {o.customer_id for o in inp.orders if o.date == monday}
+        others = [c.id for c in inp.customers if c.id not in monday_customers]
+        assert others
+        changed = inp.model_copy(update={
+            "staff_unavailabilities": [StaffUnavailability(
+                staff_id="h0", week_start_date="2026-02-16",
+                unavailable_slots=[UnavailableSlot(date=monday, all_day=True)],
+            )],
+            "travel_times": [
+                tt.model_copy(update={"travel_time_minutes": 60})
+                if tt.from_id == others[0] else tt
+                for tt in inp.travel_times
+            ],
+            "staff_constraints": [StaffConstraint(
+                customer_id=others[0], staff_id="h1", constraint_type=StaffConstraintType.NG,
+            )],
+        })
+        result = solve(changed, time_limit_seconds=30, cache=cache, weekly_rebalance=True)
+        assert result.day_sources is not None
+        assert result.day_sources[monday] == "solved"
+        # 週次リバランス後も日ごとの出どころを保持する
+        assert result.rebalance_deltas is not None
+        for date, source in result.day_sources.items():
+            on_day = {o.customer_id for o in inp.orders if o.date == date}
+            assert source == ("reused" if others[0] not in on_day and date != monday else "solved")
+
+
+def test_project_subproblem() -> None:
+    inp = _input()
+    monday = DATES[DayOfWeek.MONDAY]
+    day = inp.model_copy(update={"orders": [o for o in inp.orders if o.date == monday]})
+    day = day.model_copy(update={
+        "staff_unavailabilities": [StaffUnavailability(
+            staff_id="h0", week_start_date="2026-02-16",
+            unavailable_slots=[
+                UnavailableSlot(date=monday, all_day=True),
+                UnavailableSlot(date=DATES[DayOfWeek.TUESDAY], all_day=True),
+            ],
+        ), StaffUnavailability(
+            staff_id="h1", week_start_date="2026-02-16",
+            unavailable_slots=[UnavailableSlot(date=DATES[DayOfWeek.TUESDAY], all_day=True)],
+        )],
+    })
+    projected = project_subproblem(day)
+    customers = {o.customer_id for o in day.orders}
+    assert [su.staff_id for su in projected.staff_unavailabilities] == ["h0"]
+    assert [s.date for s in projected.staff_unavailabilities[0].unavailable_slots] == [monday]
+    assert all(
+        tt.from_id in customers and tt.to_id in customers for tt in projected.travel_times
+    )
+    assert len(projected.travel_times) == len(customers) * (len(customers) - 1)
+    assert projected.orders == day.orders
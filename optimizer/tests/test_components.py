@@ -0,0 +1,161 @@
+"""連結成分分解（decompose_components）のテスト
+
+割当可能ヘルパーの集合が交わらないオーダー群を別々に解いても、
+分割しない場合と同じ最適値・同じ並びの結果になることを確認する。
+"""
+
+import random
+
+import pytest
+
+from optimizer.engine.components import connected_components
+from optimizer.engine.objective import evaluate_objective
+from optimizer.engine.solver import SoftWeights, solve
+from optimizer.models import (
+    Customer,
+    DayOfWeek,
+    Gender,
+    GenderRequirement,
+    GeoLocation,
+    Helper,
+    HoursRange,
+    OptimizationInput,
+    Order,
+    StaffConstraint,
+    StaffConstraintType,
+)
+
+DATES = {DayOfWeek.MONDAY: "2026-02-16", DayOfWeek.TUESDAY: "2026-02-17"}
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _pooled_input(seed: int, n_orders: int = 24) -> OptimizationInput:
+    """3つのヘルパープールに分かれる入力
+
+    c0, c1 → 入れるスタッフ h0, h1 / c2, c3 → 入れるスタッフ h2, h3 /
+    c4, c5 → 女性限定（女性は h4, h5 のみ）
+    """
+    rng = random.Random(seed)
+    helpers = [
+        Helper(
+            id=f"h{i}", family_name="ヘルパー", given_name=str(i),
+            can_physical_care=True, transportation="car",
+            gender=Gender.FEMALE if i >= 4 else Gender.MALE,
+            preferred_hours=HoursRange(min=1, max=4),
+            available_hours=HoursRange(min=0, max=40),
+            employment_type="part_time",
+        )
+        for i in range(6)
+    ]
+    customers = [
+        Customer(
+            id=f"c{i}", family_name="利用者", given_name=str(i), address="鹿児島市",
+            location=GeoLocation(lat=31.5, lng=130.5),
+            gender_requirement=GenderRequirement.FEMALE if i >= 4 else GenderRequirement.ANY,
+        )
+        for i in range(6)
+    ]
+    orders = []
+    for i in range(n_orders):
+        day = rng.choice(list(DATES))
+        start = rng.randrange(8 * 60, 17 * 60, 30)
+        orders.append(Order(
+            id=f"o{i:02d}", customer_id=f"c{rng.randrange(6)}",
+            date=DATES[day], day_of_week=day,
+            start_time=_hhmm(start), end_time=_hhmm(start + rng.choice([30, 60, 90])),
+            service_type="daily_living", staff_count=rng.choice([1, 1, 2]),
+        ))
+    staff_constraints = [
+        StaffConstraint(
+            customer_id=f"c{c}", staff_id=f"h{h}", constraint_type=StaffConstraintType.ALLOWED,
+        )
+        for c, hs in ((0, (0, 1)), (1, (0, 1)), (2, (2, 3)), (3, (2, 3)))
+        for h in hs
+    ]
+    return OptimizationInput(
+        customers=customers, helpers=helpers, orders=orders,
+        travel_times=[], staff_unavailabilities=[], staff_constraints=staff_constraints,
+    )
+
+
+def _pool(inp: OptimizationInput, j: int) -> int:
+    return int(inp.orders[j].customer_id[1:]) // 2
+
+
+class TestConnectedComponents:
+    def test_splits_by_helper_pool(self) -> None:
+        inp = _pooled_input(0)
+        components = connected_components(inp)
+        assert sorted(j for members in components for j in members) == list(range(len(inp.orders)))
+        pools = [{_pool(inp, j) for j in members} for members in components]
+        assert all(len(p) == 1 for p in pools)
+        assert sorted(p.pop() for p in pools) == [0, 1, 2]
+
+    def test_shared_helper_joins_components(self) -> None:
+        """h0 が c2 にも入れると、プール0と1は1つの成分になる"""
+        inp = _pooled_input(0)
+        inp.staff_constraints.append(
+            StaffConstraint(
+                customer_id="c2", staff_id="h0", constraint_type=StaffConstraintType.ALLOWED,
+            ),
+        )
+        components = connected_components(inp)
+        assert sorted({_pool(inp, j) for j in members} for members in components) == [{0, 1}, {2}]
+
+    def test_unassignable_orders_grouped(self) -> None:
+        """割当可能ヘルパーがいないオーダーは1つの成分にまとめる"""
+        inp = _pooled_input(0)
+        inp.staff_constraints.extend(
+            StaffConstraint(
+                customer_id=f"c{c}", staff_id="nobody", constraint_type=StaffConstraintType.ALLOWED,
+            )
+            for c in (4, 5)
+        )
+        components = connected_components(inp)
+        assert len(components) == 3
+        pool2 = [j for j in range(len(inp.orders)) if _pool(inp, j) == 2]
+        assert any(sorted(members) == pool2 for members in components)
+
+    def test_empty(self) -> None:
+        inp = _pooled_input(0).model_copy(update={"orders": []})
+        assert connected_components(inp) == []
+
+
+class TestSolveWithComponents:
+    @pytest.mark.parametrize("decompose_by_day", [True, False])
+    def test_same_optimum_as_undecomposed(self, decompose_by_day: bool) -> None:
+        """移動時間項がなければ分割しても最適値は変わらない"""
+        inp = _pooled_input(1)
+        weights = SoftWeights(travel=0)
+        base = solve(inp, time_limit_seconds=30, weights=weights, decompose_by_day=decompose_by_day)
+        result = solve(
+            inp, time_limit_seconds=30, weights=weights,
+            decompose_by_day=decompose_by_day, decompose_components=True,
+        )
+        assert base.component_sizes is None
+        assert result.status == base.status == "Optimal"
+        assert result.objective_value == pytest.approx(base.objective_value, abs=1e-6)
+        assert [a.order_id for a in result.assignments] == [a.order_id for a in base.assignments]
+        assert sum(result.component_sizes) == len(inp.orders)
+        assert len(result.component_sizes) == (6 if decompose_by_day else 3)
+
+    def test_objective_reported_on_undecomposed_scale(self) -> None:
+        inp = _pooled_input(2)
+        result = solve(
+            inp, time_limit_seconds=30, decompose_by_day=False, decompose_components=True,
+        )
+        assert result.objective_value == pytest.approx(
+            evaluate_objective(inp, result.assignments).total, abs=1e-6,
+        )
+
+    def test_parallel_matches_sequential(self, monkeypatch) -> None:
+        monkeypatch.setattr("os.cpu_count", lambda: 4)
+        inp = _pooled_input(1)
+        seq = solve(inp, time_limit_seconds=60, decompose_components=True)
+        par = solve(inp, time_limit_seconds=60, decompose_components=True, max_workers=2)
+        assert par.objective_value == seq.objective_value
+        assert par.component_sizes == seq.component_sizes
+        assert [a.order_id for a in par.assignments] == [a.order_id for a in seq.assignments]
@@ -0,0 +1,165 @@
+"""競合ペアインデックスのテスト — スイープラインと従来の全ペア走査の一致を確認"""
+
+import random
+import time
+
+import numpy as np
+import pytest
+
+from optimizer.engine.conflicts import build_conflict_index, travel_coefficients
+from optimizer.engine.constraints import MAX_WALK_TRAVEL_MINUTES
+from optimizer.engine.order_table import OrderTable
+from optimizer.models import DayOfWeek, Order, TravelMatrix
+
+DAYS = [DayOfWeek.MONDAY, DayOfWeek.TUESDAY, DayOfWeek.WEDNESDAY]
+DATES = {DayOfWeek.MONDAY: "2026-02-16", DayOfWeek.TUESDAY: "2026-02-17",
+         DayOfWeek.WEDNESDAY: "2026-02-18"}
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _random_case(
+    seed: int, n_orders: int = 300, n_customers: int = 60, n_days: int = 3,
+) -> tuple[list[Order], dict[tuple[str, str], float]]:
+    """非対称な移動時間・ゼロ分オーダー・同一利用者の複数オーダーを含むケース"""
+    rng = random.Random(seed)
+    customer_ids = [f"c{i:03d}" for i in range(n_customers)]
+    orders = []
+    for i in range(n_orders):
+        day = rng.choice(DAYS[:n_days])
+        start = rng.randrange(7 * 60, 19 * 60, 5)
+        orders.append(Order(
+            id=f"o{i:04d}",
+            customer_id=rng.choice(customer_ids),
+            date=DATES[day],
+            day_of_week=day,
+            start_time=_hhmm(start),
+            end_time=_hhmm(start + rng.choice([0, 30, 45, 60, 90, 120])),
+            service_type="daily_living",
+        ))
+    lookup: dict[tuple[str, str], float] = {}
+    for a in customer_ids:
+        for b in customer_ids:
+            if a != b and rng.random() < 0.7:
+                # TravelMatrix は float32 で保持するため、参照実装も同じ値で比較する
+                lookup[a, b] = float(np.float32(round(rng.uniform(0, 45), 1)))
+    # 同一世帯オーバーライド相当の0分エントリ
+    lookup[customer_ids[0], customer_ids[1]] = 0.0
+    return orders, lookup
+
+
+def _reference(
+    orders: list[Order], lookup: dict[tuple[str, str], float],
+) -> tuple[list[tuple[str, str]], list[tuple[str, str]], list[tuple[str, str]], dict[str, float]]:
+    """従来の同日全ペア走査（constraints / _build_objective の旧実装）"""
+    table = OrderTable(orders)
+    by_date: dict[str, list[int]] = {}
+    for i, o in enumerate(orders):
+        by_date.setdefault(o.date, []).append(i)
+
+    overlap, travel, walk = [], [], []
+    coef = {o.id: 0.0 for o in orders}
+    for members in by_date.values():
+        for k, i in enumerate(members):
+            o1 = orders[i]
+            s1, e1 = table.start[i], table.end[i]
+            for j in members[k + 1 :]:
+                o2 = orders[j]
+                s2, e2 = table.start[j], table.end[j]
+                if s1 < e2 and s2 < e1:
+                    overlap.append((o1.id, o2.id))
+                if o1.customer_id == o2.customer_id:
+                    continue
+                tt12 = lookup.get((o1.customer_id, o2.customer_id), 0.0)
+                tt21 = lookup.get((o2.customer_id, o1.customer_id), 0.0)
+                if e1 <= s2 and (s2 - e1) < tt12:
+                    travel.append((o1.id, o2.id))
+                elif e2 <= s1 and (s1 - e2) < tt21:
+                    travel.append((o2.id, o1.id))
+                if tt12 > MAX_WALK_TRAVEL_MINUTES or tt21 > MAX_WALK_TRAVEL_MINUTES:
+                    walk.append((o1.id, o2.id))
+                if tt12 > 0:
+                    coef[o1.id] += tt12 / 2
+                    coef[o2.id] += tt12 / 2
+    return overlap, travel, walk, coef
+
+
+def _matrix(lookup: dict[tuple[str, str], float]) -> TravelMatrix:
+    return TravelMatrix.from_pairs((a, b, minutes) for (a, b), minutes in lookup.items())
+
+
+def _as_ids(table: OrderTable, pairs: list[tuple[int, int]]) -> list[tuple[str, str]]:
+    return [(table.ids[i], table.ids[j]) for i, j in pairs]
+
+
+class TestConflictIndex:
+    @pytest.mark.parametrize("seed", range(4))
+    def test_matches_all_pairs_scan(self, seed: int) -> None:
+        """重複・移動・徒歩ペアが従来実装と同じ内容・同じ順序・同じ向き"""
+        orders, lookup = _random_case(seed)
+        table = OrderTable(orders)
+        index = build_conflict_index(table, _matrix(lookup), MAX_WALK_TRAVEL_MINUTES)
+        overlap, travel, walk, _ = _reference(orders, lookup)
+
+        assert overlap and travel and walk
+        assert _as_ids(table, index.overlap) == overlap
+        assert _as_ids(table, index.travel) == travel
+        assert _as_ids(table, index.walk) == walk
+
+    def test_walk_pairs_skipped_without_limit(self) -> None:
+        orders, lookup = _random_case(0)
+        index = build_conflict_index(OrderTable(orders), _matrix(lookup))
+        assert index.walk == []
+
+    def test_no_travel_times(self) -> None:
+        """移動時間データなし → 先読み幅0で重複ペアのみ"""
+        orders, _ = _random_case(1)
+        table = OrderTable(orders)
+        index = build_conflict_index(table, _matrix({}), MAX_WALK_TRAVEL_MINUTES)
+        overlap, travel, walk, _ = _reference(orders, {})
+        assert _as_ids(table, index.overlap) == overlap
+        assert index.travel == travel == []
+        assert index.walk == walk == []
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_travel_coefficients(self, seed: int) -> None:
+        orders, lookup = _random_case(seed)
+        table = OrderTable(orders)
+        coef = travel_coefficients(table, _matrix(lookup))
+        _, _, _, expected = _reference(orders, lookup)
+        for oid, c in zip(table.ids, coef):
+            assert c == pytest.approx(expected[oid], abs=1e-9)
+
+
+@pytest.mark.benchmark
+class TestConflictIndexBenchmark:
+    """1日1,500オーダー超での全ペア走査との比較"""
+
+    def test_single_large_day(self) -> None:
+        orders, lookup = _random_case(
+            42, n_orders=1600, n_customers=400, n_days=1,
+        )
+        table = OrderTable(orders)
+
+        t0 = time.perf_counter()
+        expected = _reference(orders, lookup)
+        t_ref = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = build_conflict_index(table, _matrix(lookup))
+        t_sweep = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        coef = travel_coefficients(table, _matrix(lookup))
+        t_coef = time.perf_counter() - t0
+
+        print(f"\n[競合ペア] orders={len(orders)}, overlap={len(index.overlap):,}, "
+              f"travel={len(index.travel):,}")
+        print(f"  全ペア走査: {t_ref:.2f}s")
+        print(f"  スイープ: {t_sweep * 1000:.0f}ms, 移動係数: {t_coef * 1000:.0f}ms")
+        assert _as_ids(table, index.overlap) == expected[0]
+        assert _as_ids(table, index.travel) == expected[1]
+        assert coef == pytest.approx([expected[3][oid] for oid in table.ids])
+        assert t_sweep + t_coef < t_ref
@@ -1,6 +1,10 @@
 """F: 重複禁止 — 同一ヘルパーが同時刻に複数箇所にアサイン不可"""
 
-from optimizer.engine.solver import solve
+import pytest
+
+from optimizer.engine.conflicts import build_conflict_index, overlap_cliques
+from optimizer.engine.order_table import OrderTable
+from optimizer.engine.solver import SolverOptions, solve
 from optimizer.models import (
     Customer,
     DayOfWeek,
@@ -9,6 +13,7 @@ from optimizer.models import (
     HoursRange,
     OptimizationInput,
     Order,
+    TravelMatrix,
 )
 
 
@@ -101,3 +106,49 @@ class TestNoOverlapConstraint:
         )
         result = solve(inp)
         assert result.status == "Optimal"
+
+
+class TestCliqueNoOverlap:
+    """no_overlap="clique" — 極大クリーク単位の重複禁止制約"""
+
+    def _input(self, n_helpers: int = 1) -> OptimizationInput:
+        return OptimizationInput(
+            customers=[_make_customer(f"C{i}") for i in range(1, 6)],
+            helpers=[_make_helper(f"H{i}") for i in range(1, n_helpers + 1)],
+            orders=[
+                _make_order("O1", "C1", "09:00", "10:00"),
+                _make_order("O2", "C2", "09:30", "10:30"),
+                _make_order("O3", "C3", "10:00", "11:00"),
+                _make_order("O4", "C4", "09:45", "09:50"),
+                _make_order("O5", "C5", "10:00", "10:00"),  # 所要0分（退化）
+            ],
+            travel_times=[], staff_unavailabilities=[], staff_constraints=[],
+        )
+
+    def test_maximal_cliques(self) -> None:
+        """接する区間は重複扱いしない / 退化オーダーはペアで残す"""
+        table = OrderTable(self._input().orders)
+        conflicts = build_conflict_index(table, TravelMatrix.from_pairs([]))
+        cliques, leftover = overlap_cliques(table, conflicts)
+        assert [[table.ids[i] for i in c] for c in cliques] == [["O1", "O2", "O4"], ["O2", "O3"]]
+        assert [(table.ids[i], table.ids[j]) for i, j in leftover] == [("O2", "O5")]
+
+        # 全重複ペアがいずれかのクリークまたは残りペアに含まれる
+        covered = {(i, j) for c in cliques for i in c for j in c if i < j} | set(leftover)
+        assert set(conflicts.overlap) <= covered
+
+    def test_same_result_as_pairwise(self) -> None:
+        inp = self._input(n_helpers=2)
+        pairwise = solve(inp, options=SolverOptions(no_overlap="pairwise"))
+        clique = solve(inp, options=SolverOptions(no_overlap="clique"))
+        assert clique.status == pairwise.status == "Optimal"
+        assert clique.objective_value == pairwise.objective_value
+        assert clique.unassigned_count == pairwise.unassigned_count
+
+        by_order = {a.order_id: set(a.staff_ids) for a in clique.assignments}
+        for a, b in [("O1", "O2"), ("O1", "O4"), ("O2", "O4"), ("O2", "O3"), ("O2", "O5")]:
+            assert by_order[a].isdisjoint(by_order[b])
+
+    def test_unknown_mode_rejected(self) -> None:
+        with pytest.raises(ValueError):
+            solve(self._input(), options=SolverOptions(no_overlap="bogus"))
@@ -9,6 +9,7 @@ from optimizer.models import (
     HoursRange,
     OptimizationInput,
     Order,
+    TravelMatrix,
     TravelTime,
 )
 
@@ -58,6 +59,25 @@ class TestTravelTimeConstraint:
         assert o1_staff == ["H1"]
         assert o2_staff == ["H1"]
 
+    def test_travel_matrix_input(self) -> None:
+        """travel_times の代わりに密行列で渡しても同じ制約になる"""
+        inp = OptimizationInput(
+            customers=[_c("C1"), _c("C2")],
+            helpers=[_h("H1"), _h("H2")],
+            orders=[
+                _o("O1", "C1", "09:00", "10:00"),
+                _o("O2", "C2", "10:10", "11:10"),  # 10分の間隔
+            ],
+            travel_times=[],
+            travel_matrix=TravelMatrix.from_pairs([("C1", "C2", 20.0), ("C2", "C1", 20.0)]),
+            staff_unavailabilities=[], staff_constraints=[],
+        )
+        result = solve(inp)
+        assert result.status == "Optimal"
+        o1_staff = next(a for a in result.assignments if a.order_id == "O1").staff_ids
+        o2_staff = next(a for a in result.assignments if a.order_id == "O2").staff_ids
+        assert set(o1_staff).isdisjoint(set(o2_staff))
+
     def test_insufficient_gap_prevents_same_helper(self) -> None:
         """移動時間20分、間隔10分 → 同一ヘルパー不可"""
         inp = OptimizationInput(
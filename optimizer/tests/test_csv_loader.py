@@ -3,6 +3,8 @@
 from datetime import date
 from pathlib import Path
 
+import numpy as np
+
 from optimizer.data.csv_loader import (
     generate_orders,
     load_customers,
@@ -10,9 +12,10 @@ from optimizer.data.csv_loader import (
     load_optimization_input,
     load_staff_constraints,
     load_staff_unavailabilities,
+    load_travel_matrix,
     load_travel_times,
 )
-from optimizer.models import DayOfWeek
+from optimizer.models import DayOfWeek, TravelMatrix
 
 
 class TestLoadCustomers:
@@ -94,6 +97,15 @@ class TestLoadTravelTimes:
         for tt in travel_times:
             assert tt.travel_time_minutes >= 0
 
+    def test_matrix_matches_pairs(self, seed_data_dir: Path) -> None:
+        customers = load_customers(seed_data_dir)
+        expected = TravelMatrix.from_travel_times(
+            load_travel_times(seed_data_dir, customers), customers,
+        )
+        matrix = load_travel_matrix(customers)
+        assert matrix.customer_ids == expected.customer_ids
+        np.testing.assert_allclose(matrix.minutes, expected.minutes, atol=1e-4)
+
 
 class TestLoadStaffUnavailabilities:
     def test_loaded(self, seed_data_dir: Path) -> None:
@@ -166,5 +178,5 @@ class TestLoadOptimizationInput:
         assert len(inp.customers) == 50
         assert len(inp.helpers) == 20
         assert len(inp.orders) == 184
-        assert len(inp.travel_times) > 0
+        assert inp.travel_matrix is not None and len(inp.travel_matrix) == 50
         assert len(inp.staff_constraints) == 21
@@ -298,3 +298,157 @@ class TestDecomposeByDay:
         result = solve(inp, time_limit_seconds=10, decompose_by_day=True)
         assert result.status == "Optimal"
         assert result.unassigned_count == 0
+
+
+class TestSolveProgress:
+    """progress コールバック（非同期ジョブの進捗表示に使う）"""
+
+    def _input(self) -> OptimizationInput:
+        return OptimizationInput(
+            customers=[_make_customer("c001")],
+            helpers=[_make_helper("h001"), _make_helper("h002")],
+            orders=[_make_order(f"o{i}", "c001", day) for i, day in enumerate(DAYS)],
+            travel_times=[], staff_unavailabilities=[], staff_constraints=[],
+        )
+
+    def test_reports_each_day(self) -> None:
+        events = []
+        result = solve(self._input(), time_limit_seconds=30, progress=events.append)
+        assert [e.completed for e in events] == [1, 2, 3, 4, 5]
+        assert all(e.phase == "solve" and e.total == 5 for e in events)
+        assert [e.current for e in events] == sorted(DATE_MAP.values())
+        assert events[-1].objective == result.objective_value
+        # 完了分の合算（ステータス・未割当数）、その日の割当、残り時間
+        assert events[-1].status == result.status
+        assert events[-1].unassigned_count == result.unassigned_count
+        assert [a.order_id for e in events for a in e.assignments] == [
+            a.order_id for a in result.assignments
+        ]
+        remaining = [e.remaining_seconds for e in events]
+        assert remaining == sorted(remaining, reverse=True)
+        assert all(0 <= r <= 30 for r in remaining)
+
+    def test_single_problem_and_rebalance(self) -> None:
+        events = []
+        solve(self._input(), time_limit_seconds=10, decompose_by_day=False, progress=events.append)
+        assert [(e.phase, e.completed, e.total) for e in events] == [("solve", 1, 1)]
+
+        events.clear()
+        result = solve(
+            self._input(), time_limit_seconds=30, weekly_rebalance=True, progress=events.append,
+        )
+        assert events[-1].phase == "rebalance"
+        assert events[-1].objective == result.objective_value
+
+
+class TestParallelDecomposition:
+    """日次分割の並列実行（max_workers>1）テスト"""
+
+    def _week_input(self) -> OptimizationInput:
+        helpers = [_make_helper("h001"), _make_helper("h002")]
+        customers = [_make_customer("c001"), _make_customer("c002")]
+        orders = []
+        for i, day in enumerate(DAYS):
+            orders.append(_make_order(f"o{i}a", "c001", day))
+            orders.append(_make_order(f"o{i}b", "c002", day,
+                                      start_time="09:30", end_time="10:30"))
+        return OptimizationInput(
+            customers=customers, helpers=helpers, orders=orders,
+            travel_times=[], staff_unavailabilities=[], staff_constraints=[],
+        )
+
+    def test_parallel_matches_sequential(self, monkeypatch) -> None:
+        """並列実行でも逐次と同じ件数・目的関数値・日付順の割当になる"""
+        # 1コア環境でも並列経路を通す
+        monkeypatch.setattr("os.cpu_count", lambda: 4)
+        inp = self._week_input()
+        seq = solve(inp, time_limit_seconds=60, decompose_by_day=True)
+        par = solve(inp, time_limit_seconds=60, decompose_by_day=True, max_workers=2)
+
+        assert par.status == seq.status == "Optimal"
+        assert par.unassigned_count == seq.unassigned_count == 0
+        assert par.objective_value == seq.objective_value
+        # 合算は日付順で決定的
+        assert [a.order_id for a in par.assignments] == [a.order_id for a in seq.assignments]
+
+    def test_parallel_preserves_overlap_constraint(self, monkeypatch) -> None:
+        """並列実行でも同日の重複制約が機能し、未割当が合算される"""
+        monkeypatch.setattr("os.cpu_count", lambda: 4)
+        helpers = [_make_helper("h001")]
+        customers = [_make_customer("c001"), _make_customer("c002")]
+        orders = [
+            _make_order("o001", "c001", DayOfWeek.MONDAY),
+            _make_order("o002", "c002", DayOfWeek.MONDAY),
+            _make_order("o003", "c001", DayOfWeek.TUESDAY),
+            _make_order("o004", "c002", DayOfWeek.TUESDAY),
+        ]
+        inp = OptimizationInput(
+            customers=customers, helpers=helpers, orders=orders,
+            travel_times=[], staff_unavailabilities=[], staff_constraints=[],
+        )
+        result = solve(inp, time_limit_seconds=30, decompose_by_day=True, max_workers=2)
+        assert result.status == "Optimal"
+        assert result.unassigned_count == 2
+
+
+class TestWorkerResolution:
+    """ワーカー数・時間配分の決定ロジック"""
+
+    def test_bounded_by_tasks(self) -> None:
+        from optimizer.engine.parallel import resolve_worker_count
+
+        assert resolve_worker_count(64, 3) <= 3
+
+    def test_at_least_one(self) -> None:
+        from optimizer.engine.parallel import resolve_worker_count
+
+        # メモリ予算が極端に大きくても最低1ワーカー
+        assert resolve_worker_count(4, 7, worker_memory_mb=10**9) == 1
+
+    def test_budget_redistributed_by_rounds(self) -> None:
+        """実行中 + 未着手の日数をワーカー数で割ったラウンド数で残り時間を配分する"""
+        from optimizer.engine.parallel import _per_day_limit
+
+        # 7日/4ワーカー → 2ラウンド
+        assert _per_day_limit(180, 7, 4) == 90
+        # 残り3日/4ワーカー → 1ラウンドで残り時間すべて
+        assert _per_day_limit(120, 3, 4) == 120
+        # 下限10秒
+        assert _per_day_limit(5, 7, 1) == 10
+
+    def test_same_budget_within_submission_pass(self, monkeypatch) -> None:
+        """同じパスで投入する日は同じ時間（最も大きい日の配分が最小にならない）"""
+        import time
+        from concurrent.futures import Future
+        from unittest.mock import MagicMock
+
+        from optimizer.engine import parallel
+
+        limits: list[int] = []
+
+        class ImmediatePool:
+            def __init__(self, *args: object, **kwargs: object) -> None:
+                pass
+
+            def __enter__(self) -> "ImmediatePool":
+                return self
+
+            def __exit__(self, *args: object) -> None:
+                pass
+
+            def submit(self, fn: object, day_inp: object, limit: int, *args: object) -> Future:
+                limits.append(limit)
+                future: Future = Future()
+                future.set_result(MagicMock())
+                return future
+
+        monkeypatch.setattr(parallel, "ProcessPoolExecutor", ImmediatePool)
+        monkeypatch.setattr(parallel, "build_day_input", lambda inp, orders: inp)
+        days = [(f"2026-02-{16 + i}", [MagicMock()] * (10 - i)) for i in range(7)]
+        results = parallel.solve_days_parallel(
+            MagicMock(), days, 180, None, n_workers=3, start_time=time.time(),
+        )
+        assert len(results) == 7
+        # 7日/3ワーカー → 3ラウンド: 最初の3日は約 180/3 秒ずつ
+        assert len(set(limits[:3])) == 1
+        assert 55 <= limits[0] <= 60
@@ -0,0 +1,142 @@
+"""マスタデータ差分同期のテスト — ウォーターマーク・マージ・削除検知・SQLite スナップショット"""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+from optimizer.data.delta_sync import DeltaSync, SqliteSnapshotStore
+from optimizer.data.master_cache import MasterDataCache
+from optimizer.models import Customer, GeoLocation
+
+T0 = datetime(2026, 2, 16, 9, 0, tzinfo=UTC)
+
+
+def _customer(cid: str, family: str = "山田") -> Customer:
+    return Customer(
+        id=cid, family_name=family, given_name=cid, address="鹿児島市",
+        location=GeoLocation(lat=31.5, lng=130.5),
+    )
+
+
+class FakeCollection:
+    """ドキュメントと updated_at を持つコレクション（load_customers の代わり）"""
+
+    def __init__(self, customers: list[Customer]) -> None:
+        self.docs = {c.id: (c, T0 - timedelta(days=1)) for c in customers}
+        self.calls: list[datetime | None] = []
+
+    def put(self, customer: Customer, updated_at: datetime) -> None:
+        self.docs[customer.id] = (customer, updated_at)
+
+    def load(self, db: object, updated_since: datetime | None = None) -> list[Customer]:
+        self.calls.append(updated_since)
+        return [
+            c for c, updated_at in self.docs.values()
+            if updated_since is None or updated_at >= updated_since
+        ]
+
+    def db(self) -> MagicMock:
+        """count 集計が現在の件数を返すモックDB"""
+        db = MagicMock()
+        db.collection.return_value.count.return_value.get.side_effect = (
+            lambda: [[MagicMock(value=len(self.docs))]]
+        )
+        return db
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = T0
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _sync(coll: FakeCollection, clock: Clock, **kwargs: object) -> DeltaSync[Customer]:
+    return DeltaSync(
+        "customers", Customer, coll.load, now=clock, clock_skew_seconds=60,
+        **kwargs,  # type: ignore[arg-type]
+    )
+
+
+class TestDeltaSync:
+    def test_delta_merges_changes(self) -> None:
+        coll = FakeCollection([_customer("C1"), _customer("C2")])
+        clock = Clock()
+        sync = _sync(coll, clock)
+        db = coll.db()
+        assert {c.id for c in sync(db)} == {"C1", "C2"}
+
+        clock.now = T0 + timedelta(minutes=10)
+        coll.put(_customer("C2", family="佐藤"), T0 + timedelta(minutes=5))
+        coll.put(_customer("C3"), T0 + timedelta(minutes=6))
+        result = {c.id: c.family_name for c in sync(db)}
+        assert result == {"C1": "山田", "C2": "佐藤", "C3": "山田"}
+        # 2回目は前回の開始時刻 - clock_skew 以降だけを読む
+        assert coll.calls == [None, T0 - timedelta(seconds=60)]
+        stats = sync.stats()
+        assert (stats.full_syncs, stats.delta_syncs, stats.documents_read) == (1, 1, 4)
+        assert stats.watermark == clock.now - timedelta(seconds=60)
+
+    def test_deletion_triggers_full_sync(self) -> None:
+        coll = FakeCollection([_customer("C1"), _customer("C2")])
+        clock = Clock()
+        sync = _sync(coll, clock)
+        db = coll.db()
+        sync(db)
+        del coll.docs["C2"]
+        assert [c.id for c in sync(db)] == ["C1"]
+        # 差分をマージしても件数が合わない → 全件を読み直す
+        assert coll.calls == [None, T0 - timedelta(seconds=60), None]
+        assert sync.stats().full_syncs == 2
+
+    def test_full_sync_interval(self) -> None:
+        coll = FakeCollection([_customer("C1")])
+        clock = Clock()
+        sync = _sync(coll, clock, full_sync_interval_seconds=600)
+        db = coll.db()
+        sync(db)
+        clock.now = T0 + timedelta(minutes=5)
+        sync(db)
+        clock.now = T0 + timedelta(minutes=11)
+        sync(db)
+        assert coll.calls[0] is None and coll.calls[1] is not None and coll.calls[2] is None
+
+    def test_sqlite_snapshot_restored(self, tmp_path) -> None:
+        coll = FakeCollection([_customer("C1"), _customer("C2")])
+        clock = Clock()
+        path = tmp_path / "master.sqlite"
+        _sync(coll, clock, store=SqliteSnapshotStore(path))(coll.db())
+
+        # 再起動したワーカー: スナップショットから復元し、差分だけ読む
+        clock.now = T0 + timedelta(minutes=10)
+        coll.put(_customer("C2", family="佐藤"), T0 + timedelta(minutes=5))
+        restarted = _sync(coll, clock, store=SqliteSnapshotStore(path))
+        assert restarted.stats().size == 2
+        result = {c.id: c.family_name for c in restarted(coll.db())}
+        assert result == {"C1": "山田", "C2": "佐藤"}
+        assert coll.calls[-1] == T0 - timedelta(seconds=60)
+        assert restarted.stats().documents_read == 1
+
+    def test_unreadable_snapshot_falls_back_to_full_sync(self, tmp_path) -> None:
+        path = tmp_path / "master.sqlite"
+        store = SqliteSnapshotStore(path)
+        store.save("customers", T0, T0, {"C1": "{\"broken\": true}"}, replace=True)
+        coll = FakeCollection([_customer("C1")])
+        sync = _sync(coll, Clock(), store=SqliteSnapshotStore(path))
+        assert sync.stats().size == 0
+        sync(coll.db())
+        assert coll.calls == [None]
+
+    def test_master_cache_delta_loader(self) -> None:
+        """MasterDataCache の読み直し（無効化後）を差分同期で行う"""
+        coll = FakeCollection([_customer("C1")])
+        clock = Clock()
+        sync = _sync(coll, clock)
+        cache = MasterDataCache(delta_loaders={coll.load: sync})
+        db = coll.db()
+        assert [c.id for c in cache.get(db, "customers", coll.load)] == ["C1"]
+        clock.now = T0 + timedelta(minutes=10)
+        coll.put(_customer("C2"), T0 + timedelta(minutes=5))
+        cache.invalidate("customers")
+        assert {c.id for c in cache.get(db, "customers", coll.load)} == {"C1", "C2"}
+        assert coll.calls == [None, T0 - timedelta(seconds=60)]
@@ -0,0 +1,330 @@
+"""割当可能性行列のテスト — NumPy実装と従来の二重ループ＋x == 0 制約行の一致を確認"""
+
+import random
+import time
+
+import numpy as np
+import pytest
+
+from optimizer.engine.feasibility import compute_feasibility_matrix, household_groups
+from optimizer.engine.order_table import OrderTable, time_to_minutes
+from optimizer.engine.solver import (
+    _build_model,
+    _compute_feasible_pairs,
+    measure_model_size,
+)
+from optimizer.models import (
+    AvailabilitySlot,
+    Customer,
+    DayOfWeek,
+    GenderRequirement,
+    GeoLocation,
+    Helper,
+    HoursRange,
+    OptimizationInput,
+    Order,
+    ServiceTypeConfig,
+    StaffConstraint,
+    StaffConstraintType,
+    StaffUnavailability,
+    TrainingStatus,
+    UnavailableSlot,
+)
+from tests.conftest import WEEK_DATES, hhmm
+
+DAYS = list(DayOfWeek)
+
+
+def _reference_feasible_pairs(inp: OptimizationInput) -> set[tuple[str, str]]:
+    """従来の (helper × order) 二重ループ実装と、旧 constraints の x == 0 行
+    （入れるスタッフ・研修中・希望休・linked_force0）で残るペア（比較用）"""
+    ng_pairs = {
+        (sc.customer_id, sc.staff_id)
+        for sc in inp.staff_constraints
+        if sc.constraint_type == StaffConstraintType.NG
+    }
+    allowed_by_customer: dict[str, set[str]] = {}
+    for sc in inp.staff_constraints:
+        if sc.constraint_type == StaffConstraintType.ALLOWED:
+            allowed_by_customer.setdefault(sc.customer_id, set()).add(sc.staff_id)
+    slots_by_staff: dict[str, list[UnavailableSlot]] = {}
+    for su in inp.staff_unavailabilities:
+        slots_by_staff.setdefault(su.staff_id, []).extend(su.unavailable_slots)
+    cert_required = (
+        {c.code for c in inp.service_type_configs if c.requires_physical_care_cert}
+        if inp.service_type_configs else set()
+    )
+    customer_map = {c.id: c for c in inp.customers}
+
+    feasible: set[tuple[str, str]] = set()
+    for h in inp.helpers:
+        for o in inp.orders:
+            if not h.can_physical_care and o.service_type in cert_required:
+                continue
+            if (o.customer_id, h.id) in ng_pairs:
+                continue
+            customer = customer_map.get(o.customer_id)
+            if customer and customer.gender_requirement != GenderRequirement.ANY:
+                if h.gender.value != customer.gender_requirement.value:
+                    continue
+            if h.weekly_availability:
+                slots = h.weekly_availability.get(o.day_of_week, [])
+                if not slots:
+                    continue
+                order_start = time_to_minutes(o.start_time)
+                order_end = time_to_minutes(o.end_time)
+                if not any(
+                    time_to_minutes(s.start_time) <= order_start
+                    and order_end <= time_to_minutes(s.end_time)
+                    for s in slots
+                ):
+                    continue
+            allowed = allowed_by_customer.get(o.customer_id)
+            if allowed is not None and h.id not in allowed:
+                continue
+            if o.staff_count <= 1 and h.customer_training_status.get(o.customer_id) in (
+                TrainingStatus.NOT_VISITED, TrainingStatus.TRAINING,
+            ):
+                continue
+            if any(
+                slot.date == o.date and (
+                    slot.all_day
+                    or (
+                        slot.start_time and slot.end_time
+                        and time_to_minutes(o.start_time) < time_to_minutes(slot.end_time)
+                        and time_to_minutes(slot.start_time) < time_to_minutes(o.end_time)
+                    )
+                )
+                for slot in slots_by_staff.get(h.id, [])
+            ):
+                continue
+            feasible.add((h.id, o.id))
+
+    # 世帯リンク: x[h, o1] == x[h, o2] の連鎖で片方が 0 なら両方 0（不動点まで伝播）
+    order_ids = {o.id for o in inp.orders}
+    links = [
+        (o.id, o.linked_order_id) for o in inp.orders
+        if o.linked_order_id and o.linked_order_id in order_ids
+    ]
+    changed = True
+    while changed:
+        changed = False
+        for h in inp.helpers:
+            for a, b in links:
+                if ((h.id, a) in feasible) != ((h.id, b) in feasible):
+                    feasible.discard((h.id, a))
+                    feasible.discard((h.id, b))
+                    changed = True
+    return feasible
+
+
+def _random_input(
+    seed: int, n_helpers: int = 30, n_customers: int = 40, n_orders: int = 200,
+) -> OptimizationInput:
+    """資格・性別・NG・入れるスタッフ・研修中・希望休・世帯リンク・
+    分割勤務枠・勤務制限なしを混在させたランダム入力"""
+    rng = random.Random(seed)
+    helpers = []
+    for i in range(n_helpers):
+        availability: dict[DayOfWeek, list[AvailabilitySlot]] = {}
+        mode = rng.random()
+        if mode < 0.7:
+            for d in rng.sample(DAYS, k=rng.randint(1, 6)):
+                slots = []
+                for _ in range(rng.randint(0, 2)):
+                    start = rng.randrange(6 * 60, 16 * 60, 30)
+                    end = start + rng.randrange(60, 6 * 60, 30)
+                    slots.append(AvailabilitySlot(start_time=hhmm(start), end_time=hhmm(end)))
+                availability[d] = slots
+        elif mode < 0.8:
+            # 曜日キーはあるが枠が空 → その週は割当不可
+            availability = {DayOfWeek.MONDAY: []}
+        helpers.append(Helper(
+            id=f"h{i:03d}",
+            family_name="ヘルパー",
+            given_name=str(i),
+            can_physical_care=rng.random() < 0.6,
+            transportation="car",
+            weekly_availability=availability,
+            preferred_hours=HoursRange(min=0, max=40),
+            available_hours=HoursRange(min=0, max=40),
+            employment_type="part_time",
+            gender=rng.choice(["male", "female"]),
+            customer_training_status={
+                f"c{rng.randrange(n_customers):03d}": rng.choice(list(TrainingStatus))
+                for _ in range(rng.randint(0, 3))
+            },
+        ))
+
+    customers = [
+        Customer(
+            id=f"c{i:03d}",
+            family_name="利用者",
+            given_name=str(i),
+            address="鹿児島市",
+            location=GeoLocation(lat=31.5, lng=130.5),
+            gender_requirement=rng.choice(["any", "any", "female", "male"]),
+        )
+        for i in range(n_customers)
+    ]
+    # customers に存在しない利用者のオーダーも含める（性別制約なし扱い）
+    customer_ids = [c.id for c in customers] + ["c_missing"]
+
+    orders = []
+    for i in range(n_orders):
+        day = rng.choice(DAYS)
+        start = rng.randrange(7 * 60, 18 * 60, 15)
+        orders.append(Order(
+            id=f"o{i:04d}",
+            customer_id=rng.choice(customer_ids),
+            date=WEEK_DATES[day],
+            day_of_week=day,
+            start_time=hhmm(start),
+            end_time=hhmm(start + rng.choice([30, 60, 90])),
+            service_type=rng.choice(["physical_care", "daily_living", "mixed"]),
+            staff_count=rng.choice([1, 1, 1, 2]),
+        ))
+    # 世帯リンク（片方向・双方向・3件連鎖・存在しないIDを混在）
+    for i in range(0, n_orders - 2, 10):
+        orders[i].linked_order_id = orders[i + 1].id
+        if rng.random() < 0.5:
+            orders[i + 1].linked_order_id = orders[i].id
+        elif rng.random() < 0.5:
+            orders[i + 1].linked_order_id = orders[i + 2].id
+    if orders:
+        orders[-1].linked_order_id = "o_missing"
+
+    staff_constraints = [
+        StaffConstraint(
+            customer_id=rng.choice(customer_ids),
+            staff_id=rng.choice([h.id for h in helpers] + ["h_missing"]),
+            constraint_type=rng.choice(list(StaffConstraintType)),
+        )
+        for _ in range(n_customers)
+    ]
+
+    staff_unavailabilities = []
+    for h in rng.sample(helpers, k=n_helpers // 3):
+        slots = [UnavailableSlot(date=WEEK_DATES[rng.choice(DAYS)], all_day=True)]
+        start = rng.randrange(8 * 60, 16 * 60, 30)
+        slots.append(UnavailableSlot(
+            date=WEEK_DATES[rng.choice(DAYS)], all_day=False,
+            start_time=hhmm(start), end_time=hhmm(start + 120),
+        ))
+        staff_unavailabilities.append(StaffUnavailability(
+            staff_id=h.id, week_start_date=WEEK_DATES[DAYS[0]], unavailable_slots=slots,
+        ))
+
+    return OptimizationInput(
+        customers=customers,
+        helpers=helpers,
+        orders=orders,
+        travel_times=[],
+        staff_unavailabilities=staff_unavailabilities,
+        staff_constraints=staff_constraints,
+        service_type_configs=[
+            ServiceTypeConfig(
+                code="physical_care", label="身体", short_label="身",
+                requires_physical_care_cert=True, sort_order=1,
+            ),
+            ServiceTypeConfig(
+                code="mixed", label="複合", short_label="複",
+                requires_physical_care_cert=True, sort_order=2,
+            ),
+            ServiceTypeConfig(
+                code="daily_living", label="生活", short_label="生",
+                requires_physical_care_cert=False, sort_order=3,
+            ),
+        ],
+    )
+
+
+class TestFeasibilityMatrix:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_reference(self, seed: int) -> None:
+        """ランダム入力で従来実装と完全一致する"""
+        inp = _random_input(seed)
+        expected = _reference_feasible_pairs(inp)
+        assert _compute_feasible_pairs(inp) == expected
+        # 判定が偏っていない（全可・全不可ではない）ことも確認
+        total = len(inp.helpers) * len(inp.orders)
+        assert 0 < len(expected) < total
+
+    def test_without_service_type_configs(self) -> None:
+        """service_type_configs が空なら資格チェックは行わない"""
+        inp = _random_input(7).model_copy(update={"service_type_configs": []})
+        assert _compute_feasible_pairs(inp) == _reference_feasible_pairs(inp)
+
+    def test_matrix_shape_and_order(self) -> None:
+        """行・列は inp.helpers / inp.orders の順序に対応する"""
+        inp = _random_input(3, n_helpers=8, n_orders=25)
+        fm = compute_feasibility_matrix(inp)
+        assert fm.mask.shape == (8, 25)
+        assert fm.mask.dtype == np.bool_
+        assert fm.helper_ids == [h.id for h in inp.helpers]
+        assert fm.order_ids == [o.id for o in inp.orders]
+
+        expected = _reference_feasible_pairs(inp)
+        counts = fm.order_counts()
+        by_order = fm.helpers_for_order()
+        for o in inp.orders:
+            helpers = [h.id for h in inp.helpers if (h.id, o.id) in expected]
+            assert by_order[o.id] == helpers
+            assert counts[o.id] == len(helpers)
+
+    def test_household_groups_share_helpers(self) -> None:
+        """世帯リンクで連結されたオーダー群は割当可能ヘルパーが一致する"""
+        inp = _random_input(4)
+        table = OrderTable(inp.orders)
+        groups = household_groups(inp, table)
+        assert any(len(g) == 3 for g in groups)
+        by_order = compute_feasibility_matrix(inp, table).helpers_for_order()
+        for members in groups:
+            assert len({tuple(by_order[table.ids[i]]) for i in members}) == 1
+
+    def test_model_has_no_fixing_rows(self) -> None:
+        """枝刈りで表現した制約の x == 0 行はモデルに含まれない"""
+        inp = _random_input(1, n_helpers=10, n_orders=60)
+        prob, x = _build_model(inp)
+        assert set(x) == _reference_feasible_pairs(inp)
+        prefixes = (
+            "qual_", "ng_", "allowed_", "gender_", "avail_", "unavail_",
+            "training_", "linked_force0_",
+        )
+        assert not [name for name in prob.constraints if name.startswith(prefixes)]
+        size = measure_model_size(prob)
+        assert size.variables == len(prob.variables())
+        assert size.rows == len(prob.constraints)
+
+    def test_empty_input(self) -> None:
+        inp = _random_input(0, n_orders=0)
+        fm = compute_feasibility_matrix(inp)
+        assert fm.mask.shape == (30, 0)
+        assert fm.pairs() == set()
+
+
+@pytest.mark.benchmark
+class TestFeasibilityBenchmark:
+    """本番スケール（176ヘルパー × 10,050オーダー）での速度比較"""
+
+    def test_speedup_vs_reference(self) -> None:
+        inp = _random_input(42, n_helpers=176, n_customers=2000, n_orders=10050)
+
+        t0 = time.perf_counter()
+        expected = _reference_feasible_pairs(inp)
+        t_ref = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fm = compute_feasibility_matrix(inp)
+        t_mask = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        pairs = fm.pairs()
+        t_pairs = time.perf_counter() - t0
+
+        print(f"\n[feasible] pairs: {len(expected):,} / {fm.mask.size:,}")
+        print(f"  二重ループ: {t_ref:.2f}s")
+        print(f"  NumPy行列: {t_mask:.3f}s (+ペア集合化 {t_pairs:.3f}s)")
+        print(f"  高速化: 行列 {t_ref / t_mask:.0f}x, 集合込み {t_ref / (t_mask + t_pairs):.1f}x")
+        assert pairs == expected
+        assert t_mask < t_ref
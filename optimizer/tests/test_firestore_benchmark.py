@@ -0,0 +1,294 @@
+"""Firestore 読み込みベンチマーク — Firestore Emulator で読み込み件数・転送量・レイテンシを比較
+
+FIRESTORE_EMULATOR_HOST を設定して pytest -m benchmark -s で実行（未設定ならスキップ）
+"""
+
+import os
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+firestore = pytest.importorskip("google.cloud.firestore")
+
+from optimizer.data.firestore_loader import (  # noqa: E402
+    MONTHLY_ORDER_FIELDS,
+    PERSON_NAME_FIELDS,
+    load_all_customers,
+    load_all_helpers,
+    load_customers,
+    load_helpers,
+    load_monthly_orders,
+    load_optimization_input,
+    load_orders,
+    load_service_types,
+    load_staff_unavailabilities,
+    load_travel_matrix,
+)
+from optimizer.models import TravelMatrix  # noqa: E402
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        not os.environ.get("FIRESTORE_EMULATOR_HOST"),
+        reason="FIRESTORE_EMULATOR_HOST が未設定（Firestore Emulator が必要）",
+    ),
+]
+
+# travel_times にいる利用者（過去の利用者を含む）と、対象週にオーダーがある利用者
+N_ALL_CUSTOMERS = 150
+N_WEEK_CUSTOMERS = 60
+N_HELPERS = 30
+WEEK_START = date(2026, 2, 16)
+# 月次レポート用データセット（実運用規模の利用者ドキュメント）
+N_REPORT_CUSTOMERS = 300
+N_REPORT_HELPERS = 80
+REPORT_MONTH = "2026-03"
+
+
+@pytest.fixture(scope="module")
+def db():  # type: ignore[no-untyped-def]
+    client = firestore.Client(project="benchmark-firestore-loader")
+    coll = client.collection("travel_times")
+    if next(iter(coll.limit(1).stream()), None) is None:
+        rng = random.Random(42)
+        ids = [f"C{i:04d}" for i in range(N_ALL_CUSTOMERS)]
+        batch = client.batch()
+        pending = 0
+        for a in ids:
+            for b in ids:
+                if a == b:
+                    continue
+                batch.set(coll.document(f"from_{a}_to_{b}"), {
+                    "travel_time_minutes": float(rng.randint(3, 40)),
+                    "distance_meters": rng.randint(500, 20000),
+                    "source": "dummy",
+                })
+                pending += 1
+                if pending == 500:
+                    batch.commit()
+                    batch = client.batch()
+                    pending = 0
+        if pending:
+            batch.commit()
+        _seed_master_and_orders(client, ids, rng)
+    return client
+
+
+def _seed_master_and_orders(
+    client: "firestore.Client", customer_ids: list[str], rng: random.Random,
+) -> None:
+    """利用者・ヘルパー・サービス種別・対象週のオーダーを書き込む"""
+    jst = timezone(timedelta(hours=9))
+    week_start = datetime(WEEK_START.year, WEEK_START.month, WEEK_START.day, tzinfo=jst)
+    batch = client.batch()
+    for cid in customer_ids:
+        batch.set(client.collection("customers").document(cid), {
+            "name": {"family": "利用者", "given": cid},
+            "address": "鹿児島市",
+            "location": {"lat": 31.5 + rng.random() * 0.1, "lng": 130.5 + rng.random() * 0.1},
+        })
+    for i in range(N_HELPERS):
+        batch.set(client.collection("helpers").document(f"H{i:03d}"), {
+            "name": {"family": "ヘルパー", "given": str(i)},
+            "can_physical_care": True,
+        })
+    for code in ("physical_care", "daily_living"):
+        batch.set(client.collection("service_types").document(code), {"code": code})
+    batch.commit()
+
+    batch = client.batch()
+    week_customers = customer_ids[0::2][:N_WEEK_CUSTOMERS]
+    for i, cid in enumerate(week_customers * 5):
+        day = week_start + timedelta(days=i % 5)
+        start = 8 + i % 9
+        batch.set(client.collection("orders").document(f"ORD{i:05d}"), {
+            "customer_id": cid,
+            "date": day,
+            "week_start_date": week_start,
+            "start_time": f"{start:02d}:00",
+            "end_time": f"{start + 1:02d}:00",
+            "service_type": "daily_living",
+            "status": "pending",
+        })
+    batch.commit()
+
+
+def _stream_and_filter(
+    client: "firestore.Client", customer_ids: set[str],
+) -> tuple[TravelMatrix, int]:
+    """従来の読み込み（コレクション全体をストリームしてクライアント側で絞り込む）"""
+    pairs = []
+    reads = 0
+    for doc in client.collection("travel_times").stream():
+        reads += 1
+        from_part, to_id = doc.id.split("_to_", 1)
+        from_id = from_part.removeprefix("from_")
+        if from_id in customer_ids and to_id in customer_ids:
+            pairs.append((from_id, to_id, doc.to_dict()["travel_time_minutes"]))
+    return TravelMatrix.from_pairs(pairs), reads
+
+
+def test_travel_times_targeted_get_all(db) -> None:  # type: ignore[no-untyped-def]
+    customer_ids = {f"C{i:04d}" for i in range(0, N_ALL_CUSTOMERS, 2)[:N_WEEK_CUSTOMERS]}
+    ids = sorted(customer_ids)
+
+    start = time.perf_counter()
+    streamed, stream_reads = _stream_and_filter(db, customer_ids)
+    stream_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    targeted = load_travel_matrix(db, [], customer_ids=customer_ids)
+    targeted_elapsed = time.perf_counter() - start
+    targeted_reads = len(ids) * (len(ids) - 1)
+
+    print(
+        f"\n  stream+filter: {stream_reads} reads, {stream_elapsed:.2f}s"
+        f"\n  targeted get_all: {targeted_reads} reads, {targeted_elapsed:.2f}s"
+    )
+    assert (streamed.take(ids) == targeted.take(ids)).all()
+    assert targeted_reads < stream_reads
+
+
+def test_load_optimization_input_parallel(db) -> None:  # type: ignore[no-untyped-def]
+    """コレクションを順に読む場合と並列読み込み（load_optimization_input）の比較"""
+    start = time.perf_counter()
+    customers = load_customers(db)
+    load_helpers(db)
+    orders = load_orders(db, WEEK_START, customers)
+    load_travel_matrix(db, customers, customer_ids={o.customer_id for o in orders})
+    load_staff_unavailabilities(db, WEEK_START)
+    load_service_types(db)
+    sequential_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inp = load_optimization_input(db, WEEK_START)
+    parallel_elapsed = time.perf_counter() - start
+
+    print(
+        f"\n  sequential: {sequential_elapsed:.2f}s"
+        f"\n  parallel: {parallel_elapsed:.2f}s ({len(inp.orders)} orders)"
+    )
+    assert sorted(o.id for o in inp.orders) == sorted(o.id for o in orders)
+    assert parallel_elapsed < sequential_elapsed
+
+
+@pytest.fixture(scope="module")
+def report_db():  # type: ignore[no-untyped-def]
+    """weekly_services・notes・irregular_patterns を持つ利用者と1か月分のオーダー"""
+    client = firestore.Client(project="benchmark-report-loaders")
+    if next(iter(client.collection("customers").limit(1).stream()), None) is not None:
+        return client
+    rng = random.Random(7)
+    jst = timezone(timedelta(hours=9))
+    days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+    docs: list[tuple[str, str, dict[str, object]]] = []
+    for i in range(N_REPORT_CUSTOMERS):
+        docs.append(("customers", f"C{i:04d}", {
+            "name": {"family": "利用者", "given": f"{i}", "short": f"利{i}"},
+            "address": f"鹿児島県鹿児島市中央町{i}-{i % 30}",
+            "location": {"lat": 31.5 + rng.random() * 0.1, "lng": 130.5 + rng.random() * 0.1},
+            "weekly_services": {
+                day: [
+                    {
+                        "start_time": f"{8 + 3 * k:02d}:00",
+                        "end_time": f"{9 + 3 * k:02d}:00",
+                        "service_type": rng.choice(["physical_care", "daily_living"]),
+                        "staff_count": 1,
+                    }
+                    for k in range(3)
+                ]
+                for day in days
+            },
+            "irregular_patterns": [
+                {"type": "biweekly", "description": "隔週で入浴介助", "active_weeks": [0, 2]},
+                {"type": "monthly", "description": "月初に通院同行", "active_weeks": [0]},
+            ],
+            "ng_staff_ids": [f"H{rng.randrange(N_REPORT_HELPERS):03d}" for _ in range(3)],
+            "preferred_staff_ids": [f"H{rng.randrange(N_REPORT_HELPERS):03d}" for _ in range(3)],
+            "service_manager": "サービス提供責任者",
+            "care_manager_name": "ケアマネージャー",
+            "notes": "申し送り事項。" * 60,
+        }))
+    for i in range(N_REPORT_HELPERS):
+        docs.append(("helpers", f"H{i:03d}", {
+            "name": {"family": "ヘルパー", "given": str(i), "short": f"ヘ{i}"},
+            "qualifications": ["介護福祉士", "実務者研修"],
+            "can_physical_care": True,
+            "weekly_availability": {
+                day: [{"start_time": "08:00", "end_time": "18:00"}] for day in days
+            },
+            "customer_training_status": {
+                f"C{j:04d}": "completed" for j in range(0, N_REPORT_CUSTOMERS, 5)
+            },
+        }))
+    month_start = datetime(2026, 3, 1, tzinfo=jst)
+    for i in range(N_REPORT_CUSTOMERS * 8):
+        start = 8 + i % 9
+        docs.append(("orders", f"RPT{i:05d}", {
+            "customer_id": f"C{i % N_REPORT_CUSTOMERS:04d}",
+            "date": month_start + timedelta(days=i % 31),
+            "week_start_date": month_start,
+            "start_time": f"{start:02d}:00",
+            "end_time": f"{start + 1:02d}:00",
+            "service_type": "daily_living",
+            "status": "completed",
+            "assigned_staff_ids": [f"H{i % N_REPORT_HELPERS:03d}"],
+            "staff_count": 1,
+            "manually_edited": False,
+            "linked_order_id": None,
+            "notes": "特記事項なし",
+        }))
+    for offset in range(0, len(docs), 500):
+        batch = client.batch()
+        for collection, doc_id, data in docs[offset:offset + 500]:
+            batch.set(client.collection(collection).document(doc_id), data)
+        batch.commit()
+    return client
+
+
+def _payload_bytes(query: "firestore.Query") -> int:
+    """クエリ結果のフィールド値の大きさの目安（to_dict() の repr の UTF-8 バイト数）"""
+    return sum(len(repr(doc.to_dict()).encode()) for doc in query.stream())
+
+
+def test_report_loaders_field_projection(report_db) -> None:  # type: ignore[no-untyped-def]
+    """月次レポート用ローダー: ドキュメント全体の読み込みと select による射影の比較"""
+    jst = timezone(timedelta(hours=9))
+    orders_query = (
+        report_db.collection("orders")
+        .where("date", ">=", datetime(2026, 3, 1, tzinfo=jst))
+        .where("date", "<", datetime(2026, 4, 1, tzinfo=jst))
+    )
+    cases = [
+        # (名前, 全フィールドのクエリ, 射影したクエリ, ローダー)
+        ("orders", orders_query, orders_query.select(MONTHLY_ORDER_FIELDS),
+         lambda: load_monthly_orders(report_db, REPORT_MONTH)),
+        ("helpers", report_db.collection("helpers"),
+         report_db.collection("helpers").select(PERSON_NAME_FIELDS),
+         lambda: load_all_helpers(report_db)),
+        ("customers", report_db.collection("customers"),
+         report_db.collection("customers").select(PERSON_NAME_FIELDS),
+         lambda: load_all_customers(report_db)),
+    ]
+
+    for name, full_query, projected_query, loader in cases:
+        # 従来の読み込み（ドキュメント全体を受け取ってデシリアライズする）
+        start = time.perf_counter()
+        full = [doc.to_dict() for doc in full_query.stream()]
+        full_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = loader()
+        projected_elapsed = time.perf_counter() - start
+
+        full_bytes = _payload_bytes(full_query)
+        projected_bytes = _payload_bytes(projected_query)
+        print(
+            f"\n  {name}: {len(rows)} rows"
+            f"\n    full: {full_bytes / 1024:.0f} KiB, {full_elapsed:.2f}s"
+            f"\n    select: {projected_bytes / 1024:.0f} KiB, {projected_elapsed:.2f}s"
+        )
+        assert len(rows) == len(full)
+        assert projected_bytes < full_bytes
@@ -1,27 +1,33 @@
 """Firestoreデータローダーのテスト"""
 
+import logging
 from datetime import date, datetime
 from unittest.mock import MagicMock
 
 import pytest
 
 from optimizer.data.firestore_loader import (
+    MONTHLY_ORDER_FIELDS,
     _build_staff_count_lookup,
     _date_to_day_of_week,
     ts_to_date_str,
     load_all_customers,
     load_all_helpers,
     load_all_service_types,
+    load_current_assignments,
     load_customers,
     load_helpers,
     load_monthly_orders,
     load_optimization_input,
     load_orders,
+    load_previous_week_slot_staff,
     load_service_types,
     load_staff_constraints,
     load_staff_unavailabilities,
+    load_travel_matrix,
     load_travel_times,
 )
+from optimizer.data.master_cache import MasterDataCache
 from optimizer.models import (
     Customer,
     DayOfWeek,
@@ -46,16 +52,37 @@ def _mock_db_with_collections(collection_data: dict[str, list[MagicMock]]) -> Ma
     """コレクション→ドキュメントリストのモックDB"""
     db = MagicMock()
 
+    def document_ref(name: str, doc_id: str) -> MagicMock:
+        ref = MagicMock()
+        ref.id = doc_id
+        ref.collection_name = name
+        return ref
+
     def collection_side_effect(name: str) -> MagicMock:
         coll = MagicMock()
         docs = collection_data.get(name, [])
         coll.stream.return_value = iter(docs)
-        # where チェイン対応
+        # where・select チェイン対応
         coll.where.return_value = coll
-        coll.document.side_effect = lambda doc_id: MagicMock()
+        coll.select.return_value = coll
+        coll.document.side_effect = lambda doc_id: document_ref(name, doc_id)
         return coll
 
+    def get_all_side_effect(refs: list[MagicMock], **kwargs: object) -> list[MagicMock]:
+        """存在しないドキュメントは exists=False で返す（Firestore の get_all と同じ）"""
+        result = []
+        for ref in refs:
+            by_id = {d.id: d for d in collection_data.get(ref.collection_name, [])}
+            doc = by_id.get(ref.id)
+            if doc is None:
+                doc = MagicMock()
+                doc.id = ref.id
+                doc.exists = False
+            result.append(doc)
+        return result
+
     db.collection.side_effect = collection_side_effect
+    db.get_all.side_effect = get_all_side_effect
     return db
 
 
@@ -211,6 +238,19 @@ class TestLoadCustomers:
         c = load_customers(db)[0]
         assert c.irregular_patterns == []
 
+    def test_updated_since_filters_by_updated_at(self) -> None:
+        """差分同期用: updated_at >= updated_since のドキュメントだけを問い合わせる"""
+        doc = _mock_doc("C001", {"name": {"family": "山田", "given": "太郎"}})
+        coll = MagicMock()
+        coll.where.return_value.stream.return_value = iter([doc])
+        db = MagicMock()
+        db.collection.return_value = coll
+        since = datetime(2026, 2, 9, 12, 0)
+        customers = load_customers(db, updated_since=since)
+        assert [c.id for c in customers] == ["C001"]
+        coll.where.assert_called_once_with("updated_at", ">=", since)
+        coll.stream.assert_not_called()
+
 
 # --- Helperローダーテスト ---
 
@@ -395,6 +435,40 @@ class TestLoadOrders:
         assert orders == []
 
 
+# --- ウォームスタート用ローダーテスト ---
+
+
+class TestWarmStartLoaders:
+    def _order_doc(self, doc_id: str, staff_ids: list[str], status: str = "assigned") -> MagicMock:
+        return _mock_doc(doc_id, {
+            "customer_id": "C001",
+            "date": datetime(2026, 2, 2),
+            "start_time": "09:00",
+            "end_time": "10:00",
+            "service_type": "physical_care",
+            "status": status,
+            "assigned_staff_ids": staff_ids,
+        })
+
+    def test_current_assignments_skip_unassigned(self) -> None:
+        db = _mock_db_with_collections({"orders": [
+            self._order_doc("ORD1", ["H001"]),
+            self._order_doc("ORD2", []),
+        ]})
+        result = load_current_assignments(db, date(2026, 2, 2))
+        assert [(a.order_id, a.staff_ids) for a in result] == [("ORD1", ["H001"])]
+
+    def test_previous_week_slot_staff(self) -> None:
+        db = _mock_db_with_collections({"orders": [
+            self._order_doc("ORD1", ["H001", "H002"]),
+            self._order_doc("ORD2", ["H003"], status="cancelled"),
+        ]})
+        result = load_previous_week_slot_staff(db, date(2026, 2, 9))
+        assert result == {
+            ("C001", "monday", "09:00", "10:00", "physical_care"): ["H001", "H002"],
+        }
+
+
 # --- TravelTimeローダーテスト ---
 
 
@@ -422,6 +496,57 @@ class TestLoadTravelTimes:
         db = _mock_db_with_collections({"travel_times": docs})
         assert len(load_travel_times(db)) == 3
 
+    def test_customer_ids_fetched_by_doc_id(self) -> None:
+        """customer_ids 指定時はコレクションをストリームせずペアのドキュメントだけ取得する"""
+        docs = [
+            _mock_doc("from_C001_to_C002", {"travel_time_minutes": 5.0}),
+            _mock_doc("from_C001_to_C003", {"travel_time_minutes": 8.2}),
+        ]
+        db = _mock_db_with_collections({"travel_times": docs})
+        tts = load_travel_times(db, customer_ids={"C001", "C002"})
+        assert [(tt.from_id, tt.to_id) for tt in tts] == [("C001", "C002")]
+        requested = [ref.id for ref in db.get_all.call_args.args[0]]
+        assert sorted(requested) == ["from_C001_to_C002", "from_C002_to_C001"]
+
+
+class TestLoadTravelMatrix:
+    def test_filtered_with_household_override(self) -> None:
+        docs = [
+            _mock_doc("from_C001_to_C002", {"travel_time_minutes": 5.0}),
+            _mock_doc("from_C001_to_C003", {"travel_time_minutes": 8.0}),
+            _mock_doc("from_C001_to_C009", {"travel_time_minutes": 9.0}),
+            _mock_doc("invalid_format", {"travel_time_minutes": 1.0}),
+        ]
+        db = _mock_db_with_collections({"travel_times": docs})
+        customers = [
+            Customer(
+                id=cid, family_name="テスト", given_name=cid, address="鹿児島市",
+                location=GeoLocation(lat=31.5, lng=130.5),
+                same_household_customer_ids=["C003"] if cid == "C001" else [],
+            )
+            for cid in ("C001", "C002", "C003", "C009")
+        ]
+        matrix = load_travel_matrix(db, customers, customer_ids={"C001", "C002", "C003"})
+        assert matrix.customer_ids == ["C001", "C002", "C003"]
+        assert matrix.get("C001", "C002") == pytest.approx(5.0)
+        # 同一世帯は 0 分、フィルタ外の C009 は含まない
+        assert matrix.get("C001", "C003") == 0.0
+        assert matrix.get("C001", "C009") == 0.0
+
+    def test_chunked_parallel_get_all(self) -> None:
+        ids = [f"C{i:03d}" for i in range(6)]
+        docs = [
+            _mock_doc(f"from_{a}_to_{b}", {"travel_time_minutes": float(i + j)})
+            for i, a in enumerate(ids) for j, b in enumerate(ids) if a != b
+        ]
+        db = _mock_db_with_collections({"travel_times": docs})
+        matrix = load_travel_matrix(db, [], customer_ids=set(ids), batch_size=4, max_workers=3)
+        # 30ペア / 4件ずつ = 8回
+        assert db.get_all.call_count == 8
+        for i, a in enumerate(ids):
+            for j, b in enumerate(ids):
+                assert matrix.get(a, b) == (float(i + j) if a != b else 0.0)
+
 
 # --- StaffUnavailabilityローダーテスト ---
 
@@ -529,7 +654,7 @@ class TestBuildStaffCountLookup:
 
 
 class TestLoadOptimizationInput:
-    def test_full_load(self) -> None:
+    def test_full_load(self, caplog: pytest.LogCaptureFixture) -> None:
         customer_doc = _mock_doc(
             "C001",
             {
@@ -604,13 +729,48 @@ class TestLoadOptimizationInput:
             }
         )
 
-        inp = load_optimization_input(db, date(2026, 2, 9))
+        with caplog.at_level(logging.INFO, logger="optimizer.data.firestore_loader"):
+            inp = load_optimization_input(db, date(2026, 2, 9))
         assert len(inp.customers) == 1
         assert len(inp.helpers) == 1
         assert len(inp.orders) == 2
-        assert len(inp.travel_times) == 1
+        # 移動時間は密行列で返す（TravelTime のリストは作らない）
+        assert inp.travel_times == []
+        assert inp.travel_matrix is not None
+        assert inp.travel_matrix.get("C001", "C002") == pytest.approx(5.0)
         assert len(inp.staff_unavailabilities) == 0
         assert len(inp.staff_constraints) == 0
+        # コレクションごとの所要時間をログに出す
+        for name in (
+            "customers", "helpers", "orders", "travel_times", "staff_unavailability",
+            "service_types",
+        ):
+            assert f"Firestore読み込み {name}:" in caplog.text
+
+    def test_master_cache(self) -> None:
+        """master_cache 指定時は customers / helpers / service_types を2回目以降読まない"""
+        customer_doc = _mock_doc("C001", {"name": {"family": "山田", "given": "太郎"}})
+        order_doc = _mock_doc(
+            "ORD0001",
+            {
+                "customer_id": "C001",
+                "date": datetime(2026, 2, 9),
+                "start_time": "09:00",
+                "end_time": "10:00",
+                "service_type": "physical_care",
+            },
+        )
+        db = _mock_db_with_collections({"customers": [customer_doc], "orders": [order_doc]})
+        cache = MasterDataCache()
+        load_optimization_input(db, date(2026, 2, 9), master_cache=cache)
+        inp = load_optimization_input(db, date(2026, 2, 9), master_cache=cache)
+        assert [c.id for c in inp.customers] == ["C001"]
+        assert len(inp.orders) == 1
+        collections = [c.args[0] for c in db.collection.call_args_list]
+        assert collections.count("customers") == 1
+        assert collections.count("helpers") == 1
+        assert collections.count("service_types") == 1
+        assert collections.count("orders") == 2
 
 
 # --- 月次ローダーテスト ---
@@ -720,6 +880,18 @@ class TestLoadMonthlyOrders:
         assert orders[0]["assigned_staff_ids"] == []
         assert orders[0]["staff_count"] == 1
 
+    def test_projects_report_fields(self) -> None:
+        """集計に使うフィールドだけを select で読む"""
+        db = MagicMock()
+        query = db.collection.return_value
+        query.where.return_value = query
+        query.select.return_value = query
+        query.stream.return_value = iter([])
+        load_monthly_orders(db, "2026-02")
+        query.select.assert_called_once_with(MONTHLY_ORDER_FIELDS)
+        assert "date" in MONTHLY_ORDER_FIELDS
+        assert "notes" not in MONTHLY_ORDER_FIELDS
+
 
 class TestLoadAllHelpers:
     def test_basic_loading(self) -> None:
@@ -803,6 +975,20 @@ class TestLoadAllCustomers:
         assert customers[0]["id"] == "C001"
         assert customers[1]["id"] == "C002"
 
+    def test_projects_name_only(self) -> None:
+        """weekly_services・notes 等を読まず、name だけを射影する"""
+        db = MagicMock()
+        coll = db.collection.return_value
+        coll.select.return_value.stream.return_value = iter(
+            [_mock_doc("C001", {"name": {"family": "山田", "given": "太郎"}})]
+        )
+        assert load_all_customers(db) == [
+            {"id": "C001", "family_name": "山田", "given_name": "太郎"}
+        ]
+        db.collection.assert_called_once_with("customers")
+        coll.select.assert_called_once_with(["name"])
+        coll.stream.assert_not_called()
+
 
 # --- ServiceTypesローダーテスト ---
 
@@ -0,0 +1,114 @@
+"""Firestoreクライアントプールのテスト — 遅延生成・ラウンドロビン・統計・クローズ"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from optimizer.data.firestore_pool import FirestoreClientPool
+
+
+def _factory() -> MagicMock:
+    """呼ばれるたびに新しいモッククライアントを返すファクトリ"""
+    factory = MagicMock(side_effect=lambda: MagicMock(name=f"client{factory.call_count}"))
+    return factory
+
+
+class TestFirestoreClientPool:
+    def test_lazy_round_robin(self) -> None:
+        factory = _factory()
+        pool = FirestoreClientPool(size=2, factory=factory)
+        assert pool.stats().clients == 0
+        first, second, third = pool.acquire(), pool.acquire(), pool.acquire()
+        assert first is not second
+        assert third is first
+        assert factory.call_count == 2
+
+    def test_warm_creates_all(self) -> None:
+        factory = _factory()
+        pool = FirestoreClientPool(size=3, factory=factory)
+        pool.warm()
+        assert pool.stats().clients == 3
+        for _ in range(6):
+            pool.acquire()
+        assert factory.call_count == 3
+
+    def test_concurrent_acquire_shares_one_client_per_slot(self) -> None:
+        created: list[MagicMock] = []
+
+        def factory() -> MagicMock:
+            client = MagicMock(name=f"client{len(created)}")
+            created.append(client)
+            return client
+
+        pool = FirestoreClientPool(size=4, factory=factory)
+        clients: list[object] = []
+
+        def worker() -> None:
+            for _ in range(50):
+                clients.append(pool.acquire())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(c) for c in clients}) == 4
+        # 同じ slot を同時に生成した場合、登録されなかった方は閉じる
+        for client in created:
+            if all(client is not c for c in clients):
+                client.close.assert_called_once()
+
+    def test_create_outside_lock(self) -> None:
+        """生成中のスレッドがあっても生成済みのクライアントはすぐ返す"""
+        first = MagicMock(name="client0")
+        creating = threading.Event()
+        release = threading.Event()
+        calls: list[int] = []
+
+        def factory() -> MagicMock:
+            calls.append(len(calls))
+            if len(calls) == 1:
+                return first
+            creating.set()
+            release.wait(5)
+            return MagicMock(name="client1")
+
+        pool = FirestoreClientPool(size=2, factory=factory)
+        assert pool.acquire() is first
+        worker = threading.Thread(target=pool.acquire)
+        worker.start()
+        assert creating.wait(5)
+        started = time.perf_counter()
+        assert pool.acquire() is first
+        assert time.perf_counter() - started < 1
+        release.set()
+        worker.join()
+        assert pool.stats().clients == 2
+
+    def test_stats(self) -> None:
+        pool = FirestoreClientPool(size=1, factory=_factory())
+        for _ in range(10):
+            pool.acquire()
+        stats = pool.stats()
+        assert (stats.size, stats.clients, stats.acquisitions) == (1, 1, 10)
+        assert 0.0 <= stats.avg_acquire_ms <= stats.max_acquire_ms
+        assert stats.p95_acquire_ms <= stats.max_acquire_ms
+
+    def test_close_and_recreate(self) -> None:
+        factory = _factory()
+        pool = FirestoreClientPool(size=2, factory=factory)
+        pool.warm()
+        created = [pool.acquire(), pool.acquire()]
+        pool.close()
+        for client in created:
+            client.close.assert_called_once()
+        assert pool.stats().clients == 0
+        assert pool.acquire() not in created
+
+    def test_factory_error_propagates(self) -> None:
+        pool = FirestoreClientPool(size=1, factory=MagicMock(side_effect=RuntimeError("no creds")))
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+        assert pool.stats().clients == 0
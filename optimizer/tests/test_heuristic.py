@@ -0,0 +1,102 @@
+"""貪欲構築ヒューリスティックのテスト — 実行可能性・目的関数・フォールバック"""
+
+import time
+
+import pytest
+
+from optimizer.engine.heuristic import construct_greedy, solve_greedy
+from optimizer.engine.objective import evaluate_objective
+from optimizer.engine.solver import SoftWeights, SolverOptions, _solve_days, _solve_single
+from optimizer.engine.warm_start import repair_initial_assignment
+from optimizer.models import (
+    HoursRange,
+    OptimizationInput,
+    OptimizationResult,
+    Order,
+    StaffConstraint,
+    StaffConstraintType,
+)
+from tests.conftest import random_input
+
+
+def _random_input(seed: int, n_helpers: int = 6, n_orders: int = 30) -> OptimizationInput:
+    """重複・移動時間・徒歩・世帯リンク・推奨スタッフ・2人対応を含む入力"""
+    return random_input(
+        seed, n_helpers, n_orders,
+        service_types=("daily_living", "physical_care"), physical_care_every=2,
+        staff_constraints=[
+            StaffConstraint(
+                customer_id="c0", staff_id="h1", constraint_type=StaffConstraintType.PREFERRED,
+            ),
+            StaffConstraint(
+                customer_id="c2", staff_id="h3", constraint_type=StaffConstraintType.NG,
+            ),
+        ],
+    )
+
+
+class TestConstructGreedy:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_feasible(self, seed: int) -> None:
+        """修復で1件も除外されない = 全ハード制約を満たす"""
+        inp = _random_input(seed)
+        assignments = construct_greedy(inp)
+        assert [a.order_id for a in assignments] == [o.id for o in inp.orders]
+        _, report = repair_initial_assignment(inp, assignments)
+        assert report.infeasible == report.excess == report.household == report.conflict == 0
+        assert report.kept == sum(len(a.staff_ids) for a in assignments)
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_objective_not_below_optimum(self, seed: int) -> None:
+        inp = _random_input(seed, n_orders=20)
+        result = solve_greedy(inp)
+        optimum = _solve_single(inp, 60, options=SolverOptions(heuristic_start=False))
+        assert result.status == "Feasible"
+        assert result.objective_value == pytest.approx(
+            evaluate_objective(inp, result.assignments).total, abs=1e-6,
+        )
+        assert result.objective_value >= optimum.objective_value - 1e-6
+        # 未割当は最適解より大きく悪化しない
+        assert result.unassigned_count <= optimum.unassigned_count + len(inp.orders) // 5
+
+    def test_skips_assignment_costlier_than_coverage(self) -> None:
+        """目的関数の増分がカバレッジペナルティ以上なら未割当のままにする"""
+        inp = _random_input(0, n_helpers=1, n_orders=1)
+        helper = inp.helpers[0].model_copy(update={
+            "can_physical_care": True, "preferred_hours": HoursRange(min=0, max=0),
+        })
+        inp = inp.model_copy(update={"helpers": [helper]})
+        # 60分の超過: 2 × 60 × 重み
+        assert construct_greedy(inp, SoftWeights(workload_balance=1))[0].staff_ids == ["h0"]
+        assert construct_greedy(inp, SoftWeights(workload_balance=10))[0].staff_ids == []
+
+    def test_empty_orders(self) -> None:
+        inp = _random_input(0).model_copy(update={"orders": []})
+        assert construct_greedy(inp) == []
+
+
+class TestGreedyFallback:
+    def test_no_incumbent_returns_greedy(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """MIP が incumbent なしで終わった場合は貪欲解を返す"""
+        inp = _random_input(0)
+        monkeypatch.setattr(
+            "optimizer.engine.solver._solve_backend",
+            lambda *args: OptimizationResult(
+                assignments=[], objective_value=0.0, solve_time_seconds=1.0,
+                status="Not Solved", unassigned_count=0, partial_count=0,
+            ),
+        )
+        result = _solve_single(inp, 1)
+        assert result.status == "Feasible"
+        assert [a.order_id for a in result.assignments] == [o.id for o in inp.orders]
+        assert result.objective_value == pytest.approx(solve_greedy(inp).objective_value)
+
+    def test_exhausted_budget_days_use_greedy(self) -> None:
+        """時間切れの日も全オーダー未割当ではなく貪欲解で埋める"""
+        inp = _random_input(1)
+        by_date: dict[str, list[Order]] = {}
+        for o in inp.orders:
+            by_date.setdefault(o.date, []).append(o)
+        result = _solve_days(inp, sorted(by_date.items()), 10, None, 1, None, time.time() - 60)
+        assert len(result.assignments) == len(inp.orders)
+        assert result.unassigned_count < len(inp.orders)
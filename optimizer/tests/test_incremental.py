@@ -0,0 +1,150 @@
+"""差分再最適化のテスト — 解放範囲・固定の維持・実行可能性"""
+
+import pytest
+
+from optimizer.engine.incremental import IncrementalOptions, reoptimize_incremental
+from optimizer.engine.objective import evaluate_objective
+from optimizer.engine.solver import solve
+from optimizer.engine.warm_start import repair_initial_assignment
+from optimizer.models import (
+    Assignment,
+    OptimizationInput,
+    Order,
+    StaffUnavailability,
+    UnavailableSlot,
+)
+from tests.conftest import random_input
+
+
+def _random_input(seed: int, n_helpers: int = 6, n_orders: int = 36) -> OptimizationInput:
+    return random_input(
+        seed, n_helpers, n_orders, n_days=3, durations=(30, 60), travel_minutes=(5, 10, 20),
+        preferred_hours=(2, 6), available_hours=(0, 40), walk_helpers=False,
+        spread_locations=True, link_first_pair=False,
+    )
+
+
+def _assert_feasible(inp: OptimizationInput, assignments: list[Assignment]) -> None:
+    _, report = repair_initial_assignment(inp, assignments)
+    assert report.infeasible == report.excess == report.household == report.conflict == 0
+
+
+def _assert_only_freed_changed(result, current: list[Assignment]) -> None:
+    before = {a.order_id: sorted(a.staff_ids) for a in current}
+    freed = set(result.freed_order_ids)
+    for a in result.assignments:
+        if a.order_id not in freed:
+            assert sorted(a.staff_ids) == before.get(a.order_id, [])
+    assert {a.order_id for a in result.changed} <= freed
+
+
+@pytest.fixture(scope="module")
+def solved() -> tuple[OptimizationInput, list[Assignment]]:
+    inp = _random_input(0)
+    return inp, solve(inp, time_limit_seconds=20).assignments
+
+
+class TestReoptimizeIncremental:
+    def test_retimed_order(self, solved) -> None:
+        """時間変更したオーダーと担当ヘルパーの同日分だけ解き直す"""
+        inp, current = solved
+        target = next(o for o in inp.orders if o.staff_count == 1)
+        retimed = target.model_copy(update={"start_time": "18:00", "end_time": "19:00"})
+        inp = inp.model_copy(update={
+            "orders": [retimed if o.id == target.id else o for o in inp.orders],
+        })
+        result = reoptimize_incremental(inp, current, [target.id], time_limit_seconds=5)
+
+        assert result.status == "Feasible"
+        assert target.id in result.freed_order_ids
+        assert len(result.freed_order_ids) < len(inp.orders)
+        _assert_feasible(inp, result.assignments)
+        _assert_only_freed_changed(result, current)
+        assert result.objective == pytest.approx(
+            evaluate_objective(inp, result.assignments).total, abs=1e-6,
+        )
+        assert result.objective <= result.initial_objective + 1e-6
+        assert next(a for a in result.assignments if a.order_id == target.id).staff_ids
+
+    def test_unavailable_helper_removed(self, solved) -> None:
+        """休み希望で外れたヘルパーの代わりを割り当て、そのヘルパーは使わない"""
+        inp, current = solved
+        target = next(a for a in current if a.staff_ids)
+        order = next(o for o in inp.orders if o.id == target.order_id)
+        removed = target.staff_ids[0]
+        inp = inp.model_copy(update={"staff_unavailabilities": [StaffUnavailability(
+            staff_id=removed, week_start_date="2026-02-16",
+            unavailable_slots=[UnavailableSlot(date=order.date, all_day=True)],
+        )]})
+        current = [
+            a.model_copy(update={"staff_ids": [s for s in a.staff_ids if s != removed]})
+            if a.order_id == order.id else a
+            for a in current
+        ]
+        result = reoptimize_incremental(
+            inp, current, [order.id], helper_ids=[removed], time_limit_seconds=5,
+        )
+        _assert_feasible(inp, result.assignments)
+        _assert_only_freed_changed(result, current)
+        new = next(a for a in result.assignments if a.order_id == order.id)
+        assert removed not in new.staff_ids
+        assert len(new.staff_ids) == order.staff_count
+
+    def test_cancelled_order_skipped(self, solved) -> None:
+        inp, current = solved
+        cancelled = inp.orders[0]
+        inp = inp.model_copy(update={"orders": inp.orders[1:]})
+        helpers = next(a.staff_ids for a in current if a.order_id == cancelled.id)
+        result = reoptimize_incremental(
+            inp, current, [cancelled.id], helper_ids=helpers, time_limit_seconds=5,
+        )
+        assert result.skipped_order_ids == [cancelled.id]
+        _assert_feasible(inp, result.assignments)
+        _assert_only_freed_changed(result, current)
+        assert all(a.order_id != cancelled.id for a in result.changed)
+
+    @pytest.mark.parametrize("n_changed,limit,expected", [(2, 6, 6), (10, 4, 10)])
+    def test_max_free_orders(self, solved, n_changed: int, limit: int, expected: int) -> None:
+        """波及近傍は上限まで、変更オーダーは上限を超えても解放する"""
+        inp, current = solved
+        changed = [o.id for o in inp.orders[:n_changed]]
+        result = reoptimize_incremental(
+            inp, current, changed, time_limit_seconds=5,
+            incremental_options=IncrementalOptions(
+                ripple=("helper_day", "customer", "unfilled"), max_free_orders=limit,
+            ),
+        )
+        # 世帯リンクがないので上限ちょうど
+        assert len(result.freed_order_ids) == expected
+        assert set(changed) <= set(result.freed_order_ids)
+        _assert_feasible(inp, result.assignments)
+        _assert_only_freed_changed(result, current)
+
+    def test_violating_current_assignment_freed(self, solved) -> None:
+        """現在の割当がハード制約に違反していれば、そのオーダーも解き直す"""
+        inp, current = solved
+        by_date: dict[str, list[Order]] = {}
+        for o in inp.orders:
+            by_date.setdefault(o.date, []).append(o)
+        o1, o2 = next(
+            (a, b) for orders in by_date.values() for a in orders for b in orders
+            if a.id < b.id and a.start_time == b.start_time
+        )
+        # o1 の担当を o2 にも重ねて割り当てる（重複違反）
+        o1_staff = next(a.staff_ids for a in current if a.order_id == o1.id)
+        current = [
+            a.model_copy(update={"staff_ids": o1_staff[: o2.staff_count]})
+            if a.order_id == o2.id else a
+            for a in current
+        ]
+        result = reoptimize_incremental(inp, current, [inp.orders[-1].id], time_limit_seconds=5)
+        assert {o1.id, o2.id} & set(result.freed_order_ids)
+        _assert_feasible(inp, result.assignments)
+
+    def test_unknown_ripple_rejected(self, solved) -> None:
+        inp, current = solved
+        with pytest.raises(ValueError):
+            reoptimize_incremental(
+                inp, current, [inp.orders[0].id],
+                incremental_options=IncrementalOptions(ripple=("bogus",)),
+            )
@@ -4,7 +4,8 @@ from datetime import date
 from pathlib import Path
 
 from optimizer.data.csv_loader import load_optimization_input
-from optimizer.engine.solver import _time_to_minutes, solve
+from optimizer.engine.order_table import time_to_minutes
+from optimizer.engine.solver import solve
 from optimizer.models import DayOfWeek, OptimizationInput, StaffConstraintType
 
 
@@ -151,8 +152,8 @@ class TestIntegration:
                 for o2 in orders[i + 1 :]:
                     if o1.date != o2.date:
                         continue
-                    s1, e1 = _time_to_minutes(o1.start_time), _time_to_minutes(o1.end_time)
-                    s2, e2 = _time_to_minutes(o2.start_time), _time_to_minutes(o2.end_time)
+                    s1, e1 = time_to_minutes(o1.start_time), time_to_minutes(o1.end_time)
+                    s2, e2 = time_to_minutes(o2.start_time), time_to_minutes(o2.end_time)
                     assert not (s1 < e2 and s2 < e1), (
                         f"Overlap: {hid} assigned {o1.id}({o1.start_time}-{o1.end_time}) "
                         f"and {o2.id}({o2.start_time}-{o2.end_time}) on {o1.date}"
@@ -0,0 +1,269 @@
+"""非同期最適化ジョブのテスト — ジョブストア・ランナー・進捗の保存"""
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from optimizer.api.jobs import (
+    FirestoreJobStore,
+    InMemoryJobStore,
+    JobQueueFullError,
+    JobRunner,
+    JobStore,
+    OptimizationJob,
+)
+from optimizer.api.schemas import OptimizeRequest, OptimizeResponse
+from optimizer.engine.solver import SolveProgress
+from optimizer.models import Assignment
+
+REQ = OptimizeRequest(week_start_date="2026-02-09")
+
+
+def _response() -> OptimizeResponse:
+    return OptimizeResponse(
+        assignments=[], objective_value=12.5, solve_time_seconds=1.0, status="Optimal",
+        orders_updated=0, total_orders=0, assigned_count=0,
+    )
+
+
+def _progress(phase: str, completed: int, total: int, objective: float) -> SolveProgress:
+    return SolveProgress(
+        phase=phase, completed=completed, total=total, current=None,
+        objective=objective, elapsed_seconds=0.1,
+    )
+
+
+def _wait(runner: JobRunner, job_id: str, timeout: float = 10.0) -> OptimizationJob:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = runner.get(job_id)
+        assert job is not None
+        if job.status in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class RecordingStore(InMemoryJobStore):
+    """保存されたジョブのスナップショットを記録する"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.saved: list[OptimizationJob] = []
+
+    def save(self, job: OptimizationJob) -> None:
+        super().save(job)
+        self.saved.append(job.model_copy(deep=True))
+
+
+class TestJobRunner:
+    def test_success_with_progress(self) -> None:
+        def run(req, auth, progress):
+            progress(_progress("solve", 1, 2, 100.0))
+            progress(_progress("solve", 2, 2, 180.0))
+            return _response()
+
+        store = RecordingStore()
+        runner = JobRunner(store, run)
+        job = runner.submit(REQ, {"email": "a@example.com"})
+        assert job.status == "queued"
+        assert job.executed_by == "a@example.com"
+
+        done = _wait(runner, job.job_id)
+        assert done.status == "succeeded"
+        assert done.result is not None and done.result.objective_value == 12.5
+        assert done.progress is not None and done.progress.completed == 2
+        assert done.started_at is not None and done.finished_at is not None
+        statuses = [j.status for j in store.saved]
+        assert statuses[0] == "queued" and statuses[-1] == "succeeded"
+        # 部分問題の進捗が途中で保存されている
+        assert any(j.status == "running" and j.progress is not None for j in store.saved)
+        runner.shutdown(wait=True)
+
+    def test_progress_throttled(self) -> None:
+        """同じフェーズの途中経過は間隔を空けて保存する"""
+        def run(req, auth, progress):
+            for i in range(1, 50):
+                progress(_progress("lns", i, 0, 100.0 - i))
+            return _response()
+
+        store = RecordingStore()
+        runner = JobRunner(store, run)
+        job = runner.submit(REQ, None)
+        _wait(runner, job.job_id)
+        lns_saves = [j for j in store.saved if j.status == "running" and j.progress is not None]
+        assert 1 <= len(lns_saves) < 5
+        runner.shutdown(wait=True)
+
+    def test_http_error_recorded(self) -> None:
+        def run(req, auth, progress):
+            raise HTTPException(status_code=409, detail="オーダーがありません")
+
+        runner = JobRunner(InMemoryJobStore(), run)
+        done = _wait(runner, runner.submit(REQ, None).job_id)
+        assert done.status == "failed"
+        assert done.error == "オーダーがありません"
+        assert done.error_status_code == 409
+        runner.shutdown(wait=True)
+
+    def test_unexpected_error_recorded(self) -> None:
+        def run(req, auth, progress):
+            raise RuntimeError("boom")
+
+        runner = JobRunner(InMemoryJobStore(), run)
+        done = _wait(runner, runner.submit(REQ, None).job_id)
+        assert done.status == "failed"
+        assert done.error == "boom"
+        assert done.error_status_code == 500
+        runner.shutdown(wait=True)
+
+    def test_queue_bound(self) -> None:
+        release = threading.Event()
+
+        def run(req, auth, progress):
+            release.wait(10)
+            return _response()
+
+        runner = JobRunner(InMemoryJobStore(), run, max_concurrent=1, max_queued=2)
+        first = runner.submit(REQ, None)
+        second = runner.submit(REQ, None)
+        with pytest.raises(JobQueueFullError):
+            runner.submit(REQ, None)
+        release.set()
+        assert _wait(runner, first.job_id).status == "succeeded"
+        assert _wait(runner, second.job_id).status == "succeeded"
+        # 完了すると再び投入できる
+        third = runner.submit(REQ, None)
+        assert _wait(runner, third.job_id).status == "succeeded"
+        runner.shutdown(wait=True)
+
+
+def _parse(stream) -> list[tuple[int, str, dict]]:
+    events = []
+    for chunk in stream:
+        if chunk.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestEventStream:
+    def _day(self, day: int, status: str) -> SolveProgress:
+        return SolveProgress(
+            phase="solve", completed=day, total=2, current=f"2026-02-{8 + day:02d}",
+            objective=10.0 * day, elapsed_seconds=1.0 * day, status=status,
+            unassigned_count=day - 1, partial_count=0, remaining_seconds=60.0 - day,
+            assignments=[Assignment(order_id=f"o{day}", staff_ids=["h1"])],
+        )
+
+    def test_live_events(self) -> None:
+        def run(req, auth, progress):
+            progress(self._day(1, "Optimal"))
+            progress(self._day(2, "Feasible"))
+            return _response()
+
+        runner = JobRunner(InMemoryJobStore(), run)
+        job = runner.submit(REQ, None)
+        events = _parse(runner.stream_events(job.job_id))
+        assert [e for _, e, _ in events] == ["status", "status", "progress", "progress", "result"]
+        assert [i for i, _, _ in events] == [1, 2, 3, 4, 5]
+        assert [d["status"] for _, e, d in events if e == "status"] == ["queued", "running"]
+        day2 = events[3][2]
+        assert day2["status"] == "Feasible"
+        assert day2["unassigned_count"] == 1
+        assert day2["remaining_seconds"] == 58.0
+        assert day2["assignments"] == [{"order_id": "o2", "staff_ids": ["h1"]}]
+        assert events[-1][2]["objective_value"] == 12.5
+
+        # 再接続: Last-Event-ID 以降のみ
+        resumed = _parse(runner.stream_events(job.job_id, last_event_id=3))
+        assert [i for i, _, _ in resumed] == [4, 5]
+        runner.shutdown(wait=True)
+
+    def test_error_event(self) -> None:
+        def run(req, auth, progress):
+            raise HTTPException(status_code=409, detail="割当が見つかりません")
+
+        runner = JobRunner(InMemoryJobStore(), run)
+        job = runner.submit(REQ, None)
+        events = _parse(runner.stream_events(job.job_id))
+        assert events[-1][1:] == ("error", {"detail": "割当が見つかりません", "status_code": 409})
+        runner.shutdown(wait=True)
+
+    def test_job_from_other_process_relayed_from_store(self) -> None:
+        """イベントを持たないジョブはストアの進捗と結果を送る"""
+        def run(req, auth, progress):
+            progress(self._day(2, "Optimal"))
+            return _response()
+
+        store = InMemoryJobStore()
+        runner = JobRunner(store, run)
+        job = runner.submit(REQ, None)
+        _wait(runner, job.job_id)
+        other = JobRunner(store, run)
+        events = _parse(other.stream_events(job.job_id))
+        assert [e for _, e, _ in events] == ["progress", "result"]
+        assert events[0][2]["completed"] == 2
+        assert events[0][2]["assignments"] is None
+        assert other.stream_events("missing") is None
+        runner.shutdown(wait=True)
+        other.shutdown(wait=True)
+
+
+class TestJobStores:
+    def _job(self) -> OptimizationJob:
+        return OptimizationJob(
+            job_id="j1", status="succeeded", week_start_date="2026-02-09",
+            created_at="2026-02-08T00:00:00+00:00", request=REQ, result=_response(),
+        )
+
+    def test_incomplete_store_rejected(self) -> None:
+        """メソッドを実装していないストアは生成時点でエラー"""
+
+        class SaveOnlyStore(JobStore):
+            def save(self, job: OptimizationJob) -> None:
+                pass
+
+        with pytest.raises(TypeError):
+            SaveOnlyStore()  # type: ignore[abstract]
+
+    def test_in_memory_evicts_oldest(self) -> None:
+        store = InMemoryJobStore(max_jobs=2)
+        for job_id in ("a", "b", "c"):
+            store.save(self._job().model_copy(update={"job_id": job_id}))
+        assert store.get("a") is None
+        assert store.get("c") is not None
+
+    def test_in_memory_returns_copy(self) -> None:
+        store = InMemoryJobStore()
+        job = self._job()
+        store.save(job)
+        job.status = "failed"
+        assert store.get("j1").status == "succeeded"
+
+    def test_firestore_round_trip(self) -> None:
+        db = MagicMock()
+        doc_ref = db.collection.return_value.document.return_value
+        store = FirestoreJobStore(db)
+        store.save(self._job())
+        db.collection.assert_called_with("optimization_jobs")
+        saved = doc_ref.set.call_args[0][0]
+        assert saved["job_id"] == "j1"
+        assert saved["request"]["week_start_date"] == "2026-02-09"
+
+        doc_ref.get.return_value = MagicMock(exists=True, to_dict=lambda: saved)
+        loaded = store.get("j1")
+        assert loaded is not None
+        assert loaded.result == self._job().result
+        assert loaded.to_response().model_dump().keys() == {
+            "job_id", "status", "week_start_date", "created_at", "started_at",
+            "finished_at", "progress", "result", "error", "error_status_code",
+        }
+
+        doc_ref.get.return_value = MagicMock(exists=False)
+        assert store.get("missing") is None
@@ -0,0 +1,117 @@
+"""大近傍探索（LNS）のテスト — 実行可能性の維持・単調改善・進捗コールバック"""
+
+import pytest
+
+from optimizer.engine.heuristic import construct_greedy
+from optimizer.engine.lns import (
+    NEIGHBORHOODS,
+    LnsOptions,
+    LnsProgress,
+    _LnsState,
+    improve_lns,
+)
+from optimizer.engine.objective import evaluate_objective
+from optimizer.engine.solver import SoftWeights, solve
+from optimizer.engine.warm_start import repair_initial_assignment
+from optimizer.models import (
+    OptimizationInput,
+    StaffConstraint,
+    StaffConstraintType,
+)
+from tests.conftest import random_input
+
+
+def _random_input(seed: int, n_helpers: int = 6, n_orders: int = 36) -> OptimizationInput:
+    """週次の稼働バランス・継続性が効く3日分の入力（利用者は地理的に散らばる）"""
+    return random_input(
+        seed, n_helpers, n_orders, n_days=3,
+        preferred_hours=(3, 6), available_hours=(0, 40), spread_locations=True,
+        staff_constraints=[
+            StaffConstraint(
+                customer_id="c0", staff_id="h1", constraint_type=StaffConstraintType.PREFERRED,
+            ),
+        ],
+    )
+
+
+def _assert_feasible(inp: OptimizationInput, assignments: list) -> None:
+    _, report = repair_initial_assignment(inp, assignments)
+    assert report.infeasible == report.excess == report.household == report.conflict == 0
+
+
+class TestWeekEvaluator:
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_evaluate_objective(self, seed: int) -> None:
+        inp = _random_input(seed)
+        assignments = construct_greedy(inp, SoftWeights(workload_balance=0))
+        state = _LnsState(inp, assignments, SoftWeights())
+        assert state.evaluator.total(state.staff) == pytest.approx(
+            evaluate_objective(inp, assignments).total, abs=1e-6,
+        )
+
+
+class TestImproveLns:
+    @pytest.mark.parametrize("seed", range(2))
+    def test_improves_and_stays_feasible(self, seed: int) -> None:
+        inp = _random_input(seed)
+        initial = construct_greedy(inp, SoftWeights(workload_balance=0))
+        events: list[LnsProgress] = []
+        result = improve_lns(inp, initial, time_limit_seconds=3, progress=events.append)
+
+        _assert_feasible(inp, result.assignments)
+        assert result.objective <= result.initial_objective
+        assert result.objective == pytest.approx(
+            evaluate_objective(inp, result.assignments).total, abs=1e-6,
+        )
+        assert result.initial_objective == pytest.approx(
+            evaluate_objective(inp, initial).total, abs=1e-6,
+        )
+        # 進捗は毎反復、目的関数の推移は単調減少
+        assert len(events) == result.iterations > 0
+        assert sum(e.accepted for e in events) == result.accepted
+        values = [v for _, v in result.trace]
+        assert values == sorted(values, reverse=True)
+        assert values[-1] == pytest.approx(result.objective)
+
+    @pytest.mark.parametrize("kind", NEIGHBORHOODS)
+    def test_each_neighborhood(self, kind: str) -> None:
+        inp = _random_input(0)
+        initial = construct_greedy(inp, SoftWeights(workload_balance=0))
+        result = improve_lns(
+            inp, initial, time_limit_seconds=2, lns_options=LnsOptions(neighborhoods=(kind,)),
+        )
+        _assert_feasible(inp, result.assignments)
+        assert result.by_neighborhood[kind][0] == result.iterations > 0
+
+    def test_unknown_neighborhood_rejected(self) -> None:
+        inp = _random_input(0)
+        with pytest.raises(ValueError):
+            improve_lns(
+                inp, construct_greedy(inp), time_limit_seconds=2,
+                lns_options=LnsOptions(neighborhoods=("bogus",)),
+            )
+
+
+class TestSolveWithLns:
+    def test_lns_after_day_decomposition(self) -> None:
+        inp = _random_input(1)
+        base = solve(inp, time_limit_seconds=20)
+        events = []
+        result = solve(inp, time_limit_seconds=5, lns=True, progress=events.append)
+        assert result.lns_stats is not None
+        # 進捗: 日ごとの完了 → LNS の反復（目的関数値は週全体）
+        assert [e.phase for e in events[:3]] == ["solve"] * 3
+        lns_events = [e for e in events if e.phase == "lns"]
+        assert len(lns_events) == result.lns_stats["iterations"]
+        assert lns_events[-1].objective == pytest.approx(
+            result.weekly_objective_value, abs=1e-4,
+        )
+        assert result.weekly_objective_value == pytest.approx(
+            evaluate_objective(inp, result.assignments).total, abs=1e-4,
+        )
+        assert result.lns_stats["iterations"] > 0
+        _assert_feasible(inp, result.assignments)
+        assert [a.order_id for a in result.assignments] == [a.order_id for a in base.assignments]
+        assert evaluate_objective(inp, result.assignments).total <= (
+            evaluate_objective(inp, base.assignments).total + 1e-6
+        )
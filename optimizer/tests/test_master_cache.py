@@ -0,0 +1,130 @@
+"""マスタデータキャッシュのテスト — TTL・ローダー別エントリ・変更検知による無効化"""
+
+import time
+from unittest.mock import MagicMock
+
+from optimizer.data.master_cache import MasterDataCache
+
+
+def _loader(values: list[object]) -> MagicMock:
+    """呼ばれるたびに values の次の要素を返すローダー"""
+    return MagicMock(side_effect=values)
+
+
+def _db_capturing_snapshots() -> tuple[MagicMock, dict[str, object]]:
+    """on_snapshot に渡されたコールバックをコレクション名ごとに保持するモックDB"""
+    db = MagicMock()
+    callbacks: dict[str, object] = {}
+
+    def collection(name: str) -> MagicMock:
+        coll = MagicMock()
+
+        def on_snapshot(callback: object) -> MagicMock:
+            callbacks[name] = callback
+            return MagicMock()
+
+        coll.on_snapshot.side_effect = on_snapshot
+        return coll
+
+    db.collection.side_effect = collection
+    return db, callbacks
+
+
+class TestMasterDataCache:
+    def test_hit_until_ttl(self) -> None:
+        cache = MasterDataCache(ttl_seconds=60)
+        db = MagicMock()
+        loader = _loader([["a"], ["b"]])
+        assert cache.get(db, "customers", loader) == ["a"]
+        assert cache.get(db, "customers", loader) == ["a"]
+        assert loader.call_count == 1
+
+        key = next(iter(cache._entries))
+        cache._entries[key] = (time.monotonic() - 120, ["a"])
+        assert cache.get(db, "customers", loader) == ["b"]
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 2, 1)
+
+    def test_returns_list_copy(self) -> None:
+        cache = MasterDataCache()
+        db = MagicMock()
+        loader = _loader([["a"]])
+        cache.get(db, "helpers", loader).append("x")
+        assert cache.get(db, "helpers", loader) == ["a"]
+
+    def test_ttl_zero_disables(self) -> None:
+        cache = MasterDataCache(ttl_seconds=0)
+        loader = _loader([["a"], ["b"]])
+        db = MagicMock()
+        assert cache.get(db, "customers", loader) == ["a"]
+        assert cache.get(db, "customers", loader) == ["b"]
+        assert cache.stats().entries == 0
+
+    def test_separate_entries_per_loader_and_project(self) -> None:
+        cache = MasterDataCache()
+        db, other_db = MagicMock(), MagicMock()
+        models, dicts = _loader([["model"]]), _loader([[{"id": "C1"}]])
+        assert cache.get(db, "customers", models) == ["model"]
+        assert cache.get(db, "customers", dicts) == [{"id": "C1"}]
+        # 別プロジェクトのクライアントはキャッシュを共有しない
+        other = _loader([["other"]])
+        assert cache.get(other_db, "customers", other) == ["other"]
+
+        cache.invalidate("customers")
+        assert cache.stats().entries == 0
+        assert cache.stats().invalidations == 3
+
+    def test_invalidate_only_collection(self) -> None:
+        cache = MasterDataCache()
+        db = MagicMock()
+        customers, helpers = _loader([["c1"], ["c2"]]), _loader([["h1"]])
+        cache.get(db, "customers", customers)
+        cache.get(db, "helpers", helpers)
+        cache.invalidate("customers")
+        assert cache.get(db, "customers", customers) == ["c2"]
+        assert cache.get(db, "helpers", helpers) == ["h1"]
+
+    def test_invalidated_while_loading_not_stored(self) -> None:
+        """読み込み中に変更が入った結果は保存しない（古いデータを TTL の間返し続けない）"""
+        cache = MasterDataCache()
+        db = MagicMock()
+
+        def loader(_db: object) -> list[str]:
+            cache.invalidate("customers")
+            return ["stale"]
+
+        assert cache.get(db, "customers", loader) == ["stale"]
+        assert cache.stats().entries == 0
+
+    def test_snapshot_listener_invalidates(self) -> None:
+        cache = MasterDataCache(ttl_seconds=None, watch=True)
+        db, callbacks = _db_capturing_snapshots()
+        loader = _loader([["v1"], ["v2"]])
+        assert cache.get(db, "customers", loader) == ["v1"]
+        assert set(callbacks) == {"customers", "helpers", "service_types"}
+
+        # 初回のスナップショット（全件）では無効化しない
+        callbacks["customers"]([], [MagicMock()], None)  # type: ignore[operator]
+        assert cache.get(db, "customers", loader) == ["v1"]
+        assert cache.stats().watched == ["customers"]
+
+        callbacks["customers"]([], [MagicMock()], None)  # type: ignore[operator]
+        assert cache.get(db, "customers", loader) == ["v2"]
+        # リスナーは1回だけ張る
+        assert db.collection.call_count == 3
+
+    def test_watch_failure_falls_back_to_ttl(self) -> None:
+        cache = MasterDataCache(ttl_seconds=60, watch=True)
+        db = MagicMock()
+        db.collection.side_effect = RuntimeError("listen failed")
+        loader = _loader([["a"]])
+        assert cache.get(db, "customers", loader) == ["a"]
+        assert cache.get(db, "customers", loader) == ["a"]
+        assert db.collection.call_count == 1
+
+    def test_close_unsubscribes(self) -> None:
+        cache = MasterDataCache(watch=True)
+        db = MagicMock()
+        cache.get(db, "customers", _loader([["a"]]))
+        cache.close()
+        assert db.collection.return_value.on_snapshot.return_value.unsubscribe.call_count == 3
@@ -15,6 +15,7 @@ from optimizer.models import (
     ServiceSlot,
     StaffConstraint,
     StaffUnavailability,
+    TravelMatrix,
     TravelTime,
     UnavailableSlot,
 )
@@ -192,3 +193,54 @@ class TestOptimizationInput:
             staff_constraints=[],
         )
         assert len(inp.orders) == 0
+
+
+class TestTravelMatrix:
+    def _customer(self, id: str, household: list[str] | None = None) -> Customer:
+        return Customer(
+            id=id, family_name="山田", given_name=id, address="鹿児島市",
+            location=GeoLocation(lat=31.59, lng=130.55),
+            same_household_customer_ids=household or [],
+        )
+
+    def test_from_travel_times(self) -> None:
+        matrix = TravelMatrix.from_travel_times(
+            [
+                TravelTime(from_id="C1", to_id="C2", travel_time_minutes=12.5),
+                TravelTime(from_id="C2", to_id="C3", travel_time_minutes=7.0),
+            ],
+            [self._customer("C1")],
+        )
+        assert matrix.customer_ids == ["C1", "C2", "C3"]
+        assert matrix.get("C1", "C2") == 12.5
+        # データのないペア・行列にない利用者は 0
+        assert matrix.get("C2", "C1") == 0.0
+        assert matrix.get("C1", "C9") == 0.0
+
+    def test_household_override(self) -> None:
+        customers = [self._customer("C1", ["C2"]), self._customer("C2", ["C1"])]
+        matrix = TravelMatrix.from_pairs(
+            [("C1", "C2", 15.0), ("C2", "C1", 15.0)], customers,
+        )
+        assert matrix.get("C1", "C2") == 0.0 and matrix.get("C2", "C1") == 0.0
+
+    def test_take_and_subset(self) -> None:
+        matrix = TravelMatrix.from_pairs([("C1", "C2", 5.0), ("C2", "C3", 8.0)])
+        assert matrix.take(["C2", "C9", "C3"]).tolist() == [
+            [0.0, 0.0, 8.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0],
+        ]
+        sub = matrix.subset(["C1", "C2"])
+        assert sub == TravelMatrix.from_pairs([("C1", "C2", 5.0)])
+        assert sub.minutes.nbytes == 2 * 2 * 4
+
+    def test_shape_validated(self) -> None:
+        with pytest.raises(ValueError):
+            TravelMatrix(["C1", "C2"], [[0.0]])
+
+    def test_not_serialized(self) -> None:
+        inp = OptimizationInput(
+            customers=[], helpers=[], orders=[], travel_times=[],
+            staff_unavailabilities=[], staff_constraints=[],
+            travel_matrix=TravelMatrix.from_pairs([("C1", "C2", 5.0)]),
+        )
+        assert "travel_matrix" not in inp.model_dump()
@@ -0,0 +1,53 @@
+"""OrderTable のテスト — 整数化した時刻・日付・利用者インデックス"""
+
+from optimizer.engine.order_table import DAY_INDEX, OrderTable, time_to_minutes
+from optimizer.models import DayOfWeek, Order
+
+
+def _order(oid: str, cid: str, date: str, dow: DayOfWeek, start: str, end: str) -> Order:
+    return Order(
+        id=oid, customer_id=cid, date=date, day_of_week=dow,
+        start_time=start, end_time=end, service_type="physical_care",
+    )
+
+
+ORDERS = [
+    _order("o1", "c1", "2026-02-17", DayOfWeek.TUESDAY, "09:00", "10:00"),
+    _order("o2", "c2", "2026-02-16", DayOfWeek.MONDAY, "09:30", "10:30"),
+    _order("o3", "c1", "2026-02-17", DayOfWeek.TUESDAY, "09:30", "11:15"),
+    _order("o4", "c3", "2026-02-16", DayOfWeek.MONDAY, "10:30", "11:00"),
+]
+
+
+class TestOrderTable:
+    def test_columns(self) -> None:
+        t = OrderTable(ORDERS)
+        assert len(t) == 4
+        assert t.ids == ["o1", "o2", "o3", "o4"]
+        assert t.index == {"o1": 0, "o2": 1, "o3": 2, "o4": 3}
+        assert t.start == [540, 570, 570, 630]
+        assert t.end == [600, 630, 675, 660]
+        assert t.duration == [60, 60, 105, 30]
+        assert t.dow_idx == [DAY_INDEX[o.day_of_week] for o in ORDERS]
+        assert [t.customer_ids[c] for c in t.customer_idx] == ["c1", "c2", "c1", "c3"]
+
+    def test_by_date_keeps_first_appearance_order(self) -> None:
+        """日付の初出順・入力順（従来の orders_by_date と同じ走査順）"""
+        t = OrderTable(ORDERS)
+        assert t.dates == ["2026-02-17", "2026-02-16"]
+        assert t.date_index == {"2026-02-17": 0, "2026-02-16": 1}
+        assert t.by_date == [[0, 2], [1, 3]]
+
+    def test_overlaps_same_date_only(self) -> None:
+        t = OrderTable(ORDERS)
+        overlapping = {
+            (i, j) for i in range(len(ORDERS)) for j in range(len(ORDERS))
+            if i != j and t.overlaps(i, j)
+        }
+        # o1/o3 は同日で重複、o2/o4 は隣接（10:30終了・10:30開始）で重複しない
+        assert overlapping == {(0, 2), (2, 0)}
+
+    def test_time_to_minutes(self) -> None:
+        assert [time_to_minutes(s) for s in ("00:00", "08:05", "12:30", "23:59")] == [
+            0, 485, 750, 1439,
+        ]
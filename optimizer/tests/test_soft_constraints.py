@@ -12,8 +12,6 @@ from optimizer.models import (
     StaffConstraint,
 )
 
-from optimizer.engine.solver import _time_to_minutes
-
 
 def _h(id: str) -> Helper:
     return Helper(
@@ -1,6 +1,7 @@
 """ソルバー骨格のテスト — 制約なしで基本動作確認"""
 
-from optimizer.engine.solver import _orders_overlap, _time_to_minutes, solve
+from optimizer.engine.order_table import OrderTable, time_to_minutes
+from optimizer.engine.solver import diagnose_infeasibility, solve
 from optimizer.models import (
     Customer,
     DayOfWeek,
@@ -10,6 +11,8 @@ from optimizer.models import (
     OptimizationInput,
     Order,
     ServiceSlot,
+    StaffConstraint,
+    StaffConstraintType,
     TravelTime,
 )
 
@@ -51,25 +54,25 @@ def _make_order(id: str, customer_id: str, start: str, end: str, stype: str = "p
 
 class TestTimeToMinutes:
     def test_nine_am(self) -> None:
-        assert _time_to_minutes("09:00") == 540
+        assert time_to_minutes("09:00") == 540
 
     def test_midnight(self) -> None:
-        assert _time_to_minutes("00:00") == 0
+        assert time_to_minutes("00:00") == 0
 
     def test_five_thirty(self) -> None:
-        assert _time_to_minutes("17:30") == 1050
+        assert time_to_minutes("17:30") == 1050
 
 
 class TestOrdersOverlap:
     def test_overlapping(self) -> None:
         o1 = _make_order("O1", "C1", "09:00", "10:00")
         o2 = _make_order("O2", "C2", "09:30", "10:30")
-        assert _orders_overlap(o1, o2) is True
+        assert OrderTable([o1, o2]).overlaps(0, 1) is True
 
     def test_adjacent_no_overlap(self) -> None:
         o1 = _make_order("O1", "C1", "09:00", "10:00")
         o2 = _make_order("O2", "C2", "10:00", "11:00")
-        assert _orders_overlap(o1, o2) is False
+        assert OrderTable([o1, o2]).overlaps(0, 1) is False
 
     def test_different_dates(self) -> None:
         o1 = _make_order("O1", "C1", "09:00", "10:00")
@@ -78,7 +81,7 @@ class TestOrdersOverlap:
             day_of_week=DayOfWeek.TUESDAY, start_time="09:00",
             end_time="10:00", service_type="physical_care",
         )
-        assert _orders_overlap(o1, o2) is False
+        assert OrderTable([o1, o2]).overlaps(0, 1) is False
 
 
 class TestSolveBasic:
@@ -142,3 +145,34 @@ class TestSolveBasic:
         )
         result = solve(inp)
         assert result.solve_time_seconds > 0
+
+
+class TestDiagnoseInfeasibility:
+    def test_identifies_problem_orders(self) -> None:
+        """割当不可・重複で満たせない・人数不足のオーダーを特定する"""
+        pair = _make_order("O4", "C1", "13:00", "14:00")
+        pair.staff_count = 2
+        inp = OptimizationInput(
+            customers=[_make_customer("C1"), _make_customer("C2"), _make_customer("C3")],
+            helpers=[_make_helper("H1")],
+            orders=[
+                _make_order("O1", "C1", "09:00", "10:00"),
+                _make_order("O2", "C2", "09:30", "10:30"),
+                _make_order("O3", "C3", "11:00", "12:00"),
+                pair,
+            ],
+            travel_times=[],
+            staff_unavailabilities=[],
+            staff_constraints=[
+                StaffConstraint(
+                    customer_id="C3", staff_id="H1", constraint_type=StaffConstraintType.NG,
+                ),
+            ],
+        )
+        diagnosis = diagnose_infeasibility(inp, time_limit_seconds=10)
+        # NGヘルパーしかいない O3 はどのヘルパーも割当不可
+        assert diagnosis.zero_feasible_orders == ["O3"]
+        # 時間が重なる O1/O2 はどちらか一方しか割り当てられない
+        assert "O3" in diagnosis.unassigned_orders
+        assert len({"O1", "O2"} & set(diagnosis.unassigned_orders)) == 1
+        assert diagnosis.partially_assigned_orders == ["O4"]
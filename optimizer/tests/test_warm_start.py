@@ -0,0 +1,179 @@
+"""ウォームスタートのテスト — 初期割当の修復と MIP start"""
+
+import pytest
+
+from optimizer.engine.solver import SoftWeights, SolverOptions, _solve_single, solve
+from optimizer.engine.warm_start import (
+    assignments_from_slots,
+    repair_initial_assignment,
+    slot_key,
+)
+from optimizer.models import (
+    Assignment,
+    Customer,
+    DayOfWeek,
+    GeoLocation,
+    Helper,
+    HoursRange,
+    OptimizationInput,
+    Order,
+    StaffConstraint,
+    StaffConstraintType,
+    TravelTime,
+)
+from tests.conftest import WEEK_DATES, random_input
+
+
+def _helper(hid: str, transportation: str = "car") -> Helper:
+    return Helper(
+        id=hid, family_name="ヘルパー", given_name=hid,
+        can_physical_care=True, transportation=transportation,
+        preferred_hours=HoursRange(min=1, max=3),
+        available_hours=HoursRange(min=0, max=8),
+        employment_type="part_time",
+    )
+
+
+def _customer(cid: str) -> Customer:
+    return Customer(
+        id=cid, family_name="利用者", given_name=cid, address="鹿児島市",
+        location=GeoLocation(lat=31.5, lng=130.5),
+    )
+
+
+def _order(
+    oid: str, cid: str, start: str, end: str,
+    staff_count: int = 1, day: DayOfWeek = DayOfWeek.MONDAY,
+) -> Order:
+    return Order(
+        id=oid, customer_id=cid, date=WEEK_DATES[day], day_of_week=day,
+        start_time=start, end_time=end, service_type="daily_living",
+        staff_count=staff_count,
+    )
+
+
+def _input(orders: list[Order], **kwargs: object) -> OptimizationInput:
+    customers = [_customer(c) for c in sorted({o.customer_id for o in orders})]
+    return OptimizationInput(
+        customers=customers,
+        helpers=kwargs.get("helpers", [_helper("h1"), _helper("h2")]),  # type: ignore[arg-type]
+        orders=orders,
+        travel_times=kwargs.get("travel_times", []),  # type: ignore[arg-type]
+        staff_unavailabilities=[],
+        staff_constraints=kwargs.get("staff_constraints", []),  # type: ignore[arg-type]
+    )
+
+
+def _staff(assignments: list[Assignment]) -> dict[str, list[str]]:
+    return {a.order_id: a.staff_ids for a in assignments}
+
+
+class TestRepairInitialAssignment:
+    def test_feasible_assignment_kept(self) -> None:
+        inp = _input([
+            _order("o1", "c1", "09:00", "10:00"),
+            _order("o2", "c1", "10:00", "11:00"),
+        ])
+        initial = [Assignment(order_id="o1", staff_ids=["h1"]),
+                   Assignment(order_id="o2", staff_ids=["h1"])]
+        repaired, report = repair_initial_assignment(inp, initial)
+        assert _staff(repaired) == {"o1": ["h1"], "o2": ["h1"]}
+        assert report.kept == 2
+        assert report.infeasible == report.excess == report.conflict == 0
+
+    def test_unknown_and_infeasible_dropped(self) -> None:
+        inp = _input(
+            [_order("o1", "c1", "09:00", "10:00")],
+            staff_constraints=[StaffConstraint(
+                customer_id="c1", staff_id="h2", constraint_type=StaffConstraintType.NG,
+            )],
+        )
+        initial = [Assignment(order_id="o1", staff_ids=["h2", "h9"]),
+                   Assignment(order_id="o9", staff_ids=["h1"])]
+        repaired, report = repair_initial_assignment(inp, initial)
+        assert _staff(repaired) == {"o1": []}
+        assert report.infeasible == 1
+
+    def test_excess_staff_trimmed(self) -> None:
+        inp = _input([_order("o1", "c1", "09:00", "10:00")])
+        initial = [Assignment(order_id="o1", staff_ids=["h2", "h1", "h2"])]
+        repaired, report = repair_initial_assignment(inp, initial)
+        assert _staff(repaired) == {"o1": ["h2"]}
+        assert report.excess == 1
+
+    def test_overlap_and_travel_conflicts_dropped(self) -> None:
+        inp = _input(
+            [
+                _order("o1", "c1", "09:00", "10:00"),
+                _order("o2", "c1", "09:30", "10:30"),  # o1 と重複
+                _order("o3", "c2", "10:10", "11:00"),  # o1 から移動30分 > 間隔10分
+            ],
+            travel_times=[
+                TravelTime(from_id="c1", to_id="c2", travel_time_minutes=30),
+                TravelTime(from_id="c2", to_id="c1", travel_time_minutes=30),
+            ],
+        )
+        initial = [Assignment(order_id=o, staff_ids=["h1"]) for o in ("o1", "o2", "o3")]
+        repaired, report = repair_initial_assignment(inp, initial)
+        # 開始時刻順に先着優先
+        assert _staff(repaired) == {"o1": ["h1"], "o2": [], "o3": []}
+        assert report.conflict == 2
+
+    def test_household_link_keeps_common_staff(self) -> None:
+        o1 = _order("o1", "c1", "09:00", "10:00")
+        o2 = _order("o2", "c2", "10:00", "11:00")
+        o1.linked_order_id, o2.linked_order_id = "o2", "o1"
+        inp = _input([o1, o2])
+        initial = [Assignment(order_id="o1", staff_ids=["h1"]),
+                   Assignment(order_id="o2", staff_ids=["h2"])]
+        repaired, report = repair_initial_assignment(inp, initial)
+        assert _staff(repaired) == {"o1": [], "o2": []}
+        assert report.household == 2
+
+    def test_slots_mapped_from_last_week(self) -> None:
+        orders = [_order("o1", "c1", "09:00", "10:00"), _order("o2", "c1", "11:00", "12:00")]
+        staff_by_slot = {slot_key(orders[0]): ["h1"]}
+        assert _staff(assignments_from_slots(orders, staff_by_slot)) == {"o1": ["h1"]}
+
+
+def _random_input(seed: int, n_helpers: int = 5, n_orders: int = 20) -> OptimizationInput:
+    return random_input(seed, n_helpers, n_orders, n_customers=6, link_first_pair=False)
+
+
+class TestWarmStartSolve:
+    @pytest.mark.parametrize("seed", range(2))
+    def test_same_objective_with_initial_assignment(self, seed: int) -> None:
+        """最適解を初期解に渡しても、ずらした初期解を渡しても最適値は変わらない"""
+        inp = _random_input(seed)
+        expected = _solve_single(inp, 60)
+        shifted = [
+            Assignment(
+                order_id=a.order_id,
+                staff_ids=[f"h{(int(s[1:]) + 1) % 5}" for s in a.staff_ids],
+            )
+            for a in expected.assignments
+        ]
+        for initial in (expected.assignments, shifted):
+            result = _solve_single(inp, 60, initial_assignments=initial)
+            assert result.status == "Optimal"
+            assert result.objective_value == pytest.approx(expected.objective_value, abs=1e-6)
+
+    def test_day_decomposition_filters_initial(self) -> None:
+        inp = _random_input(0)
+        expected = solve(inp, time_limit_seconds=60)
+        result = solve(inp, time_limit_seconds=60, initial_assignments=expected.assignments)
+        assert result.objective_value == pytest.approx(expected.objective_value, abs=1e-6)
+
+    @pytest.mark.parametrize("backend", ["scip", "highs", "cpsat"])
+    def test_hint_backends(self, backend: str) -> None:
+        """ヒント非対応（highs）は初期解を無視して解く"""
+        pytest.importorskip("ortools")
+        inp = _random_input(0)
+        weights = SoftWeights(workload_balance=0)
+        expected = _solve_single(inp, 60, weights)
+        result = _solve_single(
+            inp, 60, weights, SolverOptions(backend=backend, cpsat_workers=2),
+            expected.assignments,
+        )
+        assert result.status == "Optimal"
+        assert result.objective_value == pytest.approx(expected.objective_value, abs=1e-6)